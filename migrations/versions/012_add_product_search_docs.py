@@ -0,0 +1,69 @@
+"""Till search documents — a trigger-maintained search row per product
+
+Revision ID: 012_search_docs
+Revises: 011_add_suppliers
+Create Date: 2026-10-17
+
+`/pos/search` evaluated similarity(), word_similarity() over name||description, six ILIKEs
+and a correlated product_images subquery for every product on every keystroke. It now reads
+a precomputed document instead:
+
+  product_search_docs (new table, one row per product, ON DELETE CASCADE):
+    - name / body             lower(name) and lower(name || ' ' || description)
+    - sku / barcode / supplier / category   lowercased match targets
+    - category_terms / name_terms (JSONB)   BL-101 synonym terms the category / name contain
+    - first_image_id          the first gallery photo (list-avatar fallback)
+    - is_active
+    each match target under its own GIN (trigram or jsonb) index.
+
+  search_synonym_terms (new table): the SYNONYM_CONCEPTS vocabulary, synced at boot.
+
+  product_search_doc_refresh(uuid) + triggers on products / product_images keep the
+  document current from ANY write path (ORM, raw SQL, imports).
+
+NOTE on the operative path: create_all() makes the table and `database._SEARCH_DOC_DDL`
+(run on every boot via _DDL_MIGRATIONS) installs the function, triggers and indexes; this
+file is the formal record and applies that same list. The backfill is
+services/search_documents.ensure_search_documents (run at boot).
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects.postgresql import UUID, JSONB
+
+revision = '012_search_docs'
+down_revision = '011_add_suppliers'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    from src.db.database import _SEARCH_DOC_DDL
+
+    op.create_table(
+        'product_search_docs',
+        sa.Column('product_id', UUID(as_uuid=True),
+                  sa.ForeignKey('products.id', ondelete='CASCADE'), primary_key=True),
+        sa.Column('name', sa.Text(), nullable=False, server_default=''),
+        sa.Column('body', sa.Text(), nullable=False, server_default=''),
+        sa.Column('sku', sa.Text(), nullable=False, server_default=''),
+        sa.Column('barcode', sa.Text(), nullable=False, server_default=''),
+        sa.Column('supplier', sa.Text(), nullable=False, server_default=''),
+        sa.Column('category', sa.Text(), nullable=False, server_default=''),
+        sa.Column('category_terms', JSONB(), nullable=False, server_default=sa.text("'[]'::jsonb")),
+        sa.Column('name_terms', JSONB(), nullable=False, server_default=sa.text("'[]'::jsonb")),
+        sa.Column('first_image_id', UUID(as_uuid=True), nullable=True),
+        sa.Column('is_active', sa.Boolean(), nullable=False, server_default=sa.true()),
+        sa.Column('updated_at', sa.DateTime(timezone=True), nullable=False,
+                  server_default=sa.func.now()),
+    )
+    for stmt in _SEARCH_DOC_DDL:
+        op.execute(stmt)
+
+
+def downgrade() -> None:
+    op.execute("DROP TRIGGER IF EXISTS trg_product_images_search_doc ON product_images")
+    op.execute("DROP TRIGGER IF EXISTS trg_products_search_doc ON products")
+    op.execute("DROP FUNCTION IF EXISTS trg_product_search_doc()")
+    op.execute("DROP FUNCTION IF EXISTS product_search_doc_refresh(uuid)")
+    op.drop_table('product_search_docs')
+    op.drop_table('search_synonym_terms')
@@ -0,0 +1,54 @@
+"""Daily sales rollups — the Z-report kept running instead of recomputed
+
+Revision ID: 013_sales_rollups
+Revises: 012_search_docs
+Create Date: 2026-10-17
+
+`get_daily_summary` loaded every completed sale of the day, summed the payment buckets in seven
+passes, ran three line-item queries and re-split VAT per sale — and the status-bar pulse did it
+all again on every refresh. Checkout, /sales and refunds now fold each sale into a running row:
+
+  daily_sales_rollups (new table, one row per shop-local day x cashier):
+    - business_date / cashier_id   UNIQUE together
+    - txn_count, total_sales, vat_total, giveaway_count, giveaway_cost
+    - payments / vat / products / hours (JSONB)   payment-method buckets, per-VAT-code
+      turnover + VAT, per-product units, per-hour sale counts (money as decimal strings)
+
+NOTE on the operative path: create_all() makes the table on boot; this file is the formal
+record. Days from before the rollup are summarized from raw lines until
+POST /api/v1/pos/reports/daily-summary/reconcile?apply=true backfills them.
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects.postgresql import UUID, JSONB
+
+revision = '013_sales_rollups'
+down_revision = '012_search_docs'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'daily_sales_rollups',
+        sa.Column('id', UUID(as_uuid=True), primary_key=True),
+        sa.Column('business_date', sa.Date(), nullable=False),
+        sa.Column('cashier_id', UUID(as_uuid=True), sa.ForeignKey('users.id'), nullable=False),
+        sa.Column('txn_count', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('total_sales', sa.Numeric(12, 2), nullable=False, server_default='0'),
+        sa.Column('vat_total', sa.Numeric(12, 2), nullable=False, server_default='0'),
+        sa.Column('giveaway_count', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('giveaway_cost', sa.Numeric(12, 2), nullable=False, server_default='0'),
+        sa.Column('payments', JSONB(), nullable=False, server_default='{}'),
+        sa.Column('vat', JSONB(), nullable=False, server_default='{}'),
+        sa.Column('products', JSONB(), nullable=False, server_default='{}'),
+        sa.Column('hours', JSONB(), nullable=False, server_default='{}'),
+        sa.Column('updated_at', sa.DateTime(timezone=True), nullable=False, server_default=sa.func.now()),
+        sa.UniqueConstraint('business_date', 'cashier_id', name='uq_daily_sales_rollups_day_cashier'),
+    )
+    op.create_index('ix_daily_sales_rollups_business_date', 'daily_sales_rollups', ['business_date'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_daily_sales_rollups_business_date', table_name='daily_sales_rollups')
+    op.drop_table('daily_sales_rollups')
@@ -0,0 +1,37 @@
+"""LPCX job-change notifications for the live telemetry hub
+
+Revision ID: 014_compute_job_notify
+Revises: 013_sales_rollups
+Create Date: 2026-10-17
+
+Every open /compute/stream connection polled Postgres once a second (latest 12 jobs, every
+QUEUED id, and brain_load's three aggregates incl. SUM(tokens) over the whole table). One
+in-process hub now serves all of them, driven by change notifications:
+
+  trg_compute_job_notify() + trg_compute_jobs_notify (AFTER INSERT OR UPDATE of the
+  visible columns on compute_jobs): pg_notify('lpcx_jobs', {id, owner, created_at,
+  old, new, tok, dtok}) -- the status transition and token delta the hub folds into
+  its running counters.
+
+NOTE on the operative path: `database._COMPUTE_JOB_NOTIFY_DDL` (run on every boot via
+_DDL_MIGRATIONS) installs the function + trigger; this file is the formal record and
+applies that same list.
+"""
+from alembic import op
+
+revision = '014_compute_job_notify'
+down_revision = '013_sales_rollups'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    from src.db.database import _COMPUTE_JOB_NOTIFY_DDL
+
+    for stmt in _COMPUTE_JOB_NOTIFY_DDL:
+        op.execute(stmt)
+
+
+def downgrade() -> None:
+    op.execute("DROP TRIGGER IF EXISTS trg_compute_jobs_notify ON compute_jobs")
+    op.execute("DROP FUNCTION IF EXISTS trg_compute_job_notify()")
@@ -0,0 +1,36 @@
+"""LPCX atomic job claims for remote workers
+
+Revision ID: 015_compute_job_claims
+Revises: 014_compute_job_notify
+Create Date: 2026-10-17
+
+GET /compute/worker/next now claims with FOR UPDATE SKIP LOCKED (two workers polling one
+node can no longer be handed the same job) and long-polls instead of answering an empty
+queue at once:
+
+  ix_compute_jobs_claim: partial index on compute_jobs (node, job_number)
+  WHERE status = 'queued' -- the claim query's exact shape.
+
+  trg_compute_job_notify(): the 'lpcx_jobs' payload gains `node`, so a job queued on a
+  node wakes that node's parked long-polls in every web process.
+
+NOTE on the operative path: `database._COMPUTE_JOB_CLAIM_DDL` / `_COMPUTE_JOB_NOTIFY_DDL`
+(run on every boot via _DDL_MIGRATIONS) do this; this file is the formal record.
+"""
+from alembic import op
+
+revision = '015_compute_job_claims'
+down_revision = '014_compute_job_notify'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    from src.db.database import _COMPUTE_JOB_CLAIM_DDL, _COMPUTE_JOB_NOTIFY_DDL
+
+    for stmt in (*_COMPUTE_JOB_NOTIFY_DDL, *_COMPUTE_JOB_CLAIM_DDL):
+        op.execute(stmt)
+
+
+def downgrade() -> None:
+    op.execute("DROP INDEX IF EXISTS ix_compute_jobs_claim")
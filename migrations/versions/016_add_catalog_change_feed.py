@@ -0,0 +1,50 @@
+"""Offline till catalog change feed
+
+Revision ID: 016_catalog_feed
+Revises: 015_compute_job_claims
+Create Date: 2026-10-17
+
+The till's IndexedDB mirror used to re-download the whole catalog on every sync. It now pulls
+GET /pos/catalog/changes?since=<cursor> -- only what moved:
+
+  products.catalog_version (BIGINT, indexed): a number from catalog_version_seq, stamped by
+  trg_products_catalog_version whenever a till-visible column changes (not on stock moves);
+  trg_product_barcodes_catalog_version re-stamps the product when an alias barcode changes.
+
+  catalog_tombstones (new table): product id + version of every hard-deleted product
+  (trg_products_catalog_tombstone), so the feed can hand out deletes.
+
+  catalog_version_next() takes the shared advisory lock the feed pins its head with.
+
+NOTE on the operative path: `database._CATALOG_FEED_DDL` (run on every boot via
+_DDL_MIGRATIONS) does this and backfills existing rows; this file is the formal record.
+"""
+from alembic import op
+
+revision = '016_catalog_feed'
+down_revision = '015_compute_job_claims'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    from src.db.database import _CATALOG_FEED_DDL
+
+    op.execute("ALTER TABLE products ADD COLUMN IF NOT EXISTS catalog_version BIGINT")
+    op.execute("CREATE INDEX IF NOT EXISTS ix_products_catalog_version ON products (catalog_version)")
+    for stmt in _CATALOG_FEED_DDL:
+        op.execute(stmt)
+
+
+def downgrade() -> None:
+    op.execute("DROP TRIGGER IF EXISTS trg_products_catalog_tombstone ON products")
+    op.execute("DROP TRIGGER IF EXISTS trg_product_barcodes_catalog_version ON product_barcodes")
+    op.execute("DROP TRIGGER IF EXISTS trg_products_catalog_version ON products")
+    op.execute("DROP FUNCTION IF EXISTS trg_product_catalog_tombstone()")
+    op.execute("DROP FUNCTION IF EXISTS trg_product_barcode_catalog_version()")
+    op.execute("DROP FUNCTION IF EXISTS trg_product_catalog_version()")
+    op.execute("DROP FUNCTION IF EXISTS catalog_version_next()")
+    op.execute("DROP TABLE IF EXISTS catalog_tombstones")
+    op.execute("DROP INDEX IF EXISTS ix_products_catalog_version")
+    op.execute("ALTER TABLE products DROP COLUMN IF EXISTS catalog_version")
+    op.execute("DROP SEQUENCE IF EXISTS catalog_version_seq")
@@ -0,0 +1,52 @@
+"""Per-store daily transaction counter + offline number blocks
+
+Revision ID: 017_txn_counters
+Revises: 016_catalog_feed
+Create Date: 2026-10-17
+
+TXN-YYYYMMDD-NNNN was made by counting today's transactions (a LIKE scan per sale) and adding one;
+two tills ringing at once could draw the same number. Numbers now come from a counter row bumped
+inside the sale's own DB transaction (services/txn_numbering.py):
+
+  transaction_counters (new table): store_number + day PRIMARY KEY, last_number. The day's first
+  sale seeds it from the numbers already rung, so existing days continue where they were.
+
+  transaction_number_blocks (new table): runs of numbers reserved for a cashier's offline till
+  (first_number..last_number), so the numbering audit can tell reserved-unused from a gap.
+
+NOTE on the operative path: create_all() makes both tables on boot; this file is the formal record.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = '017_txn_counters'
+down_revision = '016_catalog_feed'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'transaction_counters',
+        sa.Column('store_number', sa.Integer(), primary_key=True),
+        sa.Column('day', sa.Date(), primary_key=True),
+        sa.Column('last_number', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('updated_at', sa.DateTime(timezone=True), nullable=False, server_default=sa.func.now()),
+    )
+    op.create_table(
+        'transaction_number_blocks',
+        sa.Column('id', sa.Integer(), primary_key=True, autoincrement=True),
+        sa.Column('store_number', sa.Integer(), nullable=False),
+        sa.Column('day', sa.Date(), nullable=False),
+        sa.Column('first_number', sa.Integer(), nullable=False),
+        sa.Column('last_number', sa.Integer(), nullable=False),
+        sa.Column('issued_to', sa.String(100), nullable=False),
+        sa.Column('created_at', sa.DateTime(timezone=True), nullable=False, server_default=sa.func.now()),
+    )
+    op.create_index('ix_transaction_number_blocks_day', 'transaction_number_blocks', ['day'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_transaction_number_blocks_day', table_name='transaction_number_blocks')
+    op.drop_table('transaction_number_blocks')
+    op.drop_table('transaction_counters')
@@ -0,0 +1,39 @@
+"""Indexed, ranked till member lookup
+
+Revision ID: 018_customer_search
+Revises: 017_txn_counters
+Create Date: 2026-10-17
+
+GET /customers/search OR-ed five `lower(col) LIKE '%x%'` predicates -- a sequential scan of
+customers on every keystroke -- and sorted by handle. It now reads only indexes
+(services/customer_search.py):
+
+  customer_phone_norm(text): phone digits, 00 prefix dropped, national 0 read as 41.
+  customer_search_text(handle, real_name, instagram, email, phone): one lower-cased search text.
+  ix_customers_search_trgm: GIN trigram index on that text (contains + fuzzy matches).
+  ix_customers_handle_lower: lower(handle) text_pattern_ops (exact / prefix ranks).
+
+NOTE on the operative path: `database._CUSTOMER_SEARCH_DDL` (run on every boot via
+_DDL_MIGRATIONS) does this; this file is the formal record.
+"""
+from alembic import op
+
+revision = '018_customer_search'
+down_revision = '017_txn_counters'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    from src.db.database import _CUSTOMER_SEARCH_DDL
+
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    for stmt in _CUSTOMER_SEARCH_DDL:
+        op.execute(stmt)
+
+
+def downgrade() -> None:
+    op.execute("DROP INDEX IF EXISTS ix_customers_handle_lower")
+    op.execute("DROP INDEX IF EXISTS ix_customers_search_trgm")
+    op.execute("DROP FUNCTION IF EXISTS customer_search_text(text, text, text, text, text)")
+    op.execute("DROP FUNCTION IF EXISTS customer_phone_norm(text)")
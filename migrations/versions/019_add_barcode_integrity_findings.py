@@ -0,0 +1,65 @@
+"""Standing barcode-integrity findings, maintained incrementally
+
+Revision ID: 019_barcode_integrity
+Revises: 018_customer_search
+Create Date: 2026-10-17
+
+GET /pos/integrity/sweep recomputed every check over the whole catalog per call. The findings
+are now rows kept current as products / aliases change (services/barcode_integrity.py):
+
+  barcode_integrity_findings (new table): one row per (kind, barcode), the finding as the sweep
+  returns it in `detail`. The sweep reads these.
+
+  barcode_integrity_dirty (new table): barcodes / lower(names) whose findings must be recomputed,
+  or a full_sweep marker. Drained by barcode_integrity.refresh (the sweep and a minute loop).
+
+  trg_products_barcode_integrity / trg_product_barcodes_integrity: AFTER row triggers queueing the
+  old + new barcode and name of every write to barcode, name, is_active (products) or barcode,
+  product_id (product_barcodes). One full re-verification is queued on first deploy.
+
+NOTE on the operative path: create_all() makes both tables and `database._BARCODE_INTEGRITY_DDL`
+(run on every boot via _DDL_MIGRATIONS) the triggers; this file is the formal record.
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects.postgresql import JSONB
+
+revision = '019_barcode_integrity'
+down_revision = '018_customer_search'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    from src.db.database import _BARCODE_INTEGRITY_DDL
+
+    op.create_table(
+        'barcode_integrity_findings',
+        sa.Column('id', sa.Integer(), primary_key=True, autoincrement=True),
+        sa.Column('kind', sa.String(32), nullable=False),
+        sa.Column('barcode', sa.String(100), nullable=False),
+        sa.Column('detail', JSONB(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(timezone=True), nullable=False, server_default=sa.func.now()),
+        sa.UniqueConstraint('kind', 'barcode', name='uq_barcode_integrity_findings_kind_barcode'),
+    )
+    op.create_index('ix_barcode_integrity_findings_barcode', 'barcode_integrity_findings', ['barcode'])
+    op.create_table(
+        'barcode_integrity_dirty',
+        sa.Column('id', sa.Integer(), primary_key=True, autoincrement=True),
+        sa.Column('barcode', sa.String(100), nullable=True),
+        sa.Column('name', sa.Text(), nullable=True),
+        sa.Column('full_sweep', sa.Boolean(), nullable=False, server_default=sa.false()),
+        sa.Column('created_at', sa.DateTime(timezone=True), nullable=False, server_default=sa.func.now()),
+    )
+    for stmt in _BARCODE_INTEGRITY_DDL:
+        op.execute(stmt)
+
+
+def downgrade() -> None:
+    op.execute("DROP TRIGGER IF EXISTS trg_product_barcodes_integrity ON product_barcodes")
+    op.execute("DROP TRIGGER IF EXISTS trg_products_barcode_integrity ON products")
+    op.execute("DROP FUNCTION IF EXISTS trg_product_alias_integrity()")
+    op.execute("DROP FUNCTION IF EXISTS trg_product_barcode_integrity()")
+    op.drop_table('barcode_integrity_dirty')
+    op.drop_index('ix_barcode_integrity_findings_barcode', table_name='barcode_integrity_findings')
+    op.drop_table('barcode_integrity_findings')
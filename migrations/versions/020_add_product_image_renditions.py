@@ -0,0 +1,39 @@
+"""Content-addressed product photo renditions
+
+Revision ID: 020_product_image_renditions
+Revises: 019_barcode_integrity
+Create Date: 2026-10-17
+
+A gallery photo was one processed JPEG at `pos-products/{product_id}/{id}.jpg`, made on the event
+loop at upload and pulled whole from MinIO on every view. Uploads now store every served size
+(thumb / list / full, JPEG + WebP/AVIF) under the SHA-256 of the uploaded bytes
+(services/product_images.py):
+
+  product_images.content_hash (new column): the content address; NULL = a row from before this,
+  still served from its legacy object.
+  product_images.variants (new column): stored rendition → bytes.
+  ix_product_images_content_hash: finds an already-stored upload (dedupe) and the other rows
+  sharing its objects (delete).
+
+NOTE on the operative path: `database._PRODUCT_IMAGE_DDL` (run on every boot via
+_DDL_MIGRATIONS) does this; this file is the formal record.
+"""
+from alembic import op
+
+revision = '020_product_image_renditions'
+down_revision = '019_barcode_integrity'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    from src.db.database import _PRODUCT_IMAGE_DDL
+
+    for stmt in _PRODUCT_IMAGE_DDL:
+        op.execute(stmt)
+
+
+def downgrade() -> None:
+    op.execute("DROP INDEX IF EXISTS ix_product_images_content_hash")
+    op.execute("ALTER TABLE product_images DROP COLUMN IF EXISTS variants")
+    op.execute("ALTER TABLE product_images DROP COLUMN IF EXISTS content_hash")
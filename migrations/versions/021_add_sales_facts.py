@@ -0,0 +1,66 @@
+"""Sales fact table for range reports
+
+Revision ID: 021_sales_facts
+Revises: 020_product_image_renditions
+Create Date: 2026-10-17
+
+The product / category sales reports collected every completed transaction id of the range and
+bound them back as `line_items.transaction_id IN (...)` — tens of thousands of parameters on a
+long range. Sold lines are now also appended, denormalized, to a fact table in the sale's own DB
+transaction (services/sales_facts.py), and the reports scan it by day:
+
+  sales_facts (new table): one row per sold line (kind='sale') or its full-refund reversal
+  (kind='refund') — shop-local business_date, product, name + category as sold, cashier,
+  customer, qty, revenue, VAT amount / rate / code, consumption, giveaway flag, unit cost.
+  ix_sales_facts_day_product, ix_sales_facts_day_category: the report range scans.
+  ix_sales_facts_transaction_id: refund reversal + the backfill's "sale without facts" anti-join.
+
+Existing sales are backfilled by the `sales_facts` boot seeder (and the hourly rollup tick).
+
+NOTE on the operative path: create_all() makes the table on boot; this file is the formal record.
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+revision = '021_sales_facts'
+down_revision = '020_product_image_renditions'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'sales_facts',
+        sa.Column('id', sa.Integer(), primary_key=True, autoincrement=True),
+        sa.Column('business_date', sa.Date(), nullable=False),
+        sa.Column('sold_at', sa.DateTime(timezone=True), nullable=False),
+        sa.Column('kind', sa.String(8), nullable=False, server_default='sale'),
+        sa.Column('transaction_id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('transaction_number', sa.String(50), nullable=True),
+        sa.Column('line_no', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('cashier_id', postgresql.UUID(as_uuid=True), nullable=True),
+        sa.Column('customer_id', postgresql.UUID(as_uuid=True), nullable=True),
+        sa.Column('product_id', postgresql.UUID(as_uuid=True), nullable=True),
+        sa.Column('name', sa.Text(), nullable=False),
+        sa.Column('category', sa.String(100), nullable=False, server_default='Uncategorized'),
+        sa.Column('quantity', sa.Integer(), nullable=False),
+        sa.Column('revenue', sa.Numeric(12, 2), nullable=False),
+        sa.Column('vat_amount', sa.Numeric(10, 2), nullable=False, server_default='0'),
+        sa.Column('vat_rate', sa.Numeric(4, 2), nullable=True),
+        sa.Column('vat_code', sa.String(16), nullable=True),
+        sa.Column('consumption', sa.String(16), nullable=False, server_default='dine_in'),
+        sa.Column('is_giveaway', sa.Boolean(), nullable=False, server_default=sa.false()),
+        sa.Column('unit_cost', sa.Numeric(10, 2), nullable=True),
+        sa.Column('recorded_at', sa.DateTime(timezone=True), nullable=False, server_default=sa.func.now()),
+    )
+    op.create_index('ix_sales_facts_transaction_id', 'sales_facts', ['transaction_id'])
+    op.create_index('ix_sales_facts_day_product', 'sales_facts', ['business_date', 'product_id'])
+    op.create_index('ix_sales_facts_day_category', 'sales_facts', ['business_date', 'category'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_sales_facts_day_category', table_name='sales_facts')
+    op.drop_index('ix_sales_facts_day_product', table_name='sales_facts')
+    op.drop_index('ix_sales_facts_transaction_id', table_name='sales_facts')
+    op.drop_table('sales_facts')
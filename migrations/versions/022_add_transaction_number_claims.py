@@ -0,0 +1,36 @@
+"""Claims on reserved offline transaction numbers
+
+Revision ID: 022_txn_number_claims
+Revises: 021_sales_facts
+Create Date: 2026-10-17
+
+An offline till rings numbers from its reserved block; the server checked "in the cashier's block
+and not yet a transaction" with a SELECT and let the sale's INSERT decide. Two uploads of the same
+number both passed the check and the loser hit the unique index at commit (a 500). The number is
+now claimed up front (services/txn_numbering.claim_reserved):
+
+  transaction_number_claims (new table): transaction_number PRIMARY KEY, issued_to, claimed_at.
+  One INSERT ... ON CONFLICT DO NOTHING per claim; no row inserted means the number is taken.
+
+NOTE on the operative path: create_all() makes the table on boot; this file is the formal record.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = '022_txn_number_claims'
+down_revision = '021_sales_facts'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'transaction_number_claims',
+        sa.Column('transaction_number', sa.String(50), primary_key=True),
+        sa.Column('issued_to', sa.String(100), nullable=False),
+        sa.Column('claimed_at', sa.DateTime(timezone=True), nullable=False, server_default=sa.func.now()),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('transaction_number_claims')
@@ -0,0 +1,37 @@
+"""Live supplier search — the sniffed web platform cached on the suppliers row
+
+Revision ID: 023_supplier_platform
+Revises: 022_txn_number_claims
+Create Date: 2026-10-17
+
+A supplier whose adapter_type isn't a web platform (e.g. 'csv') has its homepage sniffed to find
+the platform live search should use. The sniff used to be repeated on every registry load; it is
+now stored on the row (services/supplier_search._load_registry) and redone once it is stale:
+
+  suppliers (new columns):
+    - detected_platform     sniffed platform: 'magento' | 'tamar' | 'shopware', '' = none found,
+                            NULL = not sniffed yet (or the website/type changed since)
+    - platform_checked_at   when it was sniffed (naive UTC, like updated_at)
+
+Both nullable, no backfill: existing rows simply sniff once on their next search.
+
+NOTE on the operative path: the same ALTERs run at startup via `database._ADDITIVE_COLUMNS`;
+this file is the formal alembic record. Reversible downgrade below.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = '023_supplier_platform'
+down_revision = '022_txn_number_claims'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('suppliers', sa.Column('detected_platform', sa.String(length=40), nullable=True))
+    op.add_column('suppliers', sa.Column('platform_checked_at', sa.DateTime(), nullable=True))
+
+
+def downgrade() -> None:
+    for col in ('platform_checked_at', 'detected_platform'):
+        op.drop_column('suppliers', col)
@@ -14,20 +14,143 @@
 -- Motivated 2026-07-19 by a silent staging rename nobody could attribute
 -- (memory: banco-master-data-vision). NOTE: `app.current_user` fails to parse —
 -- current_user is a reserved word — so the var is `app.actor`.
+--
+-- Scale (2026-10): every product edit and sale lands here, so the log is
+-- PARTITIONED BY MONTH on changed_at (an old month can be detached/archived in
+-- one statement); the cockpit pages by keyset on id, reads its facet counts from
+-- audit_facets (kept by a trigger, never a GROUP BY over the log) and free-text
+-- search hits a trigram index. Re-running this script on an env that still has
+-- the old single-table audit_log converts it in place (rows + ids preserved).
+-- The app calls audit_log_add_partitions() at boot and daily to stay ahead.
 -- ============================================================================
 
--- 1) the logbook: one table for every audited change, any entity
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+
+-- 0) upgrade path: a pre-partitioning audit_log is set aside here, copied in at 1b)
+DO $$
+BEGIN
+  IF EXISTS (SELECT 1 FROM pg_class WHERE relname = 'audit_log' AND relkind = 'r') THEN
+    ALTER TABLE audit_log RENAME TO audit_log_legacy;
+    ALTER INDEX IF EXISTS ix_audit_entity RENAME TO ix_audit_entity_legacy;
+    ALTER INDEX IF EXISTS audit_log_pkey RENAME TO audit_log_legacy_pkey;
+  END IF;
+END $$;
+
+-- 1) the logbook: one table for every audited change, any entity, one partition per month
+CREATE SEQUENCE IF NOT EXISTS audit_log_id_seq;
 CREATE TABLE IF NOT EXISTS audit_log (
-  id          BIGSERIAL PRIMARY KEY,
+  id          BIGINT NOT NULL DEFAULT nextval('audit_log_id_seq'),
   entity_type TEXT NOT NULL,                       -- which table
   entity_id   TEXT NOT NULL,                       -- which row (PK as text)
   action      TEXT NOT NULL,                       -- INSERT / UPDATE / DELETE
   changed_by  TEXT,                                -- app.actor session var, else 'system'
   changed_at  TIMESTAMPTZ NOT NULL DEFAULT now(),
-  changes     JSONB                                -- {field:{old,new}} on UPDATE; full row on INSERT/DELETE
-);
+  changes     JSONB,                               -- {field:{old,new}} on UPDATE; full row on INSERT/DELETE
+  PRIMARY KEY (id, changed_at)                     -- a partition key must be in the PK
+) PARTITION BY RANGE (changed_at);
+ALTER SEQUENCE audit_log_id_seq OWNED BY audit_log.id;   -- survives dropping audit_log_legacy
+-- safety net: a row for a month with no partition yet lands here instead of failing the write
+CREATE TABLE IF NOT EXISTS audit_log_default PARTITION OF audit_log DEFAULT;
 CREATE INDEX IF NOT EXISTS ix_audit_entity ON audit_log (entity_type, entity_id, changed_at DESC);
 
+-- free-text search over who + what + the changed field names and values (trigram, so
+-- the cockpit's ILIKE '%term%' is an index scan, not a detoast of every row)
+CREATE OR REPLACE FUNCTION audit_search_text(entity_type text, changed_by text, changes jsonb)
+  RETURNS text LANGUAGE sql IMMUTABLE PARALLEL SAFE AS
+  $$ SELECT coalesce($2, '') || ' ' || $1 || ' ' || coalesce($3::text, '') $$;
+CREATE INDEX IF NOT EXISTS ix_audit_search_trgm ON audit_log
+  USING gin (audit_search_text(entity_type, changed_by, changes) gin_trgm_ops);
+
+-- 1a) monthly partitions. Rows that already fell into the default partition for that
+-- month are moved into the new one before it is attached (ATTACH would refuse otherwise).
+CREATE OR REPLACE FUNCTION audit_log_partition_for(m date) RETURNS boolean AS $fn$
+DECLARE
+  lo date := date_trunc('month', m)::date;
+  hi date := (date_trunc('month', m) + interval '1 month')::date;
+  part text := 'audit_log_' || to_char(lo, 'YYYY_MM');
+BEGIN
+  IF to_regclass(part) IS NOT NULL THEN RETURN false; END IF;
+  EXECUTE format('CREATE TABLE %I (LIKE audit_log INCLUDING DEFAULTS)', part);
+  EXECUTE format('WITH moved AS (DELETE FROM audit_log_default WHERE changed_at >= %L AND changed_at < %L RETURNING *)
+                  INSERT INTO %I SELECT * FROM moved', lo, hi, part);
+  EXECUTE format('ALTER TABLE audit_log ATTACH PARTITION %I FOR VALUES FROM (%L) TO (%L)', part, lo, hi);
+  RETURN true;
+END;
+$fn$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION audit_log_add_partitions(ahead int DEFAULT 3) RETURNS int AS $fn$
+DECLARE made int := 0;
+BEGIN
+  FOR i IN 0..ahead LOOP
+    IF audit_log_partition_for((date_trunc('month', now()) + make_interval(months => i))::date) THEN
+      made := made + 1;
+    END IF;
+  END LOOP;
+  RETURN made;
+END;
+$fn$ LANGUAGE plpgsql;
+
+-- 1b) upgrade path, continued: copy the old rows (same ids) and drop the old table
+DO $$
+DECLARE m date;
+BEGIN
+  IF to_regclass('audit_log_legacy') IS NOT NULL THEN
+    FOR m IN SELECT generate_series(date_trunc('month', min(changed_at)), date_trunc('month', now()),
+                                    interval '1 month')::date FROM audit_log_legacy LOOP
+      PERFORM audit_log_partition_for(m);
+    END LOOP;
+    INSERT INTO audit_log (id, entity_type, entity_id, action, changed_by, changed_at, changes)
+      SELECT id, entity_type, entity_id, action, changed_by, changed_at, changes FROM audit_log_legacy;
+    PERFORM setval('audit_log_id_seq', greatest((SELECT max(id) FROM audit_log), 1));
+    DROP TABLE audit_log_legacy;
+  END IF;
+END $$;
+SELECT audit_log_add_partitions(3);
+
+-- 1c) facet counters for the cockpit (who / what / action chips + totals). Bumped per
+-- audit row; spread over 8 slots by backend pid so concurrent tills don't queue on one
+-- hot counter row — readers sum the slots. audit_facets_rebuild() recounts from the log
+-- (after a partition is dropped, or if ever in doubt); it runs at the end of this script.
+CREATE TABLE IF NOT EXISTS audit_facets (
+  facet TEXT     NOT NULL,                         -- actor / entity_type / action
+  value TEXT     NOT NULL,                         -- '' = no actor recorded
+  slot  SMALLINT NOT NULL,
+  n     BIGINT   NOT NULL DEFAULT 0,
+  PRIMARY KEY (facet, value, slot)
+);
+
+CREATE OR REPLACE FUNCTION audit_facets_bump() RETURNS trigger AS $fn$
+DECLARE s smallint := pg_backend_pid() % 8;
+BEGIN
+  BEGIN
+    INSERT INTO audit_facets (facet, value, slot, n)
+      VALUES ('actor', coalesce(NEW.changed_by, ''), s, 1),
+             ('entity_type', NEW.entity_type, s, 1),
+             ('action', NEW.action, s, 1)
+      ON CONFLICT (facet, value, slot) DO UPDATE SET n = audit_facets.n + 1;
+  EXCEPTION WHEN OTHERS THEN
+    NULL;  -- a counter hiccup must not cost the audit row (rebuild recounts)
+  END;
+  RETURN NULL;
+END;
+$fn$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS audit_log_facets ON audit_log;
+CREATE TRIGGER audit_log_facets AFTER INSERT ON audit_log
+  FOR EACH ROW EXECUTE FUNCTION audit_facets_bump();
+
+CREATE OR REPLACE FUNCTION audit_facets_rebuild() RETURNS void AS $fn$
+BEGIN
+  -- EXCLUSIVE: concurrent bumps wait for the recount, so none is lost or double-counted
+  LOCK TABLE audit_facets IN EXCLUSIVE MODE;
+  DELETE FROM audit_facets;
+  INSERT INTO audit_facets (facet, value, slot, n)
+    SELECT 'actor', coalesce(changed_by, ''), 0, count(*) FROM audit_log GROUP BY 2
+    UNION ALL SELECT 'entity_type', entity_type, 0, count(*) FROM audit_log GROUP BY 2
+    UNION ALL SELECT 'action', action, 0, count(*) FROM audit_log GROUP BY 2;
+END;
+$fn$ LANGUAGE plpgsql;
+
 -- 2) the tripwire: ONE table-agnostic function (diffs OLD vs NEW generically)
 CREATE OR REPLACE FUNCTION audit_capture() RETURNS trigger AS $fn$
 DECLARE
@@ -79,3 +202,6 @@ CREATE TRIGGER audit_suppliers AFTER INSERT OR UPDATE OR DELETE ON suppliers
 DROP TRIGGER IF EXISTS audit_store_settings ON store_settings;
 CREATE TRIGGER audit_store_settings AFTER INSERT OR UPDATE OR DELETE ON store_settings
   FOR EACH ROW EXECUTE FUNCTION audit_capture();
+
+-- 4) recount the cockpit facets from the log (cheap to re-run; exact afterwards)
+SELECT audit_facets_rebuild();
@@ -33,6 +33,10 @@ fall back to source text or a [LLM-pending] marker, exactly like the sample).
 USAGE (run INSIDE the sandbox container — deployed code + Turbo key live there):
   /app/venv/bin/python /app/scripts/import/artemis_enrich_load.py --commit --max 50
 
+  # a big pull: 8 LLM batches in flight, resumable if it dies halfway:
+  /app/venv/bin/python /app/scripts/import/artemis_enrich_load.py --commit --max 5000 \
+      --concurrency 8 --checkpoint /tmp/artemis-enrich.jsonl
+
   # dry-run (default): enrich + report counts, write NOTHING:
   /app/venv/bin/python /app/scripts/import/artemis_enrich_load.py --max 50
 
@@ -248,6 +252,7 @@ def main():
                     help="skip the §6a detail-page rich-metadata fetch (faster, basics only)")
     ap.add_argument("--db-url", default=None,
                     help="async SQLAlchemy URL (default: the app's own engine inside the container)")
+    sample.add_llm_args(ap)
     args = ap.parse_args()
 
     capped = args.max is not None  # a --max cap means this run is NOT the full catalog
@@ -260,7 +265,8 @@ def main():
         print("No products pulled — aborting.", file=sys.stderr)
         sys.exit(2)
 
-    records, meta = asyncio.run(sample.enrich_all(raws))
+    records, meta = asyncio.run(sample.enrich_all(raws, checkpoint=args.checkpoint,
+                                                  concurrency=args.concurrency))
 
     print("\n" + "=" * 64)
     print(f" ENRICHED LOAD — Papers & Co  ({len(records)} products)")
@@ -270,6 +276,7 @@ def main():
     print(f" categories  : {sample._counter([r.category for r in records])}")
     print(f" age-restr.  : {sum(1 for r in records if r.age_restricted)}/{len(records)}")
     print(f" http reqs   : {http.n_requests}")
+    print(f" throughput  : {sample.format_throughput(meta)}")
 
     if not args.commit:
         print("-" * 64)
@@ -46,17 +46,18 @@ import artemis_import as ai  # the existing importer (Http, discovery, product e
 # read-only mount, the module is dropped beside this runner instead — import either way.
 try:
     from src.services.catalog_enrichment import (
-        RawProduct, enrich_rules, llm_context, apply_llm, llm_enrich_batch,
+        RawProduct, enrich_rules, llm_context, apply_llm, run_enrichment, Checkpoint,
+        ENRICH_CONCURRENCY,
         RECIPE_VERSION, SOURCE_PREFIX,
     )
 except ImportError:
     from catalog_enrichment import (  # type: ignore
-        RawProduct, enrich_rules, llm_context, apply_llm, llm_enrich_batch,
+        RawProduct, enrich_rules, llm_context, apply_llm, run_enrichment, Checkpoint,
+        ENRICH_CONCURRENCY,
         RECIPE_VERSION, SOURCE_PREFIX,
     )
 
 PAPERS_SLUG = "papers-co"
-BATCH = 10   # items per LLM call — 10-to-1 batching keeps calls (and throttle pressure) ~10x lower; quality unchanged (schema-bounded, sku-keyed). Tune 8–12 if the model ever drops an item.
 # §6a detail-page fetches are the real wall-time bottleneck (one blocking HTTP round-trip
 # per product, was serial → ~12 min for 50 items). We run them through a small thread pool:
 # the cap is BOTH the parallelism and the politeness throttle — keep it gentle (~10 in flight).
@@ -250,13 +251,16 @@ def pull_papers(http: "ai.Http", lang: str, cap: int, with_detail: bool = True)
 # --------------------------------------------------------------------------- #
 # Enrich (rules everywhere; LLM where reachable)                              #
 # --------------------------------------------------------------------------- #
-async def enrich_all(raws: list[RawProduct]) -> tuple[list, dict]:
+async def enrich_all(raws: list[RawProduct], *, checkpoint: str | None = None,
+                     concurrency: int | None = None) -> tuple[list, dict]:
+    """Rules for every item, then the LLM merchandising pass through the batch runner.
+    `checkpoint` = a JSONL path: SKUs already answered there are not asked again (resume)."""
     print(f"[4/4] enriching {len(raws)} items (rules) + LLM merchandising pass ...", flush=True)
     records = [enrich_rules(r) for r in raws]
     ctxs = [llm_context(r) for r in raws]
 
     meta = {"llm_method": None, "llm_model": None, "llm_ok": False, "llm_error": None,
-            "n_llm_resolved_category": 0}
+            "n_llm_resolved_category": 0, "throughput": None}
 
     # resolve the brain target
     from src.llm.targets import turbo_or_local
@@ -278,26 +282,30 @@ async def enrich_all(raws: list[RawProduct]) -> tuple[list, dict]:
             "allowed": ctx.get("allowed"),
         })
 
-    llm_results: dict = {}
-    model_used = None
+    def _progress(done, total):
+        print(f"      LLM {done}/{total} items", flush=True)
+
+    from src.llm import aclose_clients
     try:
-        import httpx
-        async with httpx.AsyncClient(timeout=target.timeout) as client:
-            for i in range(0, len(payload), BATCH):
-                chunk = payload[i:i + BATCH]
-                out, model_used = await llm_enrich_batch(chunk, target, client=client)
-                llm_results.update(out)
-                print(f"      LLM batch {i//BATCH + 1}: {len(out)}/{len(chunk)} items", flush=True)
-        meta["llm_ok"] = True
-        meta["llm_model"] = model_used
-    except Exception as e:
-        meta["llm_ok"] = False
-        meta["llm_error"] = f"{type(e).__name__}: {e}"
+        llm_results, stats = await run_enrichment(
+            payload, target, checkpoint=Checkpoint(checkpoint) if checkpoint else None,
+            concurrency=concurrency or ENRICH_CONCURRENCY, progress=_progress)
+    finally:
+        await aclose_clients()
+    model_used = stats.model
+    meta["throughput"] = stats.report()
+    meta["llm_ok"] = bool(llm_results)
+    meta["llm_model"] = model_used
+    if not llm_results:
+        meta["llm_error"] = stats.last_error or "no item answered"
         print(f"      LLM unreachable -> RULES-ONLY ({meta['llm_error']})", flush=True)
+    elif stats.aborted:
+        print(f"      LLM stopped after repeated failures ({stats.last_error}); "
+              f"{stats.failed} item(s) rules-only — re-run with the same --checkpoint to resume", flush=True)
 
     # fold LLM onto rules
     for rec, ctx in zip(records, ctxs):
-        row = llm_results.get(rec.sku) if meta["llm_ok"] else None
+        row = llm_results.get(rec.sku)
         before = rec.category
         apply_llm(rec, row, model_used, ctx)
         if ctx.get("must_resolve_category") and rec.category != before:
@@ -306,6 +314,25 @@ async def enrich_all(raws: list[RawProduct]) -> tuple[list, dict]:
     return records, meta
 
 
+def add_llm_args(ap: argparse.ArgumentParser) -> None:
+    """The LLM-pass flags, shared with the loader (artemis_enrich_load.py)."""
+    ap.add_argument("--concurrency", type=int, default=None,
+                    help=f"LLM batches in flight (default BANCO_ENRICH_CONCURRENCY={ENRICH_CONCURRENCY})")
+    ap.add_argument("--checkpoint", default=None,
+                    help="JSONL file of per-SKU LLM results; a re-run with the same file resumes "
+                         "where an interrupted one stopped (only unanswered SKUs are asked)")
+
+
+def format_throughput(meta: dict) -> str:
+    t = meta.get("throughput") or {}
+    if not t.get("calls") and not t.get("resumed"):
+        return "—"
+    return (f"{t['enriched']} enriched (+{t['resumed']} resumed, {t['failed']} rules-only) · "
+            f"{t['items_per_min'] or '—'} items/min · {t['tokens_per_item'] or '—'} tokens/item · "
+            f"retry {t['retry_rate']:.0%} · errors {t['error_rate']:.0%} · {t['calls']} calls "
+            f"({t['cached_calls']} cached) in {t['seconds']}s")
+
+
 # --------------------------------------------------------------------------- #
 # Review HTML                                                                 #
 # --------------------------------------------------------------------------- #
@@ -505,6 +532,7 @@ def main():
                     help="narrow to leaves whose path contains this segment (e.g. bongs)")
     ap.add_argument("--no-detail", action="store_true",
                     help="skip the §6a detail-page rich-metadata fetch (faster, basics only)")
+    add_llm_args(ap)
     args = ap.parse_args()
 
     http = ai.Http(delay=args.delay, retries=4, cache_dir=None)  # no on-disk cache (dry-run)
@@ -515,7 +543,7 @@ def main():
         print("No products pulled — aborting.", file=sys.stderr)
         sys.exit(2)
 
-    records, meta = asyncio.run(enrich_all(raws))
+    records, meta = asyncio.run(enrich_all(raws, checkpoint=args.checkpoint, concurrency=args.concurrency))
     out_html = render_html(records, meta, args.lang)
     Path(args.out).write_text(out_html, encoding="utf-8")
 
@@ -531,6 +559,7 @@ def main():
     print(f" needs_review   : {sum(1 for r in records if 'needs_review' in r.flags)}")
     print(f" needs_descr    : {sum(1 for r in records if 'needs_description' in r.flags)}")
     print(f" http requests  : {http.n_requests}")
+    print(f" LLM throughput : {format_throughput(meta)}")
     print(f" review HTML    : {args.out}")
     print("=" * 64)
     print(" DRY-RUN: nothing written to the DB, no images downloaded.")
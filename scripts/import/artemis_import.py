@@ -12,8 +12,8 @@ be RE-RUN for deltas: it is an idempotent upsert keyed on SKU (the Artemis
 was added / changed / removed.
 
 Rule #11 (Python first). Stdlib-only for the DRY-RUN path (argparse + urllib +
-sqlite/json) so it runs ANYWHERE with no deps and no DB. SQLAlchemy/asyncpg are
-imported lazily, only when you pass --commit (run that on the box).
+asyncio + sqlite/json) so it runs ANYWHERE with no deps and no DB. SQLAlchemy/asyncpg
+are imported lazily, only when you pass --commit (run that on the box).
 
 SAFETY
 ------
@@ -41,6 +41,17 @@ HOW THE ARTEMIS API IS REACHED  (all verified live, 2026-06-30)
             coverUrl:"/ProductImage.ashx?...", linkUrl:"/en/product/...-21577"}],
             hasMore, count(total in that category)}.
 
+CRAWLING  (bounded-parallel, polite, revalidating)
+--------------------------------------------------
+Categories are crawled concurrently (--concurrency, default 4): each one fetches its
+page, then pages its products API in order. Every request to a host draws from one token
+bucket (--rate req/s, default 1/--delay; 429/503 Retry-After drains it), so parallelism
+hides latency without raising the request rate. The on-disk cache keeps ETag /
+Last-Modified + fetch time per URL: sitemaps and category pages are reused for --max-age,
+then revalidated with a conditional GET (a tiny 304 when unchanged); the products API
+is revalidated on every run. --checkpoint records each finished category, so a killed
+crawl resumes where it stopped instead of starting over.
+
 LANGUAGE  (languageId)
 ----------------------
 Banco's source language is ENGLISH.  3=EN (primary/default), 2=DE (fallback),
@@ -96,6 +107,10 @@ USAGE
   # polite bounded validation run (sample N categories spread across groups):
   python scripts/import/artemis_import.py --max-categories 30
 
+  # weekly-watch style: persistent revalidating cache + resumable crawl:
+  python scripts/import/artemis_import.py --cache-dir /opt/ops/artemis-watch/http-cache \
+      --checkpoint /opt/ops/artemis-watch/crawl.checkpoint.jsonl --concurrency 4 --rate 4
+
   # see model-integration open questions:
   python scripts/import/artemis_import.py --notes
 
@@ -105,6 +120,7 @@ USAGE
 from __future__ import annotations
 
 import argparse
+import asyncio
 import gzip
 import hashlib
 import json
@@ -113,6 +129,7 @@ import re
 import sys
 import time
 import urllib.error
+import urllib.parse
 import urllib.request
 from dataclasses import dataclass, field, asdict
 from decimal import Decimal, InvalidOperation
@@ -149,30 +166,115 @@ DELTA_FIELDS = ("name", "price", "category", "image_url", "product_class", "is_a
 
 
 # --------------------------------------------------------------------------- #
-# HTTP -- retries, polite rate-limit, optional on-disk cache                   #
+# HTTP -- retries, polite rate-limit, revalidating on-disk cache               #
 # --------------------------------------------------------------------------- #
+# Freshness: sitemaps + category pages are trusted for CACHE_MAX_AGE, then revalidated with a
+# conditional GET (If-None-Match / If-Modified-Since -> a body-less 304 when nothing moved).
+# The products API changes with every price edit, so it is ALWAYS revalidated (API_MAX_AGE=0).
+CACHE_MAX_AGE = int(os.environ.get("ARTEMIS_CACHE_MAX_AGE", str(24 * 3600)))
+API_MAX_AGE = 0
+HOST_BURST = 4            # per-host token bucket: requests that may go out back-to-back
+CRAWL_CONCURRENCY = 4     # categories crawled at once (each pages its products sequentially)
+RETRY_AFTER_CAP = 120.0   # never sleep longer than this on a 429/503 Retry-After
+
+
+class HttpCache:
+    """URL-hash -> body (`.bin`) + freshness metadata (`.json`: url, etag, last_modified,
+    fetched_at). A body without metadata (the old all-or-nothing cache) counts as stale and
+    carries no validators, so it is fetched once more and then revalidated like the rest."""
+
+    def __init__(self, root: Path):
+        self.root = root
+        root.mkdir(parents=True, exist_ok=True)
+
+    def _paths(self, url: str) -> tuple[Path, Path]:
+        h = hashlib.sha256(url.encode()).hexdigest()[:24]
+        return self.root / f"{h}.bin", self.root / f"{h}.json"
+
+    def load(self, url: str) -> tuple[Optional[bytes], dict]:
+        body_p, meta_p = self._paths(url)
+        if not body_p.exists():
+            return None, {}
+        try:
+            meta = json.loads(meta_p.read_text()) if meta_p.exists() else {}
+        except (OSError, ValueError):
+            meta = {}
+        return body_p.read_bytes(), meta
+
+    @staticmethod
+    def is_fresh(meta: dict, max_age: float) -> bool:
+        return bool(meta) and time.time() - float(meta.get("fetched_at", 0)) < max_age
+
+    @staticmethod
+    def validators(meta: dict) -> dict:
+        h = {}
+        if meta.get("etag"):
+            h["If-None-Match"] = meta["etag"]
+        if meta.get("last_modified"):
+            h["If-Modified-Since"] = meta["last_modified"]
+        return h
+
+    def store(self, url: str, body: bytes, headers) -> None:
+        body_p, meta_p = self._paths(url)
+        tmp = body_p.with_suffix(".tmp")
+        tmp.write_bytes(body)
+        tmp.replace(body_p)
+        self._write_meta(meta_p, url, headers, {})
+
+    def touch(self, url: str, meta: dict, headers) -> None:
+        """A 304: the body on disk is current again (validators may have rotated)."""
+        self._write_meta(self._paths(url)[1], url, headers, meta)
+
+    @staticmethod
+    def _write_meta(meta_p: Path, url: str, headers, prev: dict) -> None:
+        meta = {"url": url, "fetched_at": time.time(),
+                "etag": headers.get("ETag") or prev.get("etag"),
+                "last_modified": headers.get("Last-Modified") or prev.get("last_modified")}
+        meta_p.write_text(json.dumps(meta))
+
+
+def _fetch(url: str, timeout: float, extra_headers: Optional[dict] = None) -> tuple[int, bytes, object]:
+    """One GET -> (status, body, headers). A 304 comes back as a status, not an exception;
+    every other HTTP error is raised for the caller's retry policy."""
+    req = urllib.request.Request(url, headers={
+        "User-Agent": USER_AGENT,
+        "Accept-Encoding": "gzip",
+        **(extra_headers or {}),
+    })
+    try:
+        with urllib.request.urlopen(req, timeout=timeout) as resp:
+            raw = resp.read()
+            if resp.headers.get("Content-Encoding") == "gzip":
+                raw = gzip.decompress(raw)
+            return resp.status, raw, resp.headers
+    except urllib.error.HTTPError as e:
+        if e.code == 304:
+            return 304, b"", e.headers
+        raise
+
+
 class Http:
+    """Sequential client (discovery helpers + the enrichment sample). `run()` uses AsyncHttp."""
+
     def __init__(self, delay: float = 0.3, retries: int = 4, cache_dir: Optional[Path] = None,
-                 timeout: int = 30):
+                 timeout: int = 30, max_age: float = CACHE_MAX_AGE):
         self.delay = delay
         self.retries = retries
         self.timeout = timeout
         self.cache_dir = cache_dir
-        if cache_dir:
-            cache_dir.mkdir(parents=True, exist_ok=True)
+        self.cache = HttpCache(cache_dir) if cache_dir else None
+        self.max_age = max_age
         self.n_requests = 0
+        self.n_not_modified = 0
+        self.n_cache_fresh = 0
         self._last = 0.0
 
-    def _cache_path(self, url: str) -> Optional[Path]:
-        if not self.cache_dir:
-            return None
-        h = hashlib.sha256(url.encode()).hexdigest()[:24]
-        return self.cache_dir / f"{h}.bin"
-
-    def get(self, url: str, *, cacheable: bool = True) -> bytes:
-        cp = self._cache_path(url) if cacheable else None
-        if cp and cp.exists():
-            return cp.read_bytes()
+    def get(self, url: str, *, cacheable: bool = True, max_age: Optional[float] = None) -> bytes:
+        cache = self.cache if cacheable else None
+        body, meta = cache.load(url) if cache else (None, {})
+        if body is not None and cache.is_fresh(meta, self.max_age if max_age is None else max_age):
+            self.n_cache_fresh += 1
+            return body
         # polite spacing
         gap = self.delay - (time.monotonic() - self._last)
         if gap > 0:
@@ -180,18 +282,16 @@ class Http:
         last_err: Optional[Exception] = None
         for attempt in range(self.retries):
             try:
-                req = urllib.request.Request(url, headers={
-                    "User-Agent": USER_AGENT,
-                    "Accept-Encoding": "gzip",
-                })
-                with urllib.request.urlopen(req, timeout=self.timeout) as resp:
-                    raw = resp.read()
-                    if resp.headers.get("Content-Encoding") == "gzip":
-                        raw = gzip.decompress(raw)
+                status, raw, headers = _fetch(url, self.timeout,
+                                              HttpCache.validators(meta) if body is not None else None)
                 self.n_requests += 1
                 self._last = time.monotonic()
-                if cp:
-                    cp.write_bytes(raw)
+                if status == 304:
+                    self.n_not_modified += 1
+                    cache.touch(url, meta, headers)
+                    return body
+                if cache:
+                    cache.store(url, raw, headers)
                 return raw
             except urllib.error.HTTPError as e:
                 # 404 is a real signal (stale sitemap entry) -- bubble up, don't retry.
@@ -208,6 +308,105 @@ class Http:
         return self.get(url, **kw).decode("utf-8", "replace")
 
 
+class TokenBucket:
+    """Per-host politeness: `rate` requests/s on average, at most `burst` back-to-back."""
+
+    def __init__(self, rate: float, burst: int = HOST_BURST):
+        self.rate = rate
+        self.burst = burst
+        self._tokens = float(burst)
+        self._at = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self) -> None:
+        async with self._lock:                   # FIFO: waiters are served in arrival order
+            while True:
+                now = time.monotonic()
+                self._tokens = min(self.burst, self._tokens + (now - self._at) * self.rate)
+                self._at = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+
+    def hold_off(self, seconds: float) -> None:
+        """The host asked us to slow down (429/503 Retry-After): nobody goes for `seconds`."""
+        self._tokens = min(self._tokens, -seconds * self.rate)
+
+
+class AsyncHttp:
+    """Bounded-parallel client for the full crawl. The blocking urllib call runs in a worker
+    thread (keeps the dry-run stdlib-only); `concurrency` caps requests in flight and a
+    TokenBucket per host caps the request RATE, so more workers never means a ruder crawl.
+    Same cache + conditional-GET semantics as Http."""
+
+    def __init__(self, rate: float = 3.0, burst: int = HOST_BURST,
+                 concurrency: int = CRAWL_CONCURRENCY, retries: int = 4,
+                 cache_dir: Optional[Path] = None, timeout: int = 30,
+                 max_age: float = CACHE_MAX_AGE, backoff: float = 0.3):
+        self.rate = rate
+        self.burst = burst
+        self.retries = retries
+        self.timeout = timeout
+        self.backoff = backoff
+        self.cache_dir = cache_dir
+        self.cache = HttpCache(cache_dir) if cache_dir else None
+        self.max_age = max_age
+        self.n_requests = 0
+        self.n_not_modified = 0
+        self.n_cache_fresh = 0
+        self._sem = asyncio.Semaphore(concurrency)
+        self._buckets: dict[str, TokenBucket] = {}
+
+    def _bucket(self, url: str) -> TokenBucket:
+        host = urllib.parse.urlsplit(url).netloc
+        if host not in self._buckets:
+            self._buckets[host] = TokenBucket(self.rate, self.burst)
+        return self._buckets[host]
+
+    async def get(self, url: str, *, cacheable: bool = True, max_age: Optional[float] = None) -> bytes:
+        cache = self.cache if cacheable else None
+        body, meta = cache.load(url) if cache else (None, {})
+        if body is not None and cache.is_fresh(meta, self.max_age if max_age is None else max_age):
+            self.n_cache_fresh += 1
+            return body
+        bucket = self._bucket(url)
+        last_err: Optional[Exception] = None
+        for attempt in range(self.retries):
+            wait = self.backoff * (2 ** attempt)
+            try:
+                async with self._sem:
+                    await bucket.acquire()
+                    status, raw, headers = await asyncio.to_thread(
+                        _fetch, url, self.timeout,
+                        HttpCache.validators(meta) if body is not None else None)
+                self.n_requests += 1
+                if status == 304:
+                    self.n_not_modified += 1
+                    cache.touch(url, meta, headers)
+                    return body
+                if cache:
+                    cache.store(url, raw, headers)
+                return raw
+            except urllib.error.HTTPError as e:
+                if e.code == 404:
+                    raise
+                last_err = e
+                if e.code in (429, 503):
+                    try:
+                        wait = max(wait, min(float(e.headers.get("Retry-After", 0)), RETRY_AFTER_CAP))
+                    except (TypeError, ValueError):
+                        pass                                 # HTTP-date form: plain backoff
+                    bucket.hold_off(wait)
+            except (urllib.error.URLError, TimeoutError, ConnectionError) as e:
+                last_err = e
+            await asyncio.sleep(wait)
+        raise RuntimeError(f"GET failed after {self.retries} tries: {url} :: {last_err}")
+
+    async def get_text(self, url: str, **kw) -> str:
+        return (await self.get(url, **kw)).decode("utf-8", "replace")
+
+
 # --------------------------------------------------------------------------- #
 # Category discovery (sitemap -> hierarchy)                                    #
 # --------------------------------------------------------------------------- #
@@ -242,13 +441,14 @@ class Category:
         return "/".join(self.segments)
 
 
-def discover_categories(http: Http) -> list[Category]:
-    """Sitemap index -> nav sitemap -> the 392 /de/ category URLs as a tree."""
-    idx = http.get_text(SITEMAP_INDEX)
+def _nav_sitemap_url(idx: str) -> str:
     nav_url_m = re.search(r"<loc>([^<]*siteMap-nav-de0[^<]*)</loc>", idx)
     if not nav_url_m:
         raise RuntimeError("Could not find siteMap-nav-de0 in the sitemap index")
-    nav_xml = http.get_text(nav_url_m.group(1))
+    return nav_url_m.group(1)
+
+
+def categories_from_nav(nav_xml: str) -> list[Category]:
     locs = re.findall(r"<loc>(https://www\.artemisluzern\.ch/de/[^<]+)</loc>", nav_xml)
     cats: list[Category] = []
     seen = set()
@@ -267,16 +467,19 @@ def discover_categories(http: Http) -> list[Category]:
     return cats
 
 
-def resolve_category_api(http: Http, cat: Category) -> bool:
-    """Fetch a category page and pull navigationId + hierarchicalCategoryId from the
-    embedded productsApiUrl. Returns True if resolved; marks `stale` on 404 / no API."""
-    try:
-        html = http.get_text(cat.url)
-    except urllib.error.HTTPError as e:
-        if e.code == 404:
-            cat.stale = True
-            return False
-        raise
+def discover_categories(http: Http) -> list[Category]:
+    """Sitemap index -> nav sitemap -> the 392 /de/ category URLs as a tree."""
+    idx = http.get_text(SITEMAP_INDEX)
+    return categories_from_nav(http.get_text(_nav_sitemap_url(idx)))
+
+
+async def discover_categories_async(http: AsyncHttp) -> list[Category]:
+    idx = await http.get_text(SITEMAP_INDEX)
+    return categories_from_nav(await http.get_text(_nav_sitemap_url(idx)))
+
+
+def parse_category_api(cat: Category, html: str) -> bool:
+    """Pull navigationId + hierarchicalCategoryId from the page's embedded productsApiUrl."""
     m = re.search(r'id="productsApiUrl"\s+value="([^"]+)"', html)
     if not m:
         # Group landing pages (e.g. /de/grow) sometimes omit it; their leaves carry it.
@@ -290,6 +493,19 @@ def resolve_category_api(http: Http, cat: Category) -> bool:
     return bool(cat.cat_guid)
 
 
+def resolve_category_api(http: Http, cat: Category) -> bool:
+    """Fetch a category page and pull navigationId + hierarchicalCategoryId from the
+    embedded productsApiUrl. Returns True if resolved; marks `stale` on 404 / no API."""
+    try:
+        html = http.get_text(cat.url)
+    except urllib.error.HTTPError as e:
+        if e.code == 404:
+            cat.stale = True
+            return False
+        raise
+    return parse_category_api(cat, html)
+
+
 def products_api_url(cat: Category, lang: str, page: int) -> str:
     L = LANG_IDS[lang]
     return (f"{BASE}/api/shop/products?loadingType=79&languageId={L}"
@@ -302,7 +518,7 @@ def iter_category_products(http: Http, cat: Category, lang: str,
     """Page the products API for one category until hasMore is false."""
     page = 1
     while page <= max_pages:
-        data = json.loads(http.get_text(products_api_url(cat, lang, page), cacheable=False))
+        data = json.loads(http.get_text(products_api_url(cat, lang, page), max_age=API_MAX_AGE))
         for p in data.get("products", []):
             yield p
         if not data.get("hasMore"):
@@ -310,6 +526,106 @@ def iter_category_products(http: Http, cat: Category, lang: str,
         page += 1
 
 
+async def crawl_category(http: AsyncHttp, cat: Category, lang: str,
+                         max_pages: int = 200) -> Optional[list[dict]]:
+    """Resolve one leaf's API id and page all its products. None = stale (404 / no API)."""
+    try:
+        html = await http.get_text(cat.url)
+    except urllib.error.HTTPError as e:
+        if e.code == 404:
+            cat.stale = True
+            return None
+        raise
+    if not parse_category_api(cat, html):
+        return None
+    products: list[dict] = []
+    for page in range(1, max_pages + 1):
+        data = json.loads(await http.get_text(products_api_url(cat, lang, page), max_age=API_MAX_AGE))
+        products.extend(data.get("products", []))
+        if not data.get("hasMore"):
+            break
+    return products
+
+
+# --------------------------------------------------------------------------- #
+# Crawl checkpoint -- an interrupted crawl resumes at the next category        #
+# --------------------------------------------------------------------------- #
+CHECKPOINT_MAX_AGE = 12 * 3600   # older entries are a previous crawl's, not this one's
+
+
+class CrawlCheckpoint:
+    """JSONL of finished categories: {breadcrumb, lang, at, nav_id, cat_guid, stale, products}.
+    One line is appended (and flushed) per category as it completes, so a killed run loses at
+    most the categories in flight. Entries for another language or older than `max_age` are
+    ignored. `clear()` after a clean crawl — the next run starts from the live shop again."""
+
+    def __init__(self, path: Path, lang: str, max_age: float = CHECKPOINT_MAX_AGE):
+        self.path = path
+        self.lang = lang
+        self._done: dict[str, dict] = {}
+        if path.exists():
+            cutoff = time.time() - max_age
+            for line in path.read_text().splitlines():
+                try:
+                    e = json.loads(line)
+                except ValueError:
+                    continue                                 # torn last line of a killed run
+                if e.get("lang") == lang and float(e.get("at", 0)) >= cutoff:
+                    self._done[e["breadcrumb"]] = e
+
+    def __len__(self) -> int:
+        return len(self._done)
+
+    def get(self, cat: Category) -> Optional[dict]:
+        return self._done.get(cat.breadcrumb)
+
+    def add(self, cat: Category, products: Optional[list[dict]]) -> None:
+        e = {"breadcrumb": cat.breadcrumb, "lang": self.lang, "at": time.time(),
+             "nav_id": cat.nav_id, "cat_guid": cat.cat_guid, "stale": products is None,
+             "products": products or []}
+        self._done[cat.breadcrumb] = e
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self.path.open("a", encoding="utf-8") as f:
+            f.write(json.dumps(e, ensure_ascii=False) + "\n")
+
+    def clear(self) -> None:
+        self._done.clear()
+        self.path.unlink(missing_ok=True)
+
+
+async def crawl_categories(http: AsyncHttp, targets: list[Category], lang: str, *,
+                           max_pages: int = 200, checkpoint: Optional[CrawlCheckpoint] = None,
+                           progress=None) -> tuple[list[tuple[Category, Optional[list[dict]], Optional[str]]], int]:
+    """Crawl every target category concurrently (AsyncHttp bounds the parallelism + rate).
+    Returns ([(cat, products | None if stale, error | None)] in `targets` order, n_resumed),
+    so the caller's SKU dedup stays deterministic whatever order the pages arrived in."""
+    resumed = 0
+    done = 0
+
+    async def _one(cat: Category):
+        nonlocal resumed, done
+        prev = checkpoint.get(cat) if checkpoint is not None else None
+        if prev is not None:
+            resumed += 1
+            cat.nav_id, cat.cat_guid, cat.stale = prev["nav_id"], prev["cat_guid"], prev["stale"]
+            out = (cat, None if prev["stale"] else prev["products"], None)
+        else:
+            try:
+                products = await crawl_category(http, cat, lang, max_pages=max_pages)
+                if checkpoint is not None:
+                    checkpoint.add(cat, products)
+                out = (cat, products, None)
+            except Exception as e:
+                out = (cat, [], str(e))
+        done += 1
+        if progress and done % 25 == 0:
+            progress(done, len(targets))
+        return out
+
+    results = await asyncio.gather(*(_one(c) for c in targets))
+    return list(results), resumed
+
+
 # --------------------------------------------------------------------------- #
 # Price parsing  ("CHF 1.90", "CHF 39.-", "CHF 1'234.50")                      #
 # --------------------------------------------------------------------------- #
@@ -529,58 +845,72 @@ def select_categories(cats: list[Category], max_categories: Optional[int]) -> li
 
 
 def run(args) -> dict:
-    http = Http(delay=args.delay, retries=args.retries,
-                cache_dir=(None if args.no_cache else Path(args.cache_dir)))
+    http = AsyncHttp(rate=args.rate or 1 / max(args.delay, 0.05), concurrency=args.concurrency,
+                     retries=args.retries, backoff=args.delay, max_age=args.max_age,
+                     cache_dir=(None if args.no_cache else Path(args.cache_dir)))
+    checkpoint = CrawlCheckpoint(Path(args.checkpoint), args.lang) if args.checkpoint else None
     classify, real_classifier = _load_classifier()
-
-    print(f"[1/4] discovering categories from sitemap ...", flush=True)
-    cats = discover_categories(http)
-    leaves = [c for c in cats if c.is_leaf]
-    print(f"      {len(cats)} categories  "
-          f"(groups={sum(c.depth==1 for c in cats)}, lvl2={sum(c.depth==2 for c in cats)}, "
-          f"lvl3={sum(c.depth==3 for c in cats)}, lvl4={sum(c.depth>=4 for c in cats)}, "
-          f"leaves={len(leaves)})", flush=True)
-
-    targets = select_categories(cats, args.max_categories)
-    print(f"[2/4] resolving product-API ids for {len(targets)} leaf categories "
-          f"({'SAMPLE' if args.max_categories else 'FULL'}) ...", flush=True)
-    resolved, stale = [], []
-    for i, c in enumerate(targets, 1):
-        ok = resolve_category_api(http, c)
-        (resolved if ok else stale).append(c)
-        if i % 25 == 0:
-            print(f"      resolved {i}/{len(targets)} ...", flush=True)
-
-    print(f"      resolved={len(resolved)}  stale/404={len(stale)}", flush=True)
-
-    print(f"[3/4] enumerating products ({args.lang.upper()}) per category, dedup by SKU ...",
+    t0 = time.monotonic()
+
+    async def _crawl():
+        print(f"[1/4] discovering categories from sitemap ...", flush=True)
+        cats = await discover_categories_async(http)
+        leaves = [c for c in cats if c.is_leaf]
+        print(f"      {len(cats)} categories  "
+              f"(groups={sum(c.depth==1 for c in cats)}, lvl2={sum(c.depth==2 for c in cats)}, "
+              f"lvl3={sum(c.depth==3 for c in cats)}, lvl4={sum(c.depth>=4 for c in cats)}, "
+              f"leaves={len(leaves)})", flush=True)
+
+        targets = select_categories(cats, args.max_categories)
+        print(f"[2/4] crawling {len(targets)} leaf categories "
+              f"({'SAMPLE' if args.max_categories else 'FULL'}; {args.concurrency} in flight, "
+              f"<= {http.rate:.1f} req/s; {len(checkpoint) if checkpoint is not None else 0} checkpointed) ...",
+              flush=True)
+        crawled, resumed = await crawl_categories(
+            http, targets, args.lang, max_pages=args.max_pages, checkpoint=checkpoint,
+            progress=lambda i, n: print(f"      {i}/{n} categories ...", flush=True))
+        return cats, leaves, targets, crawled, resumed
+
+    cats, leaves, targets, crawled, resumed = asyncio.run(_crawl())
+    crawl_s = time.monotonic() - t0
+    resolved = [c for c, products, err in crawled if products is not None and not err]
+    stale = [c for c, products, _ in crawled if products is None]
+    failed = len(crawled) - len(resolved) - len(stale)
+    print(f"      resolved={len(resolved)}  stale/404={len(stale)}  failed={failed}  resumed={resumed}  "
+          f"({crawl_s:.0f}s)", flush=True)
+
+    print(f"[3/4] mapping products ({args.lang.upper()}) per category, dedup by SKU ...",
           flush=True)
     mapped: dict[str, MappedProduct] = {}
     multi_listed = 0
     per_cat_counts: dict[str, int] = {}
     cat_errors = []
-    for i, c in enumerate(resolved, 1):
-        try:
-            n = 0
-            for p in iter_category_products(http, c, args.lang, max_pages=args.max_pages):
-                mp = map_product(p, c, args.lang, classify)
-                if not mp:
-                    continue
-                n += 1
-                if mp.sku in mapped:
-                    # product cross-listed; keep the DEEPER (more specific) category
-                    prev = mapped[mp.sku]
-                    multi_listed += 1
-                    if c.depth > prev_depth_of(prev):
-                        mapped[mp.sku] = mp
-                else:
+    for c, products, err in crawled:
+        if err:
+            cat_errors.append((c.breadcrumb, err))
+            continue
+        n = 0
+        for p in products or ():
+            mp = map_product(p, c, args.lang, classify)
+            if not mp:
+                continue
+            n += 1
+            if mp.sku in mapped:
+                # product cross-listed; keep the DEEPER (more specific) category
+                prev = mapped[mp.sku]
+                multi_listed += 1
+                if c.depth > prev_depth_of(prev):
                     mapped[mp.sku] = mp
+            else:
+                mapped[mp.sku] = mp
+        if products is not None:
             per_cat_counts[c.breadcrumb] = n
-        except Exception as e:
-            cat_errors.append((c.breadcrumb, str(e)))
-        if i % 25 == 0:
-            print(f"      {i}/{len(resolved)} categories, {len(mapped)} unique SKUs ...",
-                  flush=True)
+    if checkpoint is not None:
+        if cat_errors:
+            print(f"      {len(cat_errors)} categories failed; checkpoint kept -> re-run to "
+                  f"fetch only those ({args.checkpoint})", flush=True)
+        else:
+            checkpoint.clear()
 
     # delta vs snapshot
     snapshot = load_snapshot(Path(args.snapshot))
@@ -613,6 +943,10 @@ def run(args) -> dict:
         },
         "cat_errors": cat_errors[:15],
         "http_requests": http.n_requests,
+        "http_not_modified": http.n_not_modified,
+        "http_cache_fresh": http.n_cache_fresh,
+        "n_resumed": resumed,
+        "crawl_seconds": round(crawl_s, 1),
     }
 
     _print_report(report, cats, mapped, sample_n=args.sample)
@@ -657,7 +991,10 @@ def _print_report(r: dict, cats: list[Category], mapped: dict[str, MappedProduct
     print(f" language pulled        : {r['lang'].upper()}  "
           f"(fallback {FALLBACK_LANG.upper()} for empty fields)")
     print(f" Banco classifier       : {'LIVE (src.services.catalog_taxonomy)' if r['real_classifier'] else 'fallback stub (off-box)'}")
-    print(f" HTTP requests made     : {r['http_requests']}")
+    print(f" HTTP requests made     : {r['http_requests']}  "
+          f"({r['http_not_modified']} not-modified, {r['http_cache_fresh']} served fresh from cache)")
+    print(f" crawl time             : {r['crawl_seconds']}s  "
+          f"({r['n_resumed']} categories resumed from checkpoint)")
     print("-" * 72)
     print(" CATEGORY SKELETON")
     print(f"   categories in sitemap: {r['n_categories_total']}  (leaves {r['n_leaves']})")
@@ -854,9 +1191,22 @@ def build_parser() -> argparse.ArgumentParser:
     p.add_argument("--write-snapshot", action="store_true",
                    help="persist the snapshot from a dry-run (default: only on --commit)")
     p.add_argument("--cache-dir", default=str(DEFAULT_CACHE),
-                   help="on-disk HTTP cache dir (category pages/sitemaps); product API is never cached")
+                   help="on-disk HTTP cache dir; entries are revalidated with conditional GETs "
+                        "(the product API on every run)")
     p.add_argument("--no-cache", action="store_true", help="disable the HTTP cache")
-    p.add_argument("--delay", type=float, default=0.3, help="polite delay between requests (s)")
+    p.add_argument("--max-age", type=float, default=CACHE_MAX_AGE,
+                   help=f"trust cached sitemaps/category pages this many seconds before "
+                        f"revalidating (default {CACHE_MAX_AGE})")
+    p.add_argument("--delay", type=float, default=0.3,
+                   help="polite delay between requests (s); also the retry backoff base")
+    p.add_argument("--rate", type=float, default=None,
+                   help="per-host request rate cap (req/s, default 1/--delay)")
+    p.add_argument("--concurrency", type=int, default=CRAWL_CONCURRENCY,
+                   help=f"categories crawled in parallel (default {CRAWL_CONCURRENCY}); "
+                        f"the rate cap still applies")
+    p.add_argument("--checkpoint", default=None,
+                   help="JSONL of finished categories; an interrupted crawl resumes from it "
+                        "(removed after a clean crawl)")
     p.add_argument("--retries", type=int, default=4, help="HTTP retry attempts")
     p.add_argument("--commit", action="store_true",
                    help="GATED: actually write to the DB (needs --db-url). NOT a dry-run.")
@@ -7,10 +7,13 @@ filled in), runs it through a brain, and posts the result back. It holds only tw
 secrets -- a revocable node token and a scoped brain key -- and talks to nobody but
 the broker (out) and the model. No inbound ports. No DB. No app code.
 
-Loop:  GET  {BROKER}/api/v1/compute/worker/next?node={NODE}   (X-Node-Token)
-       -> call the brain with the handed-down system+prompt
+Loop:  GET  {BROKER}/api/v1/compute/worker/next?node={NODE}&wait=..&max_jobs=..  (X-Node-Token)
+       -> call the brain with the handed-down system+prompt (a batch runs concurrently)
        POST {BROKER}/api/v1/compute/worker/result             (X-Node-Token)
 
+Idle is cheap: the broker holds the GET open (long-poll, LPCX_WAIT_SECONDS) until a
+job is queued for this node, so an idle fleet costs one request per wait window.
+
 Run (env-configured):
   BROKER_URL=https://bottega.lapiazza.app \
   LPCX_NODE=do-staging-0 \
@@ -24,6 +27,7 @@ import asyncio
 import logging
 import os
 import sys
+import time
 
 import httpx
 
@@ -37,7 +41,9 @@ NODE_TOKEN = os.getenv("LPCX_NODE_TOKEN", "")
 BRAIN_KEY = os.getenv("LPCX_BRAIN_KEY", "")                      # worker's own scoped key
 BRAIN_URL = os.getenv("LPCX_BRAIN_URL", "https://ollama.com").rstrip("/")
 BRAIN_MODEL = os.getenv("LPCX_BRAIN_MODEL", "gpt-oss:120b")
-POLL_SECONDS = float(os.getenv("LPCX_POLL_SECONDS", "4"))
+POLL_SECONDS = float(os.getenv("LPCX_POLL_SECONDS", "4"))     # min gap between empty polls
+WAIT_SECONDS = float(os.getenv("LPCX_WAIT_SECONDS", "20"))     # long-poll (broker caps at 25)
+BATCH = int(os.getenv("LPCX_BATCH", "1"))                       # jobs claimed per poll
 VERIFY_TLS = os.getenv("LPCX_VERIFY_TLS", "1") != "0"           # broker uses real LE cert
 
 
@@ -61,16 +67,9 @@ async def run_brain(client: httpx.AsyncClient, system: str, prompt: str,
     return out, tokens
 
 
-async def tick(client: httpx.AsyncClient) -> bool:
-    """One pull-run-report cycle. Returns True if a job was handled."""
+async def run_job(client: httpx.AsyncClient, job: dict) -> None:
+    """Run one claimed job and report it (output or error) to the broker."""
     hdr = {"X-Node-Token": NODE_TOKEN}
-    r = await client.get(f"{BROKER}/api/v1/compute/worker/next",
-                         params={"node": NODE}, headers=hdr, timeout=30.0)
-    r.raise_for_status()
-    job = r.json().get("job")
-    if not job:
-        return False
-
     jid = job["job_id"]
     log.info(f"picked up {job.get('template')} (CJ-{job.get('job_number')}) id={jid[:8]}")
     try:
@@ -83,6 +82,20 @@ async def tick(client: httpx.AsyncClient) -> bool:
         log.exception("job failed; reporting error to broker")
         await client.post(f"{BROKER}/api/v1/compute/worker/result", headers=hdr,
                           json={"job_id": jid, "error": str(e)[:200]}, timeout=30.0)
+
+
+async def tick(client: httpx.AsyncClient) -> bool:
+    """One pull-run-report cycle. Returns True if a job was handled."""
+    hdr = {"X-Node-Token": NODE_TOKEN}
+    r = await client.get(f"{BROKER}/api/v1/compute/worker/next",
+                         params={"node": NODE, "wait": WAIT_SECONDS, "max_jobs": BATCH},
+                         headers=hdr, timeout=WAIT_SECONDS + 10.0)
+    r.raise_for_status()
+    data = r.json()
+    jobs = data.get("jobs") or ([data["job"]] if data.get("job") else [])   # older brokers: job only
+    if not jobs:
+        return False
+    await asyncio.gather(*(run_job(client, j) for j in jobs))
     return True
 
 
@@ -90,15 +103,19 @@ async def main():
     if not NODE_TOKEN or not BRAIN_KEY:
         log.error("LPCX_NODE_TOKEN and LPCX_BRAIN_KEY are required")
         sys.exit(1)
-    log.info(f"worker up: node={NODE} broker={BROKER} model={BRAIN_MODEL} poll={POLL_SECONDS}s")
+    log.info(f"worker up: node={NODE} broker={BROKER} model={BRAIN_MODEL} "
+             f"wait={WAIT_SECONDS}s batch={BATCH}")
     async with httpx.AsyncClient(verify=VERIFY_TLS) as client:
         while True:
+            started = time.monotonic()
             try:
                 handled = await tick(client)
             except Exception as e:  # noqa: BLE001 -- never die on a transient broker/network blip
                 log.warning(f"tick error (will retry): {e}")
                 handled = False
-            await asyncio.sleep(0 if handled else POLL_SECONDS)
+            # An empty long-poll already waited; only a fast empty answer (error, or a broker
+            # without long-poll) backs off for the rest of POLL_SECONDS.
+            await asyncio.sleep(0 if handled else max(0.0, POLL_SECONDS - (time.monotonic() - started)))
 
 
 if __name__ == "__main__":
@@ -6,7 +6,8 @@ difference: where the brain worker calls an LLM and returns text, this one calls
 the local muscle (render.py) and returns a FILE. That's the whole "second skill."
 
 Loop:  enroll once (announce caps -> broker preflights)
-       GET  {BROKER}/api/v1/compute/worker/next?node={NODE}   (X-Node-Token)
+       GET  {BROKER}/api/v1/compute/worker/next?node={NODE}&wait=..   (X-Node-Token)
+            (long-poll: the broker holds it open until a job is queued, so idle is cheap)
        -> render() locally (Piper + ffmpeg, this machine's hardware)
        POST {BROKER}/api/v1/compute/worker/result  (multipart MP4)   (X-Node-Token)
 
@@ -26,6 +27,7 @@ import logging
 import os
 import sys
 import tempfile
+import time
 from pathlib import Path
 
 import httpx
@@ -41,7 +43,8 @@ BROKER = os.getenv("BROKER_URL", "http://127.0.0.1:8810").rstrip("/")
 NODE = os.getenv("BYOH_NODE", "laptop-0")
 NODE_TOKEN = os.getenv("BYOH_NODE_TOKEN", "demo-token")
 RECIPE = os.getenv("BYOH_RECIPE", "voiceover-reel")
-POLL_SECONDS = float(os.getenv("BYOH_POLL_SECONDS", "2"))
+POLL_SECONDS = float(os.getenv("BYOH_POLL_SECONDS", "2"))     # min gap between empty polls
+WAIT_SECONDS = float(os.getenv("BYOH_WAIT_SECONDS", "20"))     # long-poll (broker caps at 25)
 
 
 async def enroll(client: httpx.AsyncClient) -> bool:
@@ -63,7 +66,8 @@ async def tick(client: httpx.AsyncClient) -> bool:
     """One pull-render-report cycle. Returns True if a job was handled."""
     hdr = {"X-Node-Token": NODE_TOKEN}
     r = await client.get(f"{BROKER}/api/v1/compute/worker/next",
-                         params={"node": NODE}, headers=hdr, timeout=30.0)
+                         params={"node": NODE, "wait": WAIT_SECONDS}, headers=hdr,
+                         timeout=WAIT_SECONDS + 10.0)
     r.raise_for_status()
     job = r.json().get("job")
     if not job:
@@ -89,17 +93,19 @@ async def tick(client: httpx.AsyncClient) -> bool:
 
 
 async def main() -> None:
-    log.info(f"worker up: node={NODE} broker={BROKER} recipe={RECIPE} poll={POLL_SECONDS}s")
+    log.info(f"worker up: node={NODE} broker={BROKER} recipe={RECIPE} wait={WAIT_SECONDS}s")
     async with httpx.AsyncClient() as client:
         if not await enroll(client):
             sys.exit(2)
         while True:
+            started = time.monotonic()
             try:
                 handled = await tick(client)
             except Exception as e:  # noqa: BLE001 -- never die on a transient blip
                 log.warning(f"tick error (will retry): {e}")
                 handled = False
-            await asyncio.sleep(0 if handled else POLL_SECONDS)
+            # an empty long-poll already waited; a fast empty answer backs off
+            await asyncio.sleep(0 if handled else max(0.0, POLL_SECONDS - (time.monotonic() - started)))
 
 
 if __name__ == "__main__":
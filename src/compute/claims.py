@@ -0,0 +1,213 @@
+# File: src/compute/claims.py
+# Purpose: Atomic job claiming + long-poll wakeups behind GET /compute/worker/next (web process).
+#
+# worker_next used to SELECT the oldest QUEUED job for a node and flip it to RUNNING in a
+# second step -- two workers polling the same node could both be handed it -- and an idle
+# BYOH fleet re-ran that query every few seconds per box. Now:
+#   * claim: SELECT ... FOR UPDATE SKIP LOCKED LIMIT n, flipped to RUNNING in the SAME
+#     transaction. Concurrent pollers each lock different rows; nobody blocks, nobody gets
+#     a job twice. Served by a partial index on (node, job_number) WHERE status='queued'.
+#   * long-poll: an empty claim parks the request (no DB connection held) until a job is
+#     queued for that node -- woken by the 'lpcx_jobs' trigger NOTIFY (which carries node)
+#     or in-process by submit_job -- or until `wait` runs out. A recheck every
+#     LPCX_CLAIM_RECHECK_S covers a dropped notification / no LISTEN.
+#   * stats: per node -- polls, empties, jobs claimed, claim query ms, and queue wait
+#     (created_at -> claimed) p50/p95 over the last LPCX_CLAIM_STATS_WINDOW claims.
+
+import asyncio
+import json
+import logging
+import os
+import time
+from collections import deque
+from datetime import datetime, timezone
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.compute.recipes import RECIPES
+from src.db.database import async_engine
+from src.db.models.compute_model import ComputeJobModel, ComputeJobStatus
+
+logger = logging.getLogger("lpcx.claims")
+
+LPCX_CLAIM_MAX_BATCH = int(os.getenv("LPCX_CLAIM_MAX_BATCH", "10"))
+LPCX_CLAIM_MAX_WAIT_S = float(os.getenv("LPCX_CLAIM_MAX_WAIT_S", "25"))   # < the workers' 30s timeout
+LPCX_CLAIM_RECHECK_S = float(os.getenv("LPCX_CLAIM_RECHECK_S", "5"))
+LPCX_CLAIM_STATS_WINDOW = int(os.getenv("LPCX_CLAIM_STATS_WINDOW", "200"))
+CHANGE_CHANNEL = "lpcx_jobs"
+
+
+def resolve(job: ComputeJobModel) -> dict:
+    """The worker payload: system + prompt filled from the recipe + inputs. Allowlist is
+    HERE, broker-side -- raises ValueError (the reject reason) if the job can't run."""
+    recipe = RECIPES.get(job.template)
+    if not recipe:
+        raise ValueError(f"no recipe for template '{job.template}' (not on the allowlist)")
+    try:
+        ctx = json.loads(job.inputs or "{}")
+    except Exception:  # noqa: BLE001
+        ctx = {}
+    safe: dict = {}
+    for inp in recipe["inputs"]:
+        v = ctx.get(inp["name"])
+        safe[inp["name"]] = v if v not in (None, "") else inp.get("default", "")
+    try:
+        prompt = recipe["prompt"].format(**safe)
+    except Exception as e:  # noqa: BLE001
+        raise ValueError(f"bad inputs: {e}")
+    return {
+        "job_id": str(job.id),
+        "job_number": job.job_number,
+        "template": job.template,
+        "system": recipe["system"],
+        "prompt": prompt,
+        "json_mode": recipe["output"] == "json",
+    }
+
+
+def _pct(xs: list[float], p: float) -> float:
+    return round(xs[min(len(xs) - 1, int(len(xs) * p))], 3)
+
+
+class _NodeStats:
+    def __init__(self, window: int):
+        self.polls = 0                 # claim queries run
+        self.empty = 0                 # ... that found nothing
+        self.jobs = 0                  # jobs handed out
+        self.claim_ms_last = 0.0
+        self.claim_ms_max = 0.0
+        self.waits: deque = deque(maxlen=window)   # seconds queued before a worker claimed it
+
+    def view(self) -> dict:
+        w = sorted(self.waits)
+        return {"polls": self.polls, "empty": self.empty, "jobs": self.jobs,
+                "claim_ms_last": self.claim_ms_last, "claim_ms_max": self.claim_ms_max,
+                "queue_wait_p50_s": _pct(w, 0.5) if w else None,
+                "queue_wait_p95_s": _pct(w, 0.95) if w else None}
+
+
+class ClaimBroker:
+    def __init__(self, max_batch: int = LPCX_CLAIM_MAX_BATCH, max_wait: float = LPCX_CLAIM_MAX_WAIT_S,
+                 recheck: float = LPCX_CLAIM_RECHECK_S, window: int = LPCX_CLAIM_STATS_WINDOW):
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self.recheck = recheck
+        self.window = window
+        self._wakers: dict[str, asyncio.Event] = {}   # node -> event set when a job is queued
+        self._stats: dict[str, _NodeStats] = {}
+        self._listen_conn = None
+        self._listen_raw = None
+        self._listen_lock = asyncio.Lock()
+
+    # -- claim ------------------------------------------------------------------------
+    async def claim(self, db: AsyncSession, node: str, limit: int = 1) -> list[dict]:
+        """Atomically take up to `limit` QUEUED jobs for `node` (oldest first) and mark them
+        RUNNING. Jobs that fail the allowlist are FAILED in the same transaction, not handed out."""
+        limit = max(1, min(limit, self.max_batch))
+        t0 = time.perf_counter()
+        rows = (await db.execute(
+            select(ComputeJobModel).where(
+                ComputeJobModel.node == node,
+                ComputeJobModel.status == ComputeJobStatus.QUEUED,
+            ).order_by(ComputeJobModel.job_number.asc()).limit(limit)
+            .with_for_update(skip_locked=True)
+        )).scalars().all()
+        now = datetime.now(timezone.utc)
+        claimed: list[dict] = []
+        for job in rows:
+            try:
+                claimed.append(resolve(job))
+            except ValueError as e:
+                job.status = ComputeJobStatus.FAILED
+                job.reject_reason = str(e)
+                continue
+            job.status = ComputeJobStatus.RUNNING
+            job.progress = 10
+            created = job.created_at if job.created_at.tzinfo else job.created_at.replace(tzinfo=timezone.utc)
+            self._node(node).waits.append((now - created).total_seconds())
+        await db.commit()      # releases the row locks -- and the connection, before any wait
+        self._record(node, (time.perf_counter() - t0) * 1000, len(claimed))
+        return claimed
+
+    async def next_jobs(self, db: AsyncSession, node: str, limit: int = 1, wait: float = 0) -> list[dict]:
+        """claim(), long-polling up to `wait` seconds for a job to be queued on `node`."""
+        deadline = time.monotonic() + max(0.0, min(wait, self.max_wait))
+        while True:
+            ev = self._waker(node)      # taken BEFORE the query: a job queued mid-query still wakes us
+            jobs = await self.claim(db, node, limit)
+            left = deadline - time.monotonic()
+            if jobs or left <= 0:
+                return jobs
+            await self._ensure_listen()
+            try:
+                await asyncio.wait_for(ev.wait(), timeout=min(left, self.recheck))
+            except asyncio.TimeoutError:
+                pass
+
+    # -- wakeups ----------------------------------------------------------------------
+    def notify(self, node: str) -> None:
+        """A job was queued for `node`: wake its parked pollers."""
+        ev = self._wakers.pop(node, None)
+        if ev is not None:
+            ev.set()
+
+    def _waker(self, node: str) -> asyncio.Event:
+        return self._wakers.setdefault(node, asyncio.Event())
+
+    def _on_change(self, _conn, _pid, _channel, payload: str) -> None:
+        try:
+            d = json.loads(payload)
+        except ValueError:
+            return
+        if d.get("new") == ComputeJobStatus.QUEUED.value and d.get("old") != d.get("new") and d.get("node"):
+            self.notify(d["node"])
+
+    async def _ensure_listen(self) -> None:
+        async with self._listen_lock:
+            if self._listen_raw is not None and not self._listen_raw.is_closed():
+                return
+            await self._unlisten()
+            conn = None
+            try:
+                conn = await async_engine.connect()
+                raw = await conn.get_raw_connection()
+                await raw.driver_connection.add_listener(CHANGE_CHANNEL, self._on_change)
+                self._listen_conn, self._listen_raw = conn, raw.driver_connection
+            except Exception as e:  # noqa: BLE001 -- the recheck still finds the job
+                logger.warning(f"LISTEN {CHANGE_CHANNEL} unavailable, rechecking every {self.recheck}s: {e}")
+                if conn is not None:
+                    await conn.close()
+
+    async def _unlisten(self) -> None:
+        if self._listen_conn is not None:
+            try:
+                await self._listen_conn.close()
+            except Exception:  # noqa: BLE001
+                pass
+            self._listen_conn = self._listen_raw = None
+
+    async def close(self) -> None:
+        await self._unlisten()
+
+    # -- stats ------------------------------------------------------------------------
+    def _node(self, node: str) -> _NodeStats:
+        if node not in self._stats:
+            self._stats[node] = _NodeStats(self.window)
+        return self._stats[node]
+
+    def _record(self, node: str, ms: float, n: int) -> None:
+        s = self._node(node)
+        s.polls += 1
+        s.empty += 0 if n else 1
+        s.jobs += n
+        s.claim_ms_last = round(ms, 2)
+        s.claim_ms_max = max(s.claim_ms_max, s.claim_ms_last)
+        if n:
+            logger.info(f"claim node={node} jobs={n} in {ms:.1f}ms")
+
+    def stats(self) -> dict:
+        return {node: s.view() for node, s in sorted(self._stats.items())}
+
+
+claim_broker = ClaimBroker()
@@ -15,7 +15,8 @@ import logging
 import random
 import re
 
-from src.services.bottega_service import _brain_chat  # resilient single-brain wrapper
+from src.llm import LLMResult
+from src.services.bottega_service import _brain_chat, _brain_stream  # resilient single-brain wrapper
 from src.compute.recipes import menu as _recipe_menu  # the REAL deck -- so Cleo never invents one
 
 logger = logging.getLogger("helix.concierge")
@@ -349,6 +350,54 @@ def _strip_think(s: str) -> str:
     return re.sub(r"<think>.*?</think>", "", s or "", flags=re.S).strip()
 
 
+class _ThinkFilter:
+    """_strip_think for a stream: feed() deltas, get back only what is outside <think> blocks.
+    A tail that could be the start of a tag is held until the next delta decides it; leading
+    whitespace is dropped like .strip() would. The final text is still _strip_think(full)."""
+    _OPEN, _CLOSE = "<think>", "</think>"
+
+    def __init__(self) -> None:
+        self._buf = ""
+        self._inside = False
+        self._started = False
+
+    def feed(self, delta: str) -> str:
+        self._buf += delta
+        out = []
+        while True:
+            tag = self._CLOSE if self._inside else self._OPEN
+            i = self._buf.find(tag)
+            if i >= 0:
+                if not self._inside:
+                    out.append(self._buf[:i])
+                self._buf = self._buf[i + len(tag):]
+                self._inside = not self._inside
+                continue
+            keep = next((k for k in range(min(len(tag) - 1, len(self._buf)), 0, -1)
+                         if tag.startswith(self._buf[-k:])), 0)
+            if not self._inside:
+                out.append(self._buf[:len(self._buf) - keep])
+            self._buf = self._buf[len(self._buf) - keep:]
+            break
+        text = "".join(out)
+        if not self._started:
+            text = text.lstrip()
+            self._started = bool(text)
+        return text
+
+
+async def _stream_turn(system: str, user: str):
+    """One brain turn, streamed: visible deltas, then an LLMResult whose text is think-stripped."""
+    flt = _ThinkFilter()
+    async for part in _brain_stream(system, user):
+        if isinstance(part, LLMResult):
+            yield LLMResult(text=_strip_think(part.text), tokens=part.tokens, model=part.model)
+        else:
+            visible = flt.feed(part)
+            if visible:
+                yield visible
+
+
 def blank_record() -> dict:
     """A fresh record with every field present and safely defaulted (never blank to the masters)."""
     return json.loads(json.dumps(RECORD_FIELDS))  # deep copy of the locked shape
@@ -440,17 +489,39 @@ def detect_lang(text: str) -> str:
     return "it" if hits >= 2 else "en"
 
 
-async def concierge_reply(transcript: list[dict], record: dict, language: str = "") -> str:
-    """One Cleopatra turn. The transcript ends with the member's latest message; we return the
-    concierge's next reply. Flattened to a single brain call (BYO-brain rule)."""
+def _concierge_turn(transcript: list[dict], record: dict, language: str) -> tuple[str, str]:
     user = (f"What you already know about this member:\n{_known_block(record)}\n\n"
             f"The conversation so far:\n{_transcript_block(transcript)}\n\n"
             "Reply now, as Cleopatra -- one short turn (2-5 sentences). If they just contradicted "
             "themselves or what they do clashes with what they want, gently hold up the mirror.")
-    reply = await _brain_chat(BRAIN + _recipe_deck_block() + _lang_clause(language), user)
+    return BRAIN + _recipe_deck_block() + _lang_clause(language), user
+
+
+async def concierge_reply(transcript: list[dict], record: dict, language: str = "") -> str:
+    """One Cleopatra turn. The transcript ends with the member's latest message; we return the
+    concierge's next reply. Flattened to a single brain call (BYO-brain rule)."""
+    reply = await _brain_chat(*_concierge_turn(transcript, record, language))
     return _strip_think(reply)
 
 
+async def concierge_reply_stream(transcript: list[dict], record: dict, language: str = ""):
+    """concierge_reply, streamed: yields the reply's text deltas as the brain writes them, then
+    the final LLMResult (the whole think-stripped reply + brain-tokens)."""
+    async for part in _stream_turn(*_concierge_turn(transcript, record, language)):
+        yield part
+
+
+def _thread_turn(transcript: list[dict], record: dict, persona: str, language: str) -> tuple[str, str]:
+    user = (f"What you already know about this member:\n{_known_block(record)}\n\n"
+            f"The conversation so far:\n{_transcript_block(transcript)}\n\n"
+            "This is an ONGOING conversation, not a first meeting: do NOT greet them again, do NOT "
+            "re-introduce yourself, and do NOT re-ask their language or age if you already know it -- "
+            "just continue naturally from where it left off. Reply now -- one short turn (2-5 "
+            "sentences), in character. If they just contradicted themselves or what they do clashes "
+            "with what they want, gently hold up the mirror.")
+    return persona + _recipe_deck_block() + _lang_clause(language), user
+
+
 async def thread_reply(transcript: list[dict], record: dict, persona: str = BRAIN,
                        language: str = "") -> str:
     """One master turn inside a discussion THREAD -- the keystone's reusable engine (#107).
@@ -460,17 +531,17 @@ async def thread_reply(transcript: list[dict], record: dict, persona: str = BRAI
     a master means loading ITS brain over the shared thread; default is Cleopatra, so the inbox/nudge
     threads speak in her voice until another master takes the thread over. The transcript ends with
     the member's latest message; we return the speaker's next reply."""
-    user = (f"What you already know about this member:\n{_known_block(record)}\n\n"
-            f"The conversation so far:\n{_transcript_block(transcript)}\n\n"
-            "This is an ONGOING conversation, not a first meeting: do NOT greet them again, do NOT "
-            "re-introduce yourself, and do NOT re-ask their language or age if you already know it -- "
-            "just continue naturally from where it left off. Reply now -- one short turn (2-5 "
-            "sentences), in character. If they just contradicted themselves or what they do clashes "
-            "with what they want, gently hold up the mirror.")
-    reply = await _brain_chat(persona + _recipe_deck_block() + _lang_clause(language), user)
+    reply = await _brain_chat(*_thread_turn(transcript, record, persona, language))
     return _strip_think(reply)
 
 
+async def thread_reply_stream(transcript: list[dict], record: dict, persona: str = BRAIN,
+                              language: str = ""):
+    """thread_reply, streamed -- deltas, then the final LLMResult (see concierge_reply_stream)."""
+    async for part in _stream_turn(*_thread_turn(transcript, record, persona, language)):
+        yield part
+
+
 SUGGEST_SYS = """You are Cleopatra's quick wit. Propose 2 to 4 SHORT next moves the guest might tap
 -- written first person, in their own voice, each under about 8 words.
 
@@ -502,6 +573,11 @@ SAFE_CHIPS = {
 }
 
 
+# Chips are a pure function of (known block, transcript, language): asked at temperature 0 and
+# cached, so the same state -- above all every new guest's opening turn -- skips the model.
+SUGGEST_CACHE_TTL = 600.0
+
+
 def safe_chips(language: str = "") -> list:
     """Deterministic, grounded fallback chips when a guest-planted fiction is live."""
     code = (language or "en").strip().lower()[:2]
@@ -514,7 +590,8 @@ async def suggest_next(transcript: list[dict], record: dict, language: str = "")
     user = (f"What you know about this guest:\n{_known_block(record)}\n\n"
             f"The conversation so far:\n{_transcript_block(transcript)}")
     try:
-        raw = _strip_think(await _brain_chat(SUGGEST_SYS + _lang_clause(language), user, json_mode=True))
+        raw = _strip_think(await _brain_chat(SUGGEST_SYS + _lang_clause(language), user, json_mode=True,
+                                             cache_ttl=SUGGEST_CACHE_TTL))
         a, b = raw.find("{"), raw.rfind("}")
         if a < 0 or b <= a:
             return []
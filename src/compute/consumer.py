@@ -15,6 +15,7 @@ import aio_pika
 from src.compute.queue import AMQP_URL, QUEUE_NAME
 from src.compute.runner import execute_job
 from src.compute.fairness import fair_brain
+from src.compute.progress import progress_writer
 
 logging.basicConfig(level=logging.INFO,
                     format="%(asctime)s %(levelname)s %(name)s: %(message)s")
@@ -22,6 +23,8 @@ logger = logging.getLogger("lpcx.consumer")
 
 # Prefetch HIGH so messages from ALL users get pulled (no head-of-line blocking);
 # the FairBrain gate -- not prefetch -- enforces the global cap + per-user fairness.
+# With LPCX_FAIRNESS_REDIS_URL set, that gate is cluster-wide: run as many consumers
+# as you like and the cap + per-user split still hold across all of them.
 PREFETCH = int(os.getenv("LPCX_PREFETCH", "500"))
 
 
@@ -59,6 +62,8 @@ def _load_all_models() -> None:
 
 async def main() -> None:
     _load_all_models()
+    await fair_brain.start()   # cluster mode: joins the shared slot pool in Redis
+    await progress_writer.start()   # batched progress flushes + LISTEN for kills
     connection = await aio_pika.connect_robust(AMQP_URL)
     channel = await connection.channel()
     await channel.set_qos(prefetch_count=PREFETCH)   # <- the ceiling
@@ -6,55 +6,128 @@
 # Alone -> cap = total (use the whole brain, no waste). Two busy users -> total/2
 # each. Five -> total/5. No preemption: a user keeps the slots they hold; as each
 # (short) job finishes, the freed slot goes to whoever is under their cap. Converges
-# in seconds. In-process to the single consumer (multi-consumer -> Redis later).
+# in seconds.
+#
+# Two implementations, same surface (slot(owner) / snapshot() / start() / close()):
+#   FairBrain       in-process, one consumer (the default; dev + tests)
+#   RedisFairBrain  cluster-wide, any number of `python -m src.compute.consumer`
+#                   processes share ONE slot pool (LPCX_FAIRNESS_REDIS_URL set)
+#
+# Both wait per OWNER and wake only who can actually run: a freed slot is handed to
+# the head waiter of an owner under their cap -- never a notify_all that wakes every
+# waiter just to have all but one go back to sleep.
 
 import asyncio
+import logging
 import os
-from collections import defaultdict
+import time
+from collections import defaultdict, deque
 from contextlib import asynccontextmanager
+from uuid import uuid4
+
+logger = logging.getLogger("lpcx.fairness")
 
 LPCX_BRAIN_CAP = int(os.getenv("LPCX_BRAIN_CAP", "50"))
 LPCX_MIN_PER_USER = int(os.getenv("LPCX_MIN_PER_USER", "1"))
+# Cluster mode: e.g. redis://:pass@redis:6379/2. Unset -> in-process FairBrain.
+LPCX_FAIRNESS_REDIS_URL = os.getenv("LPCX_FAIRNESS_REDIS_URL", "")
+# A consumer renews its leases every TTL/3; one that dies frees its slots within TTL.
+LPCX_LEASE_TTL = float(os.getenv("LPCX_LEASE_TTL", "30"))
+
+
+def _cap(total: int, min_per_user: int, active_users: int) -> int:
+    return max(min_per_user, total // max(1, active_users))
 
 
 class FairBrain:
     def __init__(self, total: int, min_per_user: int = 1):
         self.total = total
         self.min_per_user = min_per_user
-        self.running: dict[str, int] = defaultdict(int)   # owner -> running slots
-        self.waiting: dict[str, int] = defaultdict(int)   # owner -> queued waiters
-        self._cond = asyncio.Condition()
+        self.running: dict[str, int] = defaultdict(int)            # owner -> running slots
+        self._queues: dict[str, deque[asyncio.Future]] = {}       # owner -> FIFO of waiters
+
+    @property
+    def waiting(self) -> dict[str, int]:
+        return {u: len(q) for u, q in self._queues.items() if q}
 
-    def _active_users(self) -> int:
+    def _active_users(self, joining: str | None = None) -> int:
         users = {u for u, c in self.running.items() if c > 0}
-        users |= {u for u, c in self.waiting.items() if c > 0}
+        users |= {u for u, q in self._queues.items() if q}
+        if joining is not None:
+            users.add(joining)
         return max(1, len(users))
 
-    def _cap(self) -> int:
-        return max(self.min_per_user, self.total // self._active_users())
+    def _cap(self, joining: str | None = None) -> int:
+        return _cap(self.total, self.min_per_user, self._active_users(joining))
 
-    def _can_run(self, owner: str) -> bool:
+    def _can_run(self, owner: str, joining: str | None = None) -> bool:
         total_running = sum(self.running.values())
-        return total_running < self.total and self.running[owner] < self._cap()
+        return total_running < self.total and self.running.get(owner, 0) < self._cap(joining)
+
+    def _take(self, owner: str) -> None:
+        self.running[owner] += 1
+
+    def _wake(self) -> None:
+        """Hand free slots to the head waiter of each owner under their cap (caps may have
+        shifted). The slot is taken ON BEHALF of the waiter, so nobody can steal it between
+        the wake-up and the waiter resuming. Owners rotate to the back once served."""
+        progressed = True
+        while progressed and sum(self.running.values()) < self.total:
+            progressed = False
+            for owner in list(self._queues):
+                q = self._queues[owner]
+                while q and q[0].done():          # cancelled waiters
+                    q.popleft()
+                if not q:
+                    del self._queues[owner]
+                    continue
+                if not self._can_run(owner):
+                    continue
+                self._take(owner)
+                q.popleft().set_result(None)
+                if q:
+                    self._queues[owner] = self._queues.pop(owner)   # rotate
+                else:
+                    del self._queues[owner]
+                progressed = True
+                break
+
+    def _give_back(self, owner: str) -> None:
+        self.running[owner] -= 1
+        if self.running[owner] <= 0:
+            self.running.pop(owner, None)
+        self._wake()
 
     @asynccontextmanager
     async def slot(self, owner: str):
-        async with self._cond:
-            self.waiting[owner] += 1
-            while not self._can_run(owner):
-                await self._cond.wait()
-            self.waiting[owner] -= 1
-            if self.waiting[owner] <= 0:
-                self.waiting.pop(owner, None)
-            self.running[owner] += 1
+        if not self._queues.get(owner) and self._can_run(owner, joining=owner):
+            self._take(owner)
+        else:
+            fut = asyncio.get_running_loop().create_future()
+            self._queues.setdefault(owner, deque()).append(fut)
+            try:
+                await fut
+            except asyncio.CancelledError:
+                if fut.done() and not fut.cancelled():
+                    self._give_back(owner)        # handed a slot just as we were cancelled
+                else:
+                    q = self._queues.get(owner)
+                    if q and fut in q:
+                        q.remove(fut)
+                        if not q:
+                            del self._queues[owner]
+                    self._wake()                  # one fewer active user -> caps may grow
+                raise
         try:
             yield
         finally:
-            async with self._cond:
-                self.running[owner] -= 1
-                if self.running[owner] <= 0:
-                    self.running.pop(owner, None)
-                self._cond.notify_all()   # caps may have shifted -- re-evaluate waiters
+            self._give_back(owner)
+
+    async def start(self) -> None:
+        pass
+
+    async def close(self) -> None:
+        pass
 
     def snapshot(self) -> dict:
         return {
@@ -66,4 +139,228 @@ class FairBrain:
         }
 
 
-fair_brain = FairBrain(LPCX_BRAIN_CAP, LPCX_MIN_PER_USER)
+# ---------------------------------------------------------------------------
+# Cluster-wide: one slot pool in Redis, shared by every consumer process.
+#
+#   <prefix>:leases   ZSET  "<id>:<owner>" -> lease expiry (Redis server clock)
+#   <prefix>:waiters  ZSET  "<id>:<owner>" -> waiter expiry
+#   <prefix>:wake:<owner>   pub/sub channel, one message = one freed slot for <owner>
+#
+# Acquire / release / renew are Lua scripts, so the cap check and the lease write are
+# one atomic step across the cluster. Expired members are purged at the top of every
+# script: a consumer that dies stops renewing, and its slots come back within TTL.
+# ---------------------------------------------------------------------------
+
+_LUA_PRELUDE = """
+local t = redis.call('TIME')
+local now = tonumber(t[1]) + tonumber(t[2]) / 1000000
+redis.call('ZREMRANGEBYSCORE', KEYS[1], '-inf', now)
+redis.call('ZREMRANGEBYSCORE', KEYS[2], '-inf', now)
+local function owner_of(m) return string.sub(m, string.find(m, ':', 1, true) + 1) end
+local running, users, nusers, total_running = {}, {}, 0, 0
+local function seen(o) if not users[o] then users[o] = true; nusers = nusers + 1 end end
+for _, m in ipairs(redis.call('ZRANGE', KEYS[1], 0, -1)) do
+  local o = owner_of(m)
+  running[o] = (running[o] or 0) + 1
+  total_running = total_running + 1
+  seen(o)
+end
+local waiting = {}
+for _, m in ipairs(redis.call('ZRANGE', KEYS[2], 0, -1)) do
+  local o = owner_of(m)
+  if not waiting[o] then waiting[o] = true; table.insert(waiting, o) end
+  seen(o)
+end
+local total, min_per_user = tonumber(ARGV[1]), tonumber(ARGV[2])
+local function cap() return math.max(min_per_user, math.floor(total / math.max(1, nusers))) end
+"""
+
+# ARGV: total, min_per_user, ttl, owner, id  ->  1 = lease taken, 0 = queued as waiter
+_ACQUIRE_LUA = _LUA_PRELUDE + """
+local ttl, owner, id = tonumber(ARGV[3]), ARGV[4], ARGV[5]
+local member = id .. ':' .. owner
+seen(owner)
+if total_running < total and (running[owner] or 0) < cap() then
+  redis.call('ZREM', KEYS[2], member)
+  redis.call('ZADD', KEYS[1], now + ttl, member)
+  return 1
+end
+redis.call('ZADD', KEYS[2], now + ttl, member)
+return 0
+"""
+
+# ARGV: total, min_per_user, channel prefix, [lease member]  ->  owners woken
+# Also run with no lease member after a waiter gives up (fewer users -> caps may grow).
+_RELEASE_LUA = _LUA_PRELUDE + """
+if ARGV[4] and redis.call('ZREM', KEYS[1], ARGV[4]) == 1 then
+  local o = owner_of(ARGV[4])
+  running[o] = running[o] - 1
+  total_running = total_running - 1
+  if running[o] == 0 and not waiting[o] then nusers = nusers - 1 end
+end
+local woken = 0
+for _, o in ipairs(waiting) do
+  if total_running + woken >= total then break end
+  if (running[o] or 0) < cap() then
+    redis.call('PUBLISH', ARGV[3] .. o, '1')
+    woken = woken + 1
+  end
+end
+return woken
+"""
+
+# ARGV: ttl, n_leases, lease members..., waiter members...
+# XX = refresh only: a renewal racing a release/acquire must not resurrect the old member.
+_RENEW_LUA = """
+local t = redis.call('TIME')
+local exp = tonumber(t[1]) + tonumber(t[2]) / 1000000 + tonumber(ARGV[1])
+local n = tonumber(ARGV[2])
+for i = 3, #ARGV do
+  redis.call('ZADD', (i - 2 <= n) and KEYS[1] or KEYS[2], 'XX', exp, ARGV[i])
+end
+return #ARGV - 2
+"""
+
+
+class RedisFairBrain:
+    """FairBrain with the slot accounting in Redis, so N consumers enforce ONE global cap
+    and ONE max-min per-user cap. Locally each owner still has its own FIFO; a wake message
+    for that owner releases only the head waiter, which then races for the lease atomically
+    (a loser just re-queues). A slow poll backs up pub/sub: a lost message or a dead
+    consumer's expired leases never strand a waiter."""
+
+    def __init__(self, url: str, total: int, min_per_user: int = 1,
+                 lease_ttl: float = LPCX_LEASE_TTL, prefix: str = "lpcx:brain"):
+        self.url = url
+        self.total = total
+        self.min_per_user = min_per_user
+        self.lease_ttl = lease_ttl
+        self._keys = [f"{prefix}:leases", f"{prefix}:waiters"]
+        self._wake_prefix = f"{prefix}:wake:"
+        self._queues: dict[str, deque[asyncio.Future]] = {}
+        self._held: set[str] = set()              # lease members this process holds
+        self._waiting: set[str] = set()           # waiter members this process registered
+        self._view: dict = {"running": {}, "waiting": set()}
+        self._redis = None
+        self._tasks: list[asyncio.Task] = []
+
+    async def start(self) -> None:
+        import redis.asyncio as aioredis          # only cluster mode needs the client
+        self._redis = aioredis.from_url(self.url, decode_responses=True)
+        self._acquire = self._redis.register_script(_ACQUIRE_LUA)
+        self._release = self._redis.register_script(_RELEASE_LUA)
+        self._renew = self._redis.register_script(_RENEW_LUA)
+        pubsub = self._redis.pubsub()
+        await pubsub.psubscribe(self._wake_prefix + "*")
+        self._tasks = [asyncio.create_task(self._listen(pubsub)),
+                       asyncio.create_task(self._heartbeat())]
+        await self._refresh_view()
+        logger.info(f"FairBrain cluster mode: total={self.total} lease_ttl={self.lease_ttl}s")
+
+    async def close(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        if self._redis is not None:
+            await self._redis.aclose()
+
+    def _args(self, *extra) -> list:
+        return [self.total, self.min_per_user, *extra]
+
+    def _wake_local(self, owner: str) -> None:
+        q = self._queues.get(owner)
+        while q:
+            fut = q.popleft()
+            if not fut.done():
+                fut.set_result(None)
+                return
+
+    async def _listen(self, pubsub) -> None:
+        async for msg in pubsub.listen():
+            if msg.get("type") == "pmessage":
+                self._wake_local(msg["channel"][len(self._wake_prefix):])
+
+    async def _heartbeat(self) -> None:
+        while True:
+            await asyncio.sleep(self.lease_ttl / 3)
+            try:
+                held, waiting = list(self._held), list(self._waiting)
+                if held or waiting:
+                    await self._renew(keys=self._keys,
+                                      args=[self.lease_ttl, len(held), *held, *waiting])
+                await self._refresh_view()
+            except Exception as e:   # Redis blip: leases live on until TTL, retry next beat
+                logger.warning(f"FairBrain heartbeat skipped: {e}")
+
+    async def _refresh_view(self) -> None:
+        now = time.time()
+        leases, waiters = await asyncio.gather(
+            self._redis.zrangebyscore(self._keys[0], now, "+inf"),
+            self._redis.zrangebyscore(self._keys[1], now, "+inf"))
+        running: dict[str, int] = defaultdict(int)
+        for m in leases:
+            running[m.split(":", 1)[1]] += 1
+        self._view = {"running": dict(running), "waiting": {m.split(":", 1)[1] for m in waiters}}
+
+    async def _give_up(self, owner: str, member: str) -> None:
+        self._waiting.discard(member)
+        try:
+            await self._redis.zrem(self._keys[1], member)
+            await self._release(keys=self._keys, args=self._args(self._wake_prefix))
+        except Exception as e:
+            logger.warning(f"FairBrain waiter cleanup for {owner} failed (expires in TTL): {e}")
+
+    @asynccontextmanager
+    async def slot(self, owner: str):
+        member = f"{uuid4().hex}:{owner}"
+        loop = asyncio.get_running_loop()
+        self._waiting.add(member)
+        try:
+            while True:
+                # Queue locally BEFORE asking, so a wake published in between isn't missed.
+                fut = loop.create_future()
+                self._queues.setdefault(owner, deque()).append(fut)
+                try:
+                    if await self._acquire(keys=self._keys,
+                                           args=self._args(self.lease_ttl, owner, member.split(":", 1)[0])):
+                        break
+                    await asyncio.wait_for(fut, timeout=self.lease_ttl / 3)
+                except asyncio.TimeoutError:
+                    pass
+                finally:
+                    q = self._queues.get(owner)
+                    if q is not None:
+                        if fut in q:
+                            q.remove(fut)
+                        if not q:
+                            del self._queues[owner]
+        except BaseException:
+            await asyncio.shield(self._give_up(owner, member))
+            raise
+        self._waiting.discard(member)
+        self._held.add(member)
+        try:
+            yield
+        finally:
+            self._held.discard(member)
+            try:
+                await self._release(keys=self._keys, args=self._args(self._wake_prefix, member))
+            except Exception as e:   # the lease simply expires within TTL
+                logger.warning(f"FairBrain release for {owner} failed (expires in TTL): {e}")
+
+    def snapshot(self) -> dict:
+        """Cluster-wide view as of the last heartbeat (at most TTL/3 old)."""
+        running = self._view["running"]
+        users = {u for u, c in running.items() if c > 0} | self._view["waiting"]
+        active = max(1, len(users))
+        return {
+            "total": self.total,
+            "running": sum(running.values()),
+            "active_users": active,
+            "cap_per_user": _cap(self.total, self.min_per_user, active),
+            "by_user": dict(running),
+        }
+
+
+fair_brain = (RedisFairBrain(LPCX_FAIRNESS_REDIS_URL, LPCX_BRAIN_CAP, LPCX_MIN_PER_USER)
+              if LPCX_FAIRNESS_REDIS_URL else FairBrain(LPCX_BRAIN_CAP, LPCX_MIN_PER_USER))
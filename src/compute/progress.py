@@ -0,0 +1,160 @@
+# File: src/compute/progress.py
+# Purpose: Coalesced LPCX progress writes + pushed kill signals, for the CONSUMER process.
+#
+# execute_job used to open one session to poll kill_requested and another to write
+# tokens/progress on EVERY step -- ~12 short transactions per job, times up to
+# LPCX_BRAIN_CAP concurrent jobs. Now:
+#   * progress: runners only update an in-memory dict (latest value wins); ONE batched
+#     UPDATE per tick (LPCX_PROGRESS_FLUSH_S) writes every running job that moved.
+#     Terminal writes (KILLED / DONE / FAILED) stay immediate and drop the pending entry;
+#     the batch only touches rows still RUNNING, so a late flush can't rewind a done job.
+#   * kill: POST /compute/jobs/{id}/kill does pg_notify('lpcx_kill', id) in its commit;
+#     one LISTEN connection per consumer sets the job's asyncio.Event -> the runner sees
+#     it at its next step with no query. A periodic sweep of kill_requested (every tick
+#     while LISTEN is down, else every LPCX_KILL_SWEEP_S) covers a dropped notification.
+
+import asyncio
+import logging
+import os
+from uuid import UUID
+
+from sqlalchemy import bindparam, select, update
+
+from src.db.database import AsyncSessionLocal, async_engine
+from src.db.models.compute_model import ComputeJobModel, ComputeJobStatus
+
+logger = logging.getLogger("lpcx.progress")
+
+LPCX_PROGRESS_FLUSH_S = float(os.getenv("LPCX_PROGRESS_FLUSH_S", "1.0"))
+LPCX_KILL_SWEEP_S = float(os.getenv("LPCX_KILL_SWEEP_S", "10"))
+KILL_CHANNEL = "lpcx_kill"
+
+_PROGRESS_FIELDS = ("tokens", "progress", "credits_burned")
+
+
+class ProgressWriter:
+    def __init__(self, flush_interval: float = LPCX_PROGRESS_FLUSH_S,
+                 kill_sweep: float = LPCX_KILL_SWEEP_S):
+        self.flush_interval = flush_interval
+        self.kill_sweep = kill_sweep
+        self._pending: dict[UUID, dict] = {}          # job -> latest unflushed fields
+        self._kills: dict[UUID, asyncio.Event] = {}   # running job -> kill signal
+        self._listen_conn = None                      # SQLAlchemy AsyncConnection
+        self._listen_raw = None                       # its asyncpg connection
+        self._task: asyncio.Task | None = None
+        self._since_sweep = 0.0
+        self.flushes = 0                              # batched UPDATEs issued (loadtest stat)
+
+    # -- runner surface ---------------------------------------------------------------
+    def track(self, job_id: UUID) -> asyncio.Event:
+        """Register a running job; the returned Event is set when a kill arrives."""
+        return self._kills.setdefault(job_id, asyncio.Event())
+
+    def untrack(self, job_id: UUID) -> None:
+        self._kills.pop(job_id, None)
+        self._pending.pop(job_id, None)
+
+    def update(self, job_id: UUID, *, tokens: int, progress: int, credits_burned: int) -> None:
+        self._pending[job_id] = {"tokens": tokens, "progress": progress, "credits_burned": credits_burned}
+
+    def discard(self, job_id: UUID) -> None:
+        """Drop unflushed progress -- the caller is about to write the final state itself."""
+        self._pending.pop(job_id, None)
+
+    # -- lifecycle --------------------------------------------------------------------
+    async def start(self) -> None:
+        await self._listen()
+        self._task = asyncio.create_task(self._loop())
+
+    async def close(self) -> None:
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+        await self.flush()
+        await self._unlisten()
+
+    # -- internals --------------------------------------------------------------------
+    def _on_kill(self, _conn, _pid, _channel, payload: str) -> None:
+        try:
+            ev = self._kills.get(UUID(payload))
+        except ValueError:
+            return
+        if ev is not None:
+            ev.set()
+
+    async def _listen(self) -> None:
+        conn = None
+        try:
+            conn = await async_engine.connect()
+            raw = await conn.get_raw_connection()
+            await raw.driver_connection.add_listener(KILL_CHANNEL, self._on_kill)
+            self._listen_conn, self._listen_raw = conn, raw.driver_connection
+            logger.info(f"kill signals: LISTEN {KILL_CHANNEL}")
+        except Exception as e:  # noqa: BLE001 -- the sweep still catches kills
+            logger.warning(f"LISTEN {KILL_CHANNEL} unavailable, sweeping kill_requested instead: {e}")
+            if conn is not None:
+                await conn.close()
+
+    async def _unlisten(self) -> None:
+        if self._listen_conn is not None:
+            try:
+                await self._listen_conn.close()
+            except Exception:  # noqa: BLE001
+                pass
+            self._listen_conn = self._listen_raw = None
+
+    def _listening(self) -> bool:
+        return self._listen_raw is not None and not self._listen_raw.is_closed()
+
+    async def flush(self) -> None:
+        """Write every job's latest progress in ONE executemany UPDATE (one transaction)."""
+        if not self._pending:
+            return
+        batch, self._pending = self._pending, {}
+        jobs = ComputeJobModel.__table__
+        try:
+            async with AsyncSessionLocal() as db:
+                await db.execute(
+                    update(jobs)
+                    .where(jobs.c.id == bindparam("_id"), jobs.c.status == ComputeJobStatus.RUNNING)
+                    .values({f: bindparam(f"_{f}") for f in _PROGRESS_FIELDS}),
+                    [{"_id": jid, **{f"_{f}": v for f, v in fields.items()}} for jid, fields in batch.items()],
+                )
+                await db.commit()
+        except Exception:
+            for jid, fields in batch.items():      # retry next tick; newer values win
+                if jid in self._kills:
+                    self._pending.setdefault(jid, fields)
+            raise
+        self.flushes += 1
+
+    async def _sweep_kills(self) -> None:
+        live = [jid for jid, ev in self._kills.items() if not ev.is_set()]
+        if not live:
+            return
+        async with AsyncSessionLocal() as db:
+            killed = (await db.execute(
+                select(ComputeJobModel.id)
+                .where(ComputeJobModel.id.in_(live), ComputeJobModel.kill_requested == True)  # noqa: E712
+            )).scalars().all()
+        for jid in killed:
+            self._kills[jid].set()
+
+    async def _loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            try:
+                await self.flush()
+                self._since_sweep += self.flush_interval
+                listening = self._listening()
+                if not listening:
+                    await self._unlisten()
+                    await self._listen()
+                if not listening or self._since_sweep >= self.kill_sweep:
+                    self._since_sweep = 0.0
+                    await self._sweep_kills()
+            except Exception as e:  # noqa: BLE001 -- never let the writer die; retry next tick
+                logger.warning(f"progress flush skipped: {e}")
+
+
+progress_writer = ProgressWriter()
@@ -1,7 +1,8 @@
 # File: src/compute/runner.py
 # Purpose: LPCX job executor. Runs in the CONSUMER process (not the web app).
-# Short DB sessions only (never held across the brain call). Cross-process kill via
-# the kill_requested column. Brain SIMULATED by default (LPCX_REAL_BRAIN=1 -> Ollama).
+# Short DB sessions only (never held across the brain call). Per-step progress goes
+# through the coalescing progress_writer (batched UPDATEs); kills arrive pushed via
+# LISTEN lpcx_kill (see progress.py). Brain SIMULATED by default (LPCX_REAL_BRAIN=1 -> Ollama).
 
 import asyncio
 import logging
@@ -9,6 +10,7 @@ import os
 import random
 from uuid import UUID
 
+from src.compute.progress import progress_writer
 from src.db.database import AsyncSessionLocal
 from src.db.models.compute_model import (
     ComputeJobModel, ComputeJobStatus, ComputeLedgerKind,
@@ -49,46 +51,50 @@ async def _patch(job_id: UUID, **fields) -> None:
             await db.commit()
 
 
-async def _is_killed(job_id: UUID) -> bool:
-    async with AsyncSessionLocal() as db:
-        job = await db.get(ComputeJobModel, job_id)
-        return bool(job and job.kill_requested)
-
-
 async def execute_job(job_id: UUID, owner: str, node: str,
                       brain_mode: str = "shared",
                       byo_endpoint: str | None = None, byo_model: str | None = None) -> None:
     """Run one job to completion. Idempotent-ish: safe to re-deliver (at-least-once);
     a job already DONE/KILLED is skipped."""
     byo = brain_mode == "byo"
+    killed = progress_writer.track(job_id)   # before the read: no kill can fall in between
     try:
         async with AsyncSessionLocal() as db:
             job = await db.get(ComputeJobModel, job_id)
             if not job or job.status in (ComputeJobStatus.DONE, ComputeJobStatus.KILLED):
                 return
-        await _patch(job_id, status=ComputeJobStatus.RUNNING)
+            if job.kill_requested:             # killed while still queued
+                job.status = ComputeJobStatus.KILLED
+                job.reject_reason = "killed by requester"
+                await db.commit()
+                return
+            job.status = ComputeJobStatus.RUNNING
+            await db.commit()
 
         total = 0
         steps = 6
         for step in range(1, steps + 1):
-            if await _is_killed(job_id):
+            if killed.is_set():
+                progress_writer.discard(job_id)
                 await _patch(job_id, status=ComputeJobStatus.KILLED, reject_reason="killed by requester")
                 return
             toks = await _brain_step(f"{node}:step{step}",
                                      endpoint=byo_endpoint if byo else None,
                                      model=byo_model if byo else None)
             total += toks
-            await _patch(job_id,
-                         tokens=total,
-                         progress=min(100, round(step / steps * 100)),
-                         credits_burned=0 if byo else credits_for_tokens(total))
+            progress_writer.update(job_id,
+                                   tokens=total,
+                                   progress=min(100, round(step / steps * 100)),
+                                   credits_burned=0 if byo else credits_for_tokens(total))
 
+        progress_writer.discard(job_id)          # the final write below carries the totals
         async with AsyncSessionLocal() as db:
             job = await db.get(ComputeJobModel, job_id)
             if not job:
                 return
             job.status = ComputeJobStatus.DONE
             job.progress = 100
+            job.tokens = total
             if byo:
                 await post_ledger(db, owner, ComputeLedgerKind.SPEND, 0, job_id=job_id,
                                   counterparty="byo",
@@ -118,4 +124,7 @@ async def execute_job(job_id: UUID, owner: str, node: str,
             await db.commit()
     except Exception as e:  # noqa: BLE001
         logger.exception("job execution failed")
+        progress_writer.discard(job_id)
         await _patch(job_id, status=ComputeJobStatus.FAILED, reject_reason=str(e)[:200])
+    finally:
+        progress_writer.untrack(job_id)
@@ -0,0 +1,279 @@
+# File: src/compute/telemetry.py
+# Purpose: ONE in-process telemetry hub behind GET /compute/stream (web process).
+#
+# Every open stream used to poll Postgres once a second on its own: latest 12 jobs, every
+# QUEUED id (queue positions) and brain_load's three aggregates -- incl. SUM(tokens) over
+# the whole table. 50 dashboard tabs = 200+ queries/s for the same answer. Now:
+#   * the hub LISTENs on 'lpcx_jobs' (trigger on compute_jobs, database._COMPUTE_JOB_NOTIFY_DDL)
+#     and folds each row change into RUNNING COUNTERS: jobs per status, tokens total,
+#     running per owner, the queued line -- no re-aggregation of the table;
+#   * it refetches only the changed rows that belong in the 12-job window (one query);
+#   * it publishes at most once per LPCX_STREAM_MIN_GAP_S, only when something changed,
+#     serializing each message ONCE and fanning the identical string out to everyone;
+#   * subscribers get a full snapshot on connect, then deltas {upsert, remove, brain?}.
+# Counters re-seed from the aggregates every LPCX_STREAM_RESEED_S (self-heals a dropped
+# notification). Without LISTEN (no Postgres channel) it re-seeds once per tick instead --
+# still one computation per tick for all subscribers, never one per tab.
+# The hub runs only while someone is subscribed.
+
+import asyncio
+import json
+import logging
+import os
+import time
+from contextlib import asynccontextmanager
+from uuid import UUID
+
+from sqlalchemy import func, select
+
+from src.db.database import AsyncSessionLocal, async_engine
+from src.db.models.compute_model import ComputeJobModel, ComputeJobStatus
+from src.schemas.compute_schema import ComputeJobRead
+from src.services.compute_service import brain_payload
+
+logger = logging.getLogger("lpcx.telemetry")
+
+LPCX_STREAM_TICK_S = float(os.getenv("LPCX_STREAM_TICK_S", "1.0"))
+LPCX_STREAM_MIN_GAP_S = float(os.getenv("LPCX_STREAM_MIN_GAP_S", "0.25"))
+LPCX_STREAM_RESEED_S = float(os.getenv("LPCX_STREAM_RESEED_S", "60"))
+CHANGE_CHANNEL = "lpcx_jobs"
+WINDOW = 12            # jobs on the dashboard list
+_SUB_BACKLOG = 32      # messages a slow tab may lag before it is re-sent a snapshot
+
+
+def _sse(msg: dict) -> str:
+    return f"data: {json.dumps(msg, default=str)}\n\n"
+
+
+def _job_dict(job: ComputeJobModel) -> dict:
+    # keep SSE lean; UI fetches output via GET /jobs/{id}
+    return {**ComputeJobRead.model_validate(job).model_dump(mode="json"), "output": None}
+
+
+class TelemetryHub:
+    def __init__(self, tick: float = LPCX_STREAM_TICK_S, min_gap: float = LPCX_STREAM_MIN_GAP_S,
+                 reseed_every: float = LPCX_STREAM_RESEED_S, window: int = WINDOW):
+        self.tick = tick
+        self.min_gap = min_gap
+        self.reseed_every = reseed_every
+        self.window = window
+        self._subs: set[asyncio.Queue] = set()
+        self._fresh: set[asyncio.Queue] = set()       # subscribers still owed a snapshot
+        self._task: asyncio.Task | None = None
+        self._changed = asyncio.Event()
+        self._seeding = False
+        self._listen_conn = None
+        self._listen_raw = None
+        self._reset()
+
+    def _reset(self) -> None:
+        self._counts: dict[str, int] = {}             # status -> jobs
+        self._tokens = 0                              # SUM(tokens), all jobs
+        self._running_by: dict[str, int] = {}         # owner -> running jobs
+        self._queued: dict[str, float] = {}           # queued job id -> created_at (epoch)
+        self._jobs: dict[str, dict] = {}              # window: id -> job dict
+        self._jobs_at: dict[str, float] = {}          # window: id -> created_at (epoch)
+        self._dirty: set[str] = set()                 # changed ids the window must refetch
+        self._state: dict | None = None               # last published {brain, jobs, queue_total}
+
+    # -- subscribers ------------------------------------------------------------------
+    @asynccontextmanager
+    async def subscribe(self):
+        """A queue of ready-to-send SSE strings: a snapshot first, then deltas."""
+        q: asyncio.Queue = asyncio.Queue(maxsize=_SUB_BACKLOG)
+        self._subs.add(q)
+        if self._state is not None:
+            q.put_nowait(self._snapshot())
+        else:
+            self._fresh.add(q)
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+        try:
+            yield q
+        finally:
+            self._subs.discard(q)
+            self._fresh.discard(q)
+
+    def _offer(self, q: asyncio.Queue, msg: str) -> None:
+        if q.full():                 # too slow to keep up: drop its backlog, resync it
+            while not q.empty():
+                q.get_nowait()
+            self._fresh.add(q)
+            return
+        q.put_nowait(msg)
+
+    # -- change feed ------------------------------------------------------------------
+    def _on_change(self, _conn, _pid, _channel, payload: str) -> None:
+        try:
+            d = json.loads(payload)
+        except ValueError:
+            return
+        jid, old, new, owner = str(d["id"]), d.get("old"), d.get("new"), d.get("owner")
+        at = float(d.get("created_at") or 0)
+        if not self._seeding:        # mid-seed: the seed's own reads decide; next re-seed settles it
+            if old != new:
+                if old:
+                    self._counts[old] = max(0, self._counts.get(old, 0) - 1)
+                self._counts[new] = self._counts.get(new, 0) + 1
+                if old == ComputeJobStatus.RUNNING.value:
+                    left = self._running_by.get(owner, 0) - 1
+                    if left > 0:
+                        self._running_by[owner] = left
+                    else:
+                        self._running_by.pop(owner, None)
+                if new == ComputeJobStatus.RUNNING.value:
+                    self._running_by[owner] = self._running_by.get(owner, 0) + 1
+                if old == ComputeJobStatus.QUEUED.value:
+                    self._queued.pop(jid, None)
+                if new == ComputeJobStatus.QUEUED.value:
+                    self._queued[jid] = at
+            self._tokens += int(d.get("dtok") or 0)
+        if (jid in self._jobs or len(self._jobs) < self.window
+                or at >= min(self._jobs_at.values(), default=0)):
+            self._dirty.add(jid)
+        self._changed.set()
+
+    async def _listen(self) -> None:
+        conn = None
+        try:
+            conn = await async_engine.connect()
+            raw = await conn.get_raw_connection()
+            await raw.driver_connection.add_listener(CHANGE_CHANNEL, self._on_change)
+            self._listen_conn, self._listen_raw = conn, raw.driver_connection
+        except Exception as e:  # noqa: BLE001 -- fall back to one re-seed per tick
+            logger.warning(f"LISTEN {CHANGE_CHANNEL} unavailable, re-seeding per tick: {e}")
+            if conn is not None:
+                await conn.close()
+
+    async def _unlisten(self) -> None:
+        if self._listen_conn is not None:
+            try:
+                await self._listen_conn.close()
+            except Exception:  # noqa: BLE001
+                pass
+            self._listen_conn = self._listen_raw = None
+
+    def _listening(self) -> bool:
+        return self._listen_raw is not None and not self._listen_raw.is_closed()
+
+    # -- state ------------------------------------------------------------------------
+    async def _reseed(self) -> None:
+        """Counters + window from the aggregates (the only full-table reads, now rare)."""
+        self._seeding = True
+        self._dirty.clear()          # rows changing DURING the seed get re-marked + refetched
+        try:
+            async with AsyncSessionLocal() as db:
+                counts = {r.status.value: r.c for r in await db.execute(
+                    select(ComputeJobModel.status, func.count().label("c")).group_by(ComputeJobModel.status))}
+                tokens = (await db.execute(
+                    select(func.coalesce(func.sum(ComputeJobModel.tokens), 0)))).scalar() or 0
+                running_by = {r.owner: r.c for r in await db.execute(
+                    select(ComputeJobModel.owner, func.count().label("c"))
+                    .where(ComputeJobModel.status == ComputeJobStatus.RUNNING)
+                    .group_by(ComputeJobModel.owner))}
+                queued = {str(r.id): r.created_at.timestamp() for r in await db.execute(
+                    select(ComputeJobModel.id, ComputeJobModel.created_at)
+                    .where(ComputeJobModel.status == ComputeJobStatus.QUEUED))}
+                jobs = (await db.execute(
+                    select(ComputeJobModel).order_by(ComputeJobModel.created_at.desc()).limit(self.window)
+                )).scalars().all()
+        finally:
+            self._seeding = False
+        self._counts, self._tokens, self._running_by, self._queued = counts, int(tokens), running_by, queued
+        self._jobs = {str(j.id): _job_dict(j) for j in jobs}
+        self._jobs_at = {str(j.id): j.created_at.timestamp() for j in jobs}
+
+    async def _refresh_dirty(self) -> None:
+        ids, self._dirty = self._dirty, set()
+        try:
+            async with AsyncSessionLocal() as db:
+                rows = (await db.execute(
+                    select(ComputeJobModel).where(ComputeJobModel.id.in_([UUID(i) for i in ids]))
+                )).scalars().all()
+        except Exception:
+            self._dirty |= ids
+            raise
+        for j in rows:
+            self._jobs[str(j.id)] = _job_dict(j)
+            self._jobs_at[str(j.id)] = j.created_at.timestamp()
+        for jid in sorted(self._jobs_at, key=self._jobs_at.get, reverse=True)[self.window:]:
+            self._jobs.pop(jid, None)
+            self._jobs_at.pop(jid, None)
+
+    def _view(self) -> dict:
+        # FIFO position among all QUEUED jobs (1-based). Approximate ETA -- fairness can
+        # let a less-busy user jump ahead; it's your place in line.
+        pos = {jid: i + 1 for i, jid in enumerate(sorted(self._queued, key=self._queued.get))}
+        jobs = []
+        for jid in sorted(self._jobs_at, key=self._jobs_at.get, reverse=True):
+            d = self._jobs[jid]
+            if d["status"] == ComputeJobStatus.QUEUED.value:
+                d = {**d, "queue_position": pos.get(jid, 0)}
+            jobs.append(d)
+        return {"brain": brain_payload(self._counts, self._tokens, self._running_by),
+                "jobs": jobs, "queue_total": len(self._queued)}
+
+    def _snapshot(self) -> str:
+        return _sse({"type": "snapshot", **self._state})
+
+    def _publish(self) -> None:
+        prev, self._state = self._state, self._view()
+        delta = None
+        if prev is not None:
+            before = {j["id"]: j for j in prev["jobs"]}
+            now_ids = {j["id"] for j in self._state["jobs"]}
+            msg = {"type": "delta",
+                   "upsert": [j for j in self._state["jobs"] if before.get(j["id"]) != j],
+                   "remove": [i for i in before if i not in now_ids],
+                   "queue_total": self._state["queue_total"]}
+            if self._state["brain"] != prev["brain"]:
+                msg["brain"] = self._state["brain"]
+            if msg["upsert"] or msg["remove"] or "brain" in msg or msg["queue_total"] != prev["queue_total"]:
+                delta = _sse(msg)
+        snapshot = self._snapshot() if self._fresh else None
+        for q in list(self._subs):
+            if q in self._fresh:
+                self._fresh.discard(q)
+                self._offer(q, snapshot)
+            elif delta is not None:
+                self._offer(q, delta)
+
+    # -- loop -------------------------------------------------------------------------
+    async def _run(self) -> None:
+        try:
+            await self._listen()
+            await self._reseed()
+            seeded = time.monotonic()
+            self._publish()
+            while self._subs:
+                try:
+                    await asyncio.wait_for(self._changed.wait(), timeout=self.tick)
+                except asyncio.TimeoutError:
+                    pass
+                self._changed.clear()
+                try:
+                    listening = self._listening()
+                    if not listening:
+                        await self._unlisten()
+                        await self._listen()
+                    if not listening or time.monotonic() - seeded >= self.reseed_every:
+                        await self._reseed()
+                        seeded = time.monotonic()
+                    elif self._dirty:
+                        await self._refresh_dirty()
+                    self._publish()
+                except Exception as e:  # noqa: BLE001 -- a DB blip must not kill every stream
+                    logger.warning(f"telemetry tick skipped: {e}")
+                await asyncio.sleep(self.min_gap)     # coalesce a burst of changes
+        except Exception as e:  # noqa: BLE001
+            logger.warning(f"telemetry hub stopped: {e}")
+            await asyncio.sleep(self.tick)           # no hot restart loop while the DB is down
+        finally:
+            await self._unlisten()
+            self._reset()
+            if self._subs:           # someone subscribed while we were winding down
+                self._fresh |= self._subs
+                self._task = asyncio.create_task(self._run())
+
+
+telemetry_hub = TelemetryHub()
@@ -0,0 +1,62 @@
+"""Startup timing — how long each boot phase took, so time-to-ready can be measured and shrunk.
+
+The lifespan wraps every phase (DB init, MinIO, each seeder, ...) in `report.phase(name)`; when the
+app is ready it logs one table, slowest first, and keeps the report on `app.state.boot_report`
+(served at GET /health/boot). Phases that overlap (concurrent seeders) are timed individually, so the
+table shows both each seeder's cost and the wall-clock the boot actually spent.
+"""
+import logging
+import time
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+
+logger = logging.getLogger("helix.boot")
+
+
+@dataclass
+class BootPhase:
+    name: str
+    seconds: float = 0.0
+    status: str = "ok"            # ok | failed | skipped
+    detail: str = ""
+
+
+@dataclass
+class BootReport:
+    started: float = field(default_factory=time.perf_counter)
+    ready_after: float | None = None
+    phases: list[BootPhase] = field(default_factory=list)
+
+    @asynccontextmanager
+    async def phase(self, name: str):
+        """Time a phase. An exception marks it failed and propagates — the caller decides whether
+        a failure blocks boot (today none do)."""
+        p = BootPhase(name)
+        self.phases.append(p)
+        t0 = time.perf_counter()
+        try:
+            yield p
+        except Exception as e:
+            p.status, p.detail = "failed", str(e)[:200]
+            raise
+        finally:
+            p.seconds = time.perf_counter() - t0
+
+    def add(self, name: str, seconds: float, status: str = "ok", detail: str = "") -> None:
+        self.phases.append(BootPhase(name, seconds, status, detail))
+
+    def skip(self, name: str, detail: str = "") -> None:
+        self.add(name, 0.0, "skipped", detail)
+
+    def mark_ready(self) -> None:
+        self.ready_after = time.perf_counter() - self.started
+        lines = [f"  {p.seconds:7.3f}s  {p.status:<7}  {p.name}" + (f"  ({p.detail})" if p.detail else "")
+                 for p in sorted(self.phases, key=lambda p: -p.seconds)]
+        logger.info(f"⏱️ Boot ready in {self.ready_after:.3f}s — phases (slowest first):\n" + "\n".join(lines))
+
+    def as_dict(self) -> dict:
+        return {
+            "ready_after_s": round(self.ready_after, 3) if self.ready_after is not None else None,
+            "phases": [{"name": p.name, "seconds": round(p.seconds, 3), "status": p.status, "detail": p.detail}
+                       for p in self.phases],
+        }
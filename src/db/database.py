@@ -1,6 +1,8 @@
 import contextvars
+import hashlib
 import logging
 import os
+import time
 from contextlib import asynccontextmanager, contextmanager
 from typing import AsyncGenerator, Iterator, Optional
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, AsyncEngine
@@ -130,13 +132,36 @@ async def get_db_session_context() -> AsyncGenerator[AsyncSession, None]:
 # ================================================================
 # 🧱 INITIALIZATION
 # ================================================================
-async def init_db_tables() -> None:
-    """Ensure all ORM models are registered and create missing tables."""
-    async with async_engine.begin() as conn:
-        logger.info("Checking database for missing tables and attempting creation...")
-        await conn.run_sync(Base.metadata.create_all)
-    await _ensure_lightweight_columns()
+async def init_db_tables() -> dict:
+    """Ensure all ORM models are registered and create missing tables.
+
+    Returns per-step timings (seconds) for the boot report."""
+    timings: dict = {}
+    t0 = time.perf_counter()
+    applied = await _applied_schema_ledger()
+    timings["schema_ledger"] = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    tables_key = _metadata_fingerprint()
+    if tables_key in applied:
+        logger.info("Schema fingerprint unchanged -- skipping create_all().")
+    else:
+        async with async_engine.begin() as conn:
+            logger.info("Checking database for missing tables and attempting creation...")
+            await conn.run_sync(Base.metadata.create_all)
+            await _record_applied(conn, tables_key)
+    timings["create_all"] = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    await _ensure_lightweight_columns(applied)
+    timings["additive_ddl"] = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    from src.services.search_documents import ensure_search_documents
+    await ensure_search_documents()
+    timings["search_documents"] = time.perf_counter() - t0
     logger.info("✅ Database table initialization complete.")
+    return timings
 
 
 # Idempotent, additive-only column migrations for tables that already exist.
@@ -206,6 +231,11 @@ _ADDITIVE_COLUMNS: list[str] = [
     # 'wholesale' = your COST, 'retail' = a competitor's MARKET price, 'both'. Every existing
     # supplier backfills to 'wholesale' (they're where you buy); tag the retail/both ones after.
     "ALTER TABLE suppliers ADD COLUMN IF NOT EXISTS supplier_role VARCHAR(12) NOT NULL DEFAULT 'wholesale'",
+    # Live supplier search (2026-10-17): the homepage-sniffed platform is cached on the row
+    # instead of re-sniffed per search. NULLABLE -- NULL = not sniffed yet, so existing rows
+    # simply sniff once on their next search.
+    "ALTER TABLE suppliers ADD COLUMN IF NOT EXISTS detected_platform VARCHAR(40)",
+    "ALTER TABLE suppliers ADD COLUMN IF NOT EXISTS platform_checked_at TIMESTAMP",
     # Banco store profile (2026-06-22): hours + social links on store_settings.
     "ALTER TABLE store_settings ADD COLUMN IF NOT EXISTS opening_hours VARCHAR(500)",
     "ALTER TABLE store_settings ADD COLUMN IF NOT EXISTS facebook_url VARCHAR(255)",
@@ -293,6 +323,9 @@ _ADDITIVE_COLUMNS: list[str] = [
     "ALTER TABLE products ADD COLUMN IF NOT EXISTS qr_url VARCHAR(500)",
     "ALTER TABLE products ADD COLUMN IF NOT EXISTS work_note TEXT",
     "CREATE INDEX IF NOT EXISTS ix_products_product_group ON products (product_group)",
+    # Offline-till change feed (migration 016) -- stamped by _CATALOG_FEED_DDL's trigger.
+    "ALTER TABLE products ADD COLUMN IF NOT EXISTS catalog_version BIGINT",
+    "CREATE INDEX IF NOT EXISTS ix_products_catalog_version ON products (catalog_version)",
     "CREATE INDEX IF NOT EXISTS ix_products_source_id ON products (source_id)",
     # Supplier Registry (2026-06-30, migration 011): formalize each import SOURCE as a
     # supplier row keyed by a unique SKU prefix (TAM-=Tamar/Artemis, FTW-=FourTwenty,
@@ -315,6 +348,338 @@ _ADDITIVE_COLUMNS: list[str] = [
 ]
 
 
+# Till search document (product_search_docs, migration 012): the normalized inputs of the
+# /pos/search ranking, kept current by triggers so search never recomputes them per row.
+# search_synonym_terms mirrors SYNONYM_CONCEPTS (synced at boot by services/search_documents.py);
+# a doc's category_terms/name_terms are the terms its lower(category)/lower(name) contain.
+# Spliced into _DDL_MIGRATIONS after pg_trgm; migration 012 applies the same list.
+_SEARCH_DOC_DDL: list[str] = [
+    "CREATE TABLE IF NOT EXISTS search_synonym_terms (term TEXT PRIMARY KEY)",
+    """
+    CREATE OR REPLACE FUNCTION public.product_search_doc_refresh(pid uuid) RETURNS void
+     LANGUAGE sql
+    AS $function$
+        INSERT INTO product_search_docs AS d (product_id, name, body, sku, barcode, supplier, category,
+            category_terms, name_terms, first_image_id, is_active, updated_at)
+        SELECT p.id, lower(p.name),
+               lower(coalesce(p.name,'') || ' ' || coalesce(p.description,'')),
+               lower(coalesce(p.sku,'')), lower(coalesce(p.barcode,'')),
+               lower(coalesce(p.supplier_name,'')), lower(coalesce(p.category,'')),
+               coalesce((SELECT jsonb_agg(s.term ORDER BY s.term) FROM search_synonym_terms s
+                         WHERE strpos(lower(coalesce(p.category,'')), s.term) > 0), '[]'::jsonb),
+               coalesce((SELECT jsonb_agg(s.term ORDER BY s.term) FROM search_synonym_terms s
+                         WHERE strpos(lower(p.name), s.term) > 0), '[]'::jsonb),
+               (SELECT pi.id FROM product_images pi WHERE pi.product_id = p.id
+                 ORDER BY pi.sort_order, pi.created_at LIMIT 1),
+               p.is_active, now()
+        FROM products p
+        WHERE p.id = pid
+        ON CONFLICT (product_id) DO UPDATE SET
+            name = EXCLUDED.name, body = EXCLUDED.body, sku = EXCLUDED.sku,
+            barcode = EXCLUDED.barcode, supplier = EXCLUDED.supplier, category = EXCLUDED.category,
+            category_terms = EXCLUDED.category_terms, name_terms = EXCLUDED.name_terms,
+            first_image_id = EXCLUDED.first_image_id, is_active = EXCLUDED.is_active,
+            updated_at = EXCLUDED.updated_at
+    $function$
+    """,
+    """
+    CREATE OR REPLACE FUNCTION public.trg_product_search_doc() RETURNS trigger
+     LANGUAGE plpgsql
+    AS $function$
+    BEGIN
+        IF TG_TABLE_NAME = 'products' THEN
+            PERFORM product_search_doc_refresh(NEW.id);
+        ELSE
+            -- product_images: a photo added/removed/reordered can change the first image.
+            IF TG_OP <> 'INSERT' THEN
+                PERFORM product_search_doc_refresh(OLD.product_id);
+            END IF;
+            IF TG_OP <> 'DELETE' AND (TG_OP = 'INSERT' OR NEW.product_id IS DISTINCT FROM OLD.product_id) THEN
+                PERFORM product_search_doc_refresh(NEW.product_id);
+            END IF;
+        END IF;
+        RETURN NULL;
+    END;
+    $function$
+    """,
+    # Only the searchable columns fire it — a stock decrement at checkout never rewrites a doc.
+    """
+    DO $$
+    BEGIN
+        IF NOT EXISTS (SELECT 1 FROM pg_trigger WHERE tgname = 'trg_products_search_doc') THEN
+            CREATE TRIGGER trg_products_search_doc
+                AFTER INSERT OR UPDATE OF name, description, sku, barcode, supplier_name, category, is_active
+                ON products FOR EACH ROW EXECUTE FUNCTION trg_product_search_doc();
+        END IF;
+        IF NOT EXISTS (SELECT 1 FROM pg_trigger WHERE tgname = 'trg_product_images_search_doc') THEN
+            CREATE TRIGGER trg_product_images_search_doc
+                AFTER INSERT OR UPDATE OF product_id, sort_order OR DELETE
+                ON product_images FOR EACH ROW EXECUTE FUNCTION trg_product_search_doc();
+        END IF;
+    END $$;
+    """,
+    "CREATE INDEX IF NOT EXISTS ix_search_docs_name_trgm ON product_search_docs USING gin (name gin_trgm_ops)",
+    "CREATE INDEX IF NOT EXISTS ix_search_docs_body_trgm ON product_search_docs USING gin (body gin_trgm_ops)",
+    "CREATE INDEX IF NOT EXISTS ix_search_docs_sku_trgm ON product_search_docs USING gin (sku gin_trgm_ops)",
+    "CREATE INDEX IF NOT EXISTS ix_search_docs_barcode_trgm ON product_search_docs USING gin (barcode gin_trgm_ops)",
+    "CREATE INDEX IF NOT EXISTS ix_search_docs_supplier_trgm ON product_search_docs USING gin (supplier gin_trgm_ops)",
+    "CREATE INDEX IF NOT EXISTS ix_search_docs_category_terms ON product_search_docs USING gin (category_terms)",
+    "CREATE INDEX IF NOT EXISTS ix_search_docs_name_terms ON product_search_docs USING gin (name_terms)",
+]
+
+
+# LPCX live telemetry (migration 014): every visible change to a compute_jobs row NOTIFYs
+# 'lpcx_jobs' with its status transition + token delta (and node, so parked /worker/next
+# long-polls wake -- migration 015), so the /compute/stream hub keeps
+# running counters and refetches only the rows that moved (src/compute/telemetry.py).
+# Progress flushes are batched (src/compute/progress.py), so this fires ~once/s per job.
+_COMPUTE_JOB_NOTIFY_DDL: list[str] = [
+    """
+    CREATE OR REPLACE FUNCTION public.trg_compute_job_notify() RETURNS trigger
+     LANGUAGE plpgsql
+    AS $function$
+    BEGIN
+        PERFORM pg_notify('lpcx_jobs', json_build_object(
+            'id', NEW.id,
+            'owner', NEW.owner,
+            'node', NEW.node,
+            'created_at', extract(epoch FROM NEW.created_at),
+            'old', CASE WHEN TG_OP = 'UPDATE' THEN OLD.status::text END,
+            'new', NEW.status::text,
+            'tok', NEW.tokens,
+            'dtok', NEW.tokens - CASE WHEN TG_OP = 'UPDATE' THEN OLD.tokens ELSE 0 END
+        )::text);
+        RETURN NULL;
+    END;
+    $function$
+    """,
+    """
+    DO $$
+    BEGIN
+        IF NOT EXISTS (SELECT 1 FROM pg_trigger WHERE tgname = 'trg_compute_jobs_notify') THEN
+            CREATE TRIGGER trg_compute_jobs_notify
+                AFTER INSERT OR UPDATE OF status, progress, tokens, credits_burned, reject_reason,
+                    node, brain_model, output_type
+                ON compute_jobs FOR EACH ROW EXECUTE FUNCTION trg_compute_job_notify();
+        END IF;
+    END $$;
+    """,
+]
+
+
+# LPCX atomic claims (migration 015): GET /compute/worker/next takes
+# `... WHERE node = ? AND status = 'queued' ORDER BY job_number FOR UPDATE SKIP LOCKED`.
+# A partial index keeps that a short index scan however many finished jobs pile up.
+_COMPUTE_JOB_CLAIM_DDL: list[str] = [
+    """
+    CREATE INDEX IF NOT EXISTS ix_compute_jobs_claim
+        ON compute_jobs (node, job_number) WHERE status = 'queued'
+    """,
+]
+
+
+# Offline-till catalog change feed (migration 016): every till-visible product change takes
+# a fresh number from ONE sequence, so GET /pos/catalog/changes?since=<n> is an index range
+# scan (services/catalog_feed.py). Alias rows bump their product; a hard delete leaves a
+# tombstone. Writers hold a SHARED advisory lock (CATALOG_FEED_LOCK) from version stamp to
+# commit; the feed briefly takes it EXCLUSIVE to read a head below which nothing is in flight
+# -- so a till's cursor never steps over a version that commits late.
+CATALOG_FEED_LOCK = 0x63617467      # 'catg'
+_CATALOG_FEED_DDL: list[str] = [
+    "CREATE SEQUENCE IF NOT EXISTS catalog_version_seq",
+    """
+    CREATE TABLE IF NOT EXISTS catalog_tombstones (
+        product_id UUID PRIMARY KEY,
+        catalog_version BIGINT NOT NULL,
+        deleted_at TIMESTAMPTZ NOT NULL DEFAULT now()
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS ix_catalog_tombstones_catalog_version ON catalog_tombstones (catalog_version)",
+    f"""
+    CREATE OR REPLACE FUNCTION public.catalog_version_next() RETURNS bigint
+     LANGUAGE plpgsql
+    AS $function$
+    BEGIN
+        PERFORM pg_advisory_xact_lock_shared({CATALOG_FEED_LOCK});
+        RETURN nextval('catalog_version_seq');
+    END;
+    $function$
+    """,
+    """
+    CREATE OR REPLACE FUNCTION public.trg_product_catalog_version() RETURNS trigger
+     LANGUAGE plpgsql
+    AS $function$
+    BEGIN
+        IF TG_OP = 'INSERT' OR (NEW.sku, NEW.name, NEW.barcode, NEW.price, NEW.price_tiers::text,
+                NEW.tier_mode, NEW.category, NEW.product_class, NEW.is_active,
+                NEW.is_age_restricted, NEW.image_url)
+            IS DISTINCT FROM (OLD.sku, OLD.name, OLD.barcode, OLD.price, OLD.price_tiers::text,
+                OLD.tier_mode, OLD.category, OLD.product_class, OLD.is_active,
+                OLD.is_age_restricted, OLD.image_url) THEN
+            NEW.catalog_version := catalog_version_next();
+        END IF;
+        RETURN NEW;
+    END;
+    $function$
+    """,
+    """
+    CREATE OR REPLACE FUNCTION public.trg_product_barcode_catalog_version() RETURNS trigger
+     LANGUAGE plpgsql
+    AS $function$
+    BEGIN
+        IF TG_OP <> 'INSERT' THEN
+            UPDATE products SET catalog_version = catalog_version_next() WHERE id = OLD.product_id;
+        END IF;
+        IF TG_OP <> 'DELETE' AND (TG_OP = 'INSERT' OR NEW.product_id IS DISTINCT FROM OLD.product_id) THEN
+            UPDATE products SET catalog_version = catalog_version_next() WHERE id = NEW.product_id;
+        END IF;
+        RETURN NULL;
+    END;
+    $function$
+    """,
+    """
+    CREATE OR REPLACE FUNCTION public.trg_product_catalog_tombstone() RETURNS trigger
+     LANGUAGE plpgsql
+    AS $function$
+    BEGIN
+        INSERT INTO catalog_tombstones (product_id, catalog_version, deleted_at)
+        VALUES (OLD.id, catalog_version_next(), now())
+        ON CONFLICT (product_id) DO UPDATE
+            SET catalog_version = EXCLUDED.catalog_version, deleted_at = EXCLUDED.deleted_at;
+        RETURN NULL;
+    END;
+    $function$
+    """,
+    # Only the columns the till mirrors fire it -- a stock decrement at checkout is not a change.
+    """
+    DO $$
+    BEGIN
+        IF NOT EXISTS (SELECT 1 FROM pg_trigger WHERE tgname = 'trg_products_catalog_version') THEN
+            CREATE TRIGGER trg_products_catalog_version
+                BEFORE INSERT OR UPDATE OF sku, name, barcode, price, price_tiers, tier_mode, category,
+                    product_class, is_active, is_age_restricted, image_url
+                ON products FOR EACH ROW EXECUTE FUNCTION trg_product_catalog_version();
+        END IF;
+        IF NOT EXISTS (SELECT 1 FROM pg_trigger WHERE tgname = 'trg_product_barcodes_catalog_version') THEN
+            CREATE TRIGGER trg_product_barcodes_catalog_version
+                AFTER INSERT OR UPDATE OF product_id, barcode OR DELETE
+                ON product_barcodes FOR EACH ROW EXECUTE FUNCTION trg_product_barcode_catalog_version();
+        END IF;
+        IF NOT EXISTS (SELECT 1 FROM pg_trigger WHERE tgname = 'trg_products_catalog_tombstone') THEN
+            CREATE TRIGGER trg_products_catalog_tombstone
+                AFTER DELETE ON products FOR EACH ROW EXECUTE FUNCTION trg_product_catalog_tombstone();
+        END IF;
+    END $$;
+    """,
+    # Backfill: rows that predate the trigger (no-op once every row carries a version).
+    "UPDATE products SET catalog_version = nextval('catalog_version_seq') WHERE catalog_version IS NULL",
+]
+
+
+
+# Standing barcode-integrity findings (migration 019, services/barcode_integrity.py). The seal
+# sweep reads barcode_integrity_findings; these triggers queue every barcode / product name a
+# write could change a finding for, and barcode_integrity.refresh recomputes just those. Only the
+# columns a finding depends on fire them -- a stock decrement is not an integrity event.
+_BARCODE_INTEGRITY_DDL: list[str] = [
+    """
+    CREATE OR REPLACE FUNCTION public.trg_product_barcode_integrity() RETURNS trigger
+     LANGUAGE plpgsql
+    AS $function$
+    BEGIN
+        IF TG_OP <> 'INSERT' THEN
+            INSERT INTO barcode_integrity_dirty (barcode, name, full_sweep, created_at)
+            VALUES (NULLIF(OLD.barcode, ''), lower(OLD.name), false, now());
+        END IF;
+        IF TG_OP <> 'DELETE' AND (TG_OP = 'INSERT' OR (NEW.barcode, NEW.name) IS DISTINCT FROM (OLD.barcode, OLD.name)) THEN
+            INSERT INTO barcode_integrity_dirty (barcode, name, full_sweep, created_at)
+            VALUES (NULLIF(NEW.barcode, ''), lower(NEW.name), false, now());
+        END IF;
+        RETURN NULL;
+    END;
+    $function$
+    """,
+    """
+    CREATE OR REPLACE FUNCTION public.trg_product_alias_integrity() RETURNS trigger
+     LANGUAGE plpgsql
+    AS $function$
+    BEGIN
+        IF TG_OP <> 'INSERT' THEN
+            INSERT INTO barcode_integrity_dirty (barcode, full_sweep, created_at) VALUES (OLD.barcode, false, now());
+        END IF;
+        IF TG_OP <> 'DELETE' THEN
+            INSERT INTO barcode_integrity_dirty (barcode, full_sweep, created_at) VALUES (NEW.barcode, false, now());
+        END IF;
+        RETURN NULL;
+    END;
+    $function$
+    """,
+    """
+    DO $$
+    BEGIN
+        IF NOT EXISTS (SELECT 1 FROM pg_trigger WHERE tgname = 'trg_products_barcode_integrity') THEN
+            CREATE TRIGGER trg_products_barcode_integrity
+                AFTER INSERT OR UPDATE OF barcode, name, is_active OR DELETE
+                ON products FOR EACH ROW EXECUTE FUNCTION trg_product_barcode_integrity();
+        END IF;
+        IF NOT EXISTS (SELECT 1 FROM pg_trigger WHERE tgname = 'trg_product_barcodes_integrity') THEN
+            CREATE TRIGGER trg_product_barcodes_integrity
+                AFTER INSERT OR UPDATE OF barcode, product_id OR DELETE
+                ON product_barcodes FOR EACH ROW EXECUTE FUNCTION trg_product_alias_integrity();
+        END IF;
+    END $$;
+    """,
+    # First deploy: nothing has been verified yet -- queue one full re-verification.
+    """
+    INSERT INTO barcode_integrity_dirty (full_sweep, created_at)
+    SELECT true, now()
+    WHERE NOT EXISTS (SELECT 1 FROM barcode_integrity_findings)
+      AND NOT EXISTS (SELECT 1 FROM barcode_integrity_dirty WHERE full_sweep)
+    """,
+]
+
+# Content-addressed gallery photos (migration 020, services/product_images.py): which stored
+# renditions a product_images row has. NULL hash = a pre-020 row on its legacy single object.
+_PRODUCT_IMAGE_DDL: list[str] = [
+    "ALTER TABLE product_images ADD COLUMN IF NOT EXISTS content_hash VARCHAR(64)",
+    "ALTER TABLE product_images ADD COLUMN IF NOT EXISTS variants JSONB",
+    "CREATE INDEX IF NOT EXISTS ix_product_images_content_hash ON product_images (content_hash)",
+]
+
+# Till member lookup (migration 018, services/customer_search.py). One normalized search
+# text per customer -- lower(handle, real name, instagram, email) + the phone as digits with a
+# Swiss national "0" folded to "41", so "079 123 45 67" and "+41 79 123 45 67" are one number --
+# under a trigram GIN index (contains + fuzzy), plus lower(handle) text_pattern_ops for the
+# exact/prefix ranks and the case-insensitive uniqueness checks. IMMUTABLE so they can be
+# indexed; the query must call customer_search_text(...) with the same columns to use it.
+_CUSTOMER_SEARCH_DDL: list[str] = [
+    """
+    CREATE OR REPLACE FUNCTION public.customer_phone_norm(p text) RETURNS text
+     LANGUAGE sql IMMUTABLE PARALLEL SAFE
+    AS $function$
+        SELECT CASE WHEN d LIKE '00%' THEN substr(d, 3)
+                    WHEN d LIKE '0%'  THEN '41' || substr(d, 2)
+                    ELSE d END
+        FROM (SELECT regexp_replace(coalesce(p, ''), '[^0-9]', '', 'g') AS d) s
+    $function$
+    """,
+    """
+    CREATE OR REPLACE FUNCTION public.customer_search_text(
+        handle text, real_name text, instagram text, email text, phone text) RETURNS text
+     LANGUAGE sql IMMUTABLE PARALLEL SAFE
+    AS $function$
+        SELECT lower(coalesce(handle, '') || ' ' || coalesce(real_name, '') || ' ' ||
+                     coalesce(instagram, '') || ' ' || coalesce(email, '')) || ' ' || public.customer_phone_norm(phone)
+    $function$
+    """,
+    """
+    CREATE INDEX IF NOT EXISTS ix_customers_search_trgm ON customers
+        USING gin (customer_search_text(handle, real_name, instagram, email, phone) gin_trgm_ops)
+    """,
+    "CREATE INDEX IF NOT EXISTS ix_customers_handle_lower ON customers (lower(handle) text_pattern_ops)",
+]
+
+
 # Idempotent DDL that must exist on EVERY env (the migration-not-gated lesson:
 # this was only ever set up on local, so POS fuzzy search 500'd on staging/prod).
 # CREATE EXTENSION / OR REPLACE FUNCTION are safe to re-run on a shared DB.
@@ -332,6 +697,13 @@ _DDL_MIGRATIONS: list[str] = [
     "CREATE EXTENSION IF NOT EXISTS pg_trgm",
     # GIN trigram index keeps fuzzy/ILIKE name search fast on a big (thousands) catalog.
     "CREATE INDEX IF NOT EXISTS ix_products_name_trgm ON products USING gin (name gin_trgm_ops)",
+    *_SEARCH_DOC_DDL,
+    *_COMPUTE_JOB_NOTIFY_DDL,
+    *_COMPUTE_JOB_CLAIM_DDL,
+    *_CATALOG_FEED_DDL,
+    *_CUSTOMER_SEARCH_DDL,
+    *_BARCODE_INTEGRITY_DDL,
+    *_PRODUCT_IMAGE_DDL,
     # Category list for the search filter (the /search/categories endpoint expects this
     # view; it was missing -> 500, same pattern as search_products).
     """
@@ -444,15 +816,75 @@ _DEMO_DDL: list[str] = [
 ]
 
 
-async def _ensure_lightweight_columns() -> None:
-    """Run the additive ALTERs above. Each is independent and forgiving -- one failure
-    (e.g. table not created yet on a brand-new DB) must not block the others or boot."""
+# Boot schema ledger: every statement above that has run successfully is recorded by the
+# hash of its text, and so is a fingerprint of the ORM metadata (tables/columns/indexes).
+# A restart reads the whole ledger in ONE query and only runs what is new or changed --
+# so a redeploy no longer re-issues ~100 ALTER/CREATE statements (each briefly locking a
+# hot table) nor create_all's per-table existence checks. Editing a statement changes its
+# hash, so it runs again; a failed one is not recorded and is retried on the next boot.
+# The ledger lives IN the database it describes, so a dropped/restored DB re-runs the lot.
+# HX_SCHEMA_REAPPLY=true ignores it (e.g. after dropping a column by hand).
+_SCHEMA_LEDGER_DDL = """
+CREATE TABLE IF NOT EXISTS schema_boot_ledger (
+    stmt_hash  TEXT PRIMARY KEY,
+    applied_at TIMESTAMPTZ NOT NULL DEFAULT now()
+)
+"""
+
+
+def _stmt_hash(stmt: str) -> str:
+    return hashlib.sha256(" ".join(stmt.split()).encode()).hexdigest()
+
+
+def _metadata_fingerprint() -> str:
+    """Hash of every mapped table's shape: a new model, column or index changes it."""
+    parts = []
+    for t in sorted(Base.metadata.tables.values(), key=lambda t: t.name):
+        parts.append(t.name)
+        parts += [f"{c.name}:{c.type!r}:{c.nullable}" for c in t.columns]
+        parts += sorted(i.name or "" for i in t.indexes)
+    return "metadata:" + hashlib.sha256("\n".join(parts).encode()).hexdigest()
+
+
+async def _applied_schema_ledger() -> set[str]:
+    """Hashes of everything already applied to this DB (empty when forced or unreadable)."""
+    if os.getenv("HX_SCHEMA_REAPPLY", "false").strip().lower() in ("true", "1", "yes"):
+        logger.warning("HX_SCHEMA_REAPPLY set -- re-running every boot DDL statement.")
+        return set()
+    try:
+        async with async_engine.begin() as conn:
+            return set((await conn.execute(text("SELECT stmt_hash FROM schema_boot_ledger"))).scalars())
+    except Exception:
+        # First boot of this code (or a fresh DB): make the ledger, start from nothing.
+        try:
+            async with async_engine.begin() as conn:
+                await conn.execute(text(_SCHEMA_LEDGER_DDL))
+        except Exception as e:  # pragma: no cover - defensive, never block startup
+            logger.warning(f"schema ledger unavailable, running all boot DDL: {e}")
+        return set()
+
+
+async def _record_applied(conn, key: str) -> None:
+    await conn.execute(text(
+        "INSERT INTO schema_boot_ledger (stmt_hash) VALUES (:h) ON CONFLICT (stmt_hash) DO NOTHING"), {"h": key})
+
+
+async def _ensure_lightweight_columns(applied: set[str] = frozenset()) -> None:
+    """Run the additive ALTERs above that aren't in the ledger yet. Each is independent and
+    forgiving -- one failure (e.g. table not created yet on a brand-new DB) must not block the
+    others or boot. Demo content is re-run every boot (cheap, ON CONFLICT) and never recorded."""
     seed_demo = os.getenv("HX_SEED_DEMO", "true").strip().lower() not in ("false", "0", "no")
-    statements = _ADDITIVE_COLUMNS + _DDL_MIGRATIONS + (_DEMO_DDL if seed_demo else [])
-    for stmt in statements:
+    schema = [(stmt, _stmt_hash(stmt)) for stmt in _ADDITIVE_COLUMNS + _DDL_MIGRATIONS]
+    pending = [(stmt, h) for stmt, h in schema if h not in applied]
+    logger.info(f"Boot DDL: {len(schema) - len(pending)} of {len(schema)} statement(s) already "
+                f"applied, running {len(pending)}.")
+    pending += [(stmt, None) for stmt in (_DEMO_DDL if seed_demo else [])]
+    for stmt, h in pending:
         try:
             async with async_engine.begin() as conn:
                 await conn.execute(text(stmt))
+                if h is not None:
+                    await _record_applied(conn, h)
         except Exception as e:  # pragma: no cover - defensive, never block startup
             logger.warning(f"additive migration skipped ({stmt[:60].strip()}...): {e}")
 
@@ -13,7 +13,9 @@ from .refresh_token_model import RefreshTokenModel
 from .user_model import UserModel
 
 # POS Models (Felix's Artemis Store)
-from .product_model import ProductModel, ProductBarcodeModel, ProductImageModel, ProductTranslationModel
+from .product_model import (ProductModel, ProductBarcodeModel, ProductImageModel, ProductTranslationModel,
+                            ProductSearchDocModel, CatalogTombstoneModel, BarcodeIntegrityFindingModel,
+                            BarcodeIntegrityDirtyModel)
 from .reference_product_model import ReferenceProductModel  # BL-97 reference catalog (product master)
 from .pos_stock_movement_model import PosStockMovementModel
 from .transaction_model import TransactionModel, TransactionStatus, PaymentMethod
@@ -45,6 +47,17 @@ from .cash_shift_model import (
     CashShiftModel, CashShiftStatus, CashMovementModel, CashMovementKind,
 )
 
+# Daily sales rollup -- the running Z-report (one row per day x cashier)
+from .sales_rollup_model import DailySalesRollupModel
+
+# Sales facts -- one denormalized row per sold line, for range reports
+from .sales_fact_model import SalesFactModel
+
+# Transaction numbering -- per-store/day counter + offline number blocks
+from .transaction_counter_model import (
+    TransactionCounterModel, TransactionNumberBlockModel, TransactionNumberClaimModel,
+)
+
 # E2E Track & Trace Models (THE SPINE)
 from .farm_model import FarmModel, FarmType
 from .batch_model import BatchModel, BatchStatus, FreshnessRule
@@ -123,6 +136,10 @@ __all__ = [
     "ProductBarcodeModel",
     "ProductImageModel",
     "ProductTranslationModel",
+    "ProductSearchDocModel",
+    "CatalogTombstoneModel",
+    "BarcodeIntegrityFindingModel",
+    "BarcodeIntegrityDirtyModel",
     "ReferenceProductModel",
     "PosStockMovementModel",
     "TransactionModel",
@@ -164,6 +181,14 @@ __all__ = [
     "CashShiftStatus",
     "CashMovementModel",
     "CashMovementKind",
+    # Daily sales rollup
+    "DailySalesRollupModel",
+    # Sales facts
+    "SalesFactModel",
+    # Transaction numbering
+    "TransactionCounterModel",
+    "TransactionNumberBlockModel",
+    "TransactionNumberClaimModel",
     # E2E Track & Trace Models (THE SPINE)
     "FarmModel",
     "FarmType",
@@ -124,7 +124,7 @@ class ComputeJobModel(Base):
     )
     kill_requested: Mapped[bool] = mapped_column(
         Boolean, nullable=False, default=False,
-        comment="Cross-process kill flag -- the consumer polls this between steps",
+        comment="Cross-process kill flag -- pushed to the consumer via pg_notify, swept as a fallback",
     )
     created_at: Mapped[datetime] = mapped_column(
         DateTime(timezone=True),
@@ -7,7 +7,7 @@ For demo: manually seed 5-10 items.
 from sqlalchemy.dialects.postgresql import UUID, JSONB
 import uuid
 from datetime import datetime, timezone
-from sqlalchemy import String, DateTime, Numeric, Integer, Boolean, Text, ForeignKey, UniqueConstraint
+from sqlalchemy import String, DateTime, Numeric, Integer, BigInteger, Boolean, Text, ForeignKey, UniqueConstraint
 from sqlalchemy.orm import relationship, Mapped, mapped_column
 
 from .base import Base
@@ -339,6 +339,16 @@ class ProductModel(Base):
         comment="Banco-owned permalink for the item's QR (SHARE rail — postcard / La Piazza on-ramp)"
     )
 
+    # Offline-till change feed (migration 016): stamped from catalog_version_seq by the
+    # trg_products_catalog_version trigger whenever a till-visible column or an alias changes.
+    # GET /pos/catalog/changes?since=<n> serves every row above the till's cursor.
+    catalog_version: Mapped[int | None] = mapped_column(
+        BigInteger,
+        index=True,
+        nullable=True,
+        comment="Catalog change-feed version (DB-assigned, monotonically increasing)"
+    )
+
     # Timestamps
     created_at: Mapped[datetime] = mapped_column(
         DateTime(timezone=True),
@@ -427,10 +437,12 @@ class ProductImageModel(Base):
     Product photos — one product, many pictures (the gallery).
 
     For ~100%-unmarked head-shop goods the PHOTO is the label: a couple of angles
-    is how you recognise an item in the catalogue later. The bytes live in MinIO at
-    `pos-products/{product_id}/{id}.jpg`; this row is the index + ordering. The
-    product's cover stays on products.image_url (points at the chosen image's serve
-    URL, or an external paste).
+    is how you recognise an item in the catalogue later. The bytes live in MinIO under
+    their content address — `pos-images/{h[:2]}/{content_hash}/{size}.{fmt}`, one object
+    per served size/format (services/product_images.py); rows from before that carry no
+    hash and keep the single `pos-products/{product_id}/{id}.jpg`. This row is the index +
+    ordering. The product's cover stays on products.image_url (points at the chosen
+    image's serve URL, or an external paste).
     """
     __tablename__ = 'product_images'
 
@@ -451,6 +463,17 @@ class ProductImageModel(Base):
         nullable=False,
         comment="Display order in the gallery; lower = first",
     )
+    content_hash: Mapped[str | None] = mapped_column(
+        String(64),
+        index=True,
+        nullable=True,
+        comment="SHA-256 of the uploaded bytes — the MinIO address of its renditions (NULL = legacy key)",
+    )
+    variants: Mapped[dict | None] = mapped_column(
+        JSONB,
+        nullable=True,
+        comment='Stored renditions → bytes, e.g. {"thumb.jpg": 9120, "thumb.webp": 6210, ...}',
+    )
     created_at: Mapped[datetime] = mapped_column(
         DateTime(timezone=True),
         default=lambda: datetime.now(timezone.utc),
@@ -540,3 +563,132 @@ class ProductTranslationModel(Base):
 
     def __repr__(self):
         return f"<ProductTranslationModel(product_id='{self.product_id}', lang='{self.lang}')>"
+
+
+class ProductSearchDocModel(Base):
+    """
+    The till search document — one row per product, MAINTAINED BY THE DATABASE.
+
+    `/pos/search` used to evaluate similarity(), word_similarity() over `name || ' ' || description`,
+    six ILIKEs and a correlated product_images subquery on every row, every keystroke. This row holds
+    the already-normalized inputs of that ranking (lowercased name, name+description body, codes,
+    supplier), the synonym terms (BL-101) its category and name contain and the precomputed first gallery image,
+    each under its own trigram/GIN index — so search latency stays flat as the catalog grows.
+
+    Never written from Python: the `trg_products_search_doc` / `trg_product_images_search_doc`
+    triggers (database._DDL_MIGRATIONS) upsert it on every product/photo write, and
+    services/search_documents.py backfills + re-expands category terms when the synonym list changes.
+    """
+    __tablename__ = 'product_search_docs'
+
+    product_id: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True),
+        ForeignKey('products.id', ondelete='CASCADE'),
+        primary_key=True,
+    )
+    name: Mapped[str] = mapped_column(Text, nullable=False, default="",
+                                      comment="lower(name)")
+    body: Mapped[str] = mapped_column(Text, nullable=False, default="",
+                                      comment="lower(name || ' ' || description) — the word_similarity target")
+    sku: Mapped[str] = mapped_column(Text, nullable=False, default="", comment="lower(sku)")
+    barcode: Mapped[str] = mapped_column(Text, nullable=False, default="", comment="lower(barcode)")
+    supplier: Mapped[str] = mapped_column(Text, nullable=False, default="", comment="lower(supplier_name)")
+    category: Mapped[str] = mapped_column(Text, nullable=False, default="", comment="lower(category)")
+    category_terms: Mapped[list] = mapped_column(
+        JSONB,
+        nullable=False,
+        default=list,
+        comment="Synonym terms (BL-101) contained in lower(category) — `?|` stands in for category ILIKE ANY",
+    )
+    name_terms: Mapped[list] = mapped_column(
+        JSONB,
+        nullable=False,
+        default=list,
+        comment="Synonym terms (BL-101) contained in lower(name) — `?|` stands in for name ILIKE ANY",
+    )
+    first_image_id: Mapped[uuid.UUID | None] = mapped_column(
+        UUID(as_uuid=True),
+        nullable=True,
+        comment="First gallery photo (sort_order, created_at) — the list-avatar fallback",
+    )
+    is_active: Mapped[bool] = mapped_column(Boolean, nullable=False, default=True)
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True),
+        default=lambda: datetime.now(timezone.utc),
+        nullable=False,
+    )
+
+    def __repr__(self):
+        return f"<ProductSearchDocModel(product_id='{self.product_id}')>"
+
+
+class CatalogTombstoneModel(Base):
+    """
+    A deleted product, as the offline till's change feed sees it.
+
+    Tills mirror the catalog in IndexedDB and pull only what changed since their cursor
+    (GET /pos/catalog/changes). A hard-deleted product leaves no row to report, so the
+    `trg_products_catalog_tombstone` trigger records its id here under a fresh catalog version;
+    the feed hands it out as a delete. Never written from Python.
+    """
+    __tablename__ = 'catalog_tombstones'
+
+    product_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), primary_key=True)
+    catalog_version: Mapped[int] = mapped_column(BigInteger, index=True, nullable=False)
+    deleted_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True),
+        default=lambda: datetime.now(timezone.utc),
+        nullable=False,
+    )
+
+    def __repr__(self):
+        return f"<CatalogTombstoneModel(product_id='{self.product_id}', v={self.catalog_version})>"
+
+
+class BarcodeIntegrityFindingModel(Base):
+    """
+    One standing barcode-integrity finding (GET /pos/integrity/sweep).
+
+    The seal sweep used to recompute everything per call (every primary + alias barcode grouped,
+    every active name loaded). Findings now live here, one row per (kind, barcode), and are kept
+    current from `barcode_integrity_dirty` by services/barcode_integrity.py — the sweep reads rows.
+    kind: 'collision' (code on >1 product), 'stranded_inactive' (a discontinued row holds the code
+    and a live row has the same name), 'renamed_twin' (same, but the live name is only similar).
+    """
+    __tablename__ = 'barcode_integrity_findings'
+    __table_args__ = (UniqueConstraint('kind', 'barcode', name='uq_barcode_integrity_findings_kind_barcode'),)
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+    kind: Mapped[str] = mapped_column(String(32), nullable=False)
+    barcode: Mapped[str] = mapped_column(String(100), nullable=False, index=True)
+    detail: Mapped[dict] = mapped_column(JSONB, nullable=False,
+        comment="The finding as the sweep returns it (products / row / twin)")
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True),
+        default=lambda: datetime.now(timezone.utc),
+        nullable=False,
+    )
+
+    def __repr__(self):
+        return f"<BarcodeIntegrityFindingModel({self.kind} {self.barcode})>"
+
+
+class BarcodeIntegrityDirtyModel(Base):
+    """
+    A barcode or product name whose findings must be recomputed.
+
+    Written by the barcode-integrity triggers on products / product_barcodes (database.py); `full_sweep`
+    asks for a complete re-verification (first boot, on demand). Drained — and deleted — by
+    barcode_integrity.refresh.
+    """
+    __tablename__ = 'barcode_integrity_dirty'
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+    barcode: Mapped[str | None] = mapped_column(String(100), nullable=True)
+    name: Mapped[str | None] = mapped_column(Text, nullable=True, comment="lower(products.name)")
+    full_sweep: Mapped[bool] = mapped_column(Boolean, nullable=False, default=False)
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True),
+        default=lambda: datetime.now(timezone.utc),
+        nullable=False,
+    )
@@ -0,0 +1,76 @@
+# File: src/db/models/sales_fact_model.py
+"""
+SalesFactModel — one row per sold line, denormalized for range reports.
+
+The product / category sales reports used to pull every completed transaction id of the range into
+Python and send it back as `line_items.transaction_id IN (...)` — on a quarter or a year, tens of
+thousands of bound parameters per query, then a join to products for the name and category. This
+table is the line items as a report wants them: the shop-local day, the product, its name and
+category AS SOLD, the cashier, the customer, the VAT code, consumption and the giveaway flag, so a
+report is one indexed range scan on (business_date, …) with nothing to join.
+
+Append-only, fed inside the sale's own DB transaction (services/sales_facts.py) by the same paths
+that feed the daily rollup: legacy checkout, atomic /sales (and the offline batch), and refund. A
+full refund appends the sale's rows negated (kind='refund') on the sale's own day, so a refunded
+sale nets to zero where it was booked; a partial refund keeps the lines, as the line reports always
+have. History from before the table is backfilled by a boot seeder.
+"""
+import uuid
+from datetime import date, datetime, timezone
+from decimal import Decimal
+
+from sqlalchemy import Boolean, Date, DateTime, Index, Integer, Numeric, String, Text
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.orm import Mapped, mapped_column
+
+from .base import Base
+
+
+class SalesFactModel(Base):
+    """One sold line (kind='sale') or its reversal (kind='refund')."""
+    __tablename__ = "sales_facts"
+    __table_args__ = (
+        Index("ix_sales_facts_day_product", "business_date", "product_id"),
+        Index("ix_sales_facts_day_category", "business_date", "category"),
+    )
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+    business_date: Mapped[date] = mapped_column(Date, nullable=False,
+        comment="Shop-local calendar day (SHOP_TZ) the sale completed on — refunds included")
+    sold_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
+    kind: Mapped[str] = mapped_column(String(8), nullable=False, default="sale",
+        comment="sale | refund (a full refund's negated copy of the sale's rows)")
+
+    transaction_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), nullable=False, index=True)
+    transaction_number: Mapped[str | None] = mapped_column(String(50), nullable=True)
+    line_no: Mapped[int] = mapped_column(Integer, nullable=False, default=0,
+        comment="Position of the line in its sale (pairs a refund row with its sale row)")
+    cashier_id: Mapped[uuid.UUID | None] = mapped_column(UUID(as_uuid=True), nullable=True)
+    customer_id: Mapped[uuid.UUID | None] = mapped_column(UUID(as_uuid=True), nullable=True)
+
+    product_id: Mapped[uuid.UUID | None] = mapped_column(UUID(as_uuid=True), nullable=True,
+        comment="NULL for a custom (off-catalog) line")
+    name: Mapped[str] = mapped_column(Text, nullable=False,
+        comment="Product name as sold, or the custom line's text")
+    category: Mapped[str] = mapped_column(String(100), nullable=False, default="Uncategorized")
+
+    quantity: Mapped[int] = mapped_column(Integer, nullable=False)
+    revenue: Mapped[Decimal] = mapped_column(Numeric(12, 2), nullable=False,
+        comment="The line total (gross, as on the receipt)")
+    vat_amount: Mapped[Decimal] = mapped_column(Numeric(10, 2), nullable=False, default=0)
+    vat_rate: Mapped[Decimal | None] = mapped_column(Numeric(4, 2), nullable=True)
+    vat_code: Mapped[str | None] = mapped_column(String(16), nullable=True,
+        comment="The tenant rate table's code for vat_rate (unmatched → the default code)")
+    consumption: Mapped[str] = mapped_column(String(16), nullable=False, default="dine_in")
+    is_giveaway: Mapped[bool] = mapped_column(Boolean, nullable=False, default=False)
+    unit_cost: Mapped[Decimal | None] = mapped_column(Numeric(10, 2), nullable=True,
+        comment="Product cost at the time of sale (COGS)")
+
+    recorded_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True),
+        default=lambda: datetime.now(timezone.utc),
+        nullable=False,
+    )
+
+    def __repr__(self):
+        return f"<SalesFactModel({self.business_date} {self.kind} {self.name} x{self.quantity})>"
@@ -0,0 +1,64 @@
+# File: src/db/models/sales_rollup_model.py
+"""
+DailySalesRollupModel - the Z-report, kept running instead of recomputed.
+
+One row per (shop-local business day, cashier). Every sale-completion path (legacy checkout,
+atomic /sales) and the refund path fold their money into the row INSIDE the sale's own DB
+transaction (services/sales_rollup.py), so the daily summary, its Banana CSV and the status-bar
+pulse read a handful of rows instead of re-walking every sale + line of the day.
+
+The buckets are JSON maps so a new payment method / VAT code / product needs no migration:
+  payments   {"CASH": "123.40", "TWINT": "18.00", ...}
+  vat        {"turnover_standard": ..., "vat_standard": ..., "turnover_reduced": ...,
+              "vat_reduced": ..., "streams": {code: {code,label,rate,turnover,vat}}}
+  products   {"<product uuid>" | "~<custom line name>": units}   (giveaways excluded)
+  hours      {"14": 3, ...}   completed sales per shop-local hour
+Money is stored as decimal STRINGS (never floats) so the running sums stay cent-exact.
+
+A day with ANY row is authoritative; a day with none (history before the rollup shipped) is
+summarized from the raw lines. The reconcile job rebuilds a day from raw lines and diffs it.
+"""
+import uuid
+from datetime import date, datetime, timezone
+
+from sqlalchemy import Date, DateTime, ForeignKey, Integer, Numeric, UniqueConstraint
+from sqlalchemy.dialects.postgresql import UUID, JSONB
+from sqlalchemy.orm import Mapped, mapped_column
+
+from .base import Base
+
+
+class DailySalesRollupModel(Base):
+    """One cashier's completed sales for one shop-local day, pre-aggregated."""
+    __tablename__ = "daily_sales_rollups"
+    __table_args__ = (
+        UniqueConstraint("business_date", "cashier_id", name="uq_daily_sales_rollups_day_cashier"),
+    )
+
+    id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    business_date: Mapped[date] = mapped_column(Date, nullable=False, index=True,
+        comment="Shop-local calendar day (SHOP_TZ) the sales completed on")
+    cashier_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), ForeignKey("users.id"),
+        nullable=False)
+
+    txn_count: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    total_sales: Mapped[float] = mapped_column(Numeric(12, 2), nullable=False, default=0)
+    vat_total: Mapped[float] = mapped_column(Numeric(12, 2), nullable=False, default=0)
+    giveaway_count: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    giveaway_cost: Mapped[float] = mapped_column(Numeric(12, 2), nullable=False, default=0,
+        comment="Treats' cost (COGS) at the time they were given")
+
+    payments: Mapped[dict] = mapped_column(JSONB, nullable=False, default=dict)
+    vat: Mapped[dict] = mapped_column(JSONB, nullable=False, default=dict)
+    products: Mapped[dict] = mapped_column(JSONB, nullable=False, default=dict)
+    hours: Mapped[dict] = mapped_column(JSONB, nullable=False, default=dict)
+
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True),
+        default=lambda: datetime.now(timezone.utc),
+        onupdate=lambda: datetime.now(timezone.utc),
+        nullable=False,
+    )
+
+    def __repr__(self):
+        return f"<DailySalesRollupModel({self.business_date} cashier={self.cashier_id} n={self.txn_count})>"
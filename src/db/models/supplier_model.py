@@ -72,6 +72,19 @@ class SupplierModel(Base):
                 "'retail' = a competitor's MARKET price, 'both' = a site that is both "
                 "(e.g. fourtwenty.ch = public retail shop AND our dropship supplier)."
     )
+    # Live supplier search: the platform SNIFFED from the homepage when adapter_type isn't a
+    # web platform, cached on the row so a search doesn't re-fetch the homepage every time.
+    # '' = sniffed, nothing supported; NULL = never sniffed (or the website/type changed).
+    detected_platform: Mapped[Optional[str]] = mapped_column(
+        String(40),
+        nullable=True,
+        comment="Sniffed web platform for live search ('' = none found, NULL = not sniffed yet)"
+    )
+    platform_checked_at: Mapped[Optional[datetime]] = mapped_column(
+        DateTime,
+        nullable=True,
+        comment="When detected_platform was sniffed (naive UTC, like updated_at) -- re-sniffed when stale"
+    )
     # Trade/wholesale discount OFF RETAIL, as a percent (0-100). When set, receiving
     # auto-fills the cost from the shelf price: cost = retail × (1 − pct/100). This is
     # the Ecolution model — Sylvie sells at her Etsy RETAIL price, Felix pays 70% of it
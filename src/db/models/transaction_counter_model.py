@@ -0,0 +1,82 @@
+# File: src/db/models/transaction_counter_model.py
+"""
+Transaction numbering — the per-store, per-day receipt counter and its offline blocks.
+
+TXN-YYYYMMDD-NNNN used to be made by COUNTING today's transactions (a LIKE scan per sale) and
+adding one — two tills ringing at once read the same count and one lost on the unique index.
+Now every number comes from ONE counter row per (store, day), bumped with a single
+UPDATE ... RETURNING inside the sale's own DB transaction (services/txn_numbering.py):
+
+  • O(1): a primary-key row, no scan;
+  • contention-safe: the row lock queues concurrent tills instead of letting them collide;
+  • gap-free: a sale that rolls back rolls its number back with it.
+
+An offline till can reserve a BLOCK of numbers ahead of time (transaction_number_blocks); the
+block is carved off the same counter, so numbers stay unique, and the fiscal audit reports any
+reserved number that was never rung as reserved-unused rather than as a gap. A reserved number
+is claimed (transaction_number_claims) with one INSERT ... ON CONFLICT DO NOTHING when its sale
+arrives, so two uploads of the same number cannot both pass the check.
+"""
+from datetime import date, datetime, timezone
+
+from sqlalchemy import Date, DateTime, Integer, String
+from sqlalchemy.orm import Mapped, mapped_column
+
+from .base import Base
+
+
+class TransactionCounterModel(Base):
+    """The last transaction sequence handed out for one store on one day."""
+    __tablename__ = "transaction_counters"
+
+    store_number: Mapped[int] = mapped_column(Integer, primary_key=True)
+    day: Mapped[date] = mapped_column(Date, primary_key=True)
+    last_number: Mapped[int] = mapped_column(Integer, nullable=False, default=0,
+        comment="Highest sequence allocated (rung or reserved) for this store/day")
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True),
+        default=lambda: datetime.now(timezone.utc),
+        onupdate=lambda: datetime.now(timezone.utc),
+        nullable=False,
+    )
+
+    def __repr__(self):
+        return f"<TransactionCounter(store={self.store_number}, day={self.day}, last={self.last_number})>"
+
+
+class TransactionNumberBlockModel(Base):
+    """A contiguous run of numbers reserved for an offline till to ring without the server."""
+    __tablename__ = "transaction_number_blocks"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+    store_number: Mapped[int] = mapped_column(Integer, nullable=False)
+    day: Mapped[date] = mapped_column(Date, nullable=False, index=True)
+    first_number: Mapped[int] = mapped_column(Integer, nullable=False)
+    last_number: Mapped[int] = mapped_column(Integer, nullable=False)
+    issued_to: Mapped[str] = mapped_column(String(100), nullable=False,
+        comment="Cashier (users.id as text) allowed to ring these numbers")
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True),
+        default=lambda: datetime.now(timezone.utc),
+        nullable=False,
+    )
+
+    def __repr__(self):
+        return (f"<TransactionNumberBlock(store={self.store_number}, day={self.day}, "
+                f"{self.first_number}-{self.last_number}, to={self.issued_to})>")
+
+
+class TransactionNumberClaimModel(Base):
+    """A reserved number that a sale has rung — the primary key makes the claim first-wins."""
+    __tablename__ = "transaction_number_claims"
+
+    transaction_number: Mapped[str] = mapped_column(String(50), primary_key=True)
+    issued_to: Mapped[str] = mapped_column(String(100), nullable=False)
+    claimed_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True),
+        default=lambda: datetime.now(timezone.utc),
+        nullable=False,
+    )
+
+    def __repr__(self):
+        return f"<TransactionNumberClaim({self.transaction_number}, to={self.issued_to})>"
@@ -10,18 +10,42 @@
 #
 # Self-contained on purpose: only httpx + stdlib, no src.core imports, so the same
 # module is safe to lift into any in-tree caller without dragging the app with it.
+#
+# Connections: callers that don't pass a client share ONE pooled AsyncClient per backend
+# (base_url) per event loop -- keep-alive, HTTP/2 when `h2` is installed -- instead of a TCP+TLS
+# handshake per turn. Each target (backend + model) is capped at LLM_MAX_CONCURRENCY in-flight
+# calls. Deterministic calls (temperature=0) may opt into a content-addressed TTL/LRU cache
+# (cache_ttl=...): same backend, model, messages and format -> the model is skipped entirely.
+#
+# stream_llm is the same call with `stream: true`: content deltas as they arrive, then the
+# final LLMResult (tokens for billing) -- interactive turns show text at first token.
 
 from __future__ import annotations
 
 import asyncio
+import hashlib
+import json
 import logging
+import os
+import time
+import weakref
+from collections import OrderedDict
+from collections.abc import AsyncIterator
 from dataclasses import dataclass
 
 import httpx
 
+try:  # HTTP/2 is an optional extra (httpx[http2]); HTTP/1.1 keep-alive without it
+    import h2  # noqa: F401
+    _HTTP2 = os.getenv("LLM_HTTP2", "1") != "0"
+except ImportError:
+    _HTTP2 = False
+
 logger = logging.getLogger("helix.llm")
 
 DEFAULT_TIMEOUT = 180.0
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "8"))   # in-flight calls per target
+LLM_CACHE_MAX = int(os.getenv("LLM_CACHE_MAX", "512"))             # cached completions (LRU)
 
 # Transient failures worth retrying: rate-limit + the 5xx family + network blips. A throttled
 # Turbo (429) was the single point of failure we hit in practice -- ride it out with bounded backoff
@@ -65,6 +89,108 @@ class LLMResult:
     text: str
     tokens: int            # prompt_eval_count + eval_count == LPCX brain-tokens (for billing/eval)
     model: str             # what actually answered -- for logging, A/B, credit accounting
+    cached: bool = False   # served from the response cache: no brain call, tokens == 0
+
+
+# --- shared connections ---------------------------------------------------------------
+# Keyed by event loop: an AsyncClient's connections belong to the loop that opened them.
+class _Pool:
+    def __init__(self) -> None:
+        self.clients: dict[str, httpx.AsyncClient] = {}         # base_url -> client
+        self.slots: dict[tuple[str, str], asyncio.Semaphore] = {}  # (base_url, model) -> cap
+
+
+_pools: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, _Pool]" = weakref.WeakKeyDictionary()
+
+
+def _pool() -> _Pool:
+    loop = asyncio.get_running_loop()
+    pool = _pools.get(loop)
+    if pool is None:
+        pool = _pools[loop] = _Pool()
+    return pool
+
+
+def _shared_client(target: ModelTarget) -> httpx.AsyncClient:
+    pool = _pool()
+    key = target.base_url.rstrip("/")
+    client = pool.clients.get(key)
+    if client is None or client.is_closed:
+        client = pool.clients[key] = httpx.AsyncClient(
+            timeout=target.timeout,
+            http2=_HTTP2,
+            limits=httpx.Limits(max_connections=LLM_MAX_CONCURRENCY * 2,
+                                max_keepalive_connections=LLM_MAX_CONCURRENCY,
+                                keepalive_expiry=60.0),
+        )
+    return client
+
+
+def _slot(target: ModelTarget) -> asyncio.Semaphore:
+    pool = _pool()
+    key = (target.base_url.rstrip("/"), target.model)
+    sem = pool.slots.get(key)
+    if sem is None:
+        sem = pool.slots[key] = asyncio.Semaphore(LLM_MAX_CONCURRENCY)
+    return sem
+
+
+async def aclose_clients() -> None:
+    """Close this loop's pooled clients (app shutdown)."""
+    pool = _pools.pop(asyncio.get_running_loop(), None)
+    if pool is not None:
+        for client in pool.clients.values():
+            await client.aclose()
+
+
+# --- response cache (deterministic calls only) ----------------------------------------
+_cache: "OrderedDict[str, tuple[float, LLMResult]]" = OrderedDict()   # key -> (expires, result)
+
+
+def _cache_key(url: str, body: dict) -> str:
+    return hashlib.sha256(json.dumps([url, body], sort_keys=True, default=str).encode()).hexdigest()
+
+
+def _cache_get(key: str) -> LLMResult | None:
+    hit = _cache.get(key)
+    if hit is None:
+        return None
+    if hit[0] < time.monotonic():
+        del _cache[key]
+        return None
+    _cache.move_to_end(key)
+    return hit[1]
+
+
+def _cache_put(key: str, res: LLMResult, ttl: float) -> None:
+    _cache[key] = (time.monotonic() + ttl, res)
+    _cache.move_to_end(key)
+    while len(_cache) > LLM_CACHE_MAX:
+        _cache.popitem(last=False)
+
+
+def clear_cache() -> None:
+    _cache.clear()
+
+
+def _chat_request(user: str, target: ModelTarget, system: str, json_mode: bool,
+                  schema: dict | None, temperature: float | None, *, stream: bool) -> tuple[str, dict, dict]:
+    """(url, body, headers) for one /api/chat call -- the request contract, in ONE place."""
+    messages = []
+    if system:
+        messages.append({"role": "system", "content": system})
+    messages.append({"role": "user", "content": user})
+
+    body: dict = {"model": target.model, "messages": messages, "stream": stream}
+    if schema is not None:
+        body["format"] = schema          # enforce the outbound Service Interface
+    elif json_mode:
+        body["format"] = "json"
+    if temperature is not None:
+        body["options"] = {"temperature": temperature}
+
+    headers = {"Authorization": f"Bearer {target.api_key}"} if target.api_key else {}
+    return f"{target.base_url.rstrip('/')}/api/chat", body, headers
 
 
 async def run_llm(
@@ -75,6 +201,8 @@ async def run_llm(
     json_mode: bool = False,
     schema: dict | None = None,
     client: httpx.AsyncClient | None = None,
+    temperature: float | None = None,
+    cache_ttl: float | None = None,
 ) -> LLMResult:
     """One async chat call to an Ollama-compatible /api/chat endpoint.
 
@@ -83,54 +211,112 @@ async def run_llm(
     json_mode -- ask for free-form JSON (`format: "json"`)
     schema  -- a JSON Schema ENFORCED on the model (Ollama structured outputs);
                takes precedence over json_mode so the outbound shape can't drift
-    client  -- pass an open AsyncClient to reuse a connection across calls; if
-               omitted, a client is created and closed for this single call.
+    client  -- pass an open AsyncClient to use it; if omitted, the shared pooled
+               client for target.base_url is used (kept alive across calls).
+    temperature -- sent as options.temperature when set (None = the model's default)
+    cache_ttl -- seconds to cache this answer; honoured only for deterministic calls
+               (temperature=0). A hit skips the model: cached=True, tokens=0.
     """
-    messages = []
-    if system:
-        messages.append({"role": "system", "content": system})
-    messages.append({"role": "user", "content": user})
+    url, body, headers = _chat_request(user, target, system, json_mode, schema, temperature, stream=False)
 
-    body: dict = {"model": target.model, "messages": messages, "stream": False}
-    if schema is not None:
-        body["format"] = schema          # enforce the outbound Service Interface
-    elif json_mode:
-        body["format"] = "json"
+    key = _cache_key(url, body) if cache_ttl and temperature == 0 else None
+    if key is not None:
+        hit = _cache_get(key)
+        if hit is not None:
+            return LLMResult(text=hit.text, tokens=0, model=hit.model, cached=True)
 
-    headers = {"Authorization": f"Bearer {target.api_key}"} if target.api_key else {}
-    url = f"{target.base_url.rstrip('/')}/api/chat"
-
-    owns = client is None
-    if owns:
-        client = httpx.AsyncClient(timeout=target.timeout)
-    try:
-        data = None
-        for attempt in range(_MAX_RETRIES + 1):
-            try:
+    if client is None:
+        client = _shared_client(target)
+    slot = _slot(target)
+    data = None
+    for attempt in range(_MAX_RETRIES + 1):
+        try:
+            async with slot:
                 r = await client.post(url, json=body, headers=headers, timeout=target.timeout)
-            except (httpx.TimeoutException, httpx.TransportError) as e:
-                if attempt < _MAX_RETRIES:
-                    delay = _retry_delay(None, attempt)
-                    logger.warning("brain %s transient %s; retry %d/%d in %.1fs",
-                                   target.model, type(e).__name__, attempt + 1, _MAX_RETRIES, delay)
-                    await asyncio.sleep(delay)
-                    continue
-                raise
-            if r.status_code in _RETRY_STATUSES and attempt < _MAX_RETRIES:
-                delay = _retry_delay(r, attempt)
+        except (httpx.TimeoutException, httpx.TransportError) as e:
+            if attempt < _MAX_RETRIES:
+                delay = _retry_delay(None, attempt)
                 logger.warning("brain %s transient %s; retry %d/%d in %.1fs",
-                               target.model, r.status_code, attempt + 1, _MAX_RETRIES, delay)
+                               target.model, type(e).__name__, attempt + 1, _MAX_RETRIES, delay)
                 await asyncio.sleep(delay)
                 continue
-            r.raise_for_status()      # raises on 4xx (incl. final 429) / unretried 5xx
-            data = r.json()
-            break
-    finally:
-        if owns:
-            await client.aclose()
+            raise
+        if r.status_code in _RETRY_STATUSES and attempt < _MAX_RETRIES:
+            delay = _retry_delay(r, attempt)
+            logger.warning("brain %s transient %s; retry %d/%d in %.1fs",
+                           target.model, r.status_code, attempt + 1, _MAX_RETRIES, delay)
+            await asyncio.sleep(delay)
+            continue
+        r.raise_for_status()      # raises on 4xx (incl. final 429) / unretried 5xx
+        data = r.json()
+        break
 
-    return LLMResult(
+    res = LLMResult(
         text=data.get("message", {}).get("content", ""),
         tokens=int(data.get("eval_count", 0)) + int(data.get("prompt_eval_count", 0)),
         model=target.model,
     )
+    if key is not None:
+        _cache_put(key, res, cache_ttl)
+    return res
+
+
+async def stream_llm(
+    user: str,
+    *,
+    target: ModelTarget,
+    system: str = "",
+    json_mode: bool = False,
+    schema: dict | None = None,
+    client: httpx.AsyncClient | None = None,
+    temperature: float | None = None,
+) -> AsyncIterator[str | LLMResult]:
+    """run_llm, streamed: yields each content delta (str) as the model produces it, then ONE
+    final LLMResult (full text + brain-tokens) -- so billing reads `.tokens` exactly as before.
+
+        async for part in stream_llm(prompt, target=t):
+            if isinstance(part, LLMResult): settle(part.tokens)
+            else: send(part)
+
+    Transient failures are retried like run_llm, but only before the first delta -- once text
+    has reached the caller a failure raises instead of replaying it. Not cached.
+    """
+    url, body, headers = _chat_request(user, target, system, json_mode, schema, temperature, stream=True)
+    if client is None:
+        client = _shared_client(target)
+    started = False
+    for attempt in range(_MAX_RETRIES + 1):
+        delay = None
+        try:
+            async with _slot(target), client.stream("POST", url, json=body, headers=headers,
+                                                    timeout=target.timeout) as r:
+                if r.status_code in _RETRY_STATUSES and attempt < _MAX_RETRIES:
+                    delay = _retry_delay(r, attempt)
+                    logger.warning("brain %s transient %s; retry %d/%d in %.1fs",
+                                   target.model, r.status_code, attempt + 1, _MAX_RETRIES, delay)
+                else:
+                    if r.is_error:
+                        await r.aread()
+                        r.raise_for_status()
+                    parts: list[str] = []
+                    tokens = 0
+                    async for line in r.aiter_lines():     # Ollama streams NDJSON, one object per line
+                        if not line.strip():
+                            continue
+                        data = json.loads(line)
+                        delta = data.get("message", {}).get("content", "")
+                        if delta:
+                            started = True
+                            parts.append(delta)
+                            yield delta
+                        if data.get("done"):
+                            tokens = int(data.get("eval_count", 0)) + int(data.get("prompt_eval_count", 0))
+                    yield LLMResult(text="".join(parts), tokens=tokens, model=target.model)
+                    return
+        except (httpx.TimeoutException, httpx.TransportError) as e:
+            if started or attempt >= _MAX_RETRIES:
+                raise
+            delay = _retry_delay(None, attempt)
+            logger.warning("brain %s transient %s; retry %d/%d in %.1fs",
+                           target.model, type(e).__name__, attempt + 1, _MAX_RETRIES, delay)
+        await asyncio.sleep(delay)
@@ -23,8 +23,10 @@ from fastapi.security import OAuth2AuthorizationCodeBearer
 # ================================================================
 # ⚙️ Core Helix Imports
 # ================================================================
+from src.core.boot_report import BootReport
 from src.core.config import get_settings
 from src.db.database import init_db_tables, close_async_engine, get_db_session_context
+from src.llm import aclose_clients
 from src.services.user_service import create_initial_users
 from src.services.artemis_user_seeding import seed_artemis_staff
 from src.services.pos_seeding_service import seed_artemis_products
@@ -32,6 +34,7 @@ from src.services.store_settings_seeding import seed_store_settings
 from src.services.customer_seeding_service import seed_customers
 from src.services.sourcing_seeding_service import seed_sourcing_system
 from src.services.hr_seeding_service import seed_all_hr_data
+from src.services.sales_facts import backfill as backfill_sales_facts
 from src.services.minio_service import initialize_minio
 from src.services.keycloak_health_service import check_keycloak_realms
 from src.routes import auth_router, jobs_router, users_router
@@ -92,10 +95,137 @@ async def _empty_cart_reaper_loop():
             logger.warning(f"Empty-cart reaper tick skipped: {e}")
 
 
+async def _sales_rollup_reconcile_loop():
+    """Hourly: rebuild today's and yesterday's Z-report from the raw sales lines and repair the
+    running rollup wherever it drifted (a sale whose fold failed, a write path that bypassed it).
+    The same tick backfills sales facts for any sale that has none (services/sales_facts.py).
+    Same in-process pattern as the reaper above; the work is also exposed at
+    POST /api/v1/pos/reports/daily-summary/reconcile for manual runs."""
+    import asyncio
+    from datetime import datetime, timedelta
+    from src.routes.pos_router import SHOP_TZ, _tenant_rate_table
+    from src.services.sales_rollup import reconcile_day
+    while True:
+        try:
+            await asyncio.sleep(3600)  # hourly
+            today = datetime.now(SHOP_TZ).date()
+            for day in (today - timedelta(days=1), today):
+                async with get_db_session_context() as db:
+                    result = await reconcile_day(db, day, await _tenant_rate_table(db), apply=True)
+                if result["mismatches"] and result["rolled_up"]:
+                    logger.warning(f"📒 Sales rollup {result['date']} drifted; rebuilt "
+                                   f"{len(result['mismatches'])} cashier row(s) from raw lines")
+            async with get_db_session_context() as db:
+                await backfill_sales_facts(db)
+        except asyncio.CancelledError:
+            break
+        except Exception as e:  # never let a maintenance tick crash the app
+            logger.warning(f"Sales rollup reconcile tick skipped: {e}")
+
+
+async def _audit_partitions_loop():
+    """Daily (first tick at boot): keep audit_log's monthly partitions three months ahead, so
+    audit rows never pile up in the default partition (scripts/db/audit_log_setup.sql). A no-op
+    error on an env whose audit_log isn't partitioned yet — logged at debug, retried tomorrow."""
+    import asyncio
+    from sqlalchemy import text
+    while True:
+        try:
+            async with get_db_session_context() as db:
+                made = (await db.execute(text("SELECT audit_log_add_partitions(3)"))).scalar()
+            if made:
+                logger.info(f"🗂️ audit_log: created {made} monthly partition(s)")
+        except asyncio.CancelledError:
+            break
+        except Exception as e:  # never let a maintenance tick crash the app
+            logger.debug(f"audit_log partition upkeep skipped: {e}")
+        try:
+            await asyncio.sleep(86400)
+        except asyncio.CancelledError:
+            break
+
+
+async def _barcode_integrity_loop():
+    """Every minute: drain the barcode-integrity change queue, so the seal sweep's findings
+    (services/barcode_integrity.py) stay current without anyone opening the sweep. The first tick
+    after a fresh deploy runs the full re-verification the boot DDL queued."""
+    import asyncio
+    from src.services import barcode_integrity
+    while True:
+        try:
+            await asyncio.sleep(60)
+            async with get_db_session_context() as db:
+                await barcode_integrity.refresh(db)
+        except asyncio.CancelledError:
+            break
+        except Exception as e:  # never let a maintenance tick crash the app
+            logger.warning(f"Barcode integrity refresh tick skipped: {e}")
+
+
+async def _translation_prefill_loop():
+    """Keep product descriptions translated ahead of the viewer (services/product_translations.py):
+    fill the catalogue's missing DE/EN/FR/IT skins, products just viewed untranslated or just
+    re-texted first. Back to back while there's a backlog; naps BANCO_TRANSLATE_IDLE_S once caught
+    up, or until a view / text edit queues a product."""
+    import asyncio
+    from src.services import product_translations
+    while True:
+        try:
+            async with get_db_session_context() as db:
+                result = await product_translations.prefill(db)
+            if result["products"] or result["more"]:
+                await asyncio.sleep(1)
+            else:
+                await product_translations.wait_for_work(product_translations.PREFILL_IDLE_S)
+        except asyncio.CancelledError:
+            break
+        except Exception as e:  # never let a maintenance tick crash the app
+            logger.warning(f"Translation prefill tick skipped: {e}")
+            try:
+                await asyncio.sleep(60)
+            except asyncio.CancelledError:
+                break
+
+
+async def _run_seeder(report: BootReport, name: str, seeder) -> None:
+    """One seeder in its own session + timed phase. A failing seeder is logged, never blocks boot."""
+    try:
+        async with report.phase(f"seed.{name}"):
+            async with get_db_session_context() as db:
+                result = await seeder(db)
+        logger.info(f"✅ Seeded {name}" + (f": {result}" if isinstance(result, dict) else ""))
+    except Exception as e:
+        logger.warning(f"⚠️ Seeding {name} encountered an issue: {e}", exc_info=True)
+
+
+async def _run_seed_lane(report: BootReport, lane: list) -> None:
+    for name, seeder in lane:
+        await _run_seeder(report, name, seeder)
+
+
+def _seed_lanes(seed_demo: bool) -> list[list]:
+    """The non-foundation seeders, grouped into lanes that touch disjoint tables. Lanes run
+    concurrently (each on its own pooled connection); seeders inside a lane keep their order."""
+    lanes = [
+        ([("pos_products", seed_artemis_products)] if seed_demo else [])
+        + [("sourcing", seed_sourcing_system), ("sales_facts", backfill_sales_facts)],
+        [("customers", seed_customers)] if seed_demo else [],
+        [("hr", seed_all_hr_data)],
+        [("camper", seed_camper_data)],
+        [("isotto", seed_isotto_data), ("isotto_catalog", seed_isotto_catalog_data)],
+        [("qa_checklist", seed_qa_checklist)],
+        [("backlog", seed_backlog_data)],
+        [("compute", seed_compute_data)],
+    ]
+    return [lane for lane in lanes if lane]
+
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Handle HelixNet startup and shutdown lifecycle events."""
+    import asyncio
     logger.info("🚀 Starting up HelixNet Core (Lifespan)")
+    report = BootReport()
 
     # Demo-content seeding gate. Default ON (every existing env keeps seeding the
     # Artemis catalogue + CRACK customers). The Banco Day-One sandbox sets
@@ -104,11 +234,18 @@ async def lifespan(app: FastAPI):
     seed_demo = os.getenv("HX_SEED_DEMO", "true").strip().lower() not in ("false", "0", "no")
     if not seed_demo:
         logger.warning("🌱 HX_SEED_DEMO=false — skipping catalogue + customer demo seeding (empty sandbox).")
+        for name in ("pos_products", "customers"):
+            report.skip(f"seed.{name}", "HX_SEED_DEMO=false")
+    # HX_DEFER_SEEDERS=true: the demo/module seeders run in the background AFTER the app is
+    # ready (the foundation — users, staff, store settings — always runs before).
+    defer_seeders = os.getenv("HX_DEFER_SEEDERS", "false").strip().lower() in ("true", "1", "yes")
 
     # --- DB Init ---
     try:
         logger.info("🧱 Initializing database tables...")
-        await init_db_tables()
+        async with report.phase("db.init"):
+            for step, seconds in (await init_db_tables()).items():
+                report.add(f"db.{step}", seconds)
         logger.info("✅ Database tables verified/created successfully.")
     except Exception as e:
         logger.error(f"❌ Database initialization failed: {e}", exc_info=True)
@@ -116,135 +253,38 @@ async def lifespan(app: FastAPI):
     # --- MinIO Init ---
     try:
         logger.info("🪣 Initializing MinIO bucket(s)...")
-        if initialize_minio():
+        async with report.phase("minio"):
+            ok = await asyncio.to_thread(initialize_minio)
+        if ok:
             logger.info("✅ MinIO initialized successfully.")
         else:
             logger.warning("⚠️ MinIO initialization returned False.")
     except Exception as e:
         logger.error(f"❌ MinIO initialization failed: {e}", exc_info=True)
 
-    # --- Seed Users ---
-    try:
-        logger.info("👥 Seeding initial users...")
-        async with get_db_session_context() as db:
-            await create_initial_users(db)
-        logger.info("✅ User seeding completed successfully.")
-    except Exception as e:
-        logger.warning(f"⚠️ User seeding encountered an issue: {e}", exc_info=True)
-
-    # --- Seed Artemis Staff (Pam, Ralph, Michael, Felix) ---
-    try:
-        logger.info("👔 Seeding Artemis store staff...")
-        async with get_db_session_context() as db:
-            await seed_artemis_staff(db)
-        logger.info("✅ Artemis staff seeding completed successfully.")
-    except Exception as e:
-        logger.warning(f"⚠️ Artemis staff seeding encountered an issue: {e}", exc_info=True)
-
-    # --- Seed POS Products (Felix's Artemis Store) ---
-    if seed_demo:
-        try:
-            logger.info("🛒 Seeding POS demo products...")
-            async with get_db_session_context() as db:
-                await seed_artemis_products(db)
-            logger.info("✅ POS product seeding completed successfully.")
-        except Exception as e:
-            logger.warning(f"⚠️ POS product seeding encountered an issue: {e}", exc_info=True)
-
-    # --- Seed Store Settings (Felix's Artemis Store Config) ---
-    try:
-        logger.info("⚙️ Seeding store settings...")
-        async with get_db_session_context() as db:
-            await seed_store_settings(db)
-        logger.info("✅ Store settings seeding completed successfully.")
-    except Exception as e:
-        logger.warning(f"⚠️ Store settings seeding encountered an issue: {e}", exc_info=True)
-
-    # --- Seed Customers (The CRACKs - External Customers) ---
-    if seed_demo:
-        try:
-            logger.info("🎮 Seeding customers (The CRACKs)...")
-            async with get_db_session_context() as db:
-                await seed_customers(db)
-            logger.info("✅ Customer seeding completed successfully.")
-        except Exception as e:
-            logger.warning(f"⚠️ Customer seeding encountered an issue: {e}", exc_info=True)
-
-    # --- Seed Sourcing System (Suppliers + Requests for Felix) ---
-    try:
-        logger.info("📦 Seeding sourcing system (suppliers + requests)...")
-        async with get_db_session_context() as db:
-            results = await seed_sourcing_system(db)
-        logger.info(f"✅ Sourcing seeding completed: {results}")
-    except Exception as e:
-        logger.warning(f"⚠️ Sourcing system seeding encountered an issue: {e}", exc_info=True)
-
-    # --- Seed HR Data (Employees + Time Entries) ---
-    try:
-        logger.info("👔 Seeding HR data (employees + time entries)...")
-        async with get_db_session_context() as db:
-            results = await seed_all_hr_data(db)
-        logger.info(f"✅ HR seeding completed: {results}")
-    except Exception as e:
-        logger.warning(f"⚠️ HR seeding encountered an issue: {e}", exc_info=True)
-
-    # --- Seed Camper & Tour Data (Sebastino's Shop, Trapani) ---
-    try:
-        logger.info("Seeding Camper & Tour service data...")
-        async with get_db_session_context() as db:
-            await seed_camper_data(db)
-        logger.info("Camper & Tour seeding completed successfully.")
-    except Exception as e:
-        logger.warning(f"Camper & Tour seeding encountered an issue: {e}", exc_info=True)
-
-    # --- Seed ISOTTO Sport Data (Print Shop, Trapani - since 1968) ---
-    try:
-        logger.info("Seeding ISOTTO Sport print shop data...")
-        async with get_db_session_context() as db:
-            await seed_isotto_data(db)
-        logger.info("ISOTTO Sport seeding completed successfully.")
-    except Exception as e:
-        logger.warning(f"ISOTTO Sport seeding encountered an issue: {e}", exc_info=True)
-
-    # --- Seed ISOTTO Catalog Data (Suppliers, Products, Stock) ---
-    try:
-        logger.info("Seeding ISOTTO Sport catalog data...")
-        async with get_db_session_context() as db:
-            await seed_isotto_catalog_data(db)
-        logger.info("ISOTTO Sport catalog seeding completed successfully.")
-    except Exception as e:
-        logger.warning(f"ISOTTO Sport catalog seeding encountered an issue: {e}", exc_info=True)
-
-    # --- Seed QA Testing Checklist (Anne's 46-item dashboard) ---
-    try:
-        logger.info("Seeding QA testing checklist...")
-        async with get_db_session_context() as db:
-            await seed_qa_checklist(db)
-        logger.info("QA testing checklist seeding completed.")
-    except Exception as e:
-        logger.warning(f"QA testing checklist seeding encountered an issue: {e}", exc_info=True)
-
-    # --- Seed Backlog Items (Unified Board) ---
-    try:
-        logger.info("Seeding backlog items...")
-        async with get_db_session_context() as db:
-            await seed_backlog_data(db)
-        logger.info("Backlog seeding completed.")
-    except Exception as e:
-        logger.warning(f"Backlog seeding encountered an issue: {e}", exc_info=True)
-
-    # --- Seed LPCX compute starter grants ---
-    try:
-        logger.info("Seeding LPCX compute starter grants...")
-        async with get_db_session_context() as db:
-            await seed_compute_data(db)
-        logger.info("LPCX compute seeding completed.")
-    except Exception as e:
-        logger.warning(f"LPCX compute seeding encountered an issue: {e}", exc_info=True)
+    # --- Foundation seeders, in order: login users, the Artemis store staff (Pam, Ralph,
+    # Michael, Felix), then store settings (VAT, tiers) — everything else may lean on them. ---
+    for name, seeder in (("users", create_initial_users), ("artemis_staff", seed_artemis_staff),
+                         ("store_settings", seed_store_settings)):
+        await _run_seeder(report, name, seeder)
+
+    # --- Demo + module seeders (Artemis catalogue, CRACK customers, sourcing, HR, Camper,
+    # ISOTTO, QA checklist, backlog, LPCX grants): concurrent lanes, or deferred past ready. ---
+    lanes = _seed_lanes(seed_demo)
+    seed_task = None
+    if defer_seeders:
+        async def _run_lanes():
+            await asyncio.gather(*(_run_seed_lane(report, lane) for lane in lanes))
+        seed_task = asyncio.create_task(_run_lanes())
+        logger.info(f"🌱 HX_DEFER_SEEDERS — {len(lanes)} seeding lane(s) continue in the background.")
+    else:
+        async with report.phase("seed.lanes (wall clock)"):
+            await asyncio.gather(*(_run_seed_lane(report, lane) for lane in lanes))
 
     # --- Keycloak Realm Health Check ---
     try:
-        realm_status = await check_keycloak_realms()
+        async with report.phase("keycloak_check"):
+            realm_status = await check_keycloak_realms()
         if realm_status["status"] == "success":
             logger.info(f"✅ Keycloak connected - {realm_status['realm_count']} realm(s) found")
         elif realm_status["status"] == "pending":
@@ -255,20 +295,34 @@ async def lifespan(app: FastAPI):
         logger.debug(f"Keycloak health check deferred: {e}")
 
     # --- BL-86: start the hourly empty-cart reaper (background) ---
-    import asyncio
     reaper_task = asyncio.create_task(_empty_cart_reaper_loop())
     logger.info("🧹 Empty-cart reaper started (hourly, cancels empty OPEN carts >12h).")
-
+    rollup_task = asyncio.create_task(_sales_rollup_reconcile_loop())
+    logger.info("📒 Sales rollup reconcile started (hourly, today + yesterday).")
+    audit_parts_task = asyncio.create_task(_audit_partitions_loop())
+    integrity_task = asyncio.create_task(_barcode_integrity_loop())
+    translate_task = asyncio.create_task(_translation_prefill_loop())
+
+    report.mark_ready()
+    app.state.boot_report = report
     logger.info("✨ HelixNet Core READY to serve requests.")
     yield
 
     # --- Shutdown ---
     logger.info("⬆️ Application shutting down. Closing DB engine...")
-    reaper_task.cancel()
-    try:
-        await reaper_task
-    except asyncio.CancelledError:
-        pass
+    for task in (reaper_task, rollup_task, audit_parts_task, integrity_task, translate_task, seed_task):
+        if task is None:
+            continue
+        task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
+    await aclose_clients()          # pooled LLM connections
+    from src.services import product_images, product_translations, supplier_search
+    await product_translations.aclose_client()   # the Tamar fetch client
+    await supplier_search.aclose_client()        # the supplier-site scraping client
+    product_images.shutdown()                    # the Pillow worker pool
     await close_async_engine()
     logger.info("🛑 HelixNet Core shutdown complete.")
 
@@ -15,10 +15,9 @@ from __future__ import annotations
 import logging
 from typing import Awaitable, Callable, Optional
 
-from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from src.db.models.store_settings_model import StoreSettingsModel
+from src.services.tenant_settings import tenant_settings
 from .base import PaymentProvider, PaymentResult
 
 logger = logging.getLogger(__name__)
@@ -33,15 +32,11 @@ _MANUAL = {"", "manual", "none", "cash"}
 async def _store_payment_provider(db: AsyncSession) -> str:
     """The electronic payment provider THIS shop is wired to (default 'manual').
 
-    Mirrors _store_currency: read it off the store row, never assume. A store with no row,
-    a NULL column, or an env that predates the column all resolve to 'manual'.
+    Mirrors _store_currency: read it off the store row (via the shared tenant settings snapshot),
+    never assume. A store with no row, a NULL column, or an env that predates the column all
+    resolve to 'manual'.
     """
-    try:
-        store = (await db.execute(
-            select(StoreSettingsModel).order_by(StoreSettingsModel.store_number))).scalars().first()
-        return (getattr(store, "payment_provider", None) or "manual").strip().lower()
-    except Exception:
-        return "manual"
+    return (await tenant_settings.get(db)).payment_provider
 
 
 async def get_payment_provider(db: AsyncSession) -> Optional[PaymentProvider]:
@@ -11,14 +11,14 @@ from datetime import datetime, timezone
 
 import httpx
 from fastapi import APIRouter, Depends, File, Form, HTTPException, Request, UploadFile
-from fastapi.responses import FileResponse
+from fastapi.responses import FileResponse, StreamingResponse
 from pydantic import BaseModel
 from sqlalchemy import select, func
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from src.core.config import settings
 
-from src.db.database import get_db_session
+from src.db.database import AsyncSessionLocal, get_db_session
 from src.db.models.bottega_model import (
     BottegaProfileModel, BottegaProfileHistoryModel, BottegaSessionModel, BottegaTaskModel)
 from src.db.models.backlog_model import (
@@ -34,6 +34,7 @@ from src.compute.recipes import RECIPES, menu as recipe_menu, run_recipe, recipe
 from src.compute import concierge as cg
 from src.compute import dispatcher as dsp
 from src.compute import reception as rcp
+from src.llm import LLMResult
 
 logger = logging.getLogger("helix.bottega_router")
 
@@ -555,39 +556,19 @@ async def concierge_sharpen(request: Request,
     return {"ready": True, "completeness": completeness, "questions": questions}
 
 
-@router.post("/concierge/chat")
-async def concierge_chat(request: Request,
-                         current_user: dict = Depends(require_bottega_access()),
-                         db: AsyncSession = Depends(get_db_session)):
-    """One concierge turn. Body: {message?, language?}. Empty message on a fresh member -> the
-    opening greeting. Otherwise: reply (Cleopatra) -> extract -> merge -> persist. Returns the
-    reply + the language (so the widget can read it aloud in the right voice) + the live record."""
-    try:
-        body = await request.json()
-    except Exception:  # noqa: BLE001
-        body = {}
-    message = (body.get("message") or "").strip()
-    language = (body.get("language") or "").strip()
+def _sse_event(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
 
-    state = await read_concierge(db, current_user["username"])
-    record, transcript = state["record"], state["transcript"]
 
-    # Fresh member, no message yet -> the front-door greeting (no brain call, Angel's copy).
-    if not message and not transcript:
-        greeting = cg.opening()  # one of the four five-star flavours, fresh each visit
-        transcript.append({"role": "concierge", "content": greeting})
-        await write_concierge(db, current_user["username"], record, transcript)
-        # the opening is the English hub greeting; voice reads it in English
-        return {"reply": greeting, "language": "en", "record": record, "opening": True}
+def _sse_response(gen) -> StreamingResponse:
+    return StreamingResponse(gen, media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
 
-    if message:
-        transcript.append({"role": "member", "content": message})
 
-    try:
-        reply = await cg.concierge_reply(transcript, record, language)
-    except BrainUnavailable:
-        raise HTTPException(status_code=503,
-                            detail="Cleopatra stepped away for a second -- try again in a moment.")
+async def _finish_concierge_turn(db: AsyncSession, username: str, record: dict, transcript: list,
+                                 reply: str, language: str) -> dict:
+    """After Cleopatra's reply: extract -> merge -> chips -> persist. Shared by the JSON and the
+    streamed chat (the stream sends this as its final `done` event)."""
     transcript.append({"role": "concierge", "content": reply})
 
     # Voice AND the next-move chips follow the actual reply language: an explicit pick is
@@ -604,7 +585,7 @@ async def concierge_chat(request: Request,
         record = cg.merge_record(record, fresh)
         record = cg.stamp_provenance(record, fresh)   # v2: stamp each fact stated/inferred this turn
     else:
-        logger.warning("concierge extraction failed for %s: %s", current_user["username"], fresh)
+        logger.warning("concierge extraction failed for %s: %s", username, fresh)
     if not isinstance(suggestions, list):
         suggestions = []
     # when a guest-planted fiction is live, the model's chips can't be trusted (they parrot it) --
@@ -612,10 +593,70 @@ async def concierge_chat(request: Request,
     if cg.fiction_flagged(record):
         suggestions = cg.safe_chips(reply_lang)
 
-    await write_concierge(db, current_user["username"], record, transcript)
+    await write_concierge(db, username, record, transcript)
     return {"reply": reply, "language": reply_lang, "record": record, "suggestions": suggestions}
 
 
+@router.post("/concierge/chat")
+async def concierge_chat(request: Request,
+                         current_user: dict = Depends(require_bottega_access()),
+                         db: AsyncSession = Depends(get_db_session)):
+    """One concierge turn. Body: {message?, language?, stream?}. Empty message on a fresh member ->
+    the opening greeting. Otherwise: reply (Cleopatra) -> extract -> merge -> persist. Returns the
+    reply + the language (so the widget can read it aloud in the right voice) + the live record.
+
+    stream=true -> text/event-stream: `delta` events {text} as Cleopatra writes (first token =
+    the wait the member feels), then ONE `done` event with the same payload the JSON mode returns,
+    or an `error` event {status, detail}. The opening greeting is always plain JSON."""
+    try:
+        body = await request.json()
+    except Exception:  # noqa: BLE001
+        body = {}
+    message = (body.get("message") or "").strip()
+    language = (body.get("language") or "").strip()
+    username = current_user["username"]
+
+    state = await read_concierge(db, username)
+    record, transcript = state["record"], state["transcript"]
+
+    # Fresh member, no message yet -> the front-door greeting (no brain call, Angel's copy).
+    if not message and not transcript:
+        greeting = cg.opening()  # one of the four five-star flavours, fresh each visit
+        transcript.append({"role": "concierge", "content": greeting})
+        await write_concierge(db, username, record, transcript)
+        # the opening is the English hub greeting; voice reads it in English
+        return {"reply": greeting, "language": "en", "record": record, "opening": True}
+
+    if message:
+        transcript.append({"role": "member", "content": message})
+
+    if body.get("stream"):
+        async def gen():
+            reply = ""
+            try:
+                async for part in cg.concierge_reply_stream(transcript, record, language):
+                    if isinstance(part, LLMResult):
+                        reply = part.text
+                    else:
+                        yield _sse_event("delta", {"text": part})
+            except BrainUnavailable:
+                yield _sse_event("error", {"status": 503, "detail":
+                                           "Cleopatra stepped away for a second -- try again in a moment."})
+                return
+            # the request's session is released once the response starts -- finish on our own
+            async with AsyncSessionLocal() as sdb:
+                done = await _finish_concierge_turn(sdb, username, record, transcript, reply, language)
+            yield _sse_event("done", done)
+        return _sse_response(gen())
+
+    try:
+        reply = await cg.concierge_reply(transcript, record, language)
+    except BrainUnavailable:
+        raise HTTPException(status_code=503,
+                            detail="Cleopatra stepped away for a second -- try again in a moment.")
+    return await _finish_concierge_turn(db, username, record, transcript, reply, language)
+
+
 @router.post("/concierge/reset")
 async def concierge_reset(request: Request,
                           current_user: dict = Depends(require_bottega_access()),
@@ -1400,6 +1441,7 @@ async def mark_read(item_id: str, current_user: dict = Depends(require_bottega_a
 class ThreadReply(BaseModel):
     message: str
     language: str = ""
+    stream: bool = False      # text/event-stream: `delta` events, then `done` = the JSON payload
 
 
 def _thread_turn_view(s, owner: str) -> dict:
@@ -1490,26 +1532,53 @@ async def reply_to_thread(root_id: str, body: ThreadReply,
     speaker = author or "Cleopatra"
     transcript = _thread_transcript([root] + children + [member_turn], owner)
     state = await read_concierge(db, owner)
+    persona, language = _persona_for(author, _role), (body.language or "").strip()
+
+    def _master_turn(reply: str) -> BottegaSessionModel:
+        # 3) the reply -> a child row too (no separate notification: the member is already in the thread)
+        return BottegaSessionModel(
+            username=owner, slug="message", parent_id=rid, title=(speaker + ": " + reply)[:160],
+            inputs=json.dumps({"author": speaker, "role": "master", "read": True}),
+            output=reply[:8000], output_type="text", tags="message,thread")
+
+    def _payload(master_turn: BottegaSessionModel, reply: str) -> dict:
+        turns = [_thread_turn_view(s, owner) for s in [root] + children + [member_turn, master_turn]]
+        return {"id": str(root.id), "title": root.title, "turns": turns,
+                "reply": {"author": speaker, "body": reply}}
+
+    if body.stream:
+        await db.commit()      # the member's turn stands before the master starts typing
+        async def gen():
+            reply = ""
+            try:
+                async for part in cg.thread_reply_stream(transcript, state["record"],
+                                                         persona=persona, language=language):
+                    if isinstance(part, LLMResult):
+                        reply = part.text
+                    else:
+                        yield _sse_event("delta", {"text": part})
+            except BrainUnavailable:
+                yield _sse_event("error", {"status": 503, "detail":
+                                           f"{speaker} stepped away for a second -- try again in a moment."})
+                return
+            master_turn = _master_turn(reply)
+            async with AsyncSessionLocal() as sdb:
+                sdb.add(master_turn)
+                await sdb.commit()
+            yield _sse_event("done", _payload(master_turn, reply))
+        return _sse_response(gen())
+
     try:
-        reply = await cg.thread_reply(transcript, state["record"],
-                                      persona=_persona_for(author, _role),
-                                      language=(body.language or "").strip())
+        reply = await cg.thread_reply(transcript, state["record"], persona=persona, language=language)
     except BrainUnavailable:
         await db.commit()  # keep the member's turn even if the master stepped away
         raise HTTPException(status_code=503,
                             detail=f"{speaker} stepped away for a second -- try again in a moment.")
 
-    # 3) the reply -> a child row too (no separate notification: the member is already in the thread)
-    master_turn = BottegaSessionModel(
-        username=owner, slug="message", parent_id=rid, title=(speaker + ": " + reply)[:160],
-        inputs=json.dumps({"author": speaker, "role": "master", "read": True}),
-        output=reply[:8000], output_type="text", tags="message,thread")
+    master_turn = _master_turn(reply)
     db.add(master_turn)
     await db.commit()
-
-    turns = [_thread_turn_view(s, owner) for s in [root] + children + [member_turn, master_turn]]
-    return {"id": str(root.id), "title": root.title, "turns": turns,
-            "reply": {"author": speaker, "body": reply}}
+    return _payload(master_turn, reply)
 
 
 # ===== A: the living crew -- Cleo reads your board and nudges (summary + next move) =====
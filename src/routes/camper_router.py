@@ -13,8 +13,7 @@ from fastapi import APIRouter, Depends, HTTPException, status, Request, UploadFi
 from fastapi.responses import HTMLResponse, StreamingResponse
 from fastapi.templating import Jinja2Templates
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, func, and_, or_, DateTime as SADateTime
-from sqlalchemy.orm import selectinload
+from sqlalchemy import select, func, and_, or_
 from datetime import datetime, date, timezone, timedelta
 from decimal import Decimal
 from uuid import UUID
@@ -22,9 +21,11 @@ from typing import Optional
 from pathlib import Path
 import io
 import asyncio
+import dataclasses
 
 from src.core.config import settings  # CAMPER_REALM — env-driven realm (identity consolidation)
 from src.db.database import get_db_session
+from src.services import camper_planning
 from src.db.models.camper_vehicle_model import CamperVehicleModel, VehicleStatus
 from src.db.models.camper_customer_model import CamperCustomerModel
 from src.db.models.camper_bay_model import CamperBayModel
@@ -1235,57 +1236,35 @@ async def get_service_reminders(
     in_7_days = today + timedelta(days=7)
     in_30_days = today + timedelta(days=30)
 
-    # Jobs with follow_up_required=True and next_service_date set
-    result = await db.execute(
-        select(CamperServiceJobModel)
-        .where(
-            and_(
-                CamperServiceJobModel.follow_up_required == True,
-                CamperServiceJobModel.next_service_date.isnot(None),
-            )
-        )
-        .order_by(CamperServiceJobModel.next_service_date)
-    )
-    jobs = result.scalars().all()
-
+    # Jobs with follow_up_required=True and next_service_date set (customer + plate joined in)
     overdue = []
     upcoming_7 = []
     upcoming_30 = []
 
-    for job in jobs:
-        # Get customer + vehicle info
-        cust_result = await db.execute(
-            select(CamperCustomerModel).where(CamperCustomerModel.id == job.customer_id)
-        )
-        customer = cust_result.scalar_one_or_none()
-        v_result = await db.execute(
-            select(CamperVehicleModel.registration_plate)
-            .where(CamperVehicleModel.id == job.vehicle_id)
-        )
-        plate = v_result.scalar_one_or_none() or "Unknown"
-
-        days_until = (job.next_service_date - today).days
+    for r in await camper_planning.load_reminders(db):
+        job = r.job
+        days_until = (r.next_service_date - today).days
         reminder = ServiceReminder(
             job_id=job.id,
             job_number=job.job_number,
             title=job.title,
-            customer_id=job.customer_id,
-            customer_name=customer.name if customer else "Unknown",
-            customer_phone=customer.phone if customer else None,
-            vehicle_id=job.vehicle_id,
-            vehicle_plate=plate,
-            next_service_date=job.next_service_date,
-            follow_up_notes=job.follow_up_notes,
-            warranty_expires_at=job.warranty_expires_at,
+            customer_id=r.customer_id,
+            customer_name=job.customer_name or "Unknown",
+            customer_phone=job.customer_phone,
+            vehicle_id=r.vehicle_id,
+            vehicle_plate=job.vehicle_plate or "Unknown",
+            next_service_date=r.next_service_date,
+            follow_up_notes=r.follow_up_notes,
+            warranty_expires_at=r.warranty_expires_at,
             days_until_due=days_until,
             is_overdue=days_until < 0,
         )
 
         if days_until < 0:
             overdue.append(reminder)
-        elif job.next_service_date <= in_7_days:
+        elif r.next_service_date <= in_7_days:
             upcoming_7.append(reminder)
-        elif job.next_service_date <= in_30_days:
+        elif r.next_service_date <= in_30_days:
             upcoming_30.append(reminder)
 
     total = len(overdue) + len(upcoming_7) + len(upcoming_30)
@@ -2881,6 +2860,19 @@ async def end_wait(
 # BAY TIMELINE ENDPOINT
 # ================================================================
 
+# Timeline + calendar colour per job status
+_STATUS_COLORS = {
+    JobStatus.QUOTED: "#9CA3AF",
+    JobStatus.APPROVED: "#3B82F6",
+    JobStatus.IN_PROGRESS: "#F59E0B",
+    JobStatus.WAITING_PARTS: "#EF4444",
+    JobStatus.INSPECTION: "#8B5CF6",
+    JobStatus.COMPLETED: "#10B981",
+    JobStatus.INVOICED: "#6366F1",
+    JobStatus.CANCELLED: "#6B7280",
+}
+
+
 @router.get("/bay-timeline", response_model=list[BayTimelineResponse])
 async def get_bay_timeline(
     start: Optional[str] = None,
@@ -2901,84 +2893,34 @@ async def get_bay_timeline(
     except ValueError:
         end_date = start_date + timedelta(days=6)
 
-    # Get all active bays
-    bays_result = await db.execute(
-        select(CamperBayModel)
-        .where(CamperBayModel.is_active == True)
-        .order_by(CamperBayModel.display_order, CamperBayModel.name)
-    )
-    bays = bays_result.scalars().all()
-
-    # Status colors
-    status_colors = {
-        JobStatus.QUOTED: "#9CA3AF",
-        JobStatus.APPROVED: "#3B82F6",
-        JobStatus.IN_PROGRESS: "#F59E0B",
-        JobStatus.WAITING_PARTS: "#EF4444",
-        JobStatus.INSPECTION: "#8B5CF6",
-        JobStatus.COMPLETED: "#10B981",
-        JobStatus.INVOICED: "#6366F1",
-        JobStatus.CANCELLED: "#6B7280",
-    }
+    snapshot = await camper_planning.planning_cache.snapshot(db, start_date, end_date)
+    jobs_by_bay = snapshot.by_bay()
 
     timeline = []
-    for bay in bays:
-        # Find jobs assigned to this bay that overlap with the date range
-        # A job overlaps if: job.start_date <= end_date AND job.end_date >= start_date
-        # Fall back to scheduled_date for single-day jobs
-        jobs_result = await db.execute(
-            select(CamperServiceJobModel).where(
-                and_(
-                    CamperServiceJobModel.bay_id == bay.id,
-                    CamperServiceJobModel.status.notin_([JobStatus.CANCELLED, JobStatus.INVOICED]),
-                    # Job has date range that overlaps with requested range
-                    CamperServiceJobModel.start_date.isnot(None),
-                    CamperServiceJobModel.start_date <= end_date,
-                    CamperServiceJobModel.end_date >= start_date,
-                )
-            ).order_by(CamperServiceJobModel.start_date)
-        )
-        jobs = jobs_result.scalars().all()
-
-        # Also get jobs with only scheduled_date (no start_date/end_date yet)
-        scheduled_only_result = await db.execute(
-            select(CamperServiceJobModel).where(
-                and_(
-                    CamperServiceJobModel.bay_id == bay.id,
-                    CamperServiceJobModel.status.notin_([JobStatus.CANCELLED, JobStatus.INVOICED]),
-                    CamperServiceJobModel.start_date.is_(None),
-                    CamperServiceJobModel.scheduled_date.isnot(None),
-                    CamperServiceJobModel.scheduled_date >= start_date,
-                    CamperServiceJobModel.scheduled_date <= end_date,
-                )
-            ).order_by(CamperServiceJobModel.scheduled_date)
-        )
-        scheduled_jobs = scheduled_only_result.scalars().all()
-
+    for bay in snapshot.bays:
+        # Jobs on this bay overlapping the range (start_date..end_date), then the ones that only
+        # have a scheduled_date yet -- the snapshot keeps them in that order.
         entries = []
-        for job in list(jobs) + list(scheduled_jobs):
-            # Eagerly load vehicle and customer for display
-            await db.refresh(job, ["vehicle", "customer"])
-
+        for job in jobs_by_bay.get(bay.id, []):
             job_start = job.start_date or job.scheduled_date
             job_end = job.end_date or job.start_date or job.scheduled_date
 
             entries.append(BayTimelineEntry(
                 job_id=str(job.id),
                 job_number=job.job_number,
-                vehicle_plate=job.vehicle.registration_plate if job.vehicle else "???",
-                customer_name=job.customer.name if job.customer else "???",
+                vehicle_plate=job.vehicle_plate or "???",
+                customer_name=job.customer_name or "???",
                 status=job.status.value,
                 start_date=job_start.isoformat() if job_start else "",
                 end_date=job_end.isoformat() if job_end else "",
                 wait_reason=job.current_wait_reason,
-                color=status_colors.get(job.status, "#9CA3AF"),
+                color=_STATUS_COLORS.get(job.status, "#9CA3AF"),
             ))
 
         timeline.append(BayTimelineResponse(
             bay_id=str(bay.id),
             bay_name=bay.name,
-            bay_type=bay.bay_type.value,
+            bay_type=bay.bay_type,
             entries=entries,
         ))
 
@@ -3006,58 +2948,18 @@ async def get_calendar(
     except ValueError:
         range_end = None
 
-    # Eager-load customer + vehicle for calendar display
-    load_opts = [
-        selectinload(CamperServiceJobModel.customer),
-        selectinload(CamperServiceJobModel.vehicle),
-    ]
-
-    # Get jobs with start_date/end_date (multi-day)
-    multi_day_query = select(CamperServiceJobModel).options(*load_opts).where(
-        CamperServiceJobModel.start_date.isnot(None)
-    )
-    if range_start:
-        multi_day_query = multi_day_query.where(CamperServiceJobModel.end_date >= range_start)
-    if range_end:
-        multi_day_query = multi_day_query.where(CamperServiceJobModel.start_date <= range_end)
-
-    # Get jobs with only scheduled_date (single-day, backwards compat)
-    single_day_query = select(CamperServiceJobModel).options(*load_opts).where(
-        and_(
-            CamperServiceJobModel.start_date.is_(None),
-            CamperServiceJobModel.scheduled_date.isnot(None),
-        )
-    )
-    if range_start:
-        single_day_query = single_day_query.where(CamperServiceJobModel.scheduled_date >= range_start)
-    if range_end:
-        single_day_query = single_day_query.where(CamperServiceJobModel.scheduled_date <= range_end)
-
-    multi_result = await db.execute(multi_day_query)
-    single_result = await db.execute(single_day_query)
-    multi_jobs = multi_result.scalars().all()
-    single_jobs = single_result.scalars().all()
-
-    # Color-code by status
-    status_colors = {
-        JobStatus.QUOTED: "#9CA3AF",
-        JobStatus.APPROVED: "#3B82F6",
-        JobStatus.IN_PROGRESS: "#F59E0B",
-        JobStatus.WAITING_PARTS: "#EF4444",
-        JobStatus.INSPECTION: "#8B5CF6",
-        JobStatus.COMPLETED: "#10B981",
-        JobStatus.INVOICED: "#6366F1",
-        JobStatus.CANCELLED: "#6B7280",
-    }
+    # Multi-day jobs (start_date/end_date) and single-day ones (scheduled_date only, backwards
+    # compat), customer + vehicle joined in -- the same snapshot the bay timeline reads.
+    snapshot = await camper_planning.planning_cache.snapshot(db, range_start, range_end)
 
     events = []
 
     def _build_event(job, start_iso, end_iso=None):
         """Build a CalendarEvent with customer + vehicle info."""
-        customer_name = job.customer.name if job.customer else ""
-        customer_lang = job.customer.language.value if job.customer and job.customer.language else ""
-        customer_phone = job.customer.phone if job.customer else ""
-        vehicle_plate = job.vehicle.registration_plate if job.vehicle else ""
+        customer_name = job.customer_name or ""
+        customer_lang = job.customer_lang or ""
+        customer_phone = job.customer_phone or ""
+        vehicle_plate = job.vehicle_plate or ""
 
         # Title: "JOB-123: Title | Customer (LANG)"
         title_parts = [f"{job.job_number}: {job.title}"]
@@ -3071,7 +2973,7 @@ async def get_calendar(
             title=title,
             start=start_iso,
             end=end_iso,
-            color=status_colors.get(job.status, "#9CA3AF"),
+            color=_STATUS_COLORS.get(job.status, "#9CA3AF"),
             url=f"/camper/jobs/{job.id}",
             extendedProps={
                 "status": job.status.value,
@@ -3086,14 +2988,14 @@ async def get_calendar(
             }
         )
 
-    # Multi-day jobs: use start_date and end_date+1 (FullCalendar end is exclusive)
-    for job in multi_jobs:
-        fc_end = (job.end_date + timedelta(days=1)).isoformat() if job.end_date else None
-        events.append(_build_event(job, job.start_date.isoformat(), fc_end))
-
-    # Single-day jobs (backwards compat): scheduled_date only
-    for job in single_jobs:
-        events.append(_build_event(job, job.scheduled_date.isoformat()))
+    for job in snapshot.jobs:
+        if job.multi_day:
+            # Multi-day jobs: use start_date and end_date+1 (FullCalendar end is exclusive)
+            fc_end = (job.end_date + timedelta(days=1)).isoformat() if job.end_date else None
+            events.append(_build_event(job, job.start_date.isoformat(), fc_end))
+        else:
+            # Single-day jobs (backwards compat): scheduled_date only
+            events.append(_build_event(job, job.scheduled_date.isoformat()))
 
     return events
 
@@ -3107,155 +3009,10 @@ async def get_dashboard(
     db: AsyncSession = Depends(get_db_session),
     current_user: dict = Depends(require_any_camper_role()),
 ):
-    """One-screen overview for Nino"""
-    # Vehicles in shop (checked_in or in_service or waiting_parts)
-    in_shop_result = await db.execute(
-        select(func.count()).where(
-            CamperVehicleModel.status.in_([
-                VehicleStatus.CHECKED_IN,
-                VehicleStatus.IN_SERVICE,
-                VehicleStatus.WAITING_PARTS,
-                VehicleStatus.READY_FOR_PICKUP,
-            ])
-        )
-    )
-    vehicles_in_shop = in_shop_result.scalar() or 0
-
-    # Jobs in progress
-    in_progress_result = await db.execute(
-        select(func.count()).where(CamperServiceJobModel.status == JobStatus.IN_PROGRESS)
-    )
-    jobs_in_progress = in_progress_result.scalar() or 0
-
-    # Jobs waiting parts
-    waiting_parts_result = await db.execute(
-        select(func.count()).where(CamperServiceJobModel.status == JobStatus.WAITING_PARTS)
-    )
-    jobs_waiting_parts = waiting_parts_result.scalar() or 0
-
-    # Completed today
-    today_start = datetime.combine(date.today(), datetime.min.time(), tzinfo=timezone.utc)
-    today_end = datetime.combine(date.today(), datetime.max.time(), tzinfo=timezone.utc)
-    completed_today_result = await db.execute(
-        select(func.count()).where(
-            and_(
-                CamperServiceJobModel.status == JobStatus.COMPLETED,
-                CamperServiceJobModel.completed_at >= today_start,
-                CamperServiceJobModel.completed_at <= today_end,
-            )
-        )
-    )
-    jobs_completed_today = completed_today_result.scalar() or 0
-
-    # Pending quotes
-    pending_result = await db.execute(
-        select(func.count()).where(CamperServiceJobModel.status == JobStatus.QUOTED)
-    )
-    pending_quotes = pending_result.scalar() or 0
-
-    # Total jobs all-time
-    total_result = await db.execute(select(func.count()).select_from(CamperServiceJobModel))
-    total_jobs = total_result.scalar() or 0
-
-    # Pending deposits (deposit_required > deposit_paid)
-    deposits_result = await db.execute(
-        select(func.sum(CamperServiceJobModel.deposit_required - CamperServiceJobModel.deposit_paid)).where(
-            CamperServiceJobModel.deposit_required > CamperServiceJobModel.deposit_paid
-        )
-    )
-    pending_deposits = deposits_result.scalar() or Decimal("0.00")
-
-    # Total revenue this month (paid invoices)
-    month_start = date.today().replace(day=1)
-    revenue_result = await db.execute(
-        select(func.sum(CamperInvoiceModel.total)).where(
-            and_(
-                CamperInvoiceModel.payment_status == PaymentStatus.PAID,
-                CamperInvoiceModel.paid_at >= datetime.combine(month_start, datetime.min.time(), tzinfo=timezone.utc),
-            )
-        )
-    )
-    total_revenue_month = revenue_result.scalar() or Decimal("0.00")
-
-    # Overdue invoices
-    overdue_result = await db.execute(
-        select(func.count()).where(
-            and_(
-                CamperInvoiceModel.payment_status.in_([PaymentStatus.PENDING, PaymentStatus.DEPOSIT_PAID, PaymentStatus.PARTIAL]),
-                CamperInvoiceModel.due_date < date.today(),
-            )
-        )
-    )
-    overdue_invoices = overdue_result.scalar() or 0
-
-    # Jobs in inspection
-    inspection_result = await db.execute(
-        select(func.count()).where(CamperServiceJobModel.status == JobStatus.INSPECTION)
-    )
-    jobs_in_inspection = inspection_result.scalar() or 0
-
-    # Jobs currently waiting (have active wait reason)
-    waiting_result = await db.execute(
-        select(func.count()).where(
-            CamperServiceJobModel.current_wait_reason.isnot(None)
-        )
-    )
-    jobs_waiting = waiting_result.scalar() or 0
-
-    # Bay utilization: % of active bays that have at least one active job
-    active_bays_result = await db.execute(
-        select(func.count()).where(CamperBayModel.is_active == True)
-    )
-    active_bays = active_bays_result.scalar() or 0
-
-    if active_bays > 0:
-        occupied_bays_result = await db.execute(
-            select(func.count(func.distinct(CamperServiceJobModel.bay_id))).where(
-                and_(
-                    CamperServiceJobModel.bay_id.isnot(None),
-                    CamperServiceJobModel.status.in_([
-                        JobStatus.APPROVED, JobStatus.IN_PROGRESS,
-                        JobStatus.WAITING_PARTS, JobStatus.INSPECTION,
-                    ])
-                )
-            )
-        )
-        occupied_bays = occupied_bays_result.scalar() or 0
-        bay_utilization = round((occupied_bays / active_bays) * 100, 1)
-    else:
-        bay_utilization = 0
-
-    # Average days per completed job (start_date to completed_at)
-    avg_days_result = await db.execute(
-        select(func.avg(
-            func.extract('epoch', CamperServiceJobModel.completed_at) -
-            func.extract('epoch', func.cast(CamperServiceJobModel.start_date, SADateTime(timezone=True)))
-        )).where(
-            and_(
-                CamperServiceJobModel.status.in_([JobStatus.COMPLETED, JobStatus.INVOICED]),
-                CamperServiceJobModel.start_date.isnot(None),
-                CamperServiceJobModel.completed_at.isnot(None),
-            )
-        )
-    )
-    avg_seconds = avg_days_result.scalar()
-    average_days_per_job = round(avg_seconds / 86400, 1) if avg_seconds else 0
-
-    return DashboardSummary(
-        vehicles_in_shop=vehicles_in_shop,
-        jobs_in_progress=jobs_in_progress,
-        jobs_waiting_parts=jobs_waiting_parts,
-        jobs_waiting=jobs_waiting,
-        jobs_completed_today=jobs_completed_today,
-        pending_quotes=pending_quotes,
-        total_jobs=total_jobs,
-        pending_deposits=pending_deposits,
-        total_revenue_month=total_revenue_month,
-        overdue_invoices=overdue_invoices,
-        jobs_in_inspection=jobs_in_inspection,
-        bay_utilization=bay_utilization,
-        average_days_per_job=average_days_per_job,
-    )
+    """One-screen overview for Nino (every figure from one aggregate statement, cached until the
+    next camper write)."""
+    figures = await camper_planning.planning_cache.summary(db)
+    return DashboardSummary(**dataclasses.asdict(figures))
 
 
 # ================================================================
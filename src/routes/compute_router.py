@@ -4,7 +4,7 @@
 #
 # v2: submit INSERTS the job (queued) and PUBLISHES it to RabbitMQ. A dedicated
 # aio-pika consumer (src/compute/consumer.py) runs it -- the web process does no
-# execution. Kill = a DB flag the consumer polls. The gauge is derived from the DB.
+# execution. Kill = a DB flag pushed to the consumer. The gauge is derived from the DB.
 
 import json
 import logging
@@ -14,14 +14,14 @@ from uuid import UUID
 from fastapi import APIRouter, Depends, HTTPException, Request, status
 from fastapi.responses import HTMLResponse, StreamingResponse, RedirectResponse
 from fastapi.templating import Jinja2Templates
-from sqlalchemy import select, func, or_
+from sqlalchemy import select, func, or_, text
 from sqlalchemy.ext.asyncio import AsyncSession
 
 import os
 
 from fastapi import Header
 
-from src.db.database import get_db_session, AsyncSessionLocal
+from src.db.database import get_db_session
 from src.db.models.compute_model import (
     ComputeJobModel, ComputeJobStatus, ComputeTemplateModel,
     ComputeNodeModel, ComputeNodeStatus, ComputeLedgerKind,
@@ -40,7 +40,9 @@ from src.services.compute_service import (
     LPCX_CREDIT_TOKENS,
 )
 from src.compute.queue import publish_job
+from src.compute.telemetry import telemetry_hub
 from src.compute.recipes import RECIPES
+from src.compute.claims import claim_broker
 
 # Remote worker contract -- a shared node token, and which nodes are PULL nodes
 # (jobs targeting them are NOT enqueued locally; a remote worker pulls them).
@@ -324,7 +326,8 @@ async def submit_job(
     if job.status != ComputeJobStatus.REJECTED:
         if job.node in LPCX_PULL_NODES:
             # Remote worker pulls this via /worker/next -- do NOT enqueue locally.
-            pass
+            # Wake its long-polls here (other web processes hear the trigger's NOTIFY).
+            claim_broker.notify(job.node)
         else:
             # Hand off to RabbitMQ -- the consumer executes it. No work in the web process.
             await publish_job({
@@ -345,54 +348,26 @@ async def submit_job(
 # No inbound ports on the broker; DB/queue never exposed; worker stays dumb.
 # ================================================================
 @router.get("/worker/next")
-async def worker_next(node: str, _=Depends(require_node),
+async def worker_next(node: str, max_jobs: int = 1, wait: float = 0,
+                      _=Depends(require_node),
                       db: AsyncSession = Depends(get_db_session)):
-    """Hand the calling worker its next queued job for `node`, fully resolved
+    """Hand the calling worker its next queued job(s) for `node`, fully resolved
     (system + prompt already filled from the recipe + inputs). Allowlist is HERE,
-    broker-side: a job whose template isn't a known recipe is failed, not run."""
-    job = (await db.execute(
-        select(ComputeJobModel).where(
-            ComputeJobModel.node == node,
-            ComputeJobModel.status == ComputeJobStatus.QUEUED,
-        ).order_by(ComputeJobModel.job_number.asc()).limit(1)
-    )).scalar_one_or_none()
-    if not job:
-        return {"job": None}
+    broker-side: a job whose template isn't a known recipe is failed, not run.
 
-    recipe = RECIPES.get(job.template)
-    if not recipe:
-        job.status = ComputeJobStatus.FAILED
-        job.reject_reason = f"no recipe for template '{job.template}' (not on the allowlist)"
-        await db.commit()
-        return {"job": None}
+    Claims are atomic (FOR UPDATE SKIP LOCKED): two workers on one node never get the
+    same job. `max_jobs` claims a batch; `wait` long-polls up to that many seconds
+    (capped at LPCX_CLAIM_MAX_WAIT_S) instead of answering an empty queue at once.
+    `job` is the first claim (the v1 contract); `jobs` is the whole batch."""
+    jobs = await claim_broker.next_jobs(db, node, limit=max_jobs, wait=wait)
+    return {"job": jobs[0] if jobs else None, "jobs": jobs}
 
-    try:
-        ctx = json.loads(job.inputs or "{}")
-    except Exception:  # noqa: BLE001
-        ctx = {}
-    safe: dict = {}
-    for inp in recipe["inputs"]:
-        v = ctx.get(inp["name"])
-        safe[inp["name"]] = v if v not in (None, "") else inp.get("default", "")
-    try:
-        prompt = recipe["prompt"].format(**safe)
-    except Exception as e:  # noqa: BLE001
-        job.status = ComputeJobStatus.FAILED
-        job.reject_reason = f"bad inputs: {e}"
-        await db.commit()
-        return {"job": None}
 
-    job.status = ComputeJobStatus.RUNNING
-    job.progress = 10
-    await db.commit()
-    return {"job": {
-        "job_id": str(job.id),
-        "job_number": job.job_number,
-        "template": job.template,
-        "system": recipe["system"],
-        "prompt": prompt,
-        "json_mode": recipe["output"] == "json",
-    }}
+@router.get("/worker/stats")
+async def worker_stats(current_user: dict = Depends(require_compute_admin())):
+    """Per-node claim stats for this web process: polls, empty polls, jobs handed out,
+    claim query latency, and queue wait (queued -> claimed) p50/p95."""
+    return {"nodes": claim_broker.stats()}
 
 
 @router.post("/worker/result")
@@ -447,7 +422,9 @@ async def kill_job(
     if not job:
         raise HTTPException(status_code=404, detail="job not found")
     if job.status in (ComputeJobStatus.RUNNING, ComputeJobStatus.QUEUED):
-        job.kill_requested = True          # cross-process: the consumer polls this
+        job.kill_requested = True          # the durable flag (a queued job checks it at start)
+        # Push it to the running job: delivered to the consumer's LISTEN on commit.
+        await db.execute(text("SELECT pg_notify('lpcx_kill', :id)"), {"id": str(job_id)})
         await db.commit()
         return {"ok": True, "job_id": str(job_id), "status": "kill requested"}
     return {"ok": False, "job_id": str(job_id), "status": f"job already {job.status.value}"}
@@ -468,7 +445,8 @@ async def get_summary(
 
 # ================================================================
 # SSE -- live telemetry feed (read-only aggregate; the real backing for the
-# dashboard's gauge + job list). Polls the DB once a second.
+# dashboard's gauge + job list). Every connection shares ONE in-process hub
+# (src/compute/telemetry.py): a snapshot on connect, then deltas on job changes.
 # ================================================================
 @router.get("/stream")
 async def stream(request: Request):
@@ -476,31 +454,12 @@ async def stream(request: Request):
     async def gen():
         # tell the client the cadence + a hello so EventSource opens cleanly
         yield "retry: 2000\n\n"
-        while True:
-            if await request.is_disconnected():
-                break
-            async with AsyncSessionLocal() as db:
-                rows = await db.execute(
-                    select(ComputeJobModel).order_by(ComputeJobModel.created_at.desc()).limit(12)
-                )
-                jobs = [{**ComputeJobRead.model_validate(j).model_dump(mode="json"),
-                         "output": None}  # keep SSE lean; UI fetches output via GET /jobs/{id}
-                        for j in rows.scalars().all()]
-                # FIFO position among all QUEUED jobs (1-based). Approximate ETA --
-                # fairness can let a less-busy user jump ahead; it's your place in line.
-                qrows = (await db.execute(
-                    select(ComputeJobModel.id)
-                    .where(ComputeJobModel.status == ComputeJobStatus.QUEUED)
-                    .order_by(ComputeJobModel.created_at.asc())
-                )).all()
-                pos = {str(r[0]): i + 1 for i, r in enumerate(qrows)}
-                for d in jobs:
-                    if d["status"] == "queued":
-                        d["queue_position"] = pos.get(d["id"], 0)
-                brain = await brain_load(db)
-            payload = {"brain": brain, "jobs": jobs, "queue_total": len(pos)}
-            yield f"data: {json.dumps(payload, default=str)}\n\n"
-            await asyncio.sleep(1.0)
+        async with telemetry_hub.subscribe() as feed:
+            while not await request.is_disconnected():
+                try:
+                    yield await asyncio.wait_for(feed.get(), timeout=15.0)
+                except asyncio.TimeoutError:
+                    yield ": keepalive\n\n"
 
     return StreamingResponse(
         gen(),
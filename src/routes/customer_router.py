@@ -11,7 +11,7 @@ Handles both spending (tiers) and knowledge (CRACK levels).
 import logging
 from fastapi import APIRouter, Depends, HTTPException, status, Query
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, func, or_, and_
+from sqlalchemy import select, func, and_
 from datetime import datetime, timezone, timedelta
 from decimal import Decimal
 from uuid import UUID
@@ -44,6 +44,7 @@ from src.schemas.customer_schema import (
     CREDITS_REFERRED,
 )
 from src.core.keycloak_auth import require_any_pos_role, require_manager_or_admin
+from src.services import customer_search
 
 logger = logging.getLogger(__name__)
 
@@ -70,44 +71,12 @@ async def search_customers(
     - Email: "larry@example.ch" or partial
     - Phone: "+41" or partial
 
-    Returns list of matching profiles with checkout-relevant info.
+    Returns list of matching profiles with checkout-relevant info,
+    ranked best match first (exact handle, handle prefix, name / instagram prefix, then
+    contains + typo-tolerant matches) from indexes only; an HLX- card code is a direct
+    lookup. See services/customer_search.py.
     """
-    # Clean up the search term
-    search_term = q.strip()
-
-    # Build search conditions
-    conditions = []
-
-    # Handle search (case-insensitive)
-    conditions.append(func.lower(CustomerModel.handle).contains(search_term.lower()))
-
-    # Real name search -- a member enrolled as handle "poppe" / real-name "larry"
-    # must be findable by either (cashiers often know the real name).
-    conditions.append(func.lower(CustomerModel.real_name).contains(search_term.lower()))
-
-    # Instagram search (with or without @)
-    ig_term = search_term.lstrip('@')
-    conditions.append(func.lower(CustomerModel.instagram).contains(ig_term.lower()))
-
-    # Email search
-    if '@' in search_term or '.' in search_term:
-        conditions.append(func.lower(CustomerModel.email).contains(search_term.lower()))
-
-    # Phone search
-    if search_term.startswith('+') or search_term.isdigit():
-        conditions.append(CustomerModel.phone.contains(search_term))
-
-    # Query
-    query = (
-        select(CustomerModel)
-        .where(CustomerModel.is_active == True)
-        .where(or_(*conditions))
-        .order_by(CustomerModel.handle)
-        .limit(limit)
-    )
-
-    result = await db.execute(query)
-    customers = result.scalars().all()
+    customers = await customer_search.search(db, q, limit)
 
     return [
         {
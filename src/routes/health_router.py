@@ -1,10 +1,11 @@
 """Health & System diagnostics — the universal HelixNet platform status surface.
 
-Three endpoints, used across every HelixNet app:
+Four endpoints, used across every HelixNet app:
   • GET /health/healthz   — soft liveness (one line, for container healthchecks)
   • GET /health/health    — deep dependency check (DB + services), 503 if a CRITICAL dep is down
   • GET /health/system    — RICH machine-readable snapshot for the System Info dashboard
                             (build, env, wiring, storage, uptime + the dependency grid)
+  • GET /health/boot      — per-phase startup timings of this process (time-to-ready)
 
 Design rule: only CRITICAL dependencies (PostgreSQL, Keycloak) can drive the
 platform to DEGRADED / 503. Everything else (Celery, Redis, RabbitMQ, MinIO,
@@ -18,7 +19,7 @@ from datetime import datetime, timezone
 from typing import Dict, Any, List
 from urllib.parse import urlparse
 
-from fastapi import APIRouter, Depends, status, HTTPException
+from fastapi import APIRouter, Depends, Request, status, HTTPException
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import text
 
@@ -145,6 +146,16 @@ async def healthz():
     return {"status": "💚️ Helix API 🍏️ Ready 💦️🔐️⛑️🥁️🥬️🧩️ Running 💯️ PrimeTime ✅️ OK"}
 
 
+@health_router.get("/boot")
+async def boot_report(request: Request) -> Dict[str, Any]:
+    """How this process spent its startup: each phase's seconds + status, and time-to-ready.
+    Seeders deferred past ready (HX_DEFER_SEEDERS) fill in as they finish."""
+    report = getattr(request.app.state, "boot_report", None)
+    if report is None:
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="Boot still in progress")
+    return report.as_dict()
+
+
 @health_router.get(
     "/health",
     summary="💖 Robust API Health Check",
@@ -35,6 +35,7 @@ from src.schemas.hr_schema import (
     TimeEntrySubmit,
     TimeEntryApproval,
     EmployeeTimesheet,
+    PayrollWhatIfRequest,
 )
 from sqlalchemy.exc import IntegrityError
 import httpx
@@ -1357,6 +1358,30 @@ async def calculate_payroll(
         raise HTTPException(status_code=400, detail=str(e))
 
 
+@router.post("/payroll/{payroll_run_id}/what-if")
+async def payroll_what_if(
+    payroll_run_id: UUID,
+    request: PayrollWhatIfRequest,
+    db: AsyncSession = Depends(get_db_session),
+    current_user: dict = Depends(require_manager_or_admin()),
+):
+    """
+    Dry-run rate changes against a payroll run's month.
+    Loads the month once and computes every scenario against it; nothing is written.
+    Manager/Admin only.
+    """
+    from src.services.payroll_service import PayrollCalculator
+
+    try:
+        calculator = PayrollCalculator(db)
+        return await calculator.what_if(payroll_run_id, {
+            s.name: {**s.rates, "hourly_rates": s.hourly_rates}
+            for s in request.scenarios
+        })
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
 @router.post("/payroll/{payroll_run_id}/approve")
 async def approve_payroll(
     payroll_run_id: UUID,
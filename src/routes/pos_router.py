@@ -5,11 +5,13 @@ Handles products, transactions, scanning, and checkout.
 
 Sprint 4: Added HTML interface routes for Pam's POS system.
 """
+import base64
 import json
 import logging
 import re
-from fastapi import APIRouter, Depends, HTTPException, status, Request, UploadFile, File, Body
-from fastapi.responses import HTMLResponse, Response
+from dataclasses import dataclass
+from fastapi import APIRouter, Depends, HTTPException, status, Request, UploadFile, File, Body, Query
+from fastapi.responses import HTMLResponse, Response, StreamingResponse
 from fastapi.templating import Jinja2Templates
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, func, and_, or_, update
@@ -28,6 +30,11 @@ from src.services.lp_publish import publish_product
 from src.services.square_bridge import SquareBridgeError
 from src.services.vat_resolver import line_vat, split_vat
 from src.services.pricing import tier_unit_price
+from src.services.barcode_index import barcode_index
+from src.services.tenant_settings import tenant_settings
+from src.services.supplier_search import invalidate_registry
+from src.services import (barcode_integrity, catalog_feed, customer_search, sales_facts, sales_rollup,
+                          txn_numbering)
 from src.db.models import (
     ProductModel,
     ProductBarcodeModel,
@@ -70,6 +77,8 @@ from src.schemas.pos_schema import (
     ProductSuggestResponse,
     TransactionCreate,
     TransactionRead,
+    NumberBlockRequest,
+    NumberBlockRead,
     TransactionWithItems,
     LineItemCreate,
     LineItemRead,
@@ -77,6 +86,9 @@ from src.schemas.pos_schema import (
     BarcodeScanResponse,
     CheckoutRequest,
     SaleCreate,
+    SaleBatchCreate,
+    SaleBatchOutcome,
+    SaleBatchResult,
     RefundRequest,
     DailySummary,
     StoreSettingsRead,
@@ -146,12 +158,7 @@ async def _tenant_rate_table(db: AsyncSession) -> list[dict]:
     used before, so the money path is BYTE-IDENTICAL to today (golden lock). Wrapped so a DB blip
     degrades to the CH default and never turns VAT math into a 500.
     """
-    try:
-        store = await get_active_store_settings(db)
-    except Exception:
-        logger.warning("rate-table: store read failed; CH fallback", exc_info=True)
-        store = None
-    return resolve_regime(store)["vat_rates"]
+    return (await tenant_settings.get(db)).rate_table
 
 
 def _validate_and_serialize_vat_rates(rows) -> str:
@@ -865,16 +872,17 @@ async def product_i18n_description(
     db: AsyncSession = Depends(get_db_session),
     current_user: dict = Depends(require_any_pos_role()),
 ):
-    """BL-36: the product's description in the operator's language, filled on demand. A
-    Tamar/Artemis product is fetched natively (DE/EN/FR/IT are published); anything else is
-    machine-translated from the base (Ollama) and cached in product_translations. Falls back
-    to the raw base description so the modal always shows something."""
+    """BL-36: the product's description in the operator's language. A Tamar/Artemis product is
+    fetched natively (DE/EN/FR/IT are published); anything else is machine-translated from the
+    base (Ollama) by the background translation worker and cached in product_translations. A
+    skin not filled yet answers the English / raw base text with `pending: true` (and is queued),
+    so the modal always shows something and never waits on the model."""
     from src.db.models.product_model import ProductModel
-    from src.services.product_translations import ensure_description
+    from src.services.product_translations import describe
     product = await db.get(ProductModel, product_id)
     if not product:
         raise HTTPException(status_code=404, detail="Product not found")
-    return await ensure_description(db, product, lang)
+    return await describe(db, product, lang)
 
 
 @router.get("/products", response_model=list[ProductRead])
@@ -902,6 +910,33 @@ async def list_products(
     return products
 
 
+@router.get("/catalog/changes")
+async def catalog_changes(
+    request: Request,
+    since: int = 0,
+    limit: int = catalog_feed.PAGE_MAX,
+    db: AsyncSession = Depends(get_db_session),
+    current_user: dict = Depends(require_any_pos_role()),
+):
+    """Offline till mirror: what changed in the sellable catalog after cursor `since` (any POS role).
+
+    Columnar page `{cursor, head, more, reset, full, cols, rows, deleted}` — see services/catalog_feed.py.
+    Carries an ETag; a till re-asking with its cursor while nothing moved gets a bodiless 304."""
+    try:
+        head = await catalog_feed.catalog_head(db)
+    except catalog_feed.CatalogBusy:
+        raise HTTPException(status_code=503, detail="Catalog write in progress", headers={"Retry-After": "2"})
+    since = max(0, since)
+    limit = max(1, min(limit, catalog_feed.PAGE_MAX))
+    etag = catalog_feed.etag_for(since, head, limit)
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    page = await catalog_feed.catalog_changes(db, since, head, limit)
+    return Response(json.dumps(page, separators=(",", ":"), default=str),
+                    media_type="application/json", headers=headers)
+
+
 @router.get("/products/{product_id}", response_model=ProductRead)
 async def get_product(
     product_id: UUID,
@@ -973,6 +1008,21 @@ async def _find_product_by_any_barcode(db: AsyncSession, barcode: str) -> Option
     return result.scalar_one_or_none()
 
 
+async def _scan_lookup(db: AsyncSession, barcode: str) -> Optional[ProductModel]:
+    """Read-path barcode resolution for the till + kiosk: the in-process barcode index first (one dict
+    hit, then a PK load that's usually already in the session), the two-query DB walk only on a miss.
+    Write paths that must PROVE a code is free (bind/adopt/import) keep calling
+    _find_product_by_any_barcode directly — the index accelerates reads, it never arbitrates ownership."""
+    barcode = _clean_barcode(barcode)
+    entry = await barcode_index.lookup(db, barcode)
+    if entry is not None:
+        product = await db.get(ProductModel, entry.product_id)
+        if product is not None:
+            return product
+        barcode_index.invalidate()   # the row vanished under us (deleted via another worker) — rebuild
+    return await _find_product_by_any_barcode(db, barcode)
+
+
 @router.get("/products/barcode/{barcode}", response_model=ProductRead)
 async def get_product_by_barcode(
     barcode: str,
@@ -980,7 +1030,7 @@ async def get_product_by_barcode(
     current_user: dict = Depends(require_any_pos_role()),
 ):
     """Get product by barcode (for scanning) — matches primary OR alias barcodes."""
-    product = await _find_product_by_any_barcode(db, barcode)
+    product = await _scan_lookup(db, barcode)
 
     if not product:
         raise HTTPException(status_code=404, detail=f"Product with barcode '{barcode}' not found")
@@ -1303,7 +1353,7 @@ async def update_product(
     # If a manager rewrites the name/description, the cached per-language skins
     # (product_translations) are now derived from stale text — the postcard would keep
     # serving the old translated wording. We compare after the setattr loop and, if either
-    # changed, invalidate the cache so ensure_description regenerates on next view.
+    # changed, invalidate the cache so the translation worker regenerates it.
     _text_before = (product.name, product.description)
 
     for field, value in update_data.items():
@@ -1419,6 +1469,7 @@ async def hard_delete_product(
     await _purge_product_children(db, product_id)
     await db.delete(product)
     await db.commit()
+    barcode_index.invalidate()   # aliases went via raw SQL in _purge_product_children
     logger.info(f"Product PERMANENTLY deleted: {product.sku} by user {current_user['username']}")
 
 
@@ -1497,6 +1548,7 @@ async def bulk_delete_products(
         deleted.append(str(pid))
 
     await db.commit()
+    barcode_index.invalidate()   # aliases went via raw SQL in _purge_product_children
     logger.info(
         f"Bulk {action}: {len(deleted)} deleted, {len(discontinued)} discontinued, "
         f"{len(skipped_sold)} kept (sold) by {current_user['username']}"
@@ -1584,6 +1636,7 @@ async def create_supplier(
         )
     await db.refresh(new_supplier)
     new_supplier.product_count = 0  # brand new — nothing carries its prefix yet
+    invalidate_registry()           # live search picks up the new website at once
     logger.info(f"Supplier created: {new_supplier.prefix} ({new_supplier.name}) by {current_user['username']}")
     return new_supplier
 
@@ -1621,6 +1674,10 @@ async def update_supplier(
         supplier.code = new_prefix  # keep legacy `code` mirrored to the prefix
     for field, value in update_data.items():
         setattr(supplier, field, value)
+    if {"source_url", "adapter_type"} & update_data.keys():
+        # A new website/platform invalidates the stored homepage sniff.
+        supplier.detected_platform = None
+        supplier.platform_checked_at = None
     # NOTE: do NOT set updated_at here. The legacy `suppliers` table uses a NAIVE
     # DateTime column with onupdate=datetime.utcnow (which fires automatically on
     # flush). Assigning a tz-AWARE value (datetime.now(timezone.utc)) makes asyncpg
@@ -1634,6 +1691,7 @@ async def update_supplier(
             detail="A supplier with this prefix already exists.",
         )
     await db.refresh(supplier)
+    invalidate_registry()
     supplier.product_count = await _count_products_for_prefix(db, supplier.prefix)
     logger.info(f"Supplier updated: {supplier.prefix} ({supplier.name}) by {current_user['username']}")
     return supplier
@@ -1846,7 +1904,8 @@ async def reorder_suggestions(
 # for ~100%-unmarked goods; a few angles is how you recognise an item later.
 # Bytes live in MinIO; product_images rows index + order them; products.image_url
 # is the cover. Served back through the app (no public bucket / presigned URLs).
-# Tidied + shrunk by the BL-92 Pillow pipeline when present; stored as-is otherwise.
+# Tidied + shrunk by the BL-92 Pillow pipeline when present — in a worker pool, once,
+# into every served size (services/product_images.py); stored as-is otherwise.
 # ================================================================
 
 _MAX_IMAGE_BYTES = 15 * 1024 * 1024  # a phone photo, not a video
@@ -1870,12 +1929,22 @@ async def _product_display_image(db: AsyncSession, product) -> Optional[str]:
     return _image_serve_url(product.id, row.id) if row else None
 
 
-def _image_serve_url(product_id, image_id) -> str:
-    return f"/api/v1/pos/products/{product_id}/images/{image_id}"
+def _image_serve_url(product_id, image_id, size: Optional[str] = None) -> str:
+    url = f"/api/v1/pos/products/{product_id}/images/{image_id}"
+    return f"{url}?size={size}" if size else url
+
+
+def _sized_image_url(url: Optional[str], size: str) -> Optional[str]:
+    """A product's image_url at a smaller served size — our gallery URLs only; an external
+    (hotlinked) URL is returned untouched."""
+    if url and url.startswith("/api/v1/pos/products/") and "/images/" in url and "?" not in url:
+        return f"{url}?size={size}"
+    return url
 
 
-def _process_image_upload(raw: bytes, content_type: str) -> bytes:
-    """Take ANY picture the operator has and turn it into our one internal format. Raises HTTPException.
+async def _store_image_upload(db: AsyncSession, raw: bytes, content_type: str) -> tuple[str, dict]:
+    """Take ANY picture the operator has and turn it into our one internal format, stored at every
+    served size: (content_hash, variants) for the product_images row. Raises HTTPException.
 
     BL-139 — "Photo upload failed, .webp files hurt but common" (Angel). The format was never the
     problem: Pillow reads WEBP and AVIF fine and this pipeline already converts everything to JPEG
@@ -1895,18 +1964,14 @@ def _process_image_upload(raw: bytes, content_type: str) -> bytes:
     if content_type and not content_type.lower().startswith(("image/", "application/octet-stream",
                                                              "binary/", "multipart/")):
         logger.info(f"Image upload declared {content_type!r} — sniffing the bytes anyway")
+    from src.services import product_images
     try:
-        from src.services.image_intake import process, PRODUCT, ImageIntakeError
-        try:
-            return process(raw, PRODUCT).main
-        except ImageIntakeError as e:
-            # Now the message can be honest about WHY, instead of "please upload an image" at a file
-            # that WAS an image.
-            raise HTTPException(status_code=400,
-                                detail=f"That file couldn't be read as a picture ({str(e)[:80]})")
-    except ImportError:
-        logger.warning("Pillow not in image — storing product photo as-is (no resize).")
-        return raw
+        return await product_images.store(db, raw)
+    except ValueError as e:      # ImageIntakeError (a ValueError — no Pillow import needed to catch it)
+        # Now the message can be honest about WHY, instead of "please upload an image" at a file
+        # that WAS an image.
+        raise HTTPException(status_code=400,
+                            detail=f"That file couldn't be read as a picture ({str(e)[:80]})")
 
 
 async def _store_currency(db: AsyncSession) -> str:
@@ -1917,13 +1982,7 @@ async def _store_currency(db: AsyncSession) -> str:
     "not being CHF" in a shop whose currency IS EUR, and left the product at 0.00. The data was right;
     the hardcoded rule was wrong. The store row has carried `currency` all along — read it.
     """
-    try:
-        store = (await db.execute(
-            select(StoreSettingsModel).order_by(StoreSettingsModel.store_number))).scalars().first()
-        cur = (getattr(store, "currency", None) or "").strip().upper()
-        return cur or "CHF"
-    except Exception:
-        return "CHF"
+    return (await tenant_settings.get(db)).currency
 
 
 async def _apply_tender(db: AsyncSession, txn, amount_tendered, tender_currency):
@@ -1934,15 +1993,13 @@ async def _apply_tender(db: AsyncSession, txn, amount_tendered, tender_currency)
     shop's plan-rate, stamp txn.tender_currency/amount/rate, and hand back the home equivalent so the
     cash gate + change are computed AND GIVEN in the home currency. No accepted rate → 400 (never guess).
     """
-    home = await _store_currency(db)
+    tenant = await tenant_settings.get(db)
+    home = tenant.currency
     tc = (tender_currency or "").strip().upper()
     if amount_tendered is None or not tc or tc == home:
         return amount_tendered
-    from src.services.currency import load_fx, convert
-    store = (await db.execute(
-        select(StoreSettingsModel).order_by(StoreSettingsModel.store_number))).scalars().first()
-    fx = load_fx(getattr(store, "fx_rates", None) if store else None)
-    conv = convert(amount_tendered, tc, home, fx)
+    from src.services.currency import convert
+    conv = convert(amount_tendered, tc, home, tenant.fx)
     if not conv:
         raise HTTPException(
             status_code=400,
@@ -1964,8 +2021,7 @@ async def _capture_terminal_sim(db: AsyncSession, txn, capture):
     and returns the PaymentResult so the caller GATES the sale on approval (declined → 402, cart
     kept). No card data, no settlement — it's a simulation of the real ep2/TIM flow.
     """
-    from src.payments import _store_payment_provider
-    if (await _store_payment_provider(db)) != "worldline_sim":
+    if (await tenant_settings.get(db)).payment_provider != "worldline_sim":
         return None
     from src.payments import (
         PaymentIntent, WorldlineTIMAdapter, MockTerminal, to_minor_units)
@@ -1976,7 +2032,8 @@ async def _capture_terminal_sim(db: AsyncSession, txn, capture):
     tname = (getattr(capture, "terminal", None) or "AXIUM DX8000")
     ccy = await _store_currency(db)
     await db.flush()   # assign txn.id for the PaymentModel FK
-    ref = txn.transaction_number or str(txn.id)
+    # The atomic path draws its number after capture — until then the sale's id is the reference.
+    ref = txn.transaction_number if txn_numbering.parse_number(txn.transaction_number) else str(txn.id)
     intent = PaymentIntent(
         intent_id=ref, provider="worldline_sim",
         amount_minor=to_minor_units(txn.total), currency=ccy, reference=ref)
@@ -1999,13 +2056,8 @@ async def _tenant_vat_rates(db: AsyncSession):
     (resolve_regime), else CH config. Line-VAT snapshots MUST pass these so a 22.1% IT shop records
     22.1, not the hardcoded CH 8.1 (Angel: the checkout displayed 22.1 but the stored line was 8.1).
     A CH shop with a NULL table → resolve_regime → 8.1/2.6, byte-identical."""
-    try:
-        store = await get_active_store_settings(db)
-        regime = resolve_regime(store)
-        return Decimal(str(regime["vat_rate"])), Decimal(str(regime["vat_rate_reduced"]))
-    except Exception:
-        s = get_settings()
-        return Decimal(str(s.POS_VAT_RATE)), Decimal(str(s.POS_VAT_RATE_REDUCED))
+    tenant = await tenant_settings.get(db)
+    return tenant.vat_standard, tenant.vat_reduced
 
 
 async def _reference_best_match(db: AsyncSession, name: str, barcode: str = "") -> Optional[dict]:
@@ -2229,9 +2281,6 @@ async def _copy_external_image_to_storage(db: AsyncSession, product, source_url:
 
     Returns the served URL on success, else None (the caller keeps the external URL). NEVER
     raises — adopting a reference item must not fail because an image couldn't be copied."""
-    import io as _io
-    import asyncio as _asyncio
-
     url = (source_url or "").strip()
     if not (url.startswith("http://") or url.startswith("https://")):
         return None
@@ -2244,28 +2293,23 @@ async def _copy_external_image_to_storage(db: AsyncSession, product, source_url:
             resp = await c.get(url)
         if resp.status_code != 200 or not resp.content:
             return None
-        out_bytes = _process_image_upload(resp.content, resp.headers.get("content-type", "image/jpeg"))
+        digest, variants = await _store_image_upload(db, resp.content,
+                                                     resp.headers.get("content-type", "image/jpeg"))
     except HTTPException:
         return None   # not a usable image — keep the external URL
     except Exception as e:
         logger.warning(f"Reference image fetch failed ({url[:80]}): {e}")
         return None
     try:
-        from src.services.minio_service import minio_service
-        image = ProductImageModel(product_id=product.id, sort_order=0)
+        image = ProductImageModel(product_id=product.id, sort_order=0, content_hash=digest, variants=variants)
         db.add(image)
         await db.flush()
-        key = _gallery_image_key(product.id, image.id)
-        loop = _asyncio.get_running_loop()
-        await loop.run_in_executor(
-            None, minio_service.client.put_object,
-            minio_service.bucket_name, key, _io.BytesIO(out_bytes), len(out_bytes), "image/jpeg",
-        )
         serve = _image_serve_url(product.id, image.id)
         product.image_url = serve
         product.updated_at = datetime.now(timezone.utc)
         await db.commit()
-        logger.info(f"Copied reference image into storage for {product.sku} ({len(out_bytes)} bytes)")
+        logger.info(f"Copied reference image into storage for {product.sku} "
+                    f"({variants.get('full.jpg', 0)} bytes)")
         return serve
     except Exception as e:
         await db.rollback()
@@ -2327,35 +2371,26 @@ async def add_product_image(
     NOT manager-only. Catalogue management (price edits, cover, delete) stays
     manager-gated; only the benign photo-add opens up. The first photo also
     becomes the cover (products.image_url) if none is set yet."""
-    import io as _io
-    import asyncio as _asyncio
-    from src.services.minio_service import minio_service
-
     product = (await db.execute(select(ProductModel).where(ProductModel.id == product_id))).scalar_one_or_none()
     if not product:
         raise HTTPException(status_code=404, detail="Product not found")
 
-    out_bytes = _process_image_upload(await file.read(), file.content_type)
+    try:
+        digest, variants = await _store_image_upload(db, await file.read(), file.content_type)
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"MinIO product image upload failed for {product.sku}: {e}")
+        raise HTTPException(status_code=500, detail="Photo upload to storage failed")
 
     # Next sort_order = current count (append to the end of the gallery).
     existing = (await db.execute(
         select(func.count()).where(ProductImageModel.product_id == product_id)
     )).scalar() or 0
-    image = ProductImageModel(product_id=product_id, sort_order=existing)
+    image = ProductImageModel(product_id=product_id, sort_order=existing,
+                              content_hash=digest, variants=variants)
     db.add(image)
-    await db.flush()   # assign image.id before we build the key/url
-
-    key = _gallery_image_key(product_id, image.id)
-    loop = _asyncio.get_running_loop()
-    try:
-        await loop.run_in_executor(
-            None, minio_service.client.put_object,
-            minio_service.bucket_name, key, _io.BytesIO(out_bytes), len(out_bytes), "image/jpeg",
-        )
-    except Exception as e:
-        await db.rollback()
-        logger.error(f"MinIO product image upload failed for {key}: {e}")
-        raise HTTPException(status_code=500, detail="Photo upload to storage failed")
+    await db.flush()   # assign image.id before we build the url
 
     url = _image_serve_url(product_id, image.id)
     is_cover = False
@@ -2365,8 +2400,10 @@ async def add_product_image(
         is_cover = True
     product.updated_at = datetime.now(timezone.utc)
     await db.commit()
-    logger.info(f"Gallery photo added: {product.sku} #{existing+1} ({len(out_bytes)} bytes) by {current_user['username']}")
-    return {"id": str(image.id), "url": url, "is_cover": is_cover, "image_url": product.image_url}
+    logger.info(f"Gallery photo added: {product.sku} #{existing+1} ({variants.get('full.jpg', 0)} bytes) "
+                f"by {current_user['username']}")
+    return {"id": str(image.id), "url": url, "thumb_url": _image_serve_url(product_id, image.id, "thumb"),
+            "is_cover": is_cover, "image_url": product.image_url}
 
 
 @router.get("/products/{product_id}/images")
@@ -2383,6 +2420,7 @@ async def list_product_images(
     cover = product.image_url if product else None
     items = [
         {"id": str(r.id), "url": _image_serve_url(product_id, r.id),
+         "thumb_url": _image_serve_url(product_id, r.id, "thumb"),
          "is_cover": _image_serve_url(product_id, r.id) == cover}
         for r in rows
     ]
@@ -2393,22 +2431,39 @@ async def list_product_images(
 async def get_product_image(
     product_id: UUID,
     image_id: UUID,
+    request: Request,
+    size: str = "full",
     db: AsyncSession = Depends(get_db_session),
 ):
-    """Stream one gallery photo from MinIO (public — catalogue images need no auth)."""
-    import asyncio as _asyncio
-    from src.services.minio_service import minio_service
+    """One gallery photo (public — catalogue images need no auth). `size`: thumb (256 square,
+    grid tiles), list (480, result cards), full (1024, detail). WebP/AVIF when the browser says
+    it takes them. Served from the local disk cache with an ETag; MinIO only on a miss."""
+    from src.services import product_images
 
-    loop = _asyncio.get_running_loop()
+    row = (await db.execute(
+        select(ProductImageModel.content_hash, ProductImageModel.variants).where(
+            ProductImageModel.id == image_id, ProductImageModel.product_id == product_id)
+    )).first()
+    if row and row.content_hash:
+        name = product_images.pick(row.variants, size, request.headers.get("accept", ""))
+        key = product_images.content_key(row.content_hash, name)
+        etag = f'"{row.content_hash[:20]}-{name}"'
+        cache = "public, max-age=31536000, immutable"       # the URL's bytes never change
+    else:                                                   # pre-rendition photo: one object
+        name, key = "full.jpg", _gallery_image_key(product_id, image_id)
+        etag = f'"{image_id}"'
+        cache = "public, max-age=86400"
+    headers = {"ETag": etag, "Cache-Control": cache, "Vary": "Accept"}
+    if etag in (request.headers.get("if-none-match") or ""):
+        return Response(status_code=304, headers=headers)
     try:
-        data = await loop.run_in_executor(
-            None, minio_service.download_artifact, _gallery_image_key(product_id, image_id))
-    except Exception:
+        data = await product_images.read(key)
+    except Exception as e:
+        logger.warning(f"Image cache fill failed for {key}: {e}")
         data = None
-    if not data:
+    if data is None:
         raise HTTPException(status_code=404, detail="No such photo")
-    return Response(content=data, media_type="image/jpeg",
-                    headers={"Cache-Control": "public, max-age=86400"})
+    return Response(content=data, media_type=product_images.media_type(name), headers=headers)
 
 
 @router.put("/products/{product_id}/images/{image_id}/cover")
@@ -2442,6 +2497,7 @@ async def delete_product_image(
     """Remove one gallery photo. If it was the cover, repoint to the next remaining."""
     import asyncio as _asyncio
     from src.services.minio_service import minio_service
+    from src.services import product_images
 
     image = (await db.execute(
         select(ProductImageModel).where(
@@ -2451,17 +2507,9 @@ async def delete_product_image(
         raise HTTPException(status_code=404, detail="No such photo")
 
     serve_url = _image_serve_url(product_id, image_id)
+    digest, variants = image.content_hash, image.variants
     await db.delete(image)
 
-    # Best-effort remove the object from MinIO (don't fail the request if it's gone).
-    loop = _asyncio.get_running_loop()
-    try:
-        await loop.run_in_executor(
-            None, minio_service.client.remove_object,
-            minio_service.bucket_name, _gallery_image_key(product_id, image_id))
-    except Exception as e:
-        logger.warning(f"MinIO remove_object skipped for {image_id}: {e}")
-
     # If we just deleted the cover, repoint it to the first remaining photo (or clear).
     product = (await db.execute(select(ProductModel).where(ProductModel.id == product_id))).scalar_one_or_none()
     if product and product.image_url == serve_url:
@@ -2474,6 +2522,20 @@ async def delete_product_image(
         product.updated_at = datetime.now(timezone.utc)
     await db.commit()
 
+    # Only now, with the row gone for good, best-effort remove the object(s) from MinIO (don't fail
+    # the request if they're gone). A content-addressed photo another row still shows (same bytes)
+    # keeps its objects.
+    if digest:
+        await product_images.remove(db, digest, variants)
+    else:
+        loop = _asyncio.get_running_loop()
+        try:
+            await loop.run_in_executor(
+                None, minio_service.client.remove_object,
+                minio_service.bucket_name, _gallery_image_key(product_id, image_id))
+        except Exception as e:
+            logger.warning(f"MinIO remove_object skipped for {image_id}: {e}")
+
 
 # ================================================================
 # RECEIVING (BL-91) — stock IN at the counter: scan -> count -> stock up
@@ -2583,6 +2645,60 @@ def _product_size(name: str) -> str:
     return num + u
 
 
+# Keyset pagination for /search. Every sort is spelled as a list of (key expression, descending?, kind)
+# over the hit row, ending in `id` so the order is TOTAL — a page boundary can then be named by the last
+# row's key values (the opaque `cursor`) and the next page starts right after it instead of re-ranking
+# and discarding `skip` rows. Expressions are FIXED strings (never user text) → no injection surface.
+_SEARCH_NAME_KEY = ("name", False, "text")
+_SEARCH_SORT_KEYS = {
+    "name":       [_SEARCH_NAME_KEY],
+    "price_asc":  [("price", False, "num"), _SEARCH_NAME_KEY],
+    "price_desc": [("price", True, "num"), _SEARCH_NAME_KEY],
+    "recent":     [("created_at", True, "ts"), _SEARCH_NAME_KEY],
+    "stock":      [("stock_quantity", False, "int"), _SEARCH_NAME_KEY],   # informational, not a stock claim
+}
+# default: relevance when searching, else name. BL-101: rank by the SELECT-list `relevance` =
+# GREATEST(name-trigram, word_similarity(q, name+description)). The Artemis catalog NAME is German
+# ("Feuerzeug BIC mini") but the DESCRIPTION is the English text Artemis publishes — so an English query
+# ("lighter", "bic lighter") scored ~0 on the German name and sank under any item whose NAME held a token
+# ("Lighter", "LED …Light"). Scoring name-OR-description floats the real item up. (Same trick the
+# photo/capture search already uses — see search_reference_catalog.)
+_SEARCH_RELEVANCE_KEYS = [("CASE WHEN name ILIKE :q || '%' THEN 0 ELSE 1 END", False, "int"),
+                          ("relevance", True, "float"), _SEARCH_NAME_KEY]
+
+_CURSOR_DECODE = {
+    "int": int, "text": str, "float": float, "num": Decimal, "uuid": UUID,
+    "ts": datetime.fromisoformat,
+}
+
+
+def _ascending_key(expr: str, desc: bool, kind: str) -> tuple[str, str]:
+    """A sort key turned ascending (a DESC one negated), so a page boundary is ONE row comparison."""
+    if not desc:
+        return expr, kind
+    if kind == "ts":
+        return f"-extract(epoch FROM {expr})", "num"
+    return f"-({expr})", kind
+
+
+def _encode_search_cursor(values, kinds) -> str:
+    raw = [v if k in ("int", "text", "float") else (v.isoformat() if k == "ts" else str(v))
+           for v, k in zip(values, kinds)]
+    return base64.urlsafe_b64encode(json.dumps(raw).encode()).decode().rstrip("=")
+
+
+def _decode_search_cursor(cursor: str, kinds) -> list:
+    """The next page's lower bound, typed per key. A cursor from a different sort/query shape (or junk)
+    is a 400, never a silently wrong page."""
+    try:
+        raw = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        if not isinstance(raw, list) or len(raw) != len(kinds):
+            raise ValueError("cursor shape")
+        return [_CURSOR_DECODE[k](v) for v, k in zip(raw, kinds)]
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid search cursor — restart the search")
+
+
 @router.get("/search")
 async def search_products_fast(
     q: str = "",
@@ -2590,15 +2706,18 @@ async def search_products_fast(
     sort: Optional[str] = None,
     limit: int = 50,
     skip: int = 0,
+    cursor: Optional[str] = None,
     db: AsyncSession = Depends(get_db_session),
 ):
     """
-    Fast paginated product search (trigram fuzzy + ILIKE + exact sku/barcode),
-    backed by the GIN trigram index. Built for a big (thousands) catalog.
-
-    Returns an envelope: {items, total, skip, limit}. `total` is the HONEST count
-    of all matches (window count), so the UI can paginate / show "Found N".
-    No auth required for search (public catalog).
+    Fast paginated product search (trigram fuzzy + ILIKE + exact sku/barcode) over the
+    trigger-maintained `product_search_docs`, each predicate backed by its own GIN index.
+    Built for a big (thousands) catalog.
+
+    Returns an envelope: {items, total, skip, limit, next_cursor}. `total` is the HONEST count
+    of all matches (window count) on the FIRST page, so the UI can show "Found N"; later pages
+    return null rather than recount. Page on with `cursor=<next_cursor>` (keyset: O(page), not
+    O(skip)); `skip` still works for older clients. No auth required for search (public catalog).
     """
     from sqlalchemy import text
 
@@ -2612,38 +2731,47 @@ async def search_products_fast(
 
     # BL-101 durable layer: expand an ENGLISH/brand ask to the GERMAN category/keyword terms
     # the catalog actually stores ("lighter" → "feuerzeug…", "scale" → "waage…"). Only kicks
-    # in when a concept is recognised; otherwise syn_like is empty and the query below runs
+    # in when a concept is recognised; otherwise syn is empty and the query below runs
     # exactly as the plain search. See services/catalog_search_synonyms.py.
     from src.services.catalog_search_synonyms import expand_search_terms
-    syn_like = [f"%{t}%" for t in expand_search_terms(q)]
-    # SQL fragments injected only when we have expansions (never user text → no injection):
-    # a category/name hit on a synonym term scores a floor high enough to beat an incidental
+    syn = expand_search_terms(q)
+    # A category/name hit on a synonym term scores a floor high enough to beat an incidental
     # description mention, so "lighter" surfaces the whole "Feuerzeuge" shelf, BIC included.
+    # The doc already lists which synonym terms its category/name CONTAIN, so `?|` (GIN) is the
+    # exact stand-in for the old `category|name ILIKE ANY('%term%')` scan.
     syn_score = (
-        ", CASE WHEN category ILIKE ANY(:syn_like) THEN 0.75"
-        "       WHEN name ILIKE ANY(:syn_like) THEN 0.55 ELSE 0 END"
-    ) if syn_like else ""
-    syn_recall = " OR category ILIKE ANY(:syn_like) OR name ILIKE ANY(:syn_like)" if syn_like else ""
+        ", CASE WHEN d.category_terms ?| CAST(:syn AS TEXT[]) THEN 0.75"
+        "       WHEN d.name_terms ?| CAST(:syn AS TEXT[]) THEN 0.55 ELSE 0 END"
+    ) if syn else ""
+    syn_recall = (" OR d.category_terms ?| CAST(:syn AS TEXT[])"
+                  " OR d.name_terms ?| CAST(:syn AS TEXT[])") if syn else ""
+
+    # Recall, each arm on a doc index. `%` / `<%` are the indexable forms of similarity(name, q) > 0.1
+    # and word_similarity(q, name+description) > 0.35 — the thresholds are set per transaction below.
+    # An empty q lists everything, so it gets no recall clause at all (not a `:q = ''` arm that
+    # would make the planner give up on the indexes).
+    where = ["d.is_active = true"]
+    if q:
+        where.append(f"""(
+            d.name ILIKE '%' || :q || '%' OR d.sku ILIKE '%' || :q || '%'
+            OR d.barcode ILIKE '%' || :q || '%' OR d.name % :q
+            -- also match the SUPPLIER (find "Mama Cynthia" by her name) + the description text
+            OR d.supplier ILIKE '%' || :q || '%'
+            OR d.body ILIKE '%' || :q || '%'
+            -- BL-101: word-similarity against name+description catches English queries on
+            -- German-named items ("lighter"/"bic lighter" → "Feuerzeug BIC mini") and
+            -- tolerates word order + minor typos the whole-phrase ILIKE misses.
+            OR :q <% d.body
+            {syn_recall}
+        )""")
+    if category:
+        where.append("d.category ILIKE '%' || :category || '%'")
 
-    # Sort is interpolated from a FIXED whitelist (never user text) → no injection surface;
-    # q/category/limit/skip stay bound params. (No stock/reorder filter on purpose: the shop
+    # Sort keys come from the FIXED whitelist above → no injection surface; q/category/limit/skip
+    # and the cursor values stay bound params. (No stock/reorder filter on purpose: the shop
     # reorders by eyeballing the shelf + a pencil list, not thresholds — and under
     # zero-perpetual-inventory the raw stock count is unreliable anyway.)
-    order_clause = {
-        "name":       "name ASC",
-        "price_asc":  "price ASC, name",
-        "price_desc": "price DESC, name",
-        "recent":     "created_at DESC NULLS LAST, name",
-        "stock":      "stock_quantity ASC, name",   # informational view, not a stock claim
-    }.get((sort or "").strip().lower(),
-          # default: relevance when searching, else name. BL-101: rank by the SELECT-list
-          # `relevance` = GREATEST(name-trigram, word_similarity(q, name+description)). The
-          # Artemis catalog NAME is German ("Feuerzeug BIC mini") but the DESCRIPTION is the
-          # English text Artemis publishes — so an English query ("lighter", "bic lighter")
-          # scored ~0 on the German name and sank under any item whose NAME held a token
-          # ("Lighter", "LED …Light"). Scoring name-OR-description floats the real item up.
-          # (Same trick the photo/capture search already uses — see search_reference_catalog.)
-          "CASE WHEN name ILIKE :q || '%' THEN 0 ELSE 1 END, relevance DESC, name")
+    keys = list(_SEARCH_SORT_KEYS.get((sort or "").strip().lower(), _SEARCH_RELEVANCE_KEYS))
 
     # BL-045: a text query must float REAL name matches to the top under ANY sort. The explicit sorts
     # (recent/name/price) dropped the substring boost, so picking "Recently added" (the catalog default)
@@ -2651,62 +2779,82 @@ async def search_products_fast(
     # ("muff" ~ "…Powermatic mini") even though the name does NOT contain it, and by recency that junk
     # buried the actual "Muffin" at the BOTTOM (Angel found it there). A name that CONTAINS the query
     # always beats one that doesn't; the chosen sort then orders within each tier.
-    if (q or "").strip():
-        order_clause = "CASE WHEN name ILIKE '%' || :q || '%' THEN 0 ELSE 1 END, " + order_clause
+    if q:
+        keys.insert(0, ("CASE WHEN name ILIKE '%' || :q || '%' THEN 0 ELSE 1 END", False, "int"))
 
     # BL-128 #2: the query named a pack size → float exact-size matches to the very top (2g over 10g).
     size_rx = _query_size_regex(q)
     if size_rx:
-        order_clause = "CASE WHEN name ~* :size_rx THEN 0 ELSE 1 END, " + order_clause
+        keys.insert(0, ("CASE WHEN name ~* :size_rx THEN 0 ELSE 1 END", False, "int"))
+    keys.append(("id", False, "uuid"))   # total order → a stable page boundary
+    keys = [_ascending_key(*k) for k in keys]
+    kinds = [k for _, k in keys]
+
+    # A cursor SEEKS: `(k0, k1, …) > (:c0, :c1, …)` starts right after the previous page's last row,
+    # so only the rows past it are sorted for the LIMIT, and there is no OFFSET to walk.
+    params = {"q": q, "limit": limit}
+    keyset, page = "true", "LIMIT :limit"
+    if cursor:
+        for i, v in enumerate(_decode_search_cursor(cursor, kinds)):
+            params[f"c{i}"] = v
+        keyset = (f"({', '.join(f'k{i}' for i in range(len(keys)))})"
+                  f" > ({', '.join(f':c{i}' for i in range(len(keys)))})")
+    else:
+        params["skip"] = skip
+        page += " OFFSET :skip"
+    # The honest total is a full count of the match set — paid once, on the page that shows it.
+    first_page = not cursor and skip == 0
+    total_col = ", count(*) OVER() AS total_count" if first_page else ""
 
     # image fallback: a product's cover lives in products.image_url, but a cashier-
     # uploaded gallery photo only sets the cover when none exists yet — so a product can
     # have a perfectly good photo (visible in the edit gallery) while image_url is NULL,
-    # and the LIST avatar then shows the placeholder. COALESCE to the product's FIRST
-    # gallery image so the list renders the SAME picture the edit modal shows.
+    # and the LIST avatar then shows the placeholder. The doc's first_image_id (the product's
+    # FIRST gallery image, kept by the product_images trigger) lets the list render the SAME
+    # picture the edit modal shows.
     query = text(f"""
-        SELECT id, sku, barcode, name, category, price, price_tiers, tier_mode, stock_quantity, image_url, updated_at,
-               is_age_restricted, product_class,
-               (SELECT pi.id FROM product_images pi
-                  WHERE pi.product_id = products.id
-                  ORDER BY pi.sort_order, pi.created_at LIMIT 1) AS first_image_id,
-               GREATEST(
-                 similarity(name, :q),
-                 -- description at HALF weight: it should LIFT a German-named/English-described
-                 -- item ("Feuerzeug BIC mini" for "bic lighter") without letting an incidental
-                 -- word in a long description outrank a real name match. Full weight let
-                 -- unrelated items whose description merely mentions the word saturate the top.
-                 0.5 * word_similarity(:q, coalesce(name,'') || ' ' || coalesce(description,'')){syn_score}
-               ) AS relevance,
-               count(*) OVER() AS total_count
-        FROM products
-        WHERE is_active = true
-          AND (
-            :q = '' OR name ILIKE '%' || :q || '%' OR sku ILIKE '%' || :q || '%'
-            OR barcode ILIKE '%' || :q || '%' OR similarity(name, :q) > 0.1
-            -- also match the SUPPLIER (find "Mama Cynthia" by her name) + the description text
-            OR supplier_name ILIKE '%' || :q || '%'
-            OR description ILIKE '%' || :q || '%'
-            -- BL-101: word-similarity against name+description catches English queries on
-            -- German-named items ("lighter"/"bic lighter" → "Feuerzeug BIC mini") and
-            -- tolerates word order + minor typos the whole-phrase ILIKE misses.
-            OR word_similarity(:q, coalesce(name,'') || ' ' || coalesce(description,'')) > 0.35
-            {syn_recall}
-          )
-          AND (CAST(:category AS TEXT) IS NULL OR category ILIKE '%' || CAST(:category AS TEXT) || '%')
-        ORDER BY {order_clause}
-        LIMIT :limit OFFSET :skip
+        SELECT * FROM (
+            SELECT h.*, {", ".join(f"{expr} AS k{i}" for i, (expr, _) in enumerate(keys))}{total_col}
+            FROM (
+                SELECT p.id, p.sku, p.barcode, p.name, p.category, p.price, p.price_tiers, p.tier_mode,
+                       p.stock_quantity, p.image_url, p.created_at, p.updated_at,
+                       p.is_age_restricted, p.product_class, d.first_image_id,
+                       GREATEST(
+                         similarity(d.name, :q),
+                         -- description at HALF weight: it should LIFT a German-named/English-described
+                         -- item ("Feuerzeug BIC mini" for "bic lighter") without letting an incidental
+                         -- word in a long description outrank a real name match. Full weight let
+                         -- unrelated items whose description merely mentions the word saturate the top.
+                         0.5 * word_similarity(:q, d.body){syn_score}
+                       ) AS relevance
+                FROM product_search_docs d
+                JOIN products p ON p.id = d.product_id
+                WHERE {" AND ".join(where)}
+            ) h
+        ) r
+        WHERE {keyset}
+        ORDER BY {", ".join(f"k{i}" for i in range(len(keys)))}
+        {page}
     """)
-    params = {"q": q or "", "category": category, "limit": limit, "skip": skip}
-    if syn_like:
-        params["syn_like"] = syn_like
+    if category:
+        params["category"] = category
+    if syn:
+        params["syn"] = syn
     if size_rx:
         params["size_rx"] = size_rx
+    if q:
+        await db.execute(text(
+            "SELECT set_config('pg_trgm.similarity_threshold', '0.1', true),"
+            "       set_config('pg_trgm.word_similarity_threshold', '0.35', true)"))
     rows = (await db.execute(query, params)).fetchall()
 
     from src.services.catalog_taxonomy import class_promo_restricted
 
-    total = int(rows[0].total_count) if rows else 0
+    total = (int(rows[0].total_count) if rows else 0) if first_page else None
+    next_cursor = None
+    if rows and len(rows) == limit:
+        last = rows[-1]._mapping
+        next_cursor = _encode_search_cursor([last[f"k{i}"] for i in range(len(keys))], kinds)
     items = [
         {
             "id": str(row.id), "sku": row.sku, "barcode": row.barcode, "name": row.name,
@@ -2733,7 +2881,7 @@ async def search_products_fast(
         }
         for row in rows
     ]
-    return {"items": items, "total": total, "skip": skip, "limit": limit}
+    return {"items": items, "total": total, "skip": skip, "limit": limit, "next_cursor": next_cursor}
 
 
 @router.get("/search/categories")
@@ -3011,11 +3159,9 @@ async def scan_customer_qr(
             message="No QR code provided"
         )
 
-    # Look up by QR code
-    result = await db.execute(
-        select(CustomerModel).where(CustomerModel.qr_code == code)
-    )
-    customer = result.scalar_one_or_none()
+    # Look up by QR code — canonical case first (a scanner on a non-CH keyboard layout can
+    # send "hlx-…"), one probe on the unique qr_code index.
+    customer = await customer_search.find_by_qr(db, code)
 
     if not customer:
         return CustomerQRScanResponse(
@@ -3510,14 +3656,8 @@ async def create_transaction(
     current_user: dict = Depends(require_roles(["💰️ pos-cashier", "👔️ pos-manager", "👑️ pos-admin"])),
 ):
     """Create new transaction (open cart) - cashier/manager/admin only"""
-    # Generate transaction number (simple sequential for demo)
-    today = date.today().strftime("%Y%m%d")
-    # TODO: Make this atomic with proper sequence
-    count_result = await db.execute(
-        select(func.count()).where(TransactionModel.transaction_number.like(f"TXN-{today}-%"))
-    )
-    count = count_result.scalar() or 0
-    transaction_number = f"TXN-{today}-{count + 1:04d}"
+    # The store-day counter (services/txn_numbering) — drawn inside this commit, no count scan.
+    transaction_number = await txn_numbering.next_number(db)
 
     # Resolve the cashier to their stable users.id (FK target). One resolver, used by every
     # cashier-scoped path, so the sale, the drawer and "My Day" all key on the SAME value —
@@ -3552,17 +3692,44 @@ async def next_transaction_number(
     """Preview the number the NEXT sale will get (TXN-YYYYMMDD-NNNN).
 
     Display-only, so the New Sale header reads the real next number instead of a
-    random placeholder. The authoritative number is still assigned atomically in
-    create_transaction; this preview can differ if another till rings up first.
-    (Declared BEFORE /transactions/{transaction_id} so 'next-number' isn't parsed
-    as a UUID.)
+    random placeholder. Reads the same store-day counter the sale paths draw from
+    (nothing is drawn or locked here); this preview can differ if another till rings
+    up first. (Declared BEFORE /transactions/{transaction_id} so 'next-number' isn't
+    parsed as a UUID.)
     """
-    today = date.today().strftime("%Y%m%d")
-    count_result = await db.execute(
-        select(func.count()).where(TransactionModel.transaction_number.like(f"TXN-{today}-%"))
+    return {"transaction_number": await txn_numbering.peek(db)}
+
+
+@router.post("/transactions/number-blocks", response_model=NumberBlockRead, status_code=status.HTTP_201_CREATED)
+async def reserve_number_block(
+    req: NumberBlockRequest,
+    db: AsyncSession = Depends(get_db_session),
+    current_user: dict = Depends(require_roles(["💰️ pos-cashier", "👔️ pos-manager", "👑️ pos-admin"])),
+):
+    """Reserve a run of today's transaction numbers for a till about to go offline.
+
+    The till rings its outbox sales with these numbers (`SaleCreate.transaction_number`), so the
+    receipt it prints offline is the fiscal number the sale keeps. The block is cut from the same
+    store-day counter as online sales — never a collision — and is bound to the calling cashier.
+    Numbers left unused show up in the numbering audit as reserved-unused, not as gaps."""
+    cashier_uid = await _resolve_cashier_uid(db, current_user)
+    block = await txn_numbering.reserve_block(db, req.size, str(cashier_uid))
+    return NumberBlockRead(
+        day=block.day, size=block.last_number - block.first_number + 1,
+        first=txn_numbering.format_number(block.day, block.first_number, block.store_number),
+        last=txn_numbering.format_number(block.day, block.last_number, block.store_number),
     )
-    count = count_result.scalar() or 0
-    return {"transaction_number": f"TXN-{today}-{count + 1:04d}"}
+
+
+@router.get("/transactions/numbering-audit")
+async def transaction_numbering_audit(
+    day: Optional[date] = None,
+    db: AsyncSession = Depends(get_db_session),
+    current_user: dict = Depends(require_roles(["👔️ pos-manager", "👑️ pos-admin"])),
+):
+    """Fiscal-export check: every transaction number issued on `day` is either a transaction or an
+    unused number in a reserved offline block. `gaps` lists anything else; `gap_free` sums it up."""
+    return await txn_numbering.audit(db, day or date.today())
 
 
 @router.get("/transactions/{transaction_id}")
@@ -3866,42 +4033,53 @@ async def scan_barcode(
     current_user: dict = Depends(require_roles(["💰️ pos-cashier", "👔️ pos-manager", "👑️ pos-admin"])),
 ):
     """Scan barcode and add to transaction (cashier/manager/admin only)"""
-    # Find product by barcode — primary OR alias (BL-90).
-    product = await _find_product_by_any_barcode(db, scan.barcode)
-
-    if not product:
-        return BarcodeScanResponse(
-            success=False,
-            message=f"Product with barcode '{scan.barcode}' not found"
-        )
-
-    if not product.is_active:
-        return BarcodeScanResponse(
-            success=False,
-            message="Product is inactive",
-            product=ProductRead.model_validate(product)
-        )
+    not_found = BarcodeScanResponse(
+        success=False,
+        message=f"Product with barcode '{scan.barcode}' not found"
+    )
+    # Hot path: the in-process barcode index resolves the code (primary OR alias, BL-90) with one dict
+    # lookup and no query; add_item_to_transaction's own PK load is then the only product read.
+    entry = await barcode_index.lookup(db, _clean_barcode(scan.barcode))
+    if entry is not None and entry.is_active:
+        product_id = entry.product_id
+    else:
+        product = await _find_product_by_any_barcode(db, scan.barcode)
+        if not product:
+            return not_found
+        if not product.is_active:
+            return BarcodeScanResponse(
+                success=False,
+                message="Product is inactive",
+                product=ProductRead.model_validate(product)
+            )
+        product_id = product.id
 
     # Add to transaction
     line_item_data = LineItemCreate(
-        product_id=product.id,
+        product_id=product_id,
         quantity=scan.quantity
     )
 
     try:
         line_item = await add_item_to_transaction(transaction_id, line_item_data, db, current_user)
-        return BarcodeScanResponse(
-            success=True,
-            message=f"Added {scan.quantity}x {product.name}",
-            product=ProductRead.model_validate(product),
-            line_item=LineItemRead.model_validate(line_item)
-        )
     except HTTPException as e:
+        product = await db.get(ProductModel, product_id)
+        if product is None:
+            barcode_index.invalidate()   # stale index hit: the product was deleted elsewhere
+            return not_found
         return BarcodeScanResponse(
             success=False,
             message=str(e.detail),
             product=ProductRead.model_validate(product)
         )
+    # Already in the session identity map from add_item_to_transaction — no second query.
+    product = await db.get(ProductModel, product_id)
+    return BarcodeScanResponse(
+        success=True,
+        message=f"Added {scan.quantity}x {product.name}",
+        product=ProductRead.model_validate(product),
+        line_item=LineItemRead.model_validate(line_item)
+    )
 
 
 def _log_age_clearance(txn_ref: str, method: str, subject: str,
@@ -4127,6 +4305,11 @@ async def checkout_transaction(
         _tier_store = await get_active_store_settings(db)
         customer.recalculate_tier(policy_from_settings(_tier_store))
 
+    # Fold the sale into the day's running Z-report, in this same DB transaction.
+    _rates = await _tenant_rate_table(db)
+    await sales_rollup.record_sale(db, transaction, _rates)
+    await sales_facts.record_sale(db, transaction, _rates)
+
     await db.commit()
     await db.refresh(transaction)
 
@@ -4148,8 +4331,6 @@ async def create_sale(
     double-rung. Same server-authoritative money rules as the legacy 3-step path (catalog price
     wins, per-line VAT snapshot, promo guard, role discount cap, cash-drawer gate, member tier +
     CRM) — proven equivalent by tests/pos/test_create_sale_atomic.py so the two paths never drift."""
-    from src.services.catalog_taxonomy import class_promo_restricted, class_meta, class_is_age_restricted
-
     # --- Idempotency: if this client_uuid already rang, return that sale untouched (replay-safe). ---
     existing = (await db.execute(
         select(TransactionModel).where(TransactionModel.client_uuid == sale.client_uuid))).scalar_one_or_none()
@@ -4157,6 +4338,108 @@ async def create_sale(
         logger.info(f"Idempotent replay adopted: client_uuid={sale.client_uuid} -> {existing.transaction_number}")
         return existing
 
+    ctx = await _load_sale_context(db, current_user, [sale])
+    txn, _created = await _ring_sale(db, sale, current_user, ctx)
+    return txn
+
+
+@router.post("/sales/batch", response_model=SaleBatchResult)
+async def create_sales_batch(
+    batch: SaleBatchCreate,
+    db: AsyncSession = Depends(get_db_session),
+    current_user: dict = Depends(require_roles(["💰️ pos-cashier", "👔️ pos-manager", "👑️ pos-admin"])),
+):
+    """P2.2 — drain a till's offline outbox in ONE request. Sales are rung IN THE ORDER GIVEN, each
+    with exactly the rules of `POST /sales` and its OWN commit, so one rejected sale (an inactive
+    product, a closed drawer, a constraint the database refuses) is reported and the rest still
+    ring. Idempotent per sale on `client_uuid` (already-rung sales come back as `replayed`), so a
+    half-drained outbox is simply sent again. What `POST /sales` re-reads per sale — the replay lookup, products, members, the
+    cashier's cap + user row, VAT tables — is read ONCE for the whole batch."""
+    uuids = [s.client_uuid for s in batch.sales]
+    rung = {t.client_uuid: t for t in (await db.execute(
+        select(TransactionModel).where(TransactionModel.client_uuid.in_(uuids)))).scalars().all()}
+    fresh = [s for s in batch.sales if s.client_uuid not in rung]
+    ctx = None
+    if fresh:
+        ctx = await _load_sale_context(db, current_user, fresh)
+        await db.commit()   # a just-provisioned cashier row must survive any one sale's rollback
+
+    results: list[SaleBatchOutcome] = []
+    for sale in batch.sales:
+        if sale.client_uuid in rung:       # rung before (or earlier in THIS batch — a duplicate)
+            results.append(SaleBatchOutcome(client_uuid=sale.client_uuid, outcome="replayed",
+                                            transaction=rung[sale.client_uuid]))
+            continue
+        if ctx.stale:                      # a rollback expired what the context holds
+            ctx = await _load_sale_context(db, current_user, fresh)
+        try:
+            txn, created = await _ring_sale(db, sale, current_user, ctx)
+        except HTTPException as e:
+            await db.rollback()
+            ctx.stale = True
+            results.append(SaleBatchOutcome(client_uuid=sale.client_uuid, outcome="error",
+                                            status_code=e.status_code, detail=str(e.detail)))
+            continue
+        except IntegrityError as e:
+            # Not a replay race (_ring_sale resolves those) — a constraint this sale broke. Report
+            # it against the sale and keep draining; the rest of the outbox is unaffected.
+            await db.rollback()
+            ctx.stale = True
+            logger.warning(f"Outbox sale {sale.client_uuid} rejected by the database: {e.orig}")
+            results.append(SaleBatchOutcome(client_uuid=sale.client_uuid, outcome="error",
+                                            status_code=409, detail="Sale conflicts with stored data"))
+            continue
+        rung[sale.client_uuid] = txn
+        results.append(SaleBatchOutcome(client_uuid=sale.client_uuid,
+                                        outcome="created" if created else "replayed", transaction=txn))
+
+    counts = {k: sum(1 for r in results if r.outcome == k) for k in ("created", "replayed", "error")}
+    logger.info(f"Outbox drained: {len(results)} sale(s) — {counts['created']} rung, "
+                f"{counts['replayed']} replayed, {counts['error']} rejected")
+    return SaleBatchResult(results=results, created=counts["created"], replayed=counts["replayed"],
+                           failed=counts["error"])
+
+
+@dataclass
+class _SaleContext:
+    """What ringing a sale reads that doesn't depend on its cart — loaded ONCE per request (one
+    sale, or a whole outbox batch) in set-based queries instead of once per sale / per line."""
+    cap: Decimal
+    cashier_uid: str
+    vat_std: Decimal
+    vat_red: Decimal
+    rate_table: list
+    store: object                      # active StoreSettings (member tier policy), None if unset
+    products: dict                     # product_id -> ProductModel
+    customers: dict                    # customer_id -> CustomerModel
+    stale: bool = False                # set after a rollback (loaded rows are expired)
+
+
+async def _load_sale_context(db: AsyncSession, current_user: dict, sales: list) -> _SaleContext:
+    product_ids = {ln.product_id for s in sales for ln in s.lines if ln.product_id is not None}
+    customer_ids = {s.customer_id for s in sales if s.customer_id is not None}
+    products = {p.id: p for p in (await db.execute(
+        select(ProductModel).where(ProductModel.id.in_(product_ids)))).scalars().all()} if product_ids else {}
+    customers = {c.id: c for c in (await db.execute(
+        select(CustomerModel).where(CustomerModel.id.in_(customer_ids)))).scalars().all()} if customer_ids else {}
+    vat_std, vat_red = await _tenant_vat_rates(db)
+    return _SaleContext(
+        cap=await _max_discount_pct(db, current_user),
+        cashier_uid=await _resolve_cashier_uid(db, current_user),
+        vat_std=vat_std, vat_red=vat_red,
+        rate_table=await _tenant_rate_table(db),
+        store=await get_active_store_settings(db) if customer_ids else None,
+        products=products, customers=customers,
+    )
+
+
+async def _ring_sale(db: AsyncSession, sale: SaleCreate, current_user: dict,
+                     ctx: _SaleContext) -> tuple[TransactionModel, bool]:
+    """Build, price, gate and COMMIT one sale (the body of POST /sales). Returns (txn, created);
+    created is False when a concurrent replay of the same client_uuid won the insert race.
+    Raises HTTPException on a rejected sale — nothing is committed then."""
+    from src.services.catalog_taxonomy import class_promo_restricted, class_is_age_restricted
+
     # --- SEPARATE LANES (Felix's call 2026-07-13, superseding the old "Option B" suppression).
     # Two independent discounts, two different pockets:
     #   • the member's earned TIER rate — the shop's loyalty promise, automatic, ALWAYS applies;
@@ -4167,31 +4450,33 @@ async def create_sale(
     # Damaged-goods / clearance markdowns ride the ladder: cashier 15 / manager 70 / owner 100. ---
     manual_pct = sale.discount_percent or Decimal("0")
 
-    # Fetch the attached loyalty member up-front — reused for the tier discount applied later.
+    # The attached loyalty member (from the context) — reused for the tier discount applied later.
     customer = None
     if sale.customer_id is not None:
-        customer = await db.get(CustomerModel, sale.customer_id)
+        customer = ctx.customers.get(sale.customer_id)
         if customer is None:
             raise HTTPException(status_code=404, detail="Customer (loyalty member) not found")
 
-    cap = await _max_discount_pct(db, current_user)
+    cap = ctx.cap
     if manual_pct and manual_pct > cap:
         raise HTTPException(status_code=403,
                             detail=f"Discount {manual_pct}% exceeds your {cap}% limit.")
 
-    cashier_uid = await _resolve_cashier_uid(db, current_user)
-
-    # Transaction number: same count-based scheme as the legacy path (the "make this atomic"
-    # TODO carries forward — client_uuid is the new idempotency guard either way).
-    today = date.today().strftime("%Y%m%d")
-    count = (await db.execute(
-        select(func.count()).where(TransactionModel.transaction_number.like(f"TXN-{today}-%")))).scalar() or 0
-    transaction_number = f"TXN-{today}-{count + 1:04d}"
+    cashier_uid = ctx.cashier_uid
+    # An offline till rings with a number from its reserved block; check it is really this
+    # cashier's and still unused before anything else.
+    if sale.transaction_number:
+        try:
+            await txn_numbering.claim_reserved(db, sale.transaction_number, str(cashier_uid))
+        except txn_numbering.NumberNotReserved as e:
+            raise HTTPException(status_code=409, detail=str(e))
 
-    # Explicit id so line-item FKs resolve before the single flush/commit.
+    # Explicit id so line-item FKs resolve before the single flush/commit. An online sale carries a
+    # placeholder number until it draws its real one at the very end — see the numbering note there.
+    txn_id = uuid4()
     txn = TransactionModel(
-        id=uuid4(),
-        transaction_number=transaction_number,
+        id=txn_id,
+        transaction_number=sale.transaction_number or txn_numbering.provisional(txn_id),
         client_uuid=sale.client_uuid,
         cashier_id=cashier_uid,
         status=TransactionStatus.OPEN,
@@ -4203,7 +4488,7 @@ async def create_sale(
 
     # --- Build every line server-authoritatively: catalog price wins, VAT snapshot, promo guard. ---
     # The line VAT snapshot uses the STORE's effective rates (22.1 for IT), not the CH 8.1 default.
-    _sale_std, _sale_red = await _tenant_vat_rates(db)
+    _sale_std, _sale_red = ctx.vat_std, ctx.vat_red
     built_lines = []
     subtotal = Decimal("0.00")
     eligible_subtotal = Decimal("0.00")  # non-promo-restricted lines only -> the member tier discount base
@@ -4211,8 +4496,7 @@ async def create_sale(
     for ln in sale.lines:
         tier_final = False  # BL-26: True once a volume break (min_qty>=2) sets the price → discount-final
         if ln.product_id is not None:
-            product = (await db.execute(
-                select(ProductModel).where(ProductModel.id == ln.product_id))).scalar_one_or_none()
+            product = ctx.products.get(ln.product_id)
             if not product:
                 raise HTTPException(status_code=404, detail=f"Product not found: {ln.product_id}")
             if not product.is_active:
@@ -4300,7 +4584,7 @@ async def create_sale(
                 txn.total = Decimal(str(txn.total)) - w_disc
                 txn.discount_amount = Decimal(str(txn.discount_amount)) + w_disc
                 customer.welcome_discount_used = True
-                logger.info(f"Welcome discount {w_pct}% applied for {customer.handle} on {transaction_number}")
+                logger.info(f"Welcome discount {w_pct}% applied for {customer.handle} on sale {txn_id}")
             # Rung = claimed, regardless of whether a discount applied (empty/anon carts too).
             _kcart.status = "claimed"
             _kcart.claimed_by = current_user.get("username")
@@ -4319,7 +4603,7 @@ async def create_sale(
     # attested a walk-in. cart_age_restricted was set from each line's class in the loop above. ---
     _assert_age_cleared(
         cart_age_restricted, customer, sale.age_verified, current_user,
-        cashier_uid, transaction_number)
+        cashier_uid, sale.transaction_number or str(txn_id))
 
     # --- Cash drawer gate + cent-precision tender (identical rules to legacy checkout). ---
     home_tendered = sale.amount_tendered
@@ -4359,10 +4643,16 @@ async def create_sale(
     # computed from the in-memory lines (no flush needed). Falls back to single-rate if no lines.
     _lines = [(l.vat_rate, l.line_total) for l in built_lines]
     # Piece C: tenant rate table (CH shop w/ NULL vat_rates → CH config → byte-identical).
-    _rate_table = await _tenant_rate_table(db) if _lines else None
+    _rate_table = ctx.rate_table if _lines else None
     txn.tax_amount = (split_vat(_lines, txn.total, txn.subtotal, rate_table=_rate_table)["vat_total"]
                       if _lines else _inclusive_vat(txn.total))
 
+    # --- Transaction number: drawn from the store-day counter inside THIS transaction, so a sale
+    # rejected above (age gate, drawer, terminal) never took one and a failed commit hands it back —
+    # no gap. Drawn only now, after the drawer gate and the terminal capture, because the counter
+    # row stays locked until our commit and queues every other till behind it. ---
+    transaction_number = sale.transaction_number or await txn_numbering.next_number(db)
+    txn.transaction_number = transaction_number
     txn.receipt_number = f"REC-{transaction_number}"
 
     # --- CRM: member earns 1 credit/CHF (floored) + record updates + re-tier (same as legacy). ---
@@ -4387,8 +4677,11 @@ async def create_sale(
                 reference_id=txn.id, reference_type="order",
                 description=f"Purchase {transaction_number}: +{earned} credits"))
         from src.services.loyalty_service import policy_from_settings
-        _tier_store = await get_active_store_settings(db)
-        customer.recalculate_tier(policy_from_settings(_tier_store))
+        customer.recalculate_tier(policy_from_settings(ctx.store))
+
+    # Fold the sale into the day's running Z-report — part of the ONE commit below.
+    await sales_rollup.record_sale(db, txn, _rate_table or ctx.rate_table, lines=built_lines)
+    await sales_facts.record_sale(db, txn, _rate_table or ctx.rate_table, lines=built_lines)
 
     # ONE commit. The UNIQUE index on client_uuid is the real idempotency guard: if a concurrent
     # replay raced us, the INSERT loses the unique race — roll back and return the sale that won.
@@ -4396,18 +4689,19 @@ async def create_sale(
         await db.commit()
     except IntegrityError:
         await db.rollback()
+        ctx.stale = True
         won = (await db.execute(
             select(TransactionModel).where(TransactionModel.client_uuid == sale.client_uuid))).scalar_one_or_none()
         if won is not None:
             logger.info(f"Idempotent race resolved: client_uuid={sale.client_uuid} -> {won.transaction_number}")
-            return won
+            return won, False
         raise
     await db.refresh(txn)
 
     logger.info(f"Sale rung (atomic): {transaction_number} - Total: {txn.total} CHF"
                 + (f" - member {customer.handle} +{int(Decimal(str(txn.total)))}cr" if customer else "")
                 + f" [client_uuid={sale.client_uuid}]")
-    return txn
+    return txn, True
 
 
 @router.post("/transactions/{transaction_id}/refund", response_model=TransactionRead)
@@ -4462,6 +4756,10 @@ async def refund_transaction(
 
     is_partial = Decimal("0") < refund_amount < original_total
 
+    # The sale's Z-report contribution as booked, captured before the refund rewrites it.
+    _rate_table = await _tenant_rate_table(db)
+    booked = await sales_rollup.booked(db, transaction, _rate_table)
+
     # Update transaction
     transaction.updated_at = datetime.now(timezone.utc)
     if is_partial:
@@ -4491,6 +4789,9 @@ async def refund_transaction(
     # Zero perpetual inventory: a refund moves money only — there's no stock count to
     # put back on the shelf. The refund is recorded in the transaction notes above.
 
+    await sales_rollup.record_refund(db, transaction, booked, _rate_table)
+    await sales_facts.record_refund(db, transaction)
+
     await db.commit()
     await db.refresh(transaction)
 
@@ -4520,125 +4821,66 @@ async def get_daily_summary(
     else:
         target_date = datetime.strptime(report_date, "%Y-%m-%d").date()
 
-    # The day window is the shop's local calendar day, tz-aware, so it compares correctly
-    # against the tz-aware (UTC) completed_at column in Postgres.
-    start_of_day = datetime.combine(target_date, datetime.min.time(), tzinfo=SHOP_TZ)
-    end_of_day = datetime.combine(target_date, datetime.max.time(), tzinfo=SHOP_TZ)
-
-    conditions = [
-        TransactionModel.status == TransactionStatus.COMPLETED,
-        TransactionModel.completed_at >= start_of_day,
-        TransactionModel.completed_at <= end_of_day,
-    ]
+    # The running rollup (one row per day x cashier, folded in by every sale/refund) is the
+    # source; a day that was never rolled up (history) is built from the raw lines by the SAME
+    # builder, so both paths report identical figures. See services/sales_rollup.py.
+    day_aggs = await sales_rollup.read_day(db, target_date)
+    if day_aggs is None:
+        day_aggs = await sales_rollup.build_day(db, target_date, await _tenant_rate_table(db))
     if mine:
-        conditions.append(TransactionModel.cashier_id == await _resolve_cashier_uid(db, current_user))
-
-    result = await db.execute(select(TransactionModel).where(and_(*conditions)))
-    transactions = result.scalars().all()
-
-    # Calculate totals
-    total_sales = sum(t.total for t in transactions)
-    vat_total = sum(t.tax_amount for t in transactions)
-    cash_total = sum(t.total for t in transactions if t.payment_method == PaymentMethod.CASH)
-    visa_total = sum(t.total for t in transactions if t.payment_method == PaymentMethod.VISA)
-    debit_total = sum(t.total for t in transactions if t.payment_method == PaymentMethod.DEBIT)
-    twint_total = sum(t.total for t in transactions if t.payment_method == PaymentMethod.TWINT)
-    bank_transfer_total = sum(t.total for t in transactions if t.payment_method == PaymentMethod.BANK_TRANSFER)
-    crypto_total = sum(t.total for t in transactions if t.payment_method == PaymentMethod.CRYPTO)
-    other_total = sum(t.total for t in transactions if t.payment_method == PaymentMethod.OTHER)
-
-    # Promotional treats given free today: count + their cost (COGS, for Felix's tax).
-    giveaway_count = 0
-    giveaway_cost = Decimal("0.00")
-    tx_ids = [t.id for t in transactions]
-    if tx_ids:
-        gv = await db.execute(
-            select(LineItemModel.quantity, ProductModel.cost)
-            .join(ProductModel, ProductModel.id == LineItemModel.product_id, isouter=True)
-            .where(and_(LineItemModel.transaction_id.in_(tx_ids), LineItemModel.is_giveaway == True))
-        )
-        for qty, cost in gv.all():
-            q = int(qty or 0)
-            giveaway_count += q
-            giveaway_cost += Decimal(str(cost or 0)) * q
+        uid = await _resolve_cashier_uid(db, current_user)
+        day_aggs = {uid: day_aggs[uid]} if uid in day_aggs else {}
+    agg = sales_rollup.combine(day_aggs.values())
+    n = agg["txn_count"]
+    pay = agg["payments"]
+
+    def _paid(method: PaymentMethod) -> Decimal:
+        return Decimal(str(pay.get(method.name, 0)))
 
     # Swiss VAT split (INC3): the two turnover streams the FTA wants booked apart —
     # standard-rated (8.1%: dine-in cafe + all retail/alcohol/tobacco) vs reduced-rated
-    # (2.6%: takeaway cafe food/drink). Computed per-transaction from the line snapshots so
-    # each sale's cart-wide discount is prorated correctly, then summed across the day.
-    vat_standard = vat_reduced = turnover_standard = turnover_reduced = Decimal("0.00")
-    # P3 N-rate: also accumulate the per-code streams so the closeout/reports VAT rows can LOOP
-    # over any number of rates. For CH this is exactly {A, B} and reconciles to the scalars above.
-    _streams_acc: dict = {}
-    if tx_ids:
-        # Piece C: the tenant's rate table drives the Z-report streams. CH shop w/ NULL vat_rates →
-        # CH config table → the same A/B split (8.1/2.6) this loop produced before (byte-identical).
-        _rate_table = await _tenant_rate_table(db)
-        _money = {t.id: (t.total, t.subtotal) for t in transactions}
-        _lrows = (await db.execute(
-            select(LineItemModel.transaction_id, LineItemModel.vat_rate, LineItemModel.line_total)
-            .where(LineItemModel.transaction_id.in_(tx_ids))
-        )).all()
-        from collections import defaultdict as _dd
-        _bytx: dict = _dd(list)
-        for _txid, _rate, _lt in _lrows:
-            _bytx[_txid].append((_rate, _lt))
-        for _txid, _lines in _bytx.items():
-            _tot, _sub = _money.get(_txid, (Decimal("0"), Decimal("0")))
-            _sp = split_vat(_lines, _tot, _sub, rate_table=_rate_table)
-            vat_standard += _sp["vat_standard"]; vat_reduced += _sp["vat_reduced"]
-            turnover_standard += _sp["turnover_standard"]; turnover_reduced += _sp["turnover_reduced"]
-            for _code, _st in _sp["vat_streams"].items():
-                _acc = _streams_acc.setdefault(_code, {
-                    "code": _code, "label": _st["label"], "rate": _st["rate"],
-                    "turnover": Decimal("0.00"), "vat": Decimal("0.00")})
-                _acc["turnover"] += _st["turnover"]; _acc["vat"] += _st["vat"]
+    # (2.6%: takeaway cafe food/drink), split per sale from the line snapshots (each sale's
+    # cart-wide discount prorated) when the sale was folded in. P3 N-rate: the per-code streams
+    # let the closeout/reports VAT rows LOOP over any number of rates; for CH exactly {A, B}.
+    def _cents(v) -> Decimal:
+        return Decimal(str(v or 0)).quantize(Decimal("0.01"), rounding=ROUND_HALF_UP)
+
+    vat = agg["vat"]
+    vat_standard, vat_reduced = _cents(vat["vat_standard"]), _cents(vat["vat_reduced"])
+    turnover_standard, turnover_reduced = _cents(vat["turnover_standard"]), _cents(vat["turnover_reduced"])
     # Order standard (highest rate) first, matching the CH A→B reading order.
-    vat_streams = sorted(_streams_acc.values(), key=lambda s: s["rate"], reverse=True)
+    vat_streams = sorted(({**st, "turnover": _cents(st["turnover"]), "vat": _cents(st["vat"])}
+                          for st in vat["streams"].values()),
+                         key=lambda s: s["rate"], reverse=True) if n else []
 
     # Best sellers + units sold today (catalog products + custom lines, excl. free treats).
     # The leaderboard fills the once-empty "Top Seller" + gives items-sold for free.
-    top_seller = None
-    top_seller_quantity = None
-    top_sellers: list[dict] = []
-    items_sold = 0
-    if tx_ids:
-        name_expr = func.coalesce(ProductModel.name, LineItemModel.notes, "Item")
-        rows = (await db.execute(
-            select(name_expr.label("name"), func.sum(LineItemModel.quantity).label("qty"))
-            .join(ProductModel, ProductModel.id == LineItemModel.product_id, isouter=True)
-            .where(and_(
-                LineItemModel.transaction_id.in_(tx_ids),
-                LineItemModel.is_giveaway == False,
-            ))
-            .group_by(name_expr)
-            .order_by(func.sum(LineItemModel.quantity).desc())
-        )).all()
-        items_sold = sum(int(r.qty or 0) for r in rows)
-        top_sellers = [{"name": r.name, "quantity": int(r.qty)} for r in rows[:3]]
-        if top_sellers:
-            top_seller = top_sellers[0]["name"]
-            top_seller_quantity = top_sellers[0]["quantity"]
+    by_name: dict = {}
+    pids = [UUID(k) for k in agg["products"] if not k.startswith("~")]
+    names = dict((await db.execute(
+        select(ProductModel.id, ProductModel.name).where(ProductModel.id.in_(pids)))).all()) if pids else {}
+    for key, qty in agg["products"].items():
+        nm = key[1:] if key.startswith("~") else (names.get(UUID(key)) or "Item")
+        by_name[nm] = by_name.get(nm, 0) + int(qty)
+    ranked = sorted(by_name.items(), key=lambda kv: (-kv[1], kv[0]))
+    items_sold = sum(by_name.values())
+    top_sellers = [{"name": nm, "quantity": q} for nm, q in ranked[:3]]
+    top_seller = top_sellers[0]["name"] if top_sellers else None
+    top_seller_quantity = top_sellers[0]["quantity"] if top_sellers else None
 
     # Average basket.
-    n = len(transactions)
-    average_sale = (Decimal(str(total_sales)) / n).quantize(Decimal("0.01"), rounding=ROUND_HALF_UP) if n else Decimal("0.00")
+    total_sales = agg["total_sales"]
+    average_sale = (total_sales / n).quantize(Decimal("0.01"), rounding=ROUND_HALF_UP) if n else Decimal("0.00")
 
-    # Busiest hour (by transaction count) — a velocity hint.
+    # Busiest hour (by transaction count, shop-local) — a velocity hint.
     busiest_hour = None
-    if transactions:
-        from collections import Counter
-        hrs = Counter(t.completed_at.hour for t in transactions if t.completed_at)
-        if hrs:
-            h = hrs.most_common(1)[0][0]
-            busiest_hour = f"{h:02d}:00–{(h + 1) % 24:02d}:00"
+    if agg["hours"]:
+        h = int(max(sorted(agg["hours"]), key=lambda k: agg["hours"][k]))
+        busiest_hour = f"{h:02d}:00–{(h + 1) % 24:02d}:00"
 
     # Per-cashier takings today, resolved to names (BL-83: cashier_id = users.id).
     cashier_performance: dict = {}
-    _raw: dict = {}
-    for t in transactions:
-        if t.cashier_id:
-            _raw[t.cashier_id] = _raw.get(t.cashier_id, Decimal("0")) + Decimal(str(t.total))
+    _raw = {cid: a["total_sales"] for cid, a in day_aggs.items() if a["txn_count"]}
     if _raw:
         urows = await db.execute(
             select(UserModel.id, UserModel.first_name, UserModel.username).where(UserModel.id.in_(_raw.keys())))
@@ -4654,23 +4896,23 @@ async def get_daily_summary(
         busiest_hour=busiest_hour,
         cashier_performance=cashier_performance,
         date=target_date.isoformat(),
-        total_transactions=len(transactions),
-        total_sales=Decimal(str(total_sales)),
-        vat_total=Decimal(str(vat_total)),
+        total_transactions=n,
+        total_sales=total_sales,
+        vat_total=agg["vat_total"],
         vat_standard=vat_standard,
         vat_reduced=vat_reduced,
         turnover_standard=turnover_standard,
         turnover_reduced=turnover_reduced,
         vat_streams=vat_streams,
-        cash_total=Decimal(str(cash_total)),
-        visa_total=Decimal(str(visa_total)),
-        debit_total=Decimal(str(debit_total)),
-        twint_total=Decimal(str(twint_total)),
-        bank_transfer_total=Decimal(str(bank_transfer_total)),
-        crypto_total=Decimal(str(crypto_total)),
-        other_total=Decimal(str(other_total)),
-        giveaway_count=giveaway_count,
-        giveaway_cost=giveaway_cost,
+        cash_total=_paid(PaymentMethod.CASH),
+        visa_total=_paid(PaymentMethod.VISA),
+        debit_total=_paid(PaymentMethod.DEBIT),
+        twint_total=_paid(PaymentMethod.TWINT),
+        bank_transfer_total=_paid(PaymentMethod.BANK_TRANSFER),
+        crypto_total=_paid(PaymentMethod.CRYPTO),
+        other_total=_paid(PaymentMethod.OTHER),
+        giveaway_count=agg["giveaway_count"],
+        giveaway_cost=_cents(agg["giveaway_cost"]),
     )
 
 
@@ -4744,6 +4986,27 @@ async def get_daily_summary_csv(
     )
 
 
+@router.post("/reports/daily-summary/reconcile")
+async def reconcile_daily_summary(
+    report_date: Optional[str] = None,
+    apply: bool = False,
+    db: AsyncSession = Depends(get_db_session),
+    current_user: dict = Depends(require_roles(["👔️ pos-manager", "👑️ pos-admin"])),
+):
+    """Rebuild a day's Z-report from the raw sales lines and diff it against the running rollup,
+    per cashier. apply=true replaces the rollup with the rebuilt figures (also how a day from
+    before the rollup existed gets one). Manager/admin only; the same check runs hourly for
+    today + yesterday in the background."""
+    target_date = (datetime.strptime(report_date, "%Y-%m-%d").date() if report_date
+                   else datetime.now(SHOP_TZ).date())
+    result = await sales_rollup.reconcile_day(db, target_date, await _tenant_rate_table(db), apply=apply)
+    if result["applied"]:
+        await db.commit()
+        logger.info(f"Daily rollup {result['date']} rebuilt from raw lines by {current_user.get('username')} "
+                    f"({len(result['mismatches'])} cashier row(s) differed)")
+    return result
+
+
 # ================================================================
 # PRODUCT-SALES + CUSTOMER DRILL-DOWNS (Felix day-one wishlist, read-only)
 # Windows onto data we already capture: line items already carry product +
@@ -4769,6 +5032,33 @@ def _parse_report_range(date_from: Optional[str], date_to: Optional[str]):
     return d_from, d_to, start, end
 
 
+async def _drill_sales(db, rows) -> list[dict]:
+    """sales_facts.sold_lines rows → the buyer-card rows of a product / category drill, with the
+    cashier + customer display names resolved in batch (BL-83: cashier_id = users.id)."""
+    cashier_ids = {r.cashier_id for r in rows if r.cashier_id}
+    customer_ids = {r.customer_id for r in rows if r.customer_id}
+    cashier_nm: dict = {}
+    if cashier_ids:
+        urows = await db.execute(select(UserModel.id, UserModel.first_name, UserModel.username)
+                                 .where(UserModel.id.in_(cashier_ids)))
+        cashier_nm = {uid: (first or uname) for uid, first, uname in urows.all()}
+    customer_nm: dict = {}
+    if customer_ids:
+        crows = await db.execute(select(CustomerModel.id, CustomerModel.handle, CustomerModel.real_name)
+                                 .where(CustomerModel.id.in_(customer_ids)))
+        customer_nm = {cid: (handle or real or "Member") for cid, handle, real in crows.all()}
+
+    return [{
+        "transaction_id": str(r.transaction_id),
+        "transaction_number": r.transaction_number,
+        "time": r.sold_at.isoformat() if r.sold_at else None,
+        "cashier_name": cashier_nm.get(r.cashier_id, "—") if r.cashier_id else "—",
+        "customer_name": customer_nm.get(r.customer_id) if r.customer_id else None,
+        "qty": int(r.qty or 0),
+        "line_total": float(Decimal(str(r.revenue or 0)).quantize(Decimal("0.01"), rounding=ROUND_HALF_UP)),
+    } for r in rows]
+
+
 @router.get("/reports/product-sales")
 async def get_product_sales(
     date_from: Optional[str] = None,
@@ -4779,44 +5069,13 @@ async def get_product_sales(
     """What actually sold over a date range — per product, by quantity AND revenue.
 
     Answers Felix's most-likely first question ('what did I sell this week?'). Read-only
-    aggregate over completed sales' line items; giveaways excluded from revenue. Each row
-    drills to 'who bought it' via /reports/product-sales/{product_id}. Custom (off-catalog)
-    lines have no product_id and group by their name — they show but don't drill."""
-    d_from, d_to, start, end = _parse_report_range(date_from, date_to)
+    aggregate over completed sales' lines (the sales_facts table — one range scan, however
+    long the range); giveaways excluded from revenue. Each row drills to 'who bought it' via
+    /reports/product-sales/{product_id}. Custom (off-catalog) lines have no product_id and
+    group by their name — they show but don't drill."""
+    d_from, d_to, _start, _end = _parse_report_range(date_from, date_to)
 
-    tx_rows = (await db.execute(
-        select(TransactionModel.id).where(and_(
-            TransactionModel.status == TransactionStatus.COMPLETED,
-            TransactionModel.completed_at >= start,
-            TransactionModel.completed_at <= end,
-        ))
-    )).all()
-    tx_ids = [r[0] for r in tx_rows]
-    if not tx_ids:
-        return {"date_from": d_from.isoformat(), "date_to": d_to.isoformat(),
-                "products": [], "categories": [],
-                "totals": {"qty_sold": 0, "revenue": 0.0, "vat": 0.0, "product_count": 0}}
-
-    name_expr = func.coalesce(ProductModel.name, LineItemModel.notes, "Item")
-    cat_expr = func.coalesce(ProductModel.category, "Uncategorized")
-    rows = (await db.execute(
-        select(
-            LineItemModel.product_id.label("product_id"),
-            name_expr.label("name"),
-            cat_expr.label("category"),
-            func.sum(LineItemModel.quantity).label("qty"),
-            func.sum(LineItemModel.line_total).label("revenue"),
-            func.coalesce(func.sum(LineItemModel.vat_amount), 0).label("vat"),
-            func.count(func.distinct(LineItemModel.transaction_id)).label("txns"),
-        )
-        .join(ProductModel, ProductModel.id == LineItemModel.product_id, isouter=True)
-        .where(and_(
-            LineItemModel.transaction_id.in_(tx_ids),
-            LineItemModel.is_giveaway == False,
-        ))
-        .group_by(LineItemModel.product_id, name_expr, cat_expr)
-        .order_by(func.sum(LineItemModel.line_total).desc())
-    )).all()
+    rows = await sales_facts.product_totals(db, d_from, d_to)
 
     products = []
     cat_tot: dict = {}
@@ -4870,56 +5129,13 @@ async def get_product_sales_detail(
 ):
     """Who bought this product in the window — one row per sale it appeared in
     (time, cashier, customer, qty, line total). The drill behind a product-sales row."""
-    d_from, d_to, start, end = _parse_report_range(date_from, date_to)
+    d_from, d_to, _start, _end = _parse_report_range(date_from, date_to)
 
-    rows = (await db.execute(
-        select(
-            TransactionModel.id,
-            TransactionModel.transaction_number,
-            TransactionModel.completed_at,
-            TransactionModel.cashier_id,
-            TransactionModel.customer_id,
-            LineItemModel.quantity,
-            LineItemModel.line_total,
-        )
-        .join(TransactionModel, TransactionModel.id == LineItemModel.transaction_id)
-        .where(and_(
-            LineItemModel.product_id == product_id,
-            LineItemModel.is_giveaway == False,
-            TransactionModel.status == TransactionStatus.COMPLETED,
-            TransactionModel.completed_at >= start,
-            TransactionModel.completed_at <= end,
-        ))
-        .order_by(TransactionModel.completed_at.desc())
-    )).all()
-
-    # Resolve cashier + customer display names in batch (BL-83: cashier_id = users.id).
-    cashier_ids = {r.cashier_id for r in rows if r.cashier_id}
-    customer_ids = {r.customer_id for r in rows if r.customer_id}
-    cashier_nm: dict = {}
-    if cashier_ids:
-        urows = await db.execute(select(UserModel.id, UserModel.first_name, UserModel.username)
-                                 .where(UserModel.id.in_(cashier_ids)))
-        cashier_nm = {uid: (first or uname) for uid, first, uname in urows.all()}
-    customer_nm: dict = {}
-    if customer_ids:
-        crows = await db.execute(select(CustomerModel.id, CustomerModel.handle, CustomerModel.real_name)
-                                 .where(CustomerModel.id.in_(customer_ids)))
-        customer_nm = {cid: (handle or real or "Member") for cid, handle, real in crows.all()}
+    sales = await _drill_sales(db, await sales_facts.sold_lines(db, d_from, d_to, product_id=product_id))
 
     prod_name = (await db.execute(
         select(ProductModel.name).where(ProductModel.id == product_id))).scalar_one_or_none()
 
-    sales = [{
-        "transaction_id": str(r.id),
-        "transaction_number": r.transaction_number,
-        "time": r.completed_at.isoformat() if r.completed_at else None,
-        "cashier_name": cashier_nm.get(r.cashier_id, "—") if r.cashier_id else "—",
-        "customer_name": customer_nm.get(r.customer_id) if r.customer_id else None,
-        "qty": int(r.quantity or 0),
-        "line_total": float(Decimal(str(r.line_total or 0)).quantize(Decimal("0.01"), rounding=ROUND_HALF_UP)),
-    } for r in rows]
-
     return {
         "product_id": str(product_id),
         "product_name": prod_name or "Item",
@@ -4942,52 +5158,9 @@ async def get_category_sales_detail(
     """Who bought items in this category in the window — one row per sale a product
     of that category appeared in. The drill behind a 'By category' pill. Same shape
     as the product drill so the buyer-card panel can render it unchanged."""
-    d_from, d_to, start, end = _parse_report_range(date_from, date_to)
-
-    rows = (await db.execute(
-        select(
-            TransactionModel.id,
-            TransactionModel.transaction_number,
-            TransactionModel.completed_at,
-            TransactionModel.cashier_id,
-            TransactionModel.customer_id,
-            LineItemModel.quantity,
-            LineItemModel.line_total,
-        )
-        .join(TransactionModel, TransactionModel.id == LineItemModel.transaction_id)
-        .join(ProductModel, ProductModel.id == LineItemModel.product_id)
-        .where(and_(
-            ProductModel.category == category,
-            LineItemModel.is_giveaway == False,
-            TransactionModel.status == TransactionStatus.COMPLETED,
-            TransactionModel.completed_at >= start,
-            TransactionModel.completed_at <= end,
-        ))
-        .order_by(TransactionModel.completed_at.desc())
-    )).all()
-
-    cashier_ids = {r.cashier_id for r in rows if r.cashier_id}
-    customer_ids = {r.customer_id for r in rows if r.customer_id}
-    cashier_nm: dict = {}
-    if cashier_ids:
-        urows = await db.execute(select(UserModel.id, UserModel.first_name, UserModel.username)
-                                 .where(UserModel.id.in_(cashier_ids)))
-        cashier_nm = {uid: (first or uname) for uid, first, uname in urows.all()}
-    customer_nm: dict = {}
-    if customer_ids:
-        crows = await db.execute(select(CustomerModel.id, CustomerModel.handle, CustomerModel.real_name)
-                                 .where(CustomerModel.id.in_(customer_ids)))
-        customer_nm = {cid: (handle or real or "Member") for cid, handle, real in crows.all()}
+    d_from, d_to, _start, _end = _parse_report_range(date_from, date_to)
 
-    sales = [{
-        "transaction_id": str(r.id),
-        "transaction_number": r.transaction_number,
-        "time": r.completed_at.isoformat() if r.completed_at else None,
-        "cashier_name": cashier_nm.get(r.cashier_id, "—") if r.cashier_id else "—",
-        "customer_name": customer_nm.get(r.customer_id) if r.customer_id else None,
-        "qty": int(r.quantity or 0),
-        "line_total": float(Decimal(str(r.line_total or 0)).quantize(Decimal("0.01"), rounding=ROUND_HALF_UP)),
-    } for r in rows]
+    sales = await _drill_sales(db, await sales_facts.sold_lines(db, d_from, d_to, category=category))
 
     from src.services.catalog_taxonomy import category_emoji
     return {
@@ -5002,6 +5175,45 @@ async def get_category_sales_detail(
     }
 
 
+_EXPORT_SPOOL_BYTES = 8 * 1024 * 1024   # an export past this spills from memory to a temp file
+
+
+@router.get("/reports/sales-facts/export")
+async def export_sales_facts(
+    date_from: Optional[str] = None,
+    date_to: Optional[str] = None,
+    fmt: str = Query("parquet", pattern="^(parquet|csv)$"),
+    db: AsyncSession = Depends(get_db_session),
+    current_user: dict = Depends(require_roles(_REPORT_ROLES)),
+):
+    """The raw sold-line log of a date range (sales + full-refund reversals) for offline
+    analysis — Parquet (columnar, zstd) or CSV. The rows are streamed off the database in
+    batches into a spooled temp file (memory up to a few MB, disk beyond), which is then sent
+    in chunks — a long range never sits in memory whole."""
+    import tempfile
+    d_from, d_to, _start, _end = _parse_report_range(date_from, date_to)
+    name = f"sales-facts-{d_from.isoformat()}_{d_to.isoformat()}"
+    out = tempfile.SpooledTemporaryFile(max_size=_EXPORT_SPOOL_BYTES)
+    try:
+        await sales_facts.write_export(db, d_from, d_to, fmt, out)
+    except ImportError:
+        out.close()
+        raise HTTPException(status_code=503,
+                            detail="Parquet export needs an app image rebuild (pyarrow); fmt=csv works now")
+    except BaseException:
+        out.close()
+        raise
+    out.seek(0)
+
+    def _drain():
+        with out:
+            while chunk := out.read(64 * 1024):
+                yield chunk
+    media = "text/csv" if fmt == "csv" else "application/vnd.apache.parquet"
+    return StreamingResponse(_drain(), media_type=media,
+                             headers={"Content-Disposition": f'attachment; filename="{name}.{fmt}"'})
+
+
 # A product is "half-baked" if it SOLD but is still missing the two things a cashier's lean
 # quick-add can't be trusted to fill: a real category (not the "On the fly" placeholder / blank)
 # and a cost (no cost = margin-blind). These are the objective gaps that keep an item in the
@@ -5394,6 +5606,7 @@ async def import_catalog_worklist(
 
     if not dry_run:
         await db.commit()          # the operator's data is safe BEFORE any network work is attempted
+        barcode_index.invalidate()  # a sheet rebinds codes + prices in bulk — rebuild once, not per row
 
         # --- ASK OUR OWN CATALOG FIRST. Free, instant, no network, no quota, no guessing. ---
         # This runs before the barcode DBs and before the web, because 10,284 FourTwenty rows (99%
@@ -6031,6 +6244,7 @@ async def update_store_settings(
 
     settings.updated_at = datetime.now(timezone.utc)
     await db.commit()
+    tenant_settings.invalidate()   # the commit hook does too; the next cart reads the new caps/VAT/FX
     await db.refresh(settings)
 
     logger.info(f"Store #{store_number} settings updated by {current_user['username']}")
@@ -6482,115 +6696,71 @@ async def barcode_integrity_sweep(
     db: AsyncSession = Depends(get_db_session),
     current_user: dict = Depends(require_roles(["👔️ pos-manager", "👑️ pos-admin"])),
 ):
-    """BL-100 #4 — the STANDING SEAL SWEEP. Read-only. Finds barcode cross-wires BEFORE a
-    cashier scans into one at the till (the most expensive place to discover a bad match).
+    """BL-100 #4 — the STANDING SEAL SWEEP. Read-only on the catalog. Finds barcode cross-wires
+    BEFORE a cashier scans into one at the till (the most expensive place to discover a bad match).
 
     The lesson (CLAUDE.md, the MAX camper seals): when one seal fails, check ALL the seals.
     The Tycoon Gas incident (2026-07-14) and the GIZEH Pink/Black cross-wire (found 2026-07-19)
     were both a scan hitting the WRONG product because a barcode was double-assigned or stranded
     on a dead row. This surfaces the whole class so we find traps instead of scanning into them.
 
+    The findings are standing rows, kept current as products / aliases change (see
+    services/barcode_integrity.py): this drains one batch of keyed changes if no other drain holds
+    the lock, then reads the rows. A queued full re-verification is reported as
+    `full_sweep_pending` and left to the background loop / POST /integrity/reverify.
     Two checks map to the two real incidents:
       • COLLISION       — one barcode value resolves to MORE THAN ONE product (a scan is
                           ambiguous; the GIZEH `42470335` on both Pink Rolls + Black Rolls).
       • STRANDED-INACTIVE — a discontinued product still OWNS a scan-live barcode that no active
                           product shares (a scan → "discontinued" dead-end; the Tycoon failure).
+      • RENAMED-TWIN    — the same, but the live product's name is only trigram-similar (dead
+                          "Tycoon dupe" vs live "Tycoon Gas 250ml"). Postgres only.
     A minted-but-not-yet-scanned synthetic barcode is NOT flagged — that's by design (the
     capture-on-first-sale doctrine self-heals it), and flagging every fresh item would bury the
     real signal. Fix is never applied here — findings are SURFACED for a human to confirm
     physically, then resolved through the gated path.
     """
-    from sqlalchemy import union_all, literal
-
-    # --- Check A: one barcode → many products (the ambiguous scan) ---
-    # Every scan target (primary products.barcode + product_barcodes aliases) → group by value,
-    # keep the ones that resolve to more than one DISTINCT product. Core (not raw SQL) so it
-    # compiles on both Postgres (prod) and sqlite (tests).
-    _prod_bc = select(ProductModel.barcode.label("barcode"),
-                      ProductModel.id.label("pid")).where(
-                          ProductModel.barcode.isnot(None), ProductModel.barcode != "")
-    _alias_bc = select(ProductBarcodeModel.barcode.label("barcode"),
-                       ProductBarcodeModel.product_id.label("pid"))
-    _allbc = union_all(_prod_bc, _alias_bc).subquery("allbc")
-    coll_bcs = (await db.execute(
-        select(_allbc.c.barcode).group_by(_allbc.c.barcode)
-        .having(func.count(func.distinct(_allbc.c.pid)) > 1))).scalars().all()
-
-    collisions = []
-    if coll_bcs:
-        _pm = select(ProductModel.barcode.label("barcode"), literal("primary").label("role"),
-                     ProductModel.id.label("pid")).where(ProductModel.barcode.in_(coll_bcs))
-        _am = select(ProductBarcodeModel.barcode.label("barcode"), literal("alias").label("role"),
-                     ProductBarcodeModel.product_id.label("pid")).where(
-                         ProductBarcodeModel.barcode.in_(coll_bcs))
-        _mem = union_all(_pm, _am).subquery("mem")
-        mem = (await db.execute(
-            select(_mem.c.barcode, _mem.c.role, ProductModel.sku, ProductModel.name,
-                   ProductModel.is_active, ProductModel.category, ProductModel.price)
-            .join(ProductModel, ProductModel.id == _mem.c.pid)
-            .order_by(_mem.c.barcode, ProductModel.is_active.desc(), ProductModel.sku))).all()
-        by_bc: dict = {}
-        for r in mem:
-            by_bc.setdefault(r.barcode, []).append({
-                "sku": r.sku, "name": r.name, "role": r.role,
-                "is_active": bool(r.is_active), "category": r.category,
-                "price": float(r.price) if r.price is not None else None,
-            })
-        for bc, prods in by_bc.items():
-            collisions.append({"barcode": bc, "products": prods})
-
-    coll_set = set(coll_bcs)
-
-    # --- Check B: a scan-live barcode stranded on a DISCONTINUED product that has an ACTIVE
-    # same-name twin (the Tycoon shape — the scan dead-ends at "discontinued" while a live
-    # version of the item exists). A discontinued item with NO live twin scanning as
-    # "discontinued" is CORRECT behaviour, not a trap, so it's intentionally not flagged — that
-    # keeps the signal clean (sandbox has 100+ benign discontinued-with-barcode rows). The
-    # fuzzy/renamed-twin case (dead "Tycoon dupe" vs live "Tycoon Gas 250ml") needs the trigram
-    # brand/synonym layer BL-101 is building; exact same-name is the conservative zero-noise slice.
-    active_names = set((await db.execute(
-        select(func.lower(ProductModel.name)).where(ProductModel.is_active.is_(True))
-        .distinct())).scalars().all())
-    _ps = select(literal("primary").label("role"), ProductModel.barcode.label("barcode"),
-                 ProductModel.sku.label("sku"), ProductModel.name.label("name"),
-                 ProductModel.category.label("category"), ProductModel.price.label("price")).where(
-                     ProductModel.is_active.is_(False),
-                     ProductModel.barcode.isnot(None), ProductModel.barcode != "")
-    _as = select(literal("alias").label("role"), ProductBarcodeModel.barcode.label("barcode"),
-                 ProductModel.sku.label("sku"), ProductModel.name.label("name"),
-                 ProductModel.category.label("category"), ProductModel.price.label("price")).join(
-                     ProductModel, ProductModel.id == ProductBarcodeModel.product_id).where(
-                         ProductModel.is_active.is_(False))
-    _str = union_all(_ps, _as).subquery("stranded")
-    stranded_rows = (await db.execute(
-        select(_str.c.role, _str.c.barcode, _str.c.sku, _str.c.name, _str.c.category, _str.c.price)
-        .order_by(_str.c.barcode).limit(500))).all()
-    stranded = [{
-        "barcode": r.barcode, "sku": r.sku, "name": r.name, "role": r.role,
-        "category": r.category, "price": float(r.price) if r.price is not None else None,
-    } for r in stranded_rows
-        if r.barcode not in coll_set                       # collisions live in Check A
-        and (r.name or "").lower() in active_names]        # only trap if a live twin exists
-
-    checks = [
-        {"key": "collision", "severity": "high",
-         "label": "Barcode on more than one product",
-         "hint": "A scan is ambiguous — the same code rings up different items. Confirm which "
-                 "product the physical code belongs to; remove it from the other.",
-         "count": len(collisions), "findings": collisions},
-        {"key": "stranded_inactive", "severity": "medium",
-         "label": "Discontinued row holds a code, but a live item has the same name",
-         "hint": "Scanning this dead-ends at 'discontinued' while an active version exists — move "
-                 "the code onto the live row, or point the scan at the replacement.",
-         "count": len(stranded), "findings": stranded},
-    ]
-    total = sum(c["count"] for c in checks)
-    return {"total_findings": total, "clean": total == 0, "checks": checks}
+    await barcode_integrity.refresh(db, full=False, wait=False, batches=1)
+    return await barcode_integrity.report(db)
+
+
+@router.post("/integrity/reverify")
+async def barcode_integrity_reverify(
+    current_user: dict = Depends(require_roles(["👔️ pos-manager", "👑️ pos-admin"])),
+):
+    """Full re-verification of the seal sweep, streamed as NDJSON progress lines
+    ({"phase": "start"|"verify"|"done", "done", "total", "findings"}). Runs in chunks on its own
+    session, committing each, so the findings stay readable throughout and a dropped client
+    leaves every completed chunk in place."""
+    from src.db.database import get_db_session_context
+
+    async def _progress():
+        async with get_db_session_context() as s:
+            async for p in barcode_integrity.reverify(s):
+                yield json.dumps(p) + "\n"
+
+    return StreamingResponse(_progress(), media_type="application/x-ndjson")
+
+
+# Capabilities of this env's audit_log (scripts/db/audit_log_setup.sql): facet counters and the
+# trigram search expression. Probed until present, then remembered (they never go away).
+_AUDIT_CAPS: dict = {}
+_AUDIT_MATCH_CAP = 10000
+
+
+async def _audit_caps(db: AsyncSession) -> dict:
+    if not _AUDIT_CAPS.get("facets") or not _AUDIT_CAPS.get("search"):
+        from sqlalchemy import text
+        row = (await db.execute(text(
+            "SELECT to_regclass('audit_facets') IS NOT NULL AS facets, "
+            "to_regprocedure('audit_search_text(text,text,jsonb)') IS NOT NULL AS search"))).mappings().first()
+        _AUDIT_CAPS.update(facets=bool(row["facets"]), search=bool(row["search"]))
+    return _AUDIT_CAPS
 
 
 @router.get("/audit/feed")
 async def audit_feed(
-    limit: int = 40, offset: int = 0,
+    limit: int = 40, offset: int = 0, before: Optional[int] = None,
     entity_type: Optional[str] = None, actor: Optional[str] = None,
     action: Optional[str] = None, entity_id: Optional[str] = None,
     q: Optional[str] = None, since: Optional[str] = None, until: Optional[str] = None,
@@ -6600,29 +6770,43 @@ async def audit_feed(
     """The AUDIT COCKPIT feed — who / when / what changed across products, sales, closeouts,
     suppliers and settings (audit_log, filled by the audit_capture() trigger). Read-only,
     manager-gated. Filters: entity_type · actor · action · entity_id · free-text q. Enriched
-    with the entity's display name so the feed reads in plain language, not UUIDs."""
+    with the entity's display name so the feed reads in plain language, not UUIDs.
+
+    Paging is keyset: pass the page's `next_before` as `before` for the next one (an index range
+    on id, however deep; `offset` still works for old clients). Facet counts come from the
+    trigger-kept audit_facets counters; `matched` is counted on the first filtered page only (null
+    on the filtered pages after it) and capped (`matched_capped`) — the cockpit shows "10000+"
+    rather than scanning millions of rows."""
     from sqlalchemy import text
+    caps = await _audit_caps(db)
     lim = max(1, min(int(limit or 40), 200))
-    params = {"lim": lim, "off": max(0, int(offset or 0)),
+    params = {"lim": lim, "off": 0 if before is not None else max(0, int(offset or 0)),
+              "before": before, "cap": _AUDIT_MATCH_CAP + 1,
               "et": entity_type or None, "ac": actor or None, "act": action or None,
               "eid": entity_id or None, "q": (f"%{q}%" if q else None),
               "since": since or None, "until": until or None}
-    rows = (await db.execute(text("""
-        SELECT a.id, a.changed_at, a.changed_by, a.action, a.entity_type, a.entity_id, a.changes,
-               COALESCE(pr.name, su.name,
-                        a.changes->>'name', a.changes->'name'->>'new', a.changes->'name'->>'old') AS label
-        FROM audit_log a
-        LEFT JOIN products  pr ON a.entity_type='products'  AND pr.id::text = a.entity_id
-        LEFT JOIN suppliers su ON a.entity_type='suppliers' AND su.id::text = a.entity_id
+    # The search expression must match ix_audit_search_trgm's to use it.
+    q_expr = ("audit_search_text(a.entity_type, a.changed_by, a.changes) ILIKE :q" if caps["search"]
+              else "a.changed_by ILIKE :q OR a.entity_type ILIKE :q OR a.changes::text ILIKE :q")
+    where = f"""
         WHERE (CAST(:et  AS text) IS NULL OR a.entity_type = ANY(string_to_array(CAST(:et  AS text), ',')))
           AND (CAST(:ac  AS text) IS NULL OR a.changed_by  = ANY(string_to_array(CAST(:ac  AS text), ',')))
           AND (CAST(:act AS text) IS NULL OR a.action      = ANY(string_to_array(CAST(:act AS text), ',')))
           AND (CAST(:eid AS text) IS NULL OR a.entity_id   = :eid)
-          AND (CAST(:q   AS text) IS NULL OR a.changed_by ILIKE :q OR a.entity_type ILIKE :q OR a.changes::text ILIKE :q)
+          AND (CAST(:q   AS text) IS NULL OR {q_expr})
           AND (CAST(:since AS text) IS NULL OR a.changed_at >= CAST(:since AS text)::timestamptz)
           AND (CAST(:until AS text) IS NULL OR a.changed_at <= CAST(:until AS text)::timestamptz)
+    """
+    rows = (await db.execute(text(f"""
+        SELECT a.id, a.changed_at, a.changed_by, a.action, a.entity_type, a.entity_id, a.changes,
+               COALESCE(pr.name, su.name,
+                        a.changes->>'name', a.changes->'name'->>'new', a.changes->'name'->>'old') AS label
+        FROM (SELECT * FROM audit_log a {where}
+                AND (CAST(:before AS bigint) IS NULL OR a.id < CAST(:before AS bigint))
+              ORDER BY a.id DESC LIMIT :lim OFFSET :off) a
+        LEFT JOIN products  pr ON a.entity_type='products'  AND pr.id::text = a.entity_id
+        LEFT JOIN suppliers su ON a.entity_type='suppliers' AND su.id::text = a.entity_id
         ORDER BY a.id DESC
-        LIMIT :lim OFFSET :off
     """), params)).mappings().all()
 
     def _chg(v):
@@ -6641,25 +6825,35 @@ async def audit_feed(
         "label": r["label"], "changes": _chg(r["changes"]),
     } for r in rows]
 
-    matched = (await db.execute(text("""
-        SELECT count(*) FROM audit_log a
-        WHERE (CAST(:et  AS text) IS NULL OR a.entity_type = ANY(string_to_array(CAST(:et  AS text), ',')))
-          AND (CAST(:ac  AS text) IS NULL OR a.changed_by  = ANY(string_to_array(CAST(:ac  AS text), ',')))
-          AND (CAST(:act AS text) IS NULL OR a.action      = ANY(string_to_array(CAST(:act AS text), ',')))
-          AND (CAST(:eid AS text) IS NULL OR a.entity_id   = :eid)
-          AND (CAST(:q   AS text) IS NULL OR a.changed_by ILIKE :q OR a.entity_type ILIKE :q OR a.changes::text ILIKE :q)
-          AND (CAST(:since AS text) IS NULL OR a.changed_at >= CAST(:since AS text)::timestamptz)
-          AND (CAST(:until AS text) IS NULL OR a.changed_at <= CAST(:until AS text)::timestamptz)
-    """), params)).scalar() or 0
-
-    facet_actor = (await db.execute(text(
-        "SELECT changed_by, count(*) c FROM audit_log GROUP BY changed_by ORDER BY c DESC"))).all()
-    facet_type = (await db.execute(text(
-        "SELECT entity_type, count(*) c FROM audit_log GROUP BY entity_type ORDER BY c DESC"))).all()
-    facet_action = (await db.execute(text(
-        "SELECT action, count(*) c FROM audit_log GROUP BY action"))).all()
-    total = (await db.execute(text("SELECT count(*) FROM audit_log"))).scalar() or 0
-    return {"total": int(total), "matched": int(matched), "shown": len(items), "items": items,
+    if caps["facets"]:
+        counts = (await db.execute(text(
+            "SELECT facet, value, sum(n) AS c FROM audit_facets GROUP BY facet, value HAVING sum(n) > 0"
+        ))).all()
+        facet_actor = sorted(((v or None, int(c)) for f, v, c in counts if f == "actor"), key=lambda x: -x[1])
+        facet_type = sorted(((v, int(c)) for f, v, c in counts if f == "entity_type"), key=lambda x: -x[1])
+        facet_action = [(v, int(c)) for f, v, c in counts if f == "action"]
+        total = sum(c for _, c in facet_action)
+    else:   # env whose audit_log predates the counters (setup script not re-applied yet)
+        facet_actor = (await db.execute(text(
+            "SELECT changed_by, count(*) c FROM audit_log GROUP BY changed_by ORDER BY c DESC"))).all()
+        facet_type = (await db.execute(text(
+            "SELECT entity_type, count(*) c FROM audit_log GROUP BY entity_type ORDER BY c DESC"))).all()
+        facet_action = (await db.execute(text(
+            "SELECT action, count(*) c FROM audit_log GROUP BY action"))).all()
+        total = (await db.execute(text("SELECT count(*) FROM audit_log"))).scalar() or 0
+
+    # A filtered follow-up page reports matched=None (the cockpit keeps the first page's figure)
+    # rather than the unfiltered total.
+    filtered = any(params[k] for k in ("et", "ac", "act", "eid", "q", "since", "until"))
+    matched, capped = (None if filtered else int(total)), False
+    if filtered and before is None and not params["off"]:
+        matched = (await db.execute(text(
+            f"SELECT count(*) FROM (SELECT 1 FROM audit_log a {where} LIMIT :cap) m"), params)).scalar() or 0
+        capped = matched > _AUDIT_MATCH_CAP
+        matched = min(int(matched), _AUDIT_MATCH_CAP)
+    return {"total": int(total), "matched": matched, "matched_capped": capped,
+            "shown": len(items), "items": items,
+            "next_before": items[-1]["id"] if len(items) == lim else None,
             "actors": [{"name": a[0], "count": a[1]} for a in facet_actor],
             "entity_types": [{"name": t[0], "count": t[1]} for t in facet_type],
             "actions": {a[0]: a[1] for a in facet_action}}
@@ -7488,18 +7682,7 @@ async def _max_discount_pct(db: AsyncSession, current_user: dict) -> Decimal:
     the store or a value isn't set, so a missing row never blocks nor over-opens a sale."""
     roles = (current_user.get("user_roles")
              or current_user.get("realm_access", {}).get("roles", []) or [])
-    if any(("admin" in r or "developer" in r) for r in roles):
-        return Decimal("100")
-    store = None
-    try:
-        store = await get_active_store_settings(db)
-    except Exception:
-        logger.warning("discount cap: store-settings load failed; using role defaults", exc_info=True)
-    if any("manager" in r for r in roles):
-        val = store.manager_max_discount if store is not None else None
-        return val if val is not None else Decimal("25")
-    val = store.cashier_max_discount if store is not None else None
-    return val if val is not None else Decimal("10")
+    return (await tenant_settings.get(db)).max_discount_pct(roles)
 
 
 @router.get("/discount-cap")
@@ -7529,12 +7712,7 @@ async def _tenant_currency(db: AsyncSession) -> str:
     tenant's OWN currency set (a EUR 500 note / 1c coin is real money). Never raises —
     degrades to CHF exactly like /config, so a Swiss till is byte-identical.
     """
-    try:
-        store = await get_active_store_settings(db)
-        return resolve_regime(store).get("currency", "CHF")
-    except Exception:
-        logger.warning("shift: currency source failed; CHF fallback", exc_info=True)
-        return "CHF"
+    return (await tenant_settings.get(db)).regime.get("currency", "CHF")
 
 
 async def _shift_sales(db: AsyncSession, user_id: str, start: datetime, end: datetime) -> dict:
@@ -8254,13 +8432,13 @@ async def product_page(
     description in `lang`, related items, store footer. The client layers cashier/manager panels on
     top if a token is present (progressive disclosure); no auth needed to LOOK."""
     from src.db.models.product_model import ProductModel
-    from src.services.product_translations import ensure_description
+    from src.services.product_translations import describe
 
     product = await db.get(ProductModel, product_id)
     if not product:
         raise HTTPException(status_code=404, detail="Product not found")
     lang = (lang or "de").lower()[:2]
-    desc = await ensure_description(db, product, lang)
+    desc = await describe(db, product, lang)
 
     proto = request.headers.get("x-forwarded-proto", "https")
     host = request.headers.get("x-forwarded-host") or request.headers.get("host", "")
@@ -8375,8 +8553,8 @@ async def _kiosk_payload(db: AsyncSession, product, lang: str) -> dict:
     """Build the GUEST-SAFE product view for the kiosk — name + description in `lang`, price,
     image, specs, price tiers, 18+ flag, and a "more like this" carousel. Deliberately NO cost /
     margin / supplier / stock."""
-    from src.services.product_translations import ensure_description
-    desc = await ensure_description(db, product, lang)
+    from src.services.product_translations import describe
+    desc = await describe(db, product, lang)
     return {
         "related": await _kiosk_related(db, product),
         "found": True,
@@ -8407,7 +8585,7 @@ async def kiosk_lookup(
     lang = (lang or "de").lower()[:2]
     if not barcode:
         return {"found": False, "barcode": ""}
-    product = await _find_product_by_any_barcode(db, barcode)
+    product = await _scan_lookup(db, barcode)
     if not product or not product.is_active:
         return {"found": False, "barcode": barcode}
     return await _kiosk_payload(db, product, lang)
@@ -8801,14 +8979,14 @@ async def product_postcard(
     own colour when it carries one (Mama Cynthia's balms are colour-coded)."""
     import hashlib
     from src.db.models.product_model import ProductModel
-    from src.services.product_translations import ensure_description
+    from src.services.product_translations import describe
     from src.services.short_links import ensure_short_code
 
     product = await db.get(ProductModel, product_id)
     if not product:
         raise HTTPException(status_code=404, detail="Product not found")
 
-    desc = await ensure_description(db, product, lang)
+    desc = await describe(db, product, lang)
     attrs = product.attributes or {}
     # A serial that's stable per product+revision and looks official — Angel's "can't be copied".
     serial = product.sku + "-" + hashlib.sha1(
@@ -8877,16 +9055,17 @@ async def product_postcard_sheet(
     import hashlib
     import secrets
     from src.db.models.product_model import ProductModel
-    from src.services.product_translations import ensure_description
+    from src.services.product_translations import describe
     from src.services.short_links import ensure_short_code
 
     product = await db.get(ProductModel, product_id)
     if not product:
         raise HTTPException(status_code=404, detail="Product not found")
 
-    desc = await ensure_description(db, product, lang)
+    desc = await describe(db, product, lang)
     attrs = product.attributes or {}
     display_img = await _product_display_image(db, product) or ""   # BL-043: cover, else first gallery photo
+    display_img = _sized_image_url(display_img, "list")             # a quarter of A4 — 480px prints fine
     run = secrets.token_hex(2).upper()                    # per-sheet run id (Banksy provenance)
     base_serial = hashlib.sha1(f"{product.sku}|{product.updated_at}".encode()).hexdigest()[:4].upper()
     proto = request.headers.get("x-forwarded-proto", "https")
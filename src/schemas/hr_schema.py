@@ -12,7 +12,7 @@ from pydantic import BaseModel, Field, ConfigDict
 from datetime import datetime, date
 from decimal import Decimal
 from uuid import UUID
-from typing import Optional, List
+from typing import Optional, List, Dict
 from src.core.constants import HelixEnum
 
 
@@ -259,6 +259,18 @@ class PayrollRunCreate(BaseModel):
     notes: Optional[str] = Field(None, max_length=1000)
 
 
+class PayrollWhatIfScenario(BaseModel):
+    """One what-if: changed payroll rates (+ optional per-employee hourly rates)"""
+    name: str = Field(..., min_length=1, max_length=50)
+    rates: Dict[str, Decimal] = Field(default_factory=dict)  # e.g. {"ahv_employee": 0.054}
+    hourly_rates: Dict[UUID, Decimal] = Field(default_factory=dict)
+
+
+class PayrollWhatIfRequest(BaseModel):
+    """Dry-run rate changes against a payroll run's month (nothing is written)"""
+    scenarios: List[PayrollWhatIfScenario] = Field(..., min_length=1, max_length=10)
+
+
 class PayrollRunRead(BaseModel):
     """Payroll run summary"""
     id: UUID
@@ -4,7 +4,7 @@ Pydantic schemas for POS (Point of Sale) system.
 Used for request validation and response serialization.
 """
 from pydantic import BaseModel, Field, ConfigDict, field_validator
-from datetime import datetime
+from datetime import date, datetime
 from decimal import Decimal
 from uuid import UUID
 from typing import Optional, Literal, List
@@ -325,6 +325,32 @@ class SaleCreate(BaseModel):
     kiosk_cart_code: Optional[str] = Field(None, description="Kiosk held-order code — applies + consumes the first-order welcome discount")
     # 🌍-1 M2 SANDBOX sim: the mock-terminal capture result (worldline_sim provider only; else ignored).
     terminal_capture: Optional[TerminalCapture] = None
+    # Offline till: the number it printed, from a block reserved via POST /transactions/number-blocks.
+    # Must be in the cashier's block and unused (else 409). Omitted online — the server draws one.
+    transaction_number: Optional[str] = Field(None, max_length=50, description="Pre-reserved offline number (TXN-YYYYMMDD-NNNN)")
+
+
+SALES_BATCH_MAX = 250
+
+
+class SaleBatchCreate(BaseModel):
+    """Offline outbox drain (`POST /pos/sales/batch`): the till's queued sales IN RING ORDER.
+    Each one is rung exactly like `POST /pos/sales` (same rules, same client_uuid idempotency)
+    and committed on its own — one bad sale never sinks the rest of the queue."""
+    sales: list[SaleCreate] = Field(..., min_length=1, max_length=SALES_BATCH_MAX)
+
+
+class NumberBlockRequest(BaseModel):
+    """Reserve `size` consecutive transaction numbers for a till about to ring offline."""
+    size: int = Field(..., ge=1, le=500, description="How many numbers to reserve")
+
+
+class NumberBlockRead(BaseModel):
+    """A reserved run of today's numbers, bound to the cashier that asked for it."""
+    day: date
+    first: str
+    last: str
+    size: int
 
 
 class RefundRequest(BaseModel):
@@ -366,6 +392,24 @@ class TransactionWithItems(TransactionRead):
     line_items: list[LineItemRead] = []
 
 
+class SaleBatchOutcome(BaseModel):
+    """What happened to ONE queued sale: `created` (rung now), `replayed` (its client_uuid had
+    already rung — the original sale is returned) or `error` (status_code + detail, exactly what
+    `POST /pos/sales` would have answered). The till drops created/replayed from its outbox."""
+    client_uuid: UUID
+    outcome: str
+    transaction: Optional[TransactionRead] = None
+    status_code: Optional[int] = None
+    detail: Optional[str] = None
+
+
+class SaleBatchResult(BaseModel):
+    results: list[SaleBatchOutcome]
+    created: int = 0
+    replayed: int = 0
+    failed: int = 0
+
+
 # ================================================================
 # SCAN/BARCODE SCHEMAS
 # ================================================================
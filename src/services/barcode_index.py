@@ -0,0 +1,171 @@
+"""In-process barcode → product index for the till scan path.
+
+Every scan used to cost up to two sequential DB round-trips (primary `products.barcode`, then a join
+through `product_barcodes`) plus a full ProductModel load, per scan, per till. At peak several tills
+fire scans a second each, and the answer almost never changes between two of them. So the whole code
+space — primary barcodes AND BL-90 aliases — lives here as ONE dict of compact records, and a scan that
+hits it is a single dictionary lookup with zero queries.
+
+Freshness, in order of strength:
+  • any ORM write that touches a scan-relevant column (barcode, price, tiers, class, active, 18+) or an
+    alias row bumps the version on COMMIT (the session hook at the bottom) — no call site can forget;
+  • the routes that write through raw SQL (bulk delete, permanent delete, worklist import) call
+    `barcode_index.invalidate()` explicitly;
+  • a TTL caps how stale a replica can get when ANOTHER worker process did the write.
+A miss is never trusted as "unknown": the caller falls back to the authoritative DB lookup. A hit whose
+product row has vanished is caught by the caller (the PK load comes back empty) and invalidates.
+"""
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from dataclasses import dataclass
+from typing import Optional
+from uuid import UUID
+
+from sqlalchemy import event, inspect, select
+from sqlalchemy.orm import Session
+
+from src.db.models import ProductModel, ProductBarcodeModel
+
+logger = logging.getLogger(__name__)
+
+# Cross-process staleness ceiling. Writes in THIS process invalidate instantly; this only bounds how long
+# a scan in worker B can see a price/alias edit made through worker A.
+INDEX_TTL_SECONDS = 60.0
+
+# The columns a scan actually reads. A stock decrement at checkout must NOT flush the index (it would
+# rebuild on every sale); only a change to one of these does.
+_SCAN_COLUMNS = ("barcode", "price", "price_tiers", "tier_mode", "product_class",
+                 "is_active", "is_age_restricted")
+
+
+@dataclass(frozen=True)
+class BarcodeEntry:
+    """The compact record a scan needs — enough to price + gate a line without loading the product."""
+    product_id: UUID
+    price: object
+    price_tiers: Optional[list]
+    tier_mode: Optional[str]
+    product_class: str
+    is_active: bool
+    is_age_restricted: bool
+
+
+class BarcodeIndex:
+    """A versioned, lazily (re)built barcode → BarcodeEntry map shared by every request in the process."""
+
+    def __init__(self, ttl: float = INDEX_TTL_SECONDS):
+        self._ttl = ttl
+        self._codes: dict[str, BarcodeEntry] = {}
+        self._version = 0            # bumped on every invalidation
+        self._built_version = -1     # the version the current map was built at (-1 = never built)
+        self._built_at = 0.0
+        self._lock = asyncio.Lock()
+
+    @property
+    def version(self) -> int:
+        return self._version
+
+    def invalidate(self) -> None:
+        """Mark the map stale. The next lookup rebuilds it; a rebuild already in flight won't install."""
+        self._version += 1
+
+    def _fresh(self) -> bool:
+        return (self._built_version == self._version
+                and (time.monotonic() - self._built_at) < self._ttl)
+
+    async def _rebuild(self, db) -> None:
+        async with self._lock:
+            if self._fresh():          # another request rebuilt it while we waited
+                return
+            version = self._version
+            cols = (ProductModel.id, ProductModel.price, ProductModel.price_tiers, ProductModel.tier_mode,
+                    ProductModel.product_class, ProductModel.is_active, ProductModel.is_age_restricted)
+            entries: dict[UUID, BarcodeEntry] = {}
+            codes: dict[str, BarcodeEntry] = {}
+            rows = (await db.execute(select(ProductModel.barcode, *cols))).all()
+            for bc, pid, price, tiers, mode, cls, active, age in rows:
+                entry = BarcodeEntry(pid, price, tiers, mode, cls or "standard", bool(active), bool(age))
+                entries[pid] = entry
+                if bc:
+                    codes[bc] = entry
+            aliases = (await db.execute(
+                select(ProductBarcodeModel.barcode, ProductBarcodeModel.product_id))).all()
+            for bc, pid in aliases:
+                entry = entries.get(pid)
+                if entry is not None and bc not in codes:   # a primary always wins a (corrupt) tie
+                    codes[bc] = entry
+            if version != self._version:
+                # A write committed mid-build — what we read may predate it. Leave the map stale.
+                return
+            self._codes = codes
+            self._built_version = version
+            self._built_at = time.monotonic()
+            logger.info(f"barcode index built: {len(codes)} codes / {len(entries)} products (v{version})")
+
+    async def lookup(self, db, barcode: str) -> Optional[BarcodeEntry]:
+        """Resolve an already-CLEANED barcode. None means "not in the index" — NOT "unknown product";
+        the caller must confirm a miss against the DB before telling a cashier the code is new."""
+        if not barcode:
+            return None
+        if not self._fresh():
+            try:
+                await self._rebuild(db)
+            except Exception:
+                # The index is an accelerator, never a gate: a failed build degrades to the DB path.
+                logger.warning("barcode index build failed; scanning via DB", exc_info=True)
+                return None
+        return self._codes.get(barcode)
+
+    def __len__(self) -> int:
+        return len(self._codes)
+
+
+barcode_index = BarcodeIndex()
+
+
+# ----------------------------------------------------------------------------------------------------
+# Commit-time invalidation for ORM writes. after_flush still sees the pre-flush attribute history, so it
+# can tell a price edit (relevant) from a stock decrement (irrelevant); the flag is acted on only once
+# the transaction actually commits, and dropped on rollback.
+# ----------------------------------------------------------------------------------------------------
+_DIRTY_KEY = "barcode_index_dirty"
+
+
+def _touches_scan_columns(obj) -> bool:
+    state = inspect(obj)
+    return any(state.attrs[c].history.has_changes() for c in _SCAN_COLUMNS)
+
+
+@event.listens_for(Session, "after_flush")
+def _note_scan_relevant_writes(session, flush_context) -> None:
+    try:
+        if session.info.get(_DIRTY_KEY):
+            return
+        for obj in (*session.new, *session.deleted):
+            if isinstance(obj, (ProductModel, ProductBarcodeModel)):
+                session.info[_DIRTY_KEY] = True
+                return
+        for obj in session.dirty:
+            if isinstance(obj, ProductBarcodeModel) or (
+                    isinstance(obj, ProductModel) and _touches_scan_columns(obj)):
+                session.info[_DIRTY_KEY] = True
+                return
+    except Exception:
+        # Can't tell → assume it mattered. A spurious rebuild is cheap; a stale price at the till isn't.
+        session.info[_DIRTY_KEY] = True
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_on_commit(session) -> None:
+    if session.info.pop(_DIRTY_KEY, False):
+        barcode_index.invalidate()
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def _forget_on_rollback(session, previous_transaction) -> None:
+    if previous_transaction.nested:          # a savepoint: writes flushed before it still commit
+        return
+    session.info.pop(_DIRTY_KEY, None)
@@ -0,0 +1,260 @@
+"""Standing barcode-integrity findings — the seal sweep, maintained incrementally.
+
+GET /pos/integrity/sweep used to recompute the world per call: UNION ALL of every primary + alias
+barcode grouped by value, every active product name loaded into a Python set, every discontinued
+row with a code scanned — on a merged catalog, a long blocking request that only ran on demand.
+Now the findings are a table (barcode_integrity_findings) kept current as the catalog changes:
+
+  • every write that can change a finding queues its barcode(s) and product name(s) in
+    barcode_integrity_dirty — Postgres triggers on products / product_barcodes
+    (database._BARCODE_INTEGRITY_DDL; the SQLite test DB mirrors them as a test fixture);
+  • `refresh` drains the queue: the queued names are expanded to the barcodes they touch, and only
+    those barcodes are recomputed (a few indexed queries per CHUNK of barcodes) — O(changes);
+  • the sweep reads the findings rows — O(findings), after at most one non-blocking drain batch;
+    a queued full re-verification is reported as pending, never run inside the request;
+  • `reverify` is the full re-verification (first deploy, bulk deletes, or on demand): it walks every
+    barcode in keyset CHUNKs, committing and yielding progress after each, so the endpoint can stream
+    NDJSON instead of holding one long request.
+
+Checks (per barcode): COLLISION — the code resolves to more than one product; STRANDED-INACTIVE —
+only a discontinued product holds it and a live product has the SAME name; RENAMED-TWIN (Postgres) —
+the same, but the live name is only trigram-similar ("Tycoon dupe" vs "Tycoon Gas 250ml"), found by
+one batched `%` join against ix_products_name_trgm per chunk instead of a lookup per row.
+"""
+from __future__ import annotations
+
+import logging
+from collections import defaultdict
+from datetime import datetime, timezone
+
+from sqlalchemy import delete, func, insert, literal, select, text, union_all
+
+from src.db.models import (BarcodeIntegrityDirtyModel, BarcodeIntegrityFindingModel, ProductBarcodeModel,
+                           ProductModel)
+
+logger = logging.getLogger(__name__)
+
+CHUNK = 500                # barcodes recomputed per statement batch / per reverify step
+DRAIN_BATCH = 5000         # queued keys taken per refresh transaction
+FINDINGS_MAX = 500         # findings returned per check (the count is always exact)
+INTEGRITY_LOCK = 0x62636967     # 'bcig' — one drain / reverify step at a time
+
+CHECKS = (
+    {"key": "collision", "severity": "high",
+     "label": "Barcode on more than one product",
+     "hint": "A scan is ambiguous — the same code rings up different items. Confirm which "
+             "product the physical code belongs to; remove it from the other."},
+    {"key": "stranded_inactive", "severity": "medium",
+     "label": "Discontinued row holds a code, but a live item has the same name",
+     "hint": "Scanning this dead-ends at 'discontinued' while an active version exists — move "
+             "the code onto the live row, or point the scan at the replacement."},
+    {"key": "renamed_twin", "severity": "low",
+     "label": "Discontinued row holds a code, and a live item has a similar name",
+     "hint": "Probably the same article renamed — check the pack, then move the code onto the live "
+             "row. Similar is not same: confirm physically before rebinding."},
+)
+
+
+def _is_pg(db) -> bool:
+    return db.get_bind().dialect.name == "postgresql"
+
+
+async def _lock(db, *, wait: bool = True) -> bool:
+    """Take the drain/reverify lock for this transaction. wait=False tries once and reports."""
+    if not _is_pg(db):
+        return True
+    if wait:
+        await db.execute(text("SELECT pg_advisory_xact_lock(:k)"), {"k": INTEGRITY_LOCK})
+        return True
+    return bool((await db.execute(text("SELECT pg_try_advisory_xact_lock(:k)"), {"k": INTEGRITY_LOCK})).scalar())
+
+
+def _scan_targets():
+    """Every (barcode, product id, role) a scan can land on."""
+    prim = select(ProductModel.barcode.label("barcode"), ProductModel.id.label("pid"),
+                  literal("primary").label("role")).where(
+                      ProductModel.barcode.isnot(None), ProductModel.barcode != "")
+    alias = select(ProductBarcodeModel.barcode.label("barcode"), ProductBarcodeModel.product_id.label("pid"),
+                   literal("alias").label("role"))
+    return prim, alias
+
+
+def _row(r) -> dict:
+    return {"barcode": r.barcode, "sku": r.sku, "name": r.name, "role": r.role, "category": r.category,
+            "price": float(r.price) if r.price is not None else None}
+
+
+async def _compute(db, barcodes: list[str]) -> list[tuple[str, str, dict]]:
+    """(kind, barcode, detail) for every finding on `barcodes` — a handful of queries, any length."""
+    prim, alias = _scan_targets()
+    t = union_all(prim.where(ProductModel.barcode.in_(barcodes)),
+                  alias.where(ProductBarcodeModel.barcode.in_(barcodes))).subquery("t")
+    rows = (await db.execute(
+        select(t.c.barcode, t.c.role, t.c.pid, ProductModel.sku, ProductModel.name, ProductModel.is_active,
+               ProductModel.category, ProductModel.price)
+        .join(ProductModel, ProductModel.id == t.c.pid)
+        .order_by(t.c.barcode, ProductModel.is_active.desc(), ProductModel.sku, t.c.role.desc()))).all()
+
+    by_bc = defaultdict(list)
+    for r in rows:
+        by_bc[r.barcode].append(r)
+
+    findings, dead = [], []
+    for bc, rs in by_bc.items():
+        if len({r.pid for r in rs}) > 1:
+            findings.append(("collision", bc, {"barcode": bc, "products": [{
+                "sku": r.sku, "name": r.name, "role": r.role, "is_active": bool(r.is_active),
+                "category": r.category, "price": float(r.price) if r.price is not None else None,
+            } for r in rs]}))
+        elif not rs[0].is_active:
+            dead.append(rs[0])                 # one (discontinued) owner — primary row first
+
+    if dead:
+        names = {(r.name or "").lower() for r in dead}
+        live = set((await db.execute(
+            select(func.lower(ProductModel.name)).where(
+                ProductModel.is_active.is_(True), func.lower(ProductModel.name).in_(names)).distinct()
+        )).scalars().all())
+        findings += [("stranded_inactive", r.barcode, _row(r)) for r in dead if (r.name or "").lower() in live]
+        rest = [r for r in dead if (r.name or "").lower() not in live and r.name]
+        if rest and _is_pg(db):
+            twins = (await db.execute(text("""
+                SELECT DISTINCT ON (d.barcode) d.barcode, a.sku, a.name, similarity(a.name, d.name) AS sim
+                FROM unnest(CAST(:bcs AS text[]), CAST(:names AS text[])) AS d(barcode, name)
+                JOIN products a ON a.is_active AND a.name % d.name AND lower(a.name) <> lower(d.name)
+                ORDER BY d.barcode, sim DESC, a.sku
+            """), {"bcs": [r.barcode for r in rest], "names": [r.name for r in rest]})).all()
+            by_dead = {r.barcode: r for r in rest}
+            findings += [("renamed_twin", tw.barcode, _row(by_dead[tw.barcode]) | {
+                "twin": {"sku": tw.sku, "name": tw.name, "similarity": round(float(tw.sim), 2)}})
+                for tw in twins]
+    return findings
+
+
+async def _store(db, findings, *, barcodes=None, after=None, upto=None) -> None:
+    """Replace the findings for a set of barcodes, or for the key range (after, upto]."""
+    F = BarcodeIntegrityFindingModel
+    if barcodes is not None:
+        await db.execute(delete(F).where(F.barcode.in_(barcodes)))
+    else:
+        cond = [F.barcode > after]
+        if upto is not None:
+            cond.append(F.barcode <= upto)
+        await db.execute(delete(F).where(*cond))
+    if findings:
+        now = datetime.now(timezone.utc)
+        await db.execute(insert(F), [{"kind": k, "barcode": bc, "detail": d, "updated_at": now}
+                                     for k, bc, d in findings])
+
+
+async def _expand(db, barcodes: set, names: set) -> set:
+    """Queued names → every barcode of a product with that name (its live twin appearing or vanishing
+    changes them), plus, on Postgres, of discontinued products with a similar name."""
+    out = {b for b in barcodes if b}
+    names = {n for n in names if n}
+    if not names:
+        return out
+    prim, alias = _scan_targets()
+    t = union_all(prim, alias).subquery("t")
+    names_list = sorted(names)
+    for i in range(0, len(names_list), CHUNK):
+        chunk = names_list[i:i + CHUNK]
+        out.update((await db.execute(
+            select(t.c.barcode).join(ProductModel, ProductModel.id == t.c.pid)
+            .where(func.lower(ProductModel.name).in_(chunk)).distinct())).scalars().all())
+        if _is_pg(db):
+            out.update((await db.execute(text("""
+                SELECT DISTINCT t.barcode
+                FROM unnest(CAST(:names AS text[])) AS n(name)
+                JOIN products p ON NOT p.is_active AND p.name % n.name
+                JOIN (SELECT barcode, id AS pid FROM products WHERE barcode IS NOT NULL AND barcode <> ''
+                      UNION ALL SELECT barcode, product_id FROM product_barcodes) t ON t.pid = p.id
+            """), {"names": chunk})).scalars().all())
+    return out
+
+
+async def refresh(db, *, full: bool = True, wait: bool = True, batches: int | None = None) -> dict:
+    """Drain the queue: recompute the findings of every queued barcode/name. Commits per batch.
+    A queued full re-verification runs `reverify` to completion instead — unless `full=False`
+    (the request path), which leaves it queued for the background loop / POST /integrity/reverify
+    and drains only the keyed changes. `wait=False` skips the pass when another drain holds the
+    lock; `batches` caps the DRAIN_BATCH transactions taken."""
+    D = BarcodeIntegrityDirtyModel
+    keyed = [] if full else [D.full_sweep.is_(False)]
+    drained = recomputed = taken = 0
+    while batches is None or taken < batches:
+        if not await _lock(db, wait=wait):
+            await db.commit()
+            return {"drained": drained, "recomputed": recomputed, "full": False, "busy": True}
+        keys = (await db.execute(select(D.id, D.barcode, D.name, D.full_sweep).where(*keyed)
+                                 .order_by(D.id).limit(DRAIN_BATCH))).all()
+        if not keys:
+            await db.commit()
+            break
+        if any(k.full_sweep for k in keys):
+            await db.commit()
+            async for _ in reverify(db):
+                pass
+            return {"drained": drained, "recomputed": recomputed, "full": True}
+        targets = sorted(await _expand(db, {k.barcode for k in keys}, {k.name for k in keys}))
+        for i in range(0, len(targets), CHUNK):
+            chunk = targets[i:i + CHUNK]
+            await _store(db, await _compute(db, chunk), barcodes=chunk)
+        await db.execute(delete(D).where(D.id <= keys[-1].id, *keyed))
+        await db.commit()
+        drained += len(keys)
+        recomputed += len(targets)
+        taken += 1
+    if drained:
+        logger.info(f"barcode integrity: {drained} queued change(s) → {recomputed} barcode(s) rechecked")
+    return {"drained": drained, "recomputed": recomputed, "full": False}
+
+
+async def reverify(db):
+    """Full re-verification, CHUNK barcodes at a time (keyset on the value), committing each step.
+    Yields progress dicts: start → verify… → done. Writes made meanwhile stay queued for `refresh`."""
+    D = BarcodeIntegrityDirtyModel
+    upto_dirty = (await db.execute(select(func.max(D.id)))).scalar() or 0
+    prim, alias = _scan_targets()
+    t = union_all(prim, alias).subquery("t")
+    total = (await db.execute(select(func.count(func.distinct(t.c.barcode))))).scalar() or 0
+    await db.commit()
+    yield {"phase": "start", "total": total}
+
+    after, done, found = "", 0, 0
+    while True:
+        await _lock(db)
+        chunk = (await db.execute(select(t.c.barcode).where(t.c.barcode > after)
+                                  .group_by(t.c.barcode).order_by(t.c.barcode).limit(CHUNK))).scalars().all()
+        if not chunk:
+            break
+        findings = await _compute(db, list(chunk))
+        await _store(db, findings, after=after, upto=chunk[-1])
+        await db.commit()
+        after, done, found = chunk[-1], done + len(chunk), found + len(findings)
+        yield {"phase": "verify", "done": done, "total": total, "findings": found}
+
+    await _store(db, [], after=after)                # codes past the last one that still exists
+    await db.execute(delete(D).where(D.id <= upto_dirty))
+    await db.commit()
+    logger.info(f"barcode integrity: full re-verification — {done} barcode(s), {found} finding(s)")
+    yield {"phase": "done", "done": done, "total": total, "findings": found}
+
+
+async def report(db) -> dict:
+    """The sweep as the endpoint returns it, read from the findings table."""
+    F = BarcodeIntegrityFindingModel
+    counts = dict((await db.execute(select(F.kind, func.count()).group_by(F.kind))).all())
+    checks = []
+    for c in CHECKS:
+        n = int(counts.get(c["key"], 0))
+        rows = (await db.execute(select(F.detail).where(F.kind == c["key"])
+                                 .order_by(F.barcode).limit(FINDINGS_MAX))).scalars().all() if n else []
+        checks.append({**c, "count": n, "findings": list(rows)})
+    total = sum(c["count"] for c in checks)
+    D = BarcodeIntegrityDirtyModel
+    pending = dict((await db.execute(select(D.full_sweep, func.count()).group_by(D.full_sweep))).all())
+    return {"total_findings": total, "clean": total == 0,
+            "pending_changes": int(pending.get(False, 0)),
+            "full_sweep_pending": bool(pending.get(True)), "checks": checks}
+
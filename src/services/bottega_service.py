@@ -13,7 +13,7 @@ import re
 
 import httpx
 
-from src.llm import run_llm, turbo_or_local
+from src.llm import run_llm, stream_llm, turbo_or_local
 
 logger = logging.getLogger("helix.bottega")
 
@@ -73,7 +73,7 @@ class BrainUnavailable(Exception):
 
 async def _brain_chat(system: str, user: str, json_mode: bool = False,
                       schema: dict | None = None, model: str | None = None,
-                      model_local: str | None = None) -> str:
+                      model_local: str | None = None, cache_ttl: float | None = None) -> str:
     """Shared brain call -- the seed of the procedure-as-code recipe runner. RESILIENT:
     routes through the single src.llm wrapper; if the pinned model isn't served (404) it
     falls back ONCE to the house brain; any total failure raises BrainUnavailable so the
@@ -82,11 +82,14 @@ async def _brain_chat(system: str, user: str, json_mode: bool = False,
     schema       = the outbound Service Interface (a JSON Schema), ENFORCED on the model.
     model        = the recipe's Turbo brain (DATA); default BIO_MODEL.
     model_local  = the local-Ollama fallback brain; default LOCAL_MODEL.
-    A recipe can now name BOTH (turbo + local) so its model need not exist on both backends."""
+    A recipe can now name BOTH (turbo + local) so its model need not exist on both backends.
+    cache_ttl    = run it deterministic (temperature 0) and cache the answer that long --
+                   the same prompt then skips the model (see src.llm.client)."""
+    det = {"temperature": 0, "cache_ttl": cache_ttl} if cache_ttl else {}
     primary = turbo_or_local(model or BIO_MODEL, model_local or LOCAL_MODEL)
     house = turbo_or_local(BIO_MODEL, LOCAL_MODEL)
     try:
-        res = await run_llm(user, target=primary, system=system, json_mode=json_mode, schema=schema)
+        res = await run_llm(user, target=primary, system=system, json_mode=json_mode, schema=schema, **det)
         return res.text
     except httpx.HTTPStatusError as e:
         code = e.response.status_code if e.response is not None else 0
@@ -95,7 +98,8 @@ async def _brain_chat(system: str, user: str, json_mode: bool = False,
             logger.warning("brain '%s' unavailable (404); falling back to house brain '%s'",
                            primary.model, house.model)
             try:
-                res = await run_llm(user, target=house, system=system, json_mode=json_mode, schema=schema)
+                res = await run_llm(user, target=house, system=system, json_mode=json_mode, schema=schema,
+                                    **det)
                 return res.text
             except Exception as e2:  # noqa: BLE001
                 raise BrainUnavailable(str(e2)) from e2
@@ -104,6 +108,31 @@ async def _brain_chat(system: str, user: str, json_mode: bool = False,
         raise BrainUnavailable(str(e)) from e
 
 
+async def _brain_stream(system: str, user: str, model: str | None = None,
+                        model_local: str | None = None):
+    """_brain_chat, streamed: yields text deltas, then the final LLMResult (tokens). Same
+    resilience -- the 404 fall-back to the house brain (nothing has been yielded yet at that
+    point) and BrainUnavailable on total failure, incl. a drop mid-stream."""
+    primary = turbo_or_local(model or BIO_MODEL, model_local or LOCAL_MODEL)
+    house = turbo_or_local(BIO_MODEL, LOCAL_MODEL)
+    target = primary
+    while True:
+        try:
+            async for part in stream_llm(user, target=target, system=system):
+                yield part
+            return
+        except httpx.HTTPStatusError as e:
+            code = e.response.status_code if e.response is not None else 0
+            if code == 404 and target is primary and primary.model != house.model:
+                logger.warning("brain '%s' unavailable (404); falling back to house brain '%s'",
+                               primary.model, house.model)
+                target = house
+                continue
+            raise BrainUnavailable(f"brain returned {code}") from e
+        except (httpx.TimeoutException, httpx.TransportError) as e:
+            raise BrainUnavailable(str(e)) from e
+
+
 _TEASER_SYSTEM = (
     "You write the og:description for a La Piazza share card -- the line or two a stranger "
     "sees when this link is shared on WhatsApp, Telegram, or X. Make it irresistible: "
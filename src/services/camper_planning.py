@@ -0,0 +1,331 @@
+"""Camper planning reads — bay timeline, calendar, dashboard and reminders without the N+1.
+
+The planning screens used to be built one row at a time: the bay timeline ran two job queries PER
+BAY and then `db.refresh(job, ["vehicle", "customer"])` PER JOB, the reminders view fetched customer
+and plate PER REMINDER, and the dashboard fired a dozen separate count/sum queries. A busy week was
+hundreds of round-trips per page load. Now:
+
+  • `load_snapshot(start, end)` reads the active bays (one query) and every job planned in the range —
+    multi-day (start_date..end_date overlaps) and single-day (scheduled_date only) — with customer
+    and plate joined in (one query). Timeline and calendar are both cut from it in Python;
+  • `load_summary()` computes every dashboard figure in ONE statement (one aggregate row per table);
+  • `load_reminders()` is one query with customer and plate joined.
+The query count is constant however many bays and jobs there are (src/tests/test_camper_planning.py).
+
+Snapshots and the summary are plain records (no ORM objects), shared by every request in the process
+through `planning_cache`, keyed by date range. Freshness follows barcode_index: any ORM write to a
+job, bay, customer, vehicle or invoice bumps the version on COMMIT (session hook at the bottom), and
+a TTL bounds what a write through ANOTHER worker can leave stale.
+"""
+from __future__ import annotations
+
+import logging
+import time
+from dataclasses import dataclass, field
+from datetime import date, datetime, timezone
+from decimal import Decimal
+from typing import Awaitable, Callable, Optional
+from uuid import UUID
+
+from sqlalchemy import DateTime as SADateTime, and_, event, func, or_, select, true
+from sqlalchemy.orm import Session
+
+from src.db.models.camper_bay_model import CamperBayModel
+from src.db.models.camper_customer_model import CamperCustomerModel
+from src.db.models.camper_invoice_model import CamperInvoiceModel, PaymentStatus
+from src.db.models.camper_service_job_model import CamperServiceJobModel, JobStatus
+from src.db.models.camper_vehicle_model import CamperVehicleModel, VehicleStatus
+
+logger = logging.getLogger(__name__)
+
+# Cross-process staleness ceiling. Writes in THIS process invalidate on commit; this only bounds how
+# long worker B can show a plan that worker A just changed.
+SNAPSHOT_TTL_SECONDS = 30.0
+SNAPSHOT_MAX_ENTRIES = 32      # a handful of weeks/months per screen; oldest entry evicted beyond this
+
+# Jobs the bay timeline leaves out (the calendar shows every status).
+TIMELINE_HIDDEN = (JobStatus.CANCELLED, JobStatus.INVOICED)
+_IN_SHOP = (VehicleStatus.CHECKED_IN, VehicleStatus.IN_SERVICE, VehicleStatus.WAITING_PARTS,
+            VehicleStatus.READY_FOR_PICKUP)
+_OCCUPYING = (JobStatus.APPROVED, JobStatus.IN_PROGRESS, JobStatus.WAITING_PARTS, JobStatus.INSPECTION)
+_UNPAID = (PaymentStatus.PENDING, PaymentStatus.DEPOSIT_PAID, PaymentStatus.PARTIAL)
+
+
+@dataclass(frozen=True)
+class PlannedBay:
+    id: UUID
+    name: str
+    bay_type: str
+
+
+@dataclass(frozen=True)
+class PlannedJob:
+    """What the planning screens show of a job — the job row plus its customer and plate."""
+    id: UUID
+    job_number: str
+    title: str
+    status: JobStatus
+    bay_id: Optional[UUID]
+    start_date: Optional[date]
+    end_date: Optional[date]
+    scheduled_date: Optional[date]
+    assigned_to: Optional[str]
+    current_wait_reason: Optional[str]
+    customer_name: Optional[str]
+    customer_lang: Optional[str]
+    customer_phone: Optional[str]
+    vehicle_plate: Optional[str]
+
+    @property
+    def multi_day(self) -> bool:
+        return self.start_date is not None
+
+
+@dataclass(frozen=True)
+class PlanningSnapshot:
+    """Active bays and every job planned in [start, end] (None = open-ended), multi-day jobs first
+    by start_date, then single-day jobs by scheduled_date."""
+    start: Optional[date]
+    end: Optional[date]
+    bays: tuple[PlannedBay, ...]
+    jobs: tuple[PlannedJob, ...]
+
+    def by_bay(self) -> dict[UUID, list[PlannedJob]]:
+        """Timeline rows: each bay's jobs, cancelled/invoiced left out."""
+        rows: dict[UUID, list[PlannedJob]] = {}
+        for job in self.jobs:
+            if job.bay_id is not None and job.status not in TIMELINE_HIDDEN:
+                rows.setdefault(job.bay_id, []).append(job)
+        return rows
+
+
+@dataclass(frozen=True)
+class DashboardFigures:
+    vehicles_in_shop: int
+    jobs_in_progress: int
+    jobs_waiting_parts: int
+    jobs_waiting: int
+    jobs_completed_today: int
+    pending_quotes: int
+    total_jobs: int
+    pending_deposits: Decimal
+    total_revenue_month: Decimal
+    overdue_invoices: int
+    jobs_in_inspection: int
+    bay_utilization: float
+    average_days_per_job: float
+
+
+@dataclass(frozen=True)
+class PlannedReminder:
+    job: PlannedJob
+    customer_id: UUID
+    vehicle_id: UUID
+    next_service_date: date
+    follow_up_notes: Optional[str]
+    warranty_expires_at: Optional[date]
+
+
+# ----------------------------------------------------------------------------------------------------
+# Loaders — one fixed set of statements each, whatever the size of the shop.
+# ----------------------------------------------------------------------------------------------------
+def _job_columns():
+    J, C, V = CamperServiceJobModel, CamperCustomerModel, CamperVehicleModel
+    return (J.id, J.job_number, J.title, J.status, J.bay_id, J.start_date, J.end_date, J.scheduled_date,
+            J.assigned_to, J.current_wait_reason, C.name, C.language, C.phone, V.registration_plate)
+
+
+def _planned_job(row) -> PlannedJob:
+    (jid, number, title, status, bay_id, start, end, scheduled, assigned, wait,
+     c_name, c_lang, c_phone, plate) = row[:14]
+    return PlannedJob(jid, number, title, status, bay_id, start, end, scheduled, assigned, wait,
+                      c_name, c_lang.value if c_lang else None, c_phone, plate)
+
+
+def _with_people(stmt):
+    J = CamperServiceJobModel
+    return (stmt.outerjoin(CamperCustomerModel, CamperCustomerModel.id == J.customer_id)
+                .outerjoin(CamperVehicleModel, CamperVehicleModel.id == J.vehicle_id))
+
+
+async def load_snapshot(db, start: Optional[date], end: Optional[date]) -> PlanningSnapshot:
+    """Two queries: the active bays, and the jobs overlapping [start, end] with customer + plate."""
+    J = CamperServiceJobModel
+    bays = (await db.execute(
+        select(CamperBayModel.id, CamperBayModel.name, CamperBayModel.bay_type)
+        .where(CamperBayModel.is_active == True)
+        .order_by(CamperBayModel.display_order, CamperBayModel.name)
+    )).all()
+
+    # A multi-day job overlaps if start_date <= end AND end_date >= start; a job with only a
+    # scheduled_date (not yet given a start/end) is in range if that day is.
+    multi = [J.start_date.isnot(None)]
+    single = [J.start_date.is_(None), J.scheduled_date.isnot(None)]
+    if start is not None:
+        multi.append(J.end_date >= start)
+        single.append(J.scheduled_date >= start)
+    if end is not None:
+        multi.append(J.start_date <= end)
+        single.append(J.scheduled_date <= end)
+    rows = (await db.execute(
+        _with_people(select(*_job_columns())).where(or_(and_(*multi), and_(*single)))
+    )).all()
+
+    jobs = [_planned_job(r) for r in rows]
+    jobs.sort(key=lambda j: (0, j.start_date) if j.multi_day else (1, j.scheduled_date))
+    return PlanningSnapshot(start, end,
+                            tuple(PlannedBay(b.id, b.name, b.bay_type.value) for b in bays),
+                            tuple(jobs))
+
+
+async def load_summary(db, today: Optional[date] = None) -> DashboardFigures:
+    """Every dashboard figure in one statement: one aggregate row per table, cross-joined."""
+    today = today or date.today()
+    J, V, I, B = CamperServiceJobModel, CamperVehicleModel, CamperInvoiceModel, CamperBayModel
+    day_start = datetime.combine(today, datetime.min.time(), tzinfo=timezone.utc)
+    day_end = datetime.combine(today, datetime.max.time(), tzinfo=timezone.utc)
+    month_start = datetime.combine(today.replace(day=1), datetime.min.time(), tzinfo=timezone.utc)
+
+    if db.get_bind().dialect.name == "postgresql":
+        job_seconds = (func.extract('epoch', J.completed_at)
+                       - func.extract('epoch', func.cast(J.start_date, SADateTime(timezone=True))))
+    else:
+        job_seconds = (func.julianday(J.completed_at) - func.julianday(J.start_date)) * 86400
+
+    jobs = select(
+        func.count().label("total_jobs"),
+        func.count().filter(J.status == JobStatus.IN_PROGRESS).label("in_progress"),
+        func.count().filter(J.status == JobStatus.WAITING_PARTS).label("waiting_parts"),
+        func.count().filter(J.status == JobStatus.QUOTED).label("quoted"),
+        func.count().filter(J.status == JobStatus.INSPECTION).label("inspection"),
+        func.count().filter(J.current_wait_reason.isnot(None)).label("waiting"),
+        func.count().filter(J.status == JobStatus.COMPLETED, J.completed_at >= day_start,
+                            J.completed_at <= day_end).label("completed_today"),
+        func.sum(J.deposit_required - J.deposit_paid)
+            .filter(J.deposit_required > J.deposit_paid).label("pending_deposits"),
+        func.count(func.distinct(J.bay_id))
+            .filter(J.bay_id.isnot(None), J.status.in_(_OCCUPYING)).label("occupied_bays"),
+        func.avg(job_seconds).filter(J.status.in_([JobStatus.COMPLETED, JobStatus.INVOICED]),
+                                     J.start_date.isnot(None), J.completed_at.isnot(None)).label("avg_seconds"),
+    ).select_from(J).subquery()
+    vehicles = select(func.count().label("in_shop")).where(V.status.in_(_IN_SHOP)).subquery()
+    invoices = select(
+        func.sum(I.total).filter(I.payment_status == PaymentStatus.PAID, I.paid_at >= month_start).label("revenue"),
+        func.count().filter(I.payment_status.in_(_UNPAID), I.due_date < today).label("overdue"),
+    ).select_from(I).subquery()
+    bays = select(func.count().label("active")).where(B.is_active == True).subquery()
+
+    r = (await db.execute(
+        select(jobs, vehicles, invoices, bays)
+        .select_from(jobs.join(vehicles, true()).join(invoices, true()).join(bays, true()))
+    )).one()
+
+    active = r.active or 0
+    return DashboardFigures(
+        vehicles_in_shop=r.in_shop or 0,
+        jobs_in_progress=r.in_progress or 0,
+        jobs_waiting_parts=r.waiting_parts or 0,
+        jobs_waiting=r.waiting or 0,
+        jobs_completed_today=r.completed_today or 0,
+        pending_quotes=r.quoted or 0,
+        total_jobs=r.total_jobs or 0,
+        pending_deposits=r.pending_deposits or Decimal("0.00"),
+        total_revenue_month=r.revenue or Decimal("0.00"),
+        overdue_invoices=r.overdue or 0,
+        jobs_in_inspection=r.inspection or 0,
+        bay_utilization=round(((r.occupied_bays or 0) / active) * 100, 1) if active else 0,
+        average_days_per_job=round(float(r.avg_seconds) / 86400, 1) if r.avg_seconds else 0,
+    )
+
+
+async def load_reminders(db) -> list[PlannedReminder]:
+    """Follow-up jobs with a next service date, soonest first — one query, customer + plate joined."""
+    J = CamperServiceJobModel
+    rows = (await db.execute(
+        _with_people(select(*_job_columns(), J.customer_id, J.vehicle_id, J.next_service_date,
+                            J.follow_up_notes, J.warranty_expires_at))
+        .where(J.follow_up_required == True, J.next_service_date.isnot(None))
+        .order_by(J.next_service_date)
+    )).all()
+    return [PlannedReminder(_planned_job(r), *r[14:]) for r in rows]
+
+
+# ----------------------------------------------------------------------------------------------------
+# The shared cache.
+# ----------------------------------------------------------------------------------------------------
+@dataclass
+class _Entry:
+    version: int
+    built_at: float
+    value: object
+
+
+@dataclass
+class PlanningCache:
+    """Versioned, TTL-bounded store of planning reads, shared by every request in the process."""
+    ttl: float = SNAPSHOT_TTL_SECONDS
+    max_entries: int = SNAPSHOT_MAX_ENTRIES
+    _entries: dict = field(default_factory=dict)
+    _version: int = 0
+
+    @property
+    def version(self) -> int:
+        return self._version
+
+    def invalidate(self) -> None:
+        """Drop everything. A build already in flight won't install what it read."""
+        self._version += 1
+        self._entries.clear()
+
+    async def _get(self, key, build: Callable[[], Awaitable[object]]):
+        e = self._entries.get(key)
+        if e is not None and e.version == self._version and time.monotonic() - e.built_at < self.ttl:
+            return e.value
+        version = self._version
+        value = await build()
+        if version == self._version:
+            # A write committed mid-build would leave what we read behind it — serve it, don't keep it.
+            if len(self._entries) >= self.max_entries:
+                self._entries.pop(next(iter(self._entries)))
+            self._entries[key] = _Entry(version, time.monotonic(), value)
+        return value
+
+    async def snapshot(self, db, start: Optional[date], end: Optional[date]) -> PlanningSnapshot:
+        return await self._get(("range", start, end), lambda: load_snapshot(db, start, end))
+
+    async def summary(self, db) -> DashboardFigures:
+        today = date.today()
+        return await self._get(("summary", today), lambda: load_summary(db, today))
+
+
+planning_cache = PlanningCache()
+
+
+# ----------------------------------------------------------------------------------------------------
+# Commit-time invalidation: any ORM write to a row a planning screen shows (see barcode_index for why
+# the flag is set at flush and acted on at commit).
+# ----------------------------------------------------------------------------------------------------
+_DIRTY_KEY = "camper_planning_dirty"
+_PLANNING_MODELS = (CamperServiceJobModel, CamperBayModel, CamperCustomerModel, CamperVehicleModel,
+                    CamperInvoiceModel)
+
+
+@event.listens_for(Session, "after_flush")
+def _note_planning_writes(session, flush_context) -> None:
+    if session.info.get(_DIRTY_KEY):
+        return
+    if any(isinstance(obj, _PLANNING_MODELS) for obj in (*session.new, *session.dirty, *session.deleted)):
+        session.info[_DIRTY_KEY] = True
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_on_commit(session) -> None:
+    if session.info.pop(_DIRTY_KEY, False):
+        planning_cache.invalidate()
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def _forget_on_rollback(session, previous_transaction) -> None:
+    if previous_transaction.nested:          # a savepoint: writes flushed before it still commit
+        return
+    session.info.pop(_DIRTY_KEY, None)
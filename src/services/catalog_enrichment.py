@@ -20,13 +20,16 @@ Source-agnostic by design: the input is `RawProduct`; importers normalize, the r
 enriches. The ONE place an LLM call happens is src/llm/run_llm (BYO-brain).
 
 No DB writes happen here. The sample runner (scripts/import/artemis_enrich_sample.py)
-drives this for a dry-run review.
+drives this for a dry-run review; its LLM pass goes through `run_enrichment` (batches
+in flight concurrently, per-SKU JSONL checkpoint for resume, a throughput report).
 """
 from __future__ import annotations
 
+import os
 import re
 from dataclasses import dataclass, field
 from decimal import Decimal, InvalidOperation
+from pathlib import Path
 from typing import Optional
 
 # Banco's live two-axis rules (catalog_taxonomy.classify drives the LAW axis).
@@ -603,6 +606,10 @@ _LLM_SYSTEM = (
     "Do not invent specifications you cannot see. Output JSON only, matching the schema."
 )
 
+# The LLM step runs at temperature 0, so an unchanged batch (a resumed or repeated run)
+# is answered from run_llm's response cache instead of the model.
+LLM_CACHE_TTL = 6 * 3600.0
+
 
 def _batch_schema() -> dict:
     return {
@@ -648,6 +655,12 @@ async def llm_enrich_batch(batch: list[dict], target, client=None) -> dict:
     description, category_confidence}}. `batch` items are dicts with sku/name/group/
     artemis_path/attributes/allowed. Raises on transport/HTTP error (caller decides
     whether to fall back to rules-only)."""
+    out, res = await _llm_batch_call(batch, target, client)
+    return out, res.model
+
+
+async def _llm_batch_call(batch: list[dict], target, client=None):
+    """llm_enrich_batch, plus the raw LLMResult (tokens, cached) for the runner's accounting."""
     from src.llm.client import run_llm  # local import keeps this module importable w/o httpx
     res = await run_llm(
         _build_batch_prompt(batch),
@@ -655,9 +668,15 @@ async def llm_enrich_batch(batch: list[dict], target, client=None) -> dict:
         system=_LLM_SYSTEM,
         schema=_batch_schema(),
         client=client,
+        temperature=0,
+        cache_ttl=LLM_CACHE_TTL,      # a re-run of an unchanged batch skips the model
     )
+    return _parse_batch(res.text), res
+
+
+def _parse_batch(text: str) -> dict:
     import json as _json
-    text = res.text.strip()
+    text = (text or "").strip()
     # strip any <think> blocks defensively (reasoning models); run_llm usually handles it
     text = re.sub(r"<think>.*?</think>", "", text, flags=re.S).strip()
     try:
@@ -684,7 +703,220 @@ async def llm_enrich_batch(batch: list[dict], target, client=None) -> dict:
                 "description": str(row.get("description", "")).strip(),
                 "category_confidence": float(row.get("category_confidence", 0.0) or 0.0),
             }
-    return out, res.model
+    return out
+
+
+# --------------------------------------------------------------------------- #
+# Step 5b — the batch RUNNER: N batches in flight, resumable, measured.         #
+# Batches are packed to a prompt-token budget (not a fixed item count), run     #
+# ENRICH_CONCURRENCY at a time over run_llm's pooled client, and every SKU the  #
+# model answers is checkpointed (JSONL) the moment its batch returns — a run    #
+# that dies at item 3,000 resumes at 3,001. A failed batch is split in half     #
+# until the bad item stands alone; a SKU the model skipped is asked once more.  #
+# --------------------------------------------------------------------------- #
+ENRICH_CONCURRENCY = int(os.getenv("BANCO_ENRICH_CONCURRENCY", "4"))          # batches in flight
+ENRICH_PROMPT_TOKENS = int(os.getenv("BANCO_ENRICH_PROMPT_TOKENS", "3000"))   # per-batch prompt budget
+ENRICH_MAX_BATCH = 25        # items per call, whatever the budget (schema output grows with it)
+ENRICH_MAX_ATTEMPTS = 2      # tries per item before it stays rules-only
+ENRICH_ABORT_AFTER = 6       # consecutive failed calls → the brain is down: stop, resume later
+_CHARS_PER_TOKEN = 4         # prompt-size estimate (no tokenizer here; conservative for DE/EN text)
+
+
+def _item_prompt_chars(item: dict) -> int:
+    return len(_build_batch_prompt([item])) - len(_build_batch_prompt([]))
+
+
+def plan_batches(items: list[dict], budget_tokens: int = ENRICH_PROMPT_TOKENS,
+                 max_items: int = ENRICH_MAX_BATCH, chars_per_token: float = _CHARS_PER_TOKEN) -> list[list[dict]]:
+    """Greedy-pack items (in order) into batches whose estimated prompt stays within the budget.
+    An item bigger than the budget on its own still gets a batch of one."""
+    header = len(_build_batch_prompt([])) / chars_per_token
+    batches, cur, used = [], [], header
+    for it in items:
+        cost = _item_prompt_chars(it) / chars_per_token
+        if cur and (used + cost > budget_tokens or len(cur) >= max_items):
+            batches.append(cur)
+            cur, used = [], header
+        cur.append(it)
+        used += cost
+    if cur:
+        batches.append(cur)
+    return batches
+
+
+class Checkpoint:
+    """Per-SKU results of a run, appended as JSON lines — `done` is what a resumed run skips.
+    A missing path = a fresh run; a torn last line (killed mid-write) is ignored."""
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.done: dict = {}
+        if self.path.exists():
+            import json as _json
+            for line in self.path.read_text(encoding="utf-8").splitlines():
+                try:
+                    rec = _json.loads(line)
+                    self.done[rec["sku"]] = (rec["row"], rec.get("model"))
+                except (ValueError, KeyError, TypeError):
+                    continue
+
+    def add(self, results: dict, model: Optional[str]) -> None:
+        import json as _json
+        if not results:
+            return
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self.path.open("a", encoding="utf-8") as f:
+            for sku, row in results.items():
+                f.write(_json.dumps({"sku": sku, "row": row, "model": model}, ensure_ascii=False) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        for sku, row in results.items():
+            self.done[sku] = (row, model)
+
+
+@dataclass
+class RunStats:
+    items: int = 0             # SKUs this run asked for (after the checkpoint skip)
+    resumed: int = 0           # SKUs already in the checkpoint
+    enriched: int = 0          # SKUs the model answered this run
+    failed: int = 0            # SKUs left rules-only
+    calls: int = 0
+    retried_calls: int = 0     # calls that were a split / re-ask of earlier work
+    failed_calls: int = 0
+    cached_calls: int = 0      # answered from run_llm's response cache
+    tokens: int = 0            # prompt + completion, as the backend billed them
+    seconds: float = 0.0
+    model: Optional[str] = None
+    last_error: Optional[str] = None
+    aborted: bool = False
+
+    def report(self) -> dict:
+        """Throughput for sizing the backend (Turbo vs local Ollama)."""
+        mins = self.seconds / 60 if self.seconds else 0
+        return {
+            "model": self.model,
+            "items": self.items, "resumed": self.resumed, "enriched": self.enriched, "failed": self.failed,
+            "calls": self.calls, "cached_calls": self.cached_calls,
+            "items_per_min": round(self.enriched / mins, 1) if mins else None,
+            "tokens_per_item": round(self.tokens / self.enriched, 1) if self.enriched else None,
+            "retry_rate": round(self.retried_calls / self.calls, 3) if self.calls else 0.0,
+            "error_rate": round(self.failed_calls / self.calls, 3) if self.calls else 0.0,
+            "seconds": round(self.seconds, 1), "aborted": self.aborted, "last_error": self.last_error,
+        }
+
+
+async def run_enrichment(items: list[dict], target, *, checkpoint: Optional[Checkpoint] = None,
+                         concurrency: int = ENRICH_CONCURRENCY, budget_tokens: int = ENRICH_PROMPT_TOKENS,
+                         max_items: int = ENRICH_MAX_BATCH, progress=None) -> tuple[dict, RunStats]:
+    """Run the LLM pass over `items` (llm_enrich_batch payload dicts). Returns ({sku: llm_row},
+    stats) — checkpointed SKUs included, as stored. `progress(done, total)` is called per batch,
+    counted over this run's work: distinct SKUs, checkpointed ones left out.
+
+    Calls go through run_llm's shared client for the target (which also caps the target's
+    in-flight calls at LLM_MAX_CONCURRENCY); `concurrency` bounds this run's batches."""
+    import asyncio
+    import time
+
+    stats = RunStats()
+    results: dict = {}
+    if checkpoint is not None:
+        for sku, (row, model) in checkpoint.done.items():
+            results[sku] = row
+            stats.model = stats.model or model
+    # One entry per SKU: results (and `pending`) are keyed by SKU, so a repeated SKU would never
+    # count down and the workers would wait on it forever. The first occurrence wins.
+    todo, seen = [], set(results)
+    for it in items:
+        if it["sku"] not in seen:
+            seen.add(it["sku"])
+            todo.append(it)
+    stats.resumed = len({it["sku"] for it in items} & set(results))
+    stats.items = len(todo)
+    if not todo:
+        return results, stats
+
+    attempts: dict = {}
+    sent: set = set()
+    queue: asyncio.Queue = asyncio.Queue()
+    for b in plan_batches(todo, budget_tokens, max_items):
+        queue.put_nowait(b)
+    pending = len(todo)
+    consecutive_fail = 0
+    started = time.monotonic()
+    workers = max(1, concurrency)
+    finished = False
+
+    def _finish() -> None:
+        """Wake every idle worker to exit: nothing is left to do, or the run is aborted."""
+        nonlocal finished
+        if not finished:
+            finished = True
+            for _ in range(workers):
+                queue.put_nowait(None)
+
+    def _requeue(batch: list[dict]) -> None:
+        nonlocal pending
+        again = [it for it in batch if attempts.get(it["sku"], 0) < ENRICH_MAX_ATTEMPTS]
+        stats.failed += len(batch) - len(again)
+        pending -= len(batch) - len(again)
+        if again:
+            queue.put_nowait(again)
+
+    async def _worker():
+        nonlocal pending, consecutive_fail
+        while True:
+            batch = await queue.get()          # an idle worker waits for a split / re-queue
+            if batch is None or finished:
+                return
+            if any(it["sku"] in sent for it in batch):
+                stats.retried_calls += 1
+            sent.update(it["sku"] for it in batch)
+            for it in batch:
+                attempts[it["sku"]] = attempts.get(it["sku"], 0) + 1
+            stats.calls += 1
+            try:
+                out, res = await _llm_batch_call(batch, target)
+            except Exception as e:  # noqa: BLE001 — transport, HTTP, unparseable JSON alike
+                stats.failed_calls += 1
+                stats.last_error = f"{type(e).__name__}: {e}"
+                consecutive_fail += 1
+                if consecutive_fail >= ENRICH_ABORT_AFTER:
+                    stats.aborted = True
+                if len(batch) > 1:             # split first; only a lone item's failure counts
+                    for it in batch:
+                        attempts[it["sku"]] -= 1
+                    mid = len(batch) // 2
+                    queue.put_nowait(batch[:mid])
+                    queue.put_nowait(batch[mid:])
+                else:
+                    _requeue(batch)
+                if stats.aborted or pending <= 0:
+                    _finish()
+                continue
+            consecutive_fail = 0
+            stats.model = res.model
+            stats.cached_calls += 1 if res.cached else 0
+            stats.tokens += res.tokens
+            wanted = {it["sku"] for it in batch}
+            got = {sku: row for sku, row in out.items() if sku in wanted}
+            results.update(got)
+            if checkpoint is not None:
+                checkpoint.add(got, res.model)
+            stats.enriched += len(got)
+            pending -= len(got)
+            missed = [it for it in batch if it["sku"] not in got]
+            if missed:
+                _requeue(missed)
+            if progress:
+                progress(len(todo) - pending, len(todo))
+            if pending <= 0:
+                _finish()
+
+    await asyncio.gather(*(_worker() for _ in range(workers)))
+    if stats.aborted:
+        stats.failed += pending
+    stats.seconds = time.monotonic() - started
+    return results, stats
 
 
 # --------------------------------------------------------------------------- #
@@ -0,0 +1,121 @@
+"""Catalog change feed for the offline till mirror (GET /pos/catalog/changes).
+
+The till used to re-download `/pos/products?limit=1000` (full ProductRead objects, OFFSET-paged, no
+alias barcodes) and clear + reload IndexedDB on every sync — seconds over a weak shop Wi-Fi, and a
+catalog past 1000 rows was silently truncated. Now every till-visible product change is stamped with a
+number from ONE Postgres sequence (`products.catalog_version`, trigger-maintained — see
+database._CATALOG_FEED_DDL), so a till holding cursor N asks only for what moved after N:
+
+  • upserts  — sellable rows (with their alias barcodes) in a compact COLUMNAR page: one `cols` header,
+    then one positional array per product;
+  • deleted  — ids the till must drop: products hard-deleted (catalog_tombstones) or no longer sellable.
+
+A page is ordered by version, so `cursor` (the last version in it) is always safe to resume from; `more`
+says to ask again at once. `since=0` is a full load. A cursor AHEAD of the database (restored/reset DB)
+answers with `reset: true` and a full load, so the till clears instead of keeping ghosts.
+"""
+from __future__ import annotations
+
+from collections import defaultdict
+from uuid import UUID
+
+from sqlalchemy import func, select, text
+
+from src.db.database import CATALOG_FEED_LOCK
+from src.db.models import CatalogTombstoneModel, ProductBarcodeModel, ProductModel
+
+PAGE_MAX = 2000
+
+# What the till mirrors — the columns trg_product_catalog_version watches, plus the aliases.
+FEED_COLUMNS = ("id", "sku", "name", "barcode", "price", "price_tiers", "tier_mode", "category",
+                "product_class", "is_age_restricted", "image_url", "aliases", "v")
+_SELECT = (ProductModel.id, ProductModel.sku, ProductModel.name, ProductModel.barcode, ProductModel.price,
+           ProductModel.price_tiers, ProductModel.tier_mode, ProductModel.category, ProductModel.product_class,
+           ProductModel.is_age_restricted, ProductModel.image_url, ProductModel.catalog_version,
+           ProductModel.is_active)
+
+
+class CatalogBusy(Exception):
+    """A catalog write is still in flight — the head can't be pinned yet; the till retries shortly."""
+
+
+async def catalog_head(db) -> int:
+    """The highest catalog version that is safe to hand out.
+
+    On Postgres this takes CATALOG_FEED_LOCK exclusively for one statement: every writer holds it
+    shared from the moment it draws a version until it commits, so once we hold it nothing below the
+    head we read can still commit late. Raises CatalogBusy instead of waiting behind a long import."""
+    if db.get_bind().dialect.name == "postgresql":
+        got = (await db.execute(text("SELECT pg_try_advisory_xact_lock(:k)"), {"k": CATALOG_FEED_LOCK})).scalar()
+        if not got:
+            await db.rollback()
+            raise CatalogBusy()
+    products = (await db.execute(select(func.max(ProductModel.catalog_version)))).scalar() or 0
+    tombs = (await db.execute(select(func.max(CatalogTombstoneModel.catalog_version)))).scalar() or 0
+    await db.commit()        # releases the lock (no-op elsewhere)
+    return max(int(products), int(tombs))
+
+
+def etag_for(since: int, head: int, limit: int) -> str:
+    """A page is fully determined by (since, head, limit): versions at or below head never change."""
+    return f'W/"catalog-{since}-{head}-{limit}"'
+
+
+def _row(r, aliases: list[str]) -> list:
+    return [str(r.id), r.sku, r.name, r.barcode, float(r.price) if r.price is not None else None,
+            r.price_tiers or [], r.tier_mode, r.category, r.product_class or "standard",
+            bool(r.is_age_restricted), r.image_url, aliases, int(r.catalog_version)]
+
+
+async def catalog_changes(db, since: int, head: int, limit: int = PAGE_MAX) -> dict:
+    """One page of changes in (since, head], oldest version first."""
+    limit = max(1, min(limit, PAGE_MAX))
+    reset = since > head
+    if reset:
+        since = 0
+    window = (ProductModel.catalog_version > since, ProductModel.catalog_version <= head)
+    rows = (await db.execute(
+        select(*_SELECT).where(*window).order_by(ProductModel.catalog_version).limit(limit + 1)
+    )).all()
+    tombs = (await db.execute(
+        select(CatalogTombstoneModel.product_id, CatalogTombstoneModel.catalog_version)
+        .where(CatalogTombstoneModel.catalog_version > since, CatalogTombstoneModel.catalog_version <= head)
+        .order_by(CatalogTombstoneModel.catalog_version).limit(limit + 1)
+    )).all()
+
+    # Merge both streams by version and cut the page; the cursor is the last version kept.
+    events = sorted([(int(r.catalog_version), "row", r) for r in rows]
+                    + [(int(t.catalog_version), "tomb", t) for t in tombs], key=lambda e: e[0])
+    more = len(events) > limit
+    events = events[:limit]
+    cursor = events[-1][0] if more else head       # nothing else below head: jump to it
+
+    latest: dict[str, tuple] = {}          # a re-created id: the newest event wins
+    for v, kind, obj in events:
+        pid = str(obj.id if kind == "row" else obj.product_id)
+        latest[pid] = (kind, obj)
+    live = [obj for kind, obj in latest.values() if kind == "row" and obj.is_active]
+    deleted = [pid for pid, (kind, obj) in latest.items() if kind == "tomb" or not obj.is_active]
+
+    aliases: dict[UUID, list[str]] = defaultdict(list)
+    if live and since > 0:
+        ids = [r.id for r in live]
+        for pid, bc in (await db.execute(
+                select(ProductBarcodeModel.product_id, ProductBarcodeModel.barcode)
+                .where(ProductBarcodeModel.product_id.in_(ids)))).all():
+            aliases[pid].append(bc)
+    elif live:               # full load: one scan beats a 2000-element IN list
+        for pid, bc in (await db.execute(
+                select(ProductBarcodeModel.product_id, ProductBarcodeModel.barcode))).all():
+            aliases[pid].append(bc)
+
+    return {
+        "cursor": cursor,
+        "head": head,
+        "more": more,
+        "reset": reset,
+        "full": since == 0,
+        "cols": list(FEED_COLUMNS),
+        "rows": [_row(r, sorted(aliases.get(r.id, []))) for r in live],
+        "deleted": [] if since == 0 else deleted,     # a full load starts from an empty mirror
+    }
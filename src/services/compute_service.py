@@ -53,15 +53,33 @@ def euro_per_credit() -> float:
 # not an in-process counter:
 #   active  = jobs RUNNING (in a consumer slot)
 #   waiting = jobs QUEUED  (in the RabbitMQ line, not yet picked up)
+def brain_payload(counts: dict, tokens_total: int, by_user: dict) -> dict:
+    """The gauge from its three inputs: jobs per status, SUM(tokens), running jobs per owner.
+    Shared by brain_load (aggregates) and the /stream telemetry hub (running counters)."""
+    active = counts.get("running", 0)
+    cap = LPCX_BRAIN_CAP
+    by_user = dict(sorted(((u, c) for u, c in by_user.items() if c > 0), key=lambda kv: -kv[1]))
+    active_users = max(1, len(by_user))
+    return {
+        "active": active,
+        "waiting": counts.get("queued", 0),
+        "cap": cap,
+        "load_pct": round(min(100, active / cap * 100)) if cap else 0,
+        "tokens_total": int(tokens_total),
+        "jobs_served": counts.get("done", 0),
+        "euro_per_credit": round(euro_per_credit(), 6),
+        "credit_tokens": LPCX_CREDIT_TOKENS,
+        "by_user": by_user,
+        "cap_per_user": max(1, cap // active_users),
+    }
+
+
 async def brain_load(db: AsyncSession) -> dict:
     from src.db.models.compute_model import ComputeJobModel, ComputeJobStatus  # local import: avoid cycle
     rows = await db.execute(
         select(ComputeJobModel.status, func.count().label("c")).group_by(ComputeJobModel.status)
     )
     counts = {row.status.value: row.c for row in rows}
-    active = counts.get("running", 0)
-    waiting = counts.get("queued", 0)
-    done = counts.get("done", 0)
     toks = (await db.execute(
         select(func.coalesce(func.sum(ComputeJobModel.tokens), 0))
     )).scalar() or 0
@@ -70,23 +88,8 @@ async def brain_load(db: AsyncSession) -> dict:
         select(ComputeJobModel.owner, func.count().label("c"))
         .where(ComputeJobModel.status == ComputeJobStatus.RUNNING)
         .group_by(ComputeJobModel.owner)
-        .order_by(func.count().desc())
     )
-    by_user = {row.owner: row.c for row in urows}
-    cap = LPCX_BRAIN_CAP
-    active_users = max(1, len(by_user))
-    return {
-        "active": active,
-        "waiting": waiting,
-        "cap": cap,
-        "load_pct": round(min(100, active / cap * 100)) if cap else 0,
-        "tokens_total": int(toks),
-        "jobs_served": done,
-        "euro_per_credit": round(euro_per_credit(), 6),
-        "credit_tokens": LPCX_CREDIT_TOKENS,
-        "by_user": by_user,
-        "cap_per_user": max(1, cap // active_users),
-    }
+    return brain_payload(counts, toks, {row.owner: row.c for row in urows})
 
 
 # ================================================================
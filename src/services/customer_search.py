@@ -0,0 +1,109 @@
+"""Till member lookup — ranked, index-served customer search (GET /api/v1/customers/search).
+
+The lookup used to OR five `lower(col) LIKE '%x%'` predicates (no B-tree can serve a leading
+wildcard, so every keystroke scanned `customers`) and sorted the hits by handle, so "max" listed
+"amaxine" before "max". Now, on Postgres:
+
+  • candidates come from indexes only — lower(handle) text_pattern_ops for the prefix, and one
+    trigram GIN over customer_search_text(...) (database._CUSTOMER_SEARCH_DDL: handle, real name,
+    instagram, email and the normalized phone) for contains + fuzzy (typo) matches;
+  • ranking is exact handle → handle prefix → real-name / instagram prefix → the rest, each band
+    ordered by trigram word similarity;
+  • a scanned member card (HLX-XXXXXXXX) is a single unique-index probe on qr_code.
+
+Phones are compared as digits with a Swiss national "0" folded into "41" (normalize_phone mirrors
+customer_phone_norm in SQL), so a cashier can type a number the way the member says it. Other
+dialects (the SQLite test DB) get the same ranking over plain LIKE predicates.
+"""
+import re
+
+from sqlalchemy import case, func, literal, or_, select
+
+from src.db.models import CustomerModel
+
+FUZZY_MIN_CHARS = 3            # trigram matching needs 3 chars; shorter terms match handle prefixes
+_QR_RE = re.compile(r"^HLX-[0-9A-F]{8}$")
+
+
+def normalize_qr(code: str | None) -> str | None:
+    """HLX-XXXXXXXX in canonical case, or None if `code` isn't a member-card code."""
+    c = (code or "").strip().upper()
+    return c if _QR_RE.match(c) else None
+
+
+def normalize_phone(raw: str | None) -> str:
+    """Digits only; an international 00 prefix dropped, a national leading 0 read as +41."""
+    d = re.sub(r"[^0-9]", "", raw or "")
+    if d.startswith("00"):
+        return d[2:]
+    if d.startswith("0"):
+        return "41" + d[1:]
+    return d
+
+
+def _phone_term(term: str) -> str | None:
+    """The digits to look for when the term reads as (part of) a phone number."""
+    if re.fullmatch(r"\+?[0-9 ()./\-]{3,}", term) and sum(ch.isdigit() for ch in term) >= 3:
+        return normalize_phone(term)
+    return None
+
+
+def _esc(s: str) -> str:
+    return s.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+async def find_by_qr(db, code: str) -> CustomerModel | None:
+    """The member holding card `code` (HLX- codes in any case; anything else matched as sent)."""
+    qr = normalize_qr(code) or (code or "").strip()
+    if not qr:
+        return None
+    return (await db.execute(select(CustomerModel).where(CustomerModel.qr_code == qr))).scalar_one_or_none()
+
+
+async def search(db, q: str, limit: int = 10) -> list[CustomerModel]:
+    """Active members matching `q`, best match first."""
+    term = q.strip()
+    if not term:
+        return []
+    if normalize_qr(term):
+        hit = await find_by_qr(db, term)
+        if hit is not None:
+            return [hit] if hit.is_active else []
+
+    t = term.lower()
+    ig = t.lstrip("@")
+    C = CustomerModel
+    handle = func.lower(C.handle)
+    prefix, ig_prefix, contains = f"{_esc(t)}%", f"{_esc(ig)}%", f"%{_esc(t)}%"
+    phone = _phone_term(term)
+
+    if db.get_bind().dialect.name == "postgresql":
+        doc = func.customer_search_text(C.handle, C.real_name, C.instagram, C.email, C.phone)
+        conds = [handle.like(prefix, escape="\\")]
+        if len(t) >= FUZZY_MIN_CHARS:
+            conds += [doc.like(contains, escape="\\"), literal(t).op("<%")(doc)]
+        if phone:
+            conds.append(doc.like(f"%{phone}%"))
+        similarity = func.word_similarity(t, doc).desc()
+    else:
+        conds = [handle.like(contains, escape="\\"),
+                 func.lower(C.real_name).like(contains, escape="\\"),
+                 func.lower(C.instagram).like(f"%{_esc(ig)}%", escape="\\"),
+                 func.lower(C.email).like(contains, escape="\\")]
+        if phone:
+            conds.append(C.phone.contains(term))
+        similarity = func.length(C.handle)
+
+    rank = case(
+        (handle == t, 0),
+        (handle.like(prefix, escape="\\"), 1),
+        (or_(func.lower(C.real_name).like(prefix, escape="\\"),
+             func.lower(C.instagram).like(ig_prefix, escape="\\"),
+             func.lower(C.instagram).like(f"@{ig_prefix}", escape="\\")), 2),
+        else_=3,
+    )
+    rows = await db.execute(
+        select(C).where(C.is_active.is_(True), or_(*conds))
+        .order_by(rank, similarity, handle).limit(limit)
+    )
+    return list(rows.scalars().all())
@@ -20,6 +20,10 @@ Two presets cover today's needs:
   SLIP    — delivery note headed for the VLM: 1600px long edge, no thumbnail.
             Downscaling here also makes the Turbo read faster and cheaper.
 
+`derive` is the gallery's version of PRODUCT: every served size (thumb / list /
+full) in JPEG plus WebP/AVIF where this Pillow build can write them, made once
+at upload so nothing is resized per request (services/product_images.py).
+
 Rule #11 (Python first) — Pillow, deterministic, no model needed.
 """
 from __future__ import annotations
@@ -27,7 +31,7 @@ from __future__ import annotations
 from dataclasses import dataclass
 from io import BytesIO
 
-from PIL import Image, ImageEnhance, ImageOps
+from PIL import Image, ImageEnhance, ImageOps, features
 
 # Pillow 10 renamed the resample enum; LANCZOS is the high-quality downsample.
 _LANCZOS = Image.Resampling.LANCZOS
@@ -49,6 +53,27 @@ PRODUCT = IntakePreset(max_edge=1024, thumb_px=256, enhance=True)
 SLIP = IntakePreset(max_edge=1600, thumb_px=0, enhance=True)
 
 
+@dataclass(frozen=True)
+class Rendition:
+    """One served size of a gallery photo."""
+    name: str               # "thumb" | "list" | "full" — the ?size= a view asks for
+    max_edge: int           # long edge in px (the square edge for a square crop)
+    square: bool = False    # centered square crop (the catalog grid tile)
+
+
+# thumb: grid tiles + cart lines; list: result cards + print sheets; full: detail / lightbox.
+RENDITIONS = (
+    Rendition("thumb", 256, square=True),
+    Rendition("list", 480),
+    Rendition("full", PRODUCT.max_edge),
+)
+
+
+def derive_formats() -> tuple[str, ...]:
+    """What this Pillow build can encode: JPEG always, WebP/AVIF when compiled in."""
+    return ("jpg",) + tuple(f for f in ("webp", "avif") if features.check(f))
+
+
 @dataclass(frozen=True)
 class IntakeResult:
     """Standardized bytes plus the numbers worth logging."""
@@ -119,9 +144,14 @@ def _square_thumb(img: Image.Image, px: int) -> Image.Image:
     return ImageOps.fit(img, (px, px), _LANCZOS, centering=(0.5, 0.5))
 
 
-def _encode(img: Image.Image, quality: int) -> bytes:
+def _encode(img: Image.Image, quality: int, fmt: str = "jpg") -> bytes:
     buf = BytesIO()
-    img.save(buf, format="JPEG", quality=quality, optimize=True)
+    if fmt == "webp":
+        img.save(buf, format="WEBP", quality=quality, method=4)
+    elif fmt == "avif":
+        img.save(buf, format="AVIF", quality=quality - 25)     # AVIF's scale runs ~25 below JPEG's
+    else:
+        img.save(buf, format="JPEG", quality=quality, optimize=True)
     return buf.getvalue()
 
 
@@ -149,3 +179,21 @@ def process(data: bytes, preset: IntakePreset = PRODUCT) -> IntakeResult:
         orig_bytes=len(data),
         out_bytes=len(main),
     )
+
+
+def derive(data: bytes, formats: tuple[str, ...] | None = None) -> dict[str, bytes]:
+    """Every rendition of an uploaded photo: {"thumb.jpg": ..., "list.webp": ..., "full.jpg": ...}.
+
+    Same orient → flatten → enhance as PRODUCT, done once on the full size; the smaller sizes are
+    cut from that, so all of them look alike. Raises ImageIntakeError on undecodable bytes.
+    """
+    formats = formats or derive_formats()
+    full = _downscale(_flatten_to_rgb(_load_oriented(data)), RENDITIONS[-1].max_edge)
+    if PRODUCT.enhance:
+        full = _enhance(full)
+    out = {}
+    for r in RENDITIONS:
+        img = _square_thumb(full, r.max_edge) if r.square else _downscale(full, r.max_edge)
+        for fmt in formats:
+            out[f"{r.name}.{fmt}"] = _encode(img, PRODUCT.quality, fmt)
+    return out
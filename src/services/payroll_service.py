@@ -14,13 +14,14 @@ Calculates:
 Built for Canton Luzern rates, easily configurable.
 """
 import logging
+from dataclasses import dataclass, fields, replace
 from datetime import datetime, timezone, date
 from decimal import Decimal, ROUND_HALF_UP
 from typing import Optional, List, Dict, Tuple
-from uuid import UUID
+from uuid import UUID, uuid4
 
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, and_
+from sqlalchemy import select, and_, or_, case, delete, func, insert, update
 
 from src.db.models import (
     EmployeeModel,
@@ -53,6 +54,7 @@ ALV2_RATE = Decimal("0.005")  # 0.5% solidarity contribution above max
 # UVG (Accident insurance)
 UVG_BU_RATE = Decimal("0.0")  # Employer pays occupational accidents
 UVG_NBU_RATE_EMPLOYEE = Decimal("0.0124")  # 1.24% non-occupational (if employee pays)
+UVG_RATE_EMPLOYER = Decimal("0.015")  # ~1.5% simplified flat rate
 
 # FAK (Family compensation fund) - Canton Luzern
 FAK_RATE_EMPLOYER = Decimal("0.012")  # 1.2%
@@ -70,11 +72,89 @@ SICK_PAY_RATE = Decimal("1.00")  # 100% during sick leave (Swiss law)
 HOLIDAY_PAY_RATE = Decimal("1.00")  # 100% paid vacation
 
 
+# Employees who get a payslip
+ACTIVE_EMPLOYEE_STATUSES = ("probation", "active", "notice")
+
+# Quellensteuer - simplified flat rate by tariff code letter
+# In reality, this uses canton-specific tables
+QUELLENSTEUER_RATES = {
+    "A": Decimal("0.10"),
+    "B": Decimal("0.15"),
+    "C": Decimal("0.20"),
+}
+QUELLENSTEUER_DEFAULT_RATE = Decimal("0.12")
+
+
 def round_chf(amount: Decimal) -> Decimal:
     """Round to CHF 0.05 (Swiss rounding)."""
     return (amount * 20).quantize(Decimal("1"), rounding=ROUND_HALF_UP) / 20
 
 
+@dataclass(frozen=True)
+class PayrollRates:
+    """
+    Every rate the engine applies. The defaults are the constants above;
+    a what-if run computes against a copy with some of them changed.
+    """
+    ahv_employee: Decimal = AHV_RATE_EMPLOYEE
+    ahv_employer: Decimal = AHV_RATE_EMPLOYER
+    alv_employee: Decimal = ALV_RATE_EMPLOYEE
+    alv_employer: Decimal = ALV_RATE_EMPLOYER
+    alv_max_salary_yearly: Decimal = ALV_MAX_SALARY_YEARLY
+    alv2: Decimal = ALV2_RATE
+    uvg_employer: Decimal = UVG_RATE_EMPLOYER
+    fak_employer: Decimal = FAK_RATE_EMPLOYER
+    admin_employer: Decimal = ADMIN_RATE_EMPLOYER
+    bvg_default: Decimal = BVG_DEFAULT_RATE
+    overtime_multiplier: Decimal = OVERTIME_MULTIPLIER
+    remote_multiplier: Decimal = REMOTE_MULTIPLIER
+    hourly_rate_factor: Decimal = Decimal("1")  # e.g. 1.03 = 3% raise for everybody
+
+
+DEFAULT_RATES = PayrollRates()
+
+
+def rates_with(**overrides) -> PayrollRates:
+    """DEFAULT_RATES with some rates changed. Unknown names raise ValueError."""
+    known = {f.name for f in fields(PayrollRates)}
+    unknown = sorted(set(overrides) - known)
+    if unknown:
+        raise ValueError(f"Unknown payroll rate(s): {', '.join(unknown)}")
+    try:
+        return replace(DEFAULT_RATES, **{k: Decimal(str(v)) for k, v in overrides.items()})
+    except ArithmeticError:
+        raise ValueError("Payroll rates must be numbers")
+
+
+@dataclass
+class PayrollBatch:
+    """
+    One month's payroll input, loaded once: approved hours per employee and
+    entry type, plus those employees. Compute it against any PayrollRates.
+    """
+    year: int
+    month: int
+    employees: Dict[UUID, EmployeeModel]
+    hours: Dict[UUID, Dict[str, Decimal]]
+
+
+def _bvg_rate(employee: EmployeeModel, rates: PayrollRates) -> Decimal:
+    return employee.bvg_contribution_rate or rates.bvg_default
+
+
+def _quellensteuer_rate(employee: EmployeeModel) -> Decimal:
+    """Example: A0 = ~10%, B1 = ~15%, C2 = ~20%."""
+    if not (employee.is_quellensteuer and employee.quellensteuer_code):
+        return Decimal("0")
+    code = employee.quellensteuer_code.upper()
+    return QUELLENSTEUER_RATES.get(code[:1], QUELLENSTEUER_DEFAULT_RATE)
+
+
+def _floats(values: Dict) -> Dict:
+    """JSON-friendly copy of a totals dict (Decimal -> float)."""
+    return {k: float(v) if isinstance(v, Decimal) else v for k, v in values.items()}
+
+
 class PayrollCalculator:
     """
     Swiss payroll calculation engine.
@@ -83,6 +163,12 @@ class PayrollCalculator:
         calculator = PayrollCalculator(db_session)
         payroll_run = await calculator.create_payroll_run(2025, 1, creator_id)
         await calculator.calculate_all_payslips(payroll_run.id)
+
+        # Dry run: what would a 3% raise and a higher AHV rate cost?
+        await calculator.what_if(payroll_run.id, {
+            "raise": {"hourly_rate_factor": "1.03"},
+            "ahv": {"ahv_employee": "0.054", "ahv_employer": "0.054"},
+        })
     """
 
     def __init__(self, db: AsyncSession):
@@ -144,6 +230,11 @@ class PayrollCalculator:
         """
         Calculate payslips for all active employees.
 
+        Set-based: one grouped query loads the month's approved hours for
+        everybody, the money is computed for the whole batch, payslips go in
+        with one bulk insert and the entries are marked paid with one UPDATE -
+        all in a single commit.
+
         Args:
             payroll_run_id: The payroll run to process
 
@@ -163,339 +254,500 @@ class PayrollCalculator:
             raise ValueError(f"Cannot calculate payroll with status {payroll_run.status}")
 
         # Update status
+        previous_status = payroll_run.status
         payroll_run.status = "calculating"
         await self.db.commit()
 
-        # Get active employees
-        result = await self.db.execute(
-            select(EmployeeModel).where(
-                EmployeeModel.status.in_(["probation", "active", "notice"])
-            )
-        )
-        employees = result.scalars().all()
-
-        # Calculate each payslip
-        total_gross = Decimal("0")
-        total_net = Decimal("0")
-        total_employer_cost = Decimal("0")
-        total_hours = Decimal("0")
-        processed = 0
-        errors = []
+        try:
+            rows, errors = await self._write_payslips(payroll_run)
+        except Exception:
+            # Never leave the run stuck in "calculating" (it only accepts draft/pending_review)
+            await self.db.rollback()
+            payroll_run.status = previous_status
+            await self.db.commit()
+            raise
 
-        for employee in employees:
-            try:
-                payslip = await self._calculate_employee_payslip(
-                    employee, payroll_run
-                )
-                if payslip:
-                    total_gross += payslip.gross_salary
-                    total_net += payslip.net_salary
-                    total_employer_cost += payslip.total_employer_cost
-                    total_hours += payslip.total_hours
-                    processed += 1
-            except Exception as e:
-                logger.error(f"Error calculating payslip for {employee.employee_number}: {e}")
-                errors.append(f"{employee.employee_number}: {str(e)}")
+        totals = self._totals(rows)
 
         # Update payroll run totals
-        payroll_run.total_employees = processed
-        payroll_run.total_hours = str(total_hours)
-        payroll_run.total_gross = str(total_gross)
-        payroll_run.total_net = str(total_net)
-        payroll_run.total_employer_cost = str(total_employer_cost)
+        payroll_run.total_employees = totals["employees"]
+        payroll_run.total_hours = str(totals["total_hours"])
+        payroll_run.total_gross = str(totals["gross_salary"])
+        payroll_run.total_net = str(totals["net_salary"])
+        payroll_run.total_employer_cost = str(totals["total_employer_cost"])
         payroll_run.status = "pending_review"
         payroll_run.calculated_at = datetime.now(timezone.utc)
 
         await self.db.commit()
 
-        logger.info(f"Payroll calculated: {processed} employees, CHF {total_gross} gross")
+        logger.info(
+            f"Payroll calculated: {totals['employees']} employees, "
+            f"CHF {totals['gross_salary']} gross"
+        )
 
         return {
             "payroll_run_id": str(payroll_run_id),
             "period": payroll_run.period_name,
-            "employees_processed": processed,
-            "total_hours": float(total_hours),
-            "total_gross": float(total_gross),
-            "total_net": float(total_net),
-            "total_employer_cost": float(total_employer_cost),
+            "employees_processed": totals["employees"],
+            "total_hours": float(totals["total_hours"]),
+            "total_gross": float(totals["gross_salary"]),
+            "total_net": float(totals["net_salary"]),
+            "total_employer_cost": float(totals["total_employer_cost"]),
             "errors": errors if errors else None,
         }
 
-    async def _calculate_employee_payslip(
+    async def _write_payslips(self, payroll_run: PayrollRunModel) -> Tuple[List[Dict], List[str]]:
+        """
+        (Re)build the run's payslips. A recalculation replaces the run's
+        existing slips: the month is loaded with the entries already paid into
+        this run, so each employee gets exactly one slip covering everything.
+        Not committed - the caller commits with the run totals.
+        """
+        old_ids = list((await self.db.execute(
+            select(PaySlipModel.id).where(PaySlipModel.payroll_run_id == payroll_run.id)
+        )).scalars().all())
+
+        batch = await self.load_month(
+            payroll_run.year, payroll_run.month, payroll_run_id=payroll_run.id
+        )
+        rows, errors = self._payslip_rows(batch, DEFAULT_RATES)
+
+        slip_of: Dict[UUID, UUID] = {}
+        for row in rows:
+            row["id"] = uuid4()
+            row["payroll_run_id"] = payroll_run.id
+            slip_of[row["employee_id"]] = row["id"]
+        if rows:
+            await self.db.execute(insert(PaySlipModel), rows)
+
+            # Mark the month's entries paid, linked to the slip inserted for their employee
+            counted = TimeEntryModel.status == "approved"
+            if old_ids:
+                counted = or_(counted, TimeEntryModel.payslip_id.in_(old_ids))
+            await self.db.execute(
+                update(TimeEntryModel)
+                .where(
+                    *self._period_filter(batch.year, batch.month),
+                    counted,
+                    TimeEntryModel.employee_id.in_(list(slip_of)),
+                )
+                .values(
+                    status="paid",
+                    payslip_id=case(slip_of, value=TimeEntryModel.employee_id),
+                )
+                .execution_options(synchronize_session=False)
+            )
+
+        if old_ids:
+            # Entries of a replaced slip whose employee got no new one go back to approved
+            await self.db.execute(
+                update(TimeEntryModel)
+                .where(TimeEntryModel.payslip_id.in_(old_ids))
+                .values(status="approved", payslip_id=None)
+                .execution_options(synchronize_session=False)
+            )
+            await self.db.execute(
+                delete(PaySlipModel).where(PaySlipModel.id.in_(old_ids))
+            )
+
+        return rows, errors
+
+    async def what_if(
         self,
-        employee: EmployeeModel,
-        payroll_run: PayrollRunModel
-    ) -> Optional[PaySlipModel]:
+        payroll_run_id: UUID,
+        scenarios: Dict[str, Dict],
+        batch: Optional[PayrollBatch] = None,
+    ) -> Dict:
         """
-        Calculate payslip for a single employee.
+        Dry-run a payroll run under changed rates. Writes nothing.
+
+        Each scenario is a dict of PayrollRates overrides (e.g.
+        {"ahv_employee": "0.054", "hourly_rate_factor": "1.03"}) plus an
+        optional "hourly_rates" map {employee_id: new rate}. The month is loaded
+        once (or pass a `batch` from load_month to reuse it across calls) and
+        every scenario is computed against that same data.
+
+        Returns:
+            Baseline totals, and per scenario its totals, the delta to the
+            baseline and the per-employee net / employer-cost changes.
         """
-        year = payroll_run.year
-        month = payroll_run.month
+        result = await self.db.execute(
+            select(PayrollRunModel).where(PayrollRunModel.id == payroll_run_id)
+        )
+        payroll_run = result.scalar_one_or_none()
+
+        if not payroll_run:
+            raise ValueError("Payroll run not found")
+
+        # Parse every scenario before touching the data: a typo fails the request
+        parsed = {
+            name: (
+                rates_with(**{k: v for k, v in overrides.items() if k != "hourly_rates"}),
+                {UUID(str(k)): Decimal(str(v)) for k, v in (overrides.get("hourly_rates") or {}).items()},
+            )
+            for name, overrides in scenarios.items()
+        }
+
+        if batch is None:
+            batch = await self.load_month(
+                payroll_run.year, payroll_run.month, payroll_run_id=payroll_run.id
+            )
+
+        base_rows, errors = self._payslip_rows(batch, DEFAULT_RATES)
+        baseline = self._totals(base_rows)
+        base_by_employee = {r["employee_id"]: r for r in base_rows}
+
+        out = {}
+        for name, (rates, hourly_rates) in parsed.items():
+            rows, _ = self._payslip_rows(batch, rates, hourly_rates)
+            totals = self._totals(rows)
+            out[name] = {
+                "totals": _floats(totals),
+                "delta": _floats({k: totals[k] - baseline[k] for k in totals}),
+                "employees": [
+                    {
+                        "employee_id": str(r["employee_id"]),
+                        "employee_number": r["employee_number"],
+                        "net_salary": float(r["net_salary"]),
+                        "net_delta": float(r["net_salary"] - base_by_employee[r["employee_id"]]["net_salary"]),
+                        "employer_cost_delta": float(
+                            r["total_employer_cost"]
+                            - base_by_employee[r["employee_id"]]["total_employer_cost"]
+                        ),
+                    }
+                    for r in rows
+                    if r["employee_id"] in base_by_employee
+                ],
+            }
+
+        return {
+            "payroll_run_id": str(payroll_run_id),
+            "period": payroll_run.period_name,
+            "dry_run": True,
+            "baseline": _floats(baseline),
+            "scenarios": out,
+            "errors": errors if errors else None,
+        }
 
-        # Get approved time entries for this month
+    @staticmethod
+    def _period_filter(year: int, month: int) -> Tuple:
         month_start = date(year, month, 1)
         if month == 12:
             month_end = date(year + 1, 1, 1)
         else:
             month_end = date(year, month + 1, 1)
+        return (
+            TimeEntryModel.entry_date >= month_start,
+            TimeEntryModel.entry_date < month_end,
+        )
+
+    async def load_month(
+        self,
+        year: int,
+        month: int,
+        payroll_run_id: Optional[UUID] = None,
+    ) -> PayrollBatch:
+        """
+        Load one month's payroll input: approved hours summed per employee and
+        entry type (one grouped query) plus the employees who have any.
+
+        With `payroll_run_id`, entries already paid into that run count too, so
+        a what-if on a calculated run still sees its hours.
+        """
+        status_filter = TimeEntryModel.status == "approved"
+        if payroll_run_id is not None:
+            status_filter = or_(
+                status_filter,
+                TimeEntryModel.payslip_id.in_(
+                    select(PaySlipModel.id).where(PaySlipModel.payroll_run_id == payroll_run_id)
+                ),
+            )
 
         result = await self.db.execute(
-            select(TimeEntryModel).where(
-                and_(
-                    TimeEntryModel.employee_id == employee.id,
-                    TimeEntryModel.entry_date >= month_start,
-                    TimeEntryModel.entry_date < month_end,
-                    TimeEntryModel.status == "approved"
-                )
+            select(
+                TimeEntryModel.employee_id,
+                TimeEntryModel.entry_type,
+                func.sum(TimeEntryModel.hours),
             )
+            .join(EmployeeModel, EmployeeModel.id == TimeEntryModel.employee_id)
+            .where(
+                *self._period_filter(year, month),
+                status_filter,
+                EmployeeModel.status.in_(ACTIVE_EMPLOYEE_STATUSES),
+            )
+            .group_by(TimeEntryModel.employee_id, TimeEntryModel.entry_type)
         )
-        entries = result.scalars().all()
-
-        if not entries:
-            logger.info(f"No approved entries for {employee.employee_number} in {year}-{month:02d}")
-            return None
-
-        # Aggregate hours by type
-        hours = self._aggregate_hours(entries)
-
-        # Calculate gross pay
-        hourly_rate = employee.hourly_rate
-        remote_rate = hourly_rate * (employee.remote_rate_multiplier or REMOTE_MULTIPLIER)
-        overtime_rate = hourly_rate * OVERTIME_MULTIPLIER
-
-        regular_pay = hours["regular"] * hourly_rate
-        remote_pay = hours["remote"] * remote_rate
-        holiday_pay = hours["holiday"] * hourly_rate
-        sick_pay = hours["sick"] * hourly_rate
-        public_holiday_pay = hours["public_holiday"] * hourly_rate
-        overtime_pay = hours["overtime"] * overtime_rate
-        training_pay = hours["training"] * hourly_rate
-
-        gross_salary = (
-            regular_pay + remote_pay + holiday_pay + sick_pay +
-            public_holiday_pay + overtime_pay + training_pay
-        )
+        hours = self._aggregate_hours(result.all())
 
-        # Calculate deductions
-        deductions = self._calculate_deductions(gross_salary, employee)
-
-        # Calculate employer costs
-        employer_costs = self._calculate_employer_costs(gross_salary, employee)
-
-        # KB bonus (from CRACK contributions - placeholder)
-        kb_bonus = Decimal("0")  # TODO: Query KB contributions for this month
+        employees: Dict[UUID, EmployeeModel] = {}
+        if hours:
+            result = await self.db.execute(
+                select(EmployeeModel).where(EmployeeModel.id.in_(list(hours)))
+            )
+            employees = {e.id: e for e in result.scalars().all()}
 
-        # Net salary
-        net_salary = gross_salary - deductions["total"] + kb_bonus
+        return PayrollBatch(year=year, month=month, employees=employees, hours=hours)
 
-        # Total employer cost
-        total_employer_cost = gross_salary + employer_costs["total"]
+    def _payslip_rows(
+        self,
+        batch: PayrollBatch,
+        rates: PayrollRates,
+        hourly_rates: Optional[Dict[UUID, Decimal]] = None,
+    ) -> Tuple[List[Dict], List[str]]:
+        """
+        Compute every payslip of the batch as PaySlipModel column dicts (no id /
+        payroll_run_id yet). Pure: no DB access, so what-if runs reuse it freely.
 
-        # Create payslip
-        payslip = PaySlipModel(
-            payroll_run_id=payroll_run.id,
-            employee_id=employee.id,
-            year=year,
-            month=month,
+        Returns:
+            (rows in employee_number order, per-employee error messages)
+        """
+        hourly_rates = hourly_rates or {}
+        errors = []
 
-            # Employee snapshot
-            employee_name=f"{employee.first_name} {employee.last_name}",
-            employee_number=employee.employee_number,
-            ahv_number=employee.ahv_number,
-            hourly_rate=hourly_rate,
-
-            # Hours
-            regular_hours=hours["regular"],
-            remote_hours=hours["remote"],
-            holiday_hours=hours["holiday"],
-            sick_hours=hours["sick"],
-            public_holiday_hours=hours["public_holiday"],
-            overtime_hours=hours["overtime"],
-            training_hours=hours["training"],
-            unpaid_hours=hours["unpaid"],
-            total_hours=hours["total"],
-
-            # Gross
-            regular_pay=round_chf(regular_pay),
-            remote_pay=round_chf(remote_pay),
-            holiday_pay=round_chf(holiday_pay),
-            sick_pay=round_chf(sick_pay),
-            public_holiday_pay=round_chf(public_holiday_pay),
-            overtime_pay=round_chf(overtime_pay),
-            training_pay=round_chf(training_pay),
-            gross_salary=round_chf(gross_salary),
-
-            # Deductions
-            ahv_iv_eo=round_chf(deductions["ahv"]),
-            alv=round_chf(deductions["alv"]),
-            alv2=round_chf(deductions["alv2"]),
-            bvg=round_chf(deductions["bvg"]),
-            uvg_nbu=round_chf(deductions["nbu"]),
-            ktg=Decimal("0"),
-            quellensteuer=round_chf(deductions["quellensteuer"]),
-            other_deductions=Decimal("0"),
-            total_deductions=round_chf(deductions["total"]),
-
-            # Additions
-            kb_bonus=kb_bonus,
-            expense_reimbursement=Decimal("0"),
-            other_additions=Decimal("0"),
-
-            # Net
-            net_salary=round_chf(net_salary),
-
-            # Employer costs
-            employer_ahv=round_chf(employer_costs["ahv"]),
-            employer_alv=round_chf(employer_costs["alv"]),
-            employer_bvg=round_chf(employer_costs["bvg"]),
-            employer_uvg=round_chf(employer_costs["uvg"]),
-            employer_fak=round_chf(employer_costs["fak"]),
-            employer_admin=round_chf(employer_costs["admin"]),
-            total_employer_cost=round_chf(total_employer_cost),
-        )
+        # Gross pay per employee (one bad master record must not stop the run)
+        pay: Dict[UUID, Dict[str, Decimal]] = {}
+        for employee_id, hours in batch.hours.items():
+            employee = batch.employees.get(employee_id)
+            if employee is None:
+                continue
+            try:
+                hourly_rate = Decimal(
+                    hourly_rates.get(employee_id, employee.hourly_rate)
+                ) * rates.hourly_rate_factor
+                remote_rate = hourly_rate * (employee.remote_rate_multiplier or rates.remote_multiplier)
+                overtime_rate = hourly_rate * rates.overtime_multiplier
+                p = {
+                    "hourly_rate": hourly_rate,
+                    "regular": hours["regular"] * hourly_rate,
+                    "remote": hours["remote"] * remote_rate,
+                    "holiday": hours["holiday"] * hourly_rate,
+                    "sick": hours["sick"] * hourly_rate,
+                    "public_holiday": hours["public_holiday"] * hourly_rate,
+                    "overtime": hours["overtime"] * overtime_rate,
+                    "training": hours["training"] * hourly_rate,
+                }
+                p["gross"] = (
+                    p["regular"] + p["remote"] + p["holiday"] + p["sick"] +
+                    p["public_holiday"] + p["overtime"] + p["training"]
+                )
+                pay[employee_id] = p
+            except Exception as e:
+                logger.error(f"Error calculating payslip for {employee.employee_number}: {e}")
+                errors.append(f"{employee.employee_number}: {str(e)}")
 
-        self.db.add(payslip)
+        gross = {employee_id: p["gross"] for employee_id, p in pay.items()}
+        deductions = self._calculate_deductions(gross, batch.employees, rates)
+        employer_costs = self._calculate_employer_costs(gross, batch.employees, rates)
 
-        # Mark time entries as paid
-        for entry in entries:
-            entry.status = "paid"
-            entry.payslip_id = payslip.id
+        # KB bonus (from CRACK contributions - placeholder)
+        kb_bonus = Decimal("0")  # TODO: Query KB contributions for this month
 
-        await self.db.commit()
-        await self.db.refresh(payslip)
-
-        logger.info(f"Payslip created: {employee.employee_number} - CHF {net_salary} net")
-        return payslip
-
-    def _aggregate_hours(self, entries: List[TimeEntryModel]) -> Dict[str, Decimal]:
-        """Aggregate hours by entry type."""
-        hours = {
-            "regular": Decimal("0"),
-            "remote": Decimal("0"),
-            "holiday": Decimal("0"),
-            "sick": Decimal("0"),
-            "public_holiday": Decimal("0"),
-            "overtime": Decimal("0"),
-            "training": Decimal("0"),
-            "unpaid": Decimal("0"),
-            "total": Decimal("0"),
+        rows = []
+        for employee_id, p in pay.items():
+            employee = batch.employees[employee_id]
+            hours = batch.hours[employee_id]
+            d = deductions[employee_id]
+            c = employer_costs[employee_id]
+            net_salary = p["gross"] - d["total"] + kb_bonus
+            total_employer_cost = p["gross"] + c["total"]
+            rows.append({
+                "employee_id": employee_id,
+                "year": batch.year,
+                "month": batch.month,
+
+                # Employee snapshot
+                "employee_name": f"{employee.first_name} {employee.last_name}",
+                "employee_number": employee.employee_number,
+                "ahv_number": employee.ahv_number,
+                "hourly_rate": p["hourly_rate"].quantize(Decimal("0.01"), rounding=ROUND_HALF_UP),
+
+                # Hours
+                "regular_hours": hours["regular"],
+                "remote_hours": hours["remote"],
+                "holiday_hours": hours["holiday"],
+                "sick_hours": hours["sick"],
+                "public_holiday_hours": hours["public_holiday"],
+                "overtime_hours": hours["overtime"],
+                "training_hours": hours["training"],
+                "unpaid_hours": hours["unpaid"],
+                "total_hours": hours["total"],
+
+                # Gross
+                "regular_pay": round_chf(p["regular"]),
+                "remote_pay": round_chf(p["remote"]),
+                "holiday_pay": round_chf(p["holiday"]),
+                "sick_pay": round_chf(p["sick"]),
+                "public_holiday_pay": round_chf(p["public_holiday"]),
+                "overtime_pay": round_chf(p["overtime"]),
+                "training_pay": round_chf(p["training"]),
+                "gross_salary": round_chf(p["gross"]),
+
+                # Deductions
+                "ahv_iv_eo": round_chf(d["ahv"]),
+                "alv": round_chf(d["alv"]),
+                "alv2": round_chf(d["alv2"]),
+                "bvg": round_chf(d["bvg"]),
+                "uvg_nbu": round_chf(d["nbu"]),
+                "ktg": Decimal("0"),
+                "quellensteuer": round_chf(d["quellensteuer"]),
+                "other_deductions": Decimal("0"),
+                "total_deductions": round_chf(d["total"]),
+
+                # Additions
+                "kb_bonus": kb_bonus,
+                "expense_reimbursement": Decimal("0"),
+                "other_additions": Decimal("0"),
+
+                # Net
+                "net_salary": round_chf(net_salary),
+
+                # Employer costs
+                "employer_ahv": round_chf(c["ahv"]),
+                "employer_alv": round_chf(c["alv"]),
+                "employer_bvg": round_chf(c["bvg"]),
+                "employer_uvg": round_chf(c["uvg"]),
+                "employer_fak": round_chf(c["fak"]),
+                "employer_admin": round_chf(c["admin"]),
+                "total_employer_cost": round_chf(total_employer_cost),
+            })
+
+        rows.sort(key=lambda r: r["employee_number"])
+        return rows, errors
+
+    @staticmethod
+    def _totals(rows: List[Dict]) -> Dict:
+        """Run totals over computed payslip rows (the rounded, stored amounts)."""
+        totals = {
+            "employees": len(rows),
+            "total_hours": Decimal("0"),
+            "gross_salary": Decimal("0"),
+            "total_deductions": Decimal("0"),
+            "net_salary": Decimal("0"),
+            "total_employer_cost": Decimal("0"),
         }
-
-        for entry in entries:
-            entry_type = entry.entry_type
-            if entry_type in hours:
-                hours[entry_type] += entry.hours
+        for row in rows:
+            for key in ("total_hours", "gross_salary", "total_deductions",
+                        "net_salary", "total_employer_cost"):
+                totals[key] += row[key]
+        return totals
+
+    def _aggregate_hours(self, rows) -> Dict[UUID, Dict[str, Decimal]]:
+        """Aggregate grouped (employee_id, entry_type, hours) rows per employee."""
+        hours: Dict[UUID, Dict[str, Decimal]] = {}
+
+        for employee_id, entry_type, total in rows:
+            h = hours.get(employee_id)
+            if h is None:
+                h = hours[employee_id] = {
+                    "regular": Decimal("0"),
+                    "remote": Decimal("0"),
+                    "holiday": Decimal("0"),
+                    "sick": Decimal("0"),
+                    "public_holiday": Decimal("0"),
+                    "overtime": Decimal("0"),
+                    "training": Decimal("0"),
+                    "unpaid": Decimal("0"),
+                    "total": Decimal("0"),
+                }
+            total = Decimal(str(total or 0))
+            if entry_type in h:
+                h[entry_type] += total
             else:
-                hours["regular"] += entry.hours
+                h["regular"] += total
 
             # Total excludes unpaid
             if entry_type != "unpaid":
-                hours["total"] += entry.hours
+                h["total"] += total
 
         return hours
 
     def _calculate_deductions(
         self,
-        gross_salary: Decimal,
-        employee: EmployeeModel
-    ) -> Dict[str, Decimal]:
-        """Calculate all employee deductions."""
-        deductions = {
-            "ahv": Decimal("0"),
-            "alv": Decimal("0"),
-            "alv2": Decimal("0"),
-            "bvg": Decimal("0"),
-            "nbu": Decimal("0"),
-            "quellensteuer": Decimal("0"),
-            "total": Decimal("0"),
-        }
+        gross: Dict[UUID, Decimal],
+        employees: Dict[UUID, EmployeeModel],
+        rates: PayrollRates = None,
+    ) -> Dict[UUID, Dict[str, Decimal]]:
+        """Calculate all employee deductions, one column at a time over the batch."""
+        rates = rates or DEFAULT_RATES
+        monthly_max = rates.alv_max_salary_yearly / 12
+        zero = Decimal("0")
 
         # AHV/IV/EO - 5.3%
-        deductions["ahv"] = gross_salary * AHV_RATE_EMPLOYEE
+        ahv = {e: g * rates.ahv_employee for e, g in gross.items()}
 
         # ALV - 1.1% (up to max salary)
-        monthly_max = ALV_MAX_SALARY_YEARLY / 12
-        alv_base = min(gross_salary, monthly_max)
-        deductions["alv"] = alv_base * ALV_RATE_EMPLOYEE
+        alv = {e: min(g, monthly_max) * rates.alv_employee for e, g in gross.items()}
 
         # ALV2 - 0.5% solidarity (above max)
-        if gross_salary > monthly_max:
-            deductions["alv2"] = (gross_salary - monthly_max) * ALV2_RATE
+        alv2 = {e: (g - monthly_max) * rates.alv2 if g > monthly_max else zero
+                for e, g in gross.items()}
 
-        # BVG - Pension (if insured)
-        if employee.bvg_insured:
-            bvg_rate = employee.bvg_contribution_rate or BVG_DEFAULT_RATE
-            # Employee pays half
-            deductions["bvg"] = gross_salary * (bvg_rate / 2)
+        # BVG - Pension (if insured), employee pays half
+        bvg = {e: g * (_bvg_rate(employees[e], rates) / 2) if employees[e].bvg_insured else zero
+               for e, g in gross.items()}
 
         # NBU - Non-occupational accident (optional)
-        # Some companies have employee pay this
-        deductions["nbu"] = Decimal("0")  # Default: employer pays
+        # Some companies have employee pay this. Default: employer pays
+        nbu = {e: zero for e in gross}
 
         # Quellensteuer (withholding tax for foreigners)
-        if employee.is_quellensteuer and employee.quellensteuer_code:
-            # Simplified: use a flat rate based on code
-            # In reality, this uses canton-specific tables
-            # Example: A0 = ~10%, B1 = ~15%, C2 = ~20%
-            code = employee.quellensteuer_code.upper()
-            if code.startswith("A"):
-                rate = Decimal("0.10")
-            elif code.startswith("B"):
-                rate = Decimal("0.15")
-            elif code.startswith("C"):
-                rate = Decimal("0.20")
-            else:
-                rate = Decimal("0.12")  # Default
-            deductions["quellensteuer"] = gross_salary * rate
-
-        # Total
-        deductions["total"] = sum(deductions.values())
+        quellensteuer = {e: g * _quellensteuer_rate(employees[e]) for e, g in gross.items()}
 
-        return deductions
+        return {
+            e: {
+                "ahv": ahv[e],
+                "alv": alv[e],
+                "alv2": alv2[e],
+                "bvg": bvg[e],
+                "nbu": nbu[e],
+                "quellensteuer": quellensteuer[e],
+                "total": ahv[e] + alv[e] + alv2[e] + bvg[e] + nbu[e] + quellensteuer[e],
+            }
+            for e in gross
+        }
 
     def _calculate_employer_costs(
         self,
-        gross_salary: Decimal,
-        employee: EmployeeModel
-    ) -> Dict[str, Decimal]:
-        """Calculate all employer contributions."""
-        costs = {
-            "ahv": Decimal("0"),
-            "alv": Decimal("0"),
-            "bvg": Decimal("0"),
-            "uvg": Decimal("0"),
-            "fak": Decimal("0"),
-            "admin": Decimal("0"),
-            "total": Decimal("0"),
-        }
+        gross: Dict[UUID, Decimal],
+        employees: Dict[UUID, EmployeeModel],
+        rates: PayrollRates = None,
+    ) -> Dict[UUID, Dict[str, Decimal]]:
+        """Calculate all employer contributions, one column at a time over the batch."""
+        rates = rates or DEFAULT_RATES
+        monthly_max = rates.alv_max_salary_yearly / 12
+        zero = Decimal("0")
 
         # AHV/IV/EO - 5.3%
-        costs["ahv"] = gross_salary * AHV_RATE_EMPLOYER
+        ahv = {e: g * rates.ahv_employer for e, g in gross.items()}
 
         # ALV - 1.1% (up to max salary)
-        monthly_max = ALV_MAX_SALARY_YEARLY / 12
-        alv_base = min(gross_salary, monthly_max)
-        costs["alv"] = alv_base * ALV_RATE_EMPLOYER
+        alv = {e: min(g, monthly_max) * rates.alv_employer for e, g in gross.items()}
 
         # BVG - Employer pays half
-        if employee.bvg_insured:
-            bvg_rate = employee.bvg_contribution_rate or BVG_DEFAULT_RATE
-            costs["bvg"] = gross_salary * (bvg_rate / 2)
+        bvg = {e: g * (_bvg_rate(employees[e], rates) / 2) if employees[e].bvg_insured else zero
+               for e, g in gross.items()}
 
         # UVG - Accident insurance (employer pays BU, often NBU too)
-        # Simplified flat rate
-        costs["uvg"] = gross_salary * Decimal("0.015")  # ~1.5%
+        uvg = {e: g * rates.uvg_employer for e, g in gross.items()}
 
         # FAK - Family compensation fund (Canton Luzern)
-        costs["fak"] = gross_salary * FAK_RATE_EMPLOYER
+        fak = {e: g * rates.fak_employer for e, g in gross.items()}
 
         # Admin costs
-        costs["admin"] = gross_salary * ADMIN_RATE_EMPLOYER
+        admin = {e: g * rates.admin_employer for e, g in gross.items()}
 
-        # Total
-        costs["total"] = sum(costs.values())
-
-        return costs
+        return {
+            e: {
+                "ahv": ahv[e],
+                "alv": alv[e],
+                "bvg": bvg[e],
+                "uvg": uvg[e],
+                "fak": fak[e],
+                "admin": admin[e],
+                "total": ahv[e] + alv[e] + bvg[e] + uvg[e] + fak[e] + admin[e],
+            }
+            for e in gross
+        }
 
     async def approve_payroll_run(
         self,
@@ -0,0 +1,288 @@
+"""
+Product photo storage + serving — derived sizes, content-addressed, served from a local disk cache.
+
+Before: the upload ran the Pillow pipeline ON the event loop (every other request waited out the
+decode/resize/encode), and every GET pulled the full 1024px JPEG out of MinIO into memory — a
+catalog grid of 50 tiles was 50 full-size MinIO reads, each buffered whole.
+
+Now:
+  • upload — image_intake.derive runs in a small PROCESS pool (BANCO_IMAGE_WORKERS), producing
+    thumb / list / full in JPEG (+ WebP / AVIF when Pillow can). The objects are stored under the
+    SHA-256 of the uploaded bytes (`pos-images/ab/abcd…/list.webp`): the same photo uploaded twice,
+    or copied onto a second product, is processed and stored once. product_images.content_hash +
+    .variants record what exists.
+  • serve — the view asks for ?size=thumb|list|full; the best format the browser Accepts is picked;
+    the object is streamed into a bounded LRU cache on local disk (BANCO_IMAGE_CACHE_DIR, one
+    sub-directory per app worker of BANCO_IMAGE_CACHE_MB each) once — concurrent misses for one
+    object share the download — and every
+    later hit is read from there and sent with an ETag (the content address, so If-None-Match →
+    304) and an immutable Cache-Control. The bytes are read before the response goes out: a file
+    handed over by path could be evicted before it is opened.
+Rows from before this (no content_hash) keep their single `pos-products/{pid}/{id}.jpg` object,
+served for every size through the same cache.
+"""
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import io
+import logging
+import os
+import shutil
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from pathlib import Path
+
+from sqlalchemy import func, select
+
+from src.db.models import ProductImageModel
+
+logger = logging.getLogger(__name__)
+
+IMAGE_WORKERS = int(os.getenv("BANCO_IMAGE_WORKERS", "2"))
+IMAGE_CACHE_DIR = Path(os.getenv("BANCO_IMAGE_CACHE_DIR", "/tmp/banco-image-cache"))
+IMAGE_CACHE_MB = int(os.getenv("BANCO_IMAGE_CACHE_MB", "512"))
+
+SIZES = ("thumb", "list", "full")
+MEDIA_TYPES = {"jpg": "image/jpeg", "webp": "image/webp", "avif": "image/avif"}
+# Bump when image_intake.derive's output changes — it is part of the content address, so old
+# uploads keep their objects and a re-upload of the same bytes gets the new look.
+RENDITION_VERSION = 1
+_STREAM_CHUNK = 64 * 1024
+_FORMAT_PREFERENCE = (("avif", "image/avif"), ("webp", "image/webp"))
+
+_pool: ProcessPoolExecutor | None = None
+
+
+def _executor() -> ProcessPoolExecutor:
+    global _pool
+    if _pool is None:
+        _pool = ProcessPoolExecutor(max_workers=max(1, IMAGE_WORKERS))
+    return _pool
+
+
+async def derive(raw: bytes) -> dict[str, bytes]:
+    """All renditions of `raw`, computed in the worker pool. Raises ImageIntakeError (bad bytes)
+    or ImportError (no Pillow in this image) like image_intake itself."""
+    global _pool
+    from src.services import image_intake
+    loop = asyncio.get_running_loop()
+    try:
+        return await loop.run_in_executor(_executor(), image_intake.derive, raw)
+    except BrokenProcessPool:                 # a worker died (OOM on a huge decode) — start over once
+        _pool = None
+        return await loop.run_in_executor(_executor(), image_intake.derive, raw)
+
+
+def content_digest(raw: bytes) -> str:
+    return hashlib.sha256(f"v{RENDITION_VERSION}:".encode() + raw).hexdigest()
+
+
+def content_key(digest: str, name: str) -> str:
+    return f"pos-images/{digest[:2]}/{digest}/{name}"
+
+
+def media_type(name: str) -> str:
+    return MEDIA_TYPES.get(name.rsplit(".", 1)[-1], "image/jpeg")
+
+
+def pick(variants: dict | None, size: str | None, accept: str = "") -> str:
+    """The stored object for a requested size: the best format the client accepts, JPEG otherwise.
+    An unknown size is "full"."""
+    size = size if size in SIZES else "full"
+    have = variants or {}
+    if f"{size}.jpg" not in have:
+        size = "full"                           # stored as-is (no Pillow at upload): one object
+    accept = (accept or "").lower()
+    for ext, mime in _FORMAT_PREFERENCE:
+        if mime in accept and f"{size}.{ext}" in have:
+            return f"{size}.{ext}"
+    return f"{size}.jpg"
+
+
+async def store(db, raw: bytes) -> tuple[str, dict]:
+    """Put every rendition of an upload in MinIO under its content address; (digest, variants).
+    Bytes already stored (a re-upload, a shared supplier photo) are neither processed nor sent."""
+    from src.services.minio_service import minio_service
+
+    digest = content_digest(raw)
+    known = (await db.execute(
+        select(ProductImageModel.variants).where(
+            ProductImageModel.content_hash == digest, ProductImageModel.variants.isnot(None)).limit(1)
+    )).scalar_one_or_none()
+    if known:
+        return digest, known
+
+    try:
+        files = await derive(raw)
+    except ImportError:
+        logger.warning("Pillow not in image — storing product photo as-is (no resize).")
+        files = {"full.jpg": raw}
+    loop = asyncio.get_running_loop()
+    await asyncio.gather(*(
+        loop.run_in_executor(None, minio_service.client.put_object, minio_service.bucket_name,
+                             content_key(digest, name), io.BytesIO(data), len(data), media_type(name))
+        for name, data in files.items()))
+    return digest, {name: len(data) for name, data in files.items()}
+
+
+def shutdown() -> None:
+    """Stop the worker pool (app shutdown); a later derive starts a fresh one."""
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = None
+
+
+async def remove(db, digest: str, variants: dict) -> None:
+    """Best-effort delete of a content address's objects once no gallery row uses them. Call it
+    AFTER the row's delete is committed: a rolled-back delete must not lose the photo."""
+    from src.services.minio_service import minio_service
+
+    others = (await db.execute(
+        select(func.count()).where(ProductImageModel.content_hash == digest))).scalar() or 0
+    if others:
+        return
+    loop = asyncio.get_running_loop()
+    for name in variants or {}:
+        try:
+            await loop.run_in_executor(None, minio_service.client.remove_object,
+                                       minio_service.bucket_name, content_key(digest, name))
+        except Exception as e:
+            logger.warning(f"MinIO remove_object skipped for {digest[:12]}/{name}: {e}")
+
+
+def _alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+class DiskCache:
+    """Bounded LRU of object bytes on local disk, one file per object key.
+
+    Each process keeps its own sub-directory of `root` (`w<pid>`) and bounds only that: the byte
+    bound is per app worker, and no worker's eviction can unlink a file another one is serving.
+    Directories of processes that are gone are dropped on first use; files left by an earlier
+    process with this pid are adopted, oldest-accessed first in line. Bookkeeping lives on the
+    event loop (no lock needed); only the download runs in a thread."""
+
+    def __init__(self, root: Path, max_bytes: int):
+        self.root = root
+        self.max_bytes = max_bytes
+        self.dir: Path | None = None                          # this process's part of root
+        self._files: OrderedDict[str, int] | None = None     # file name → size, LRU first
+        self._bytes = 0
+        self._inflight: dict[str, asyncio.Future] = {}
+
+    def _index(self) -> OrderedDict:
+        if self._files is None:
+            self.dir = self.root / f"w{os.getpid()}"       # at first use — after any fork
+            self.dir.mkdir(parents=True, exist_ok=True)
+            for d in self.root.iterdir():
+                if d.is_dir() and d.name[:1] == "w" and d.name[1:].isdigit() and not _alive(int(d.name[1:])):
+                    shutil.rmtree(d, ignore_errors=True)
+            found = sorted((p.stat().st_atime, p.name, p.stat().st_size)
+                           for p in self.dir.iterdir() if p.is_file() and not p.name.endswith(".part"))
+            self._files = OrderedDict((name, size) for _, name, size in found)
+            self._bytes = sum(self._files.values())
+            self._evict()
+        return self._files
+
+    @staticmethod
+    def _name(key: str) -> str:
+        return hashlib.sha1(key.encode()).hexdigest()
+
+    def _evict(self) -> None:
+        while self._bytes > self.max_bytes and len(self._files) > 1:
+            name, size = self._files.popitem(last=False)
+            self._bytes -= size
+            (self.dir / name).unlink(missing_ok=True)
+
+    def _admit(self, name: str, size: int) -> None:
+        files = self._index()
+        self._bytes += size - files.pop(name, 0)
+        files[name] = size
+        self._evict()
+
+    async def path(self, key: str, fetch) -> Path | None:
+        """Local path of `key`, running `fetch(key, dest) -> bool` in a thread on a miss."""
+        name = self._name(key)
+        files = self._index()
+        if name in files:
+            if (self.dir / name).exists():
+                files.move_to_end(name)
+                return self.dir / name
+            self._bytes -= files.pop(name)           # removed under us (disk cleanup)
+        if name in self._inflight:
+            return await asyncio.shield(self._inflight[name])
+        fut = asyncio.get_running_loop().create_future()
+        self._inflight[name] = fut
+        try:
+            part = self.dir / f"{name}.part"
+            ok = await asyncio.get_running_loop().run_in_executor(None, fetch, key, part)
+            result = None
+            if not ok:
+                part.unlink(missing_ok=True)
+            else:
+                os.replace(part, self.dir / name)
+                self._admit(name, (self.dir / name).stat().st_size)
+                result = self.dir / name
+            fut.set_result(result)
+            return result
+        except Exception as e:
+            fut.set_exception(e)
+            fut.exception()                  # retrieved: waiters (if any) re-raise it themselves
+            raise
+        finally:
+            self._inflight.pop(name, None)
+            if not fut.done():
+                fut.cancel()
+
+    async def read(self, key: str, fetch) -> bytes | None:
+        """The bytes of `key` (see `path`). A file evicted between the lookup and the read is
+        fetched again, once."""
+        for _ in range(2):
+            path = await self.path(key, fetch)
+            if path is None:
+                return None
+            try:
+                return await asyncio.get_running_loop().run_in_executor(None, path.read_bytes)
+            except FileNotFoundError:
+                continue
+        return None
+
+
+def _fetch(key: str, dest: Path) -> bool:
+    """Stream one MinIO object to `dest` (thread). False if it doesn't exist / can't be read."""
+    from src.services.minio_service import minio_service
+    try:
+        resp = minio_service.client.get_object(minio_service.bucket_name, key)
+    except Exception as e:
+        logger.info(f"Image object {key} unavailable: {e}")
+        return False
+    try:
+        with open(dest, "wb") as f:
+            for chunk in resp.stream(_STREAM_CHUNK):
+                f.write(chunk)
+        return True
+    except Exception as e:
+        logger.warning(f"Image object {key} download failed: {e}")
+        dest.unlink(missing_ok=True)
+        return False
+    finally:
+        resp.close()
+        resp.release_conn()
+
+
+disk_cache = DiskCache(IMAGE_CACHE_DIR, IMAGE_CACHE_MB * 1024 * 1024)
+
+
+async def read(key: str) -> bytes | None:
+    """The object's bytes, from the disk cache (MinIO only on a miss)."""
+    return await disk_cache.read(key, _fetch)
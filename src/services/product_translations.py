@@ -4,21 +4,33 @@ A product = one language-independent CORE + N text skins. We fill the skins from
 source: a Tamar/Artemis product publishes DE/EN/FR/IT NATIVELY (free fetch → provenance
 'source'); everything else is machine-translated from the base description (Ollama →
 provenance 'machine', needs_review). Display picks the operator's language, falls back to
-English, then the raw base description. Filled ON DEMAND (first view in a language fills it,
-then it's a stored hit forever) so there is no giant up-front backfill.
+English, then the raw base description.
+
+Filled AHEAD of the viewer: a background worker (`prefill`, run by main's translation loop)
+walks the catalogue's missing (product, language) skins — products just viewed untranslated or
+just re-texted first — and fills them: Tamar pages over one shared HTTP client, base-language
+skins straight from the base, everything else in batched, schema-bounded model calls (one call
+per source→target language pair, PREFILL_BATCH descriptions each). Views call `describe`, which
+never waits on a model or a page fetch: a missing skin is queued and the view shows the English
+skin / base text meanwhile. `ensure_description` is the blocking fill; concurrent fills of one
+(product, language) — two viewers, a viewer and the worker — share ONE in-flight result.
 """
 from __future__ import annotations
 
+import asyncio
 import html as _html
+import json
 import logging
 import os
 import re
+import time
+import weakref
 from urllib.parse import urlparse
 
 import httpx
-from sqlalchemy import delete, select
+from sqlalchemy import and_, delete, func, or_, select
 
-from src.db.models.product_model import ProductTranslationModel
+from src.db.models.product_model import ProductModel, ProductTranslationModel
 
 log = logging.getLogger("product_translations")
 
@@ -28,6 +40,13 @@ TARGET_LANGS = tuple((os.getenv("BANCO_CATALOG_LANGS") or "en,de,fr,it").split("
 LANG_NAMES = {"en": "English", "de": "German", "fr": "French", "it": "Italian",
               "nl": "Dutch", "es": "Spanish", "pl": "Polish"}
 
+PREFILL_BATCH = int(os.getenv("BANCO_TRANSLATE_BATCH", "8"))          # descriptions per model call
+PREFILL_PRODUCTS = int(os.getenv("BANCO_TRANSLATE_PRODUCTS", "25"))   # products per worker pass
+PREFILL_IDLE_S = int(os.getenv("BANCO_TRANSLATE_IDLE_S", "300"))      # worker nap when caught up
+RETRY_AFTER_S = int(os.getenv("BANCO_TRANSLATE_RETRY_S", "3600"))     # a skin that failed waits this long
+_TAMAR_CONCURRENCY = 4
+_MAX_DESC = 2000
+
 _UA = ("Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 "
        "(KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36")
 
@@ -87,6 +106,27 @@ def _tamar_url(source_url: str, lang: str) -> str | None:
     return f"{p.scheme}://{p.netloc}{_TAMAR_PATHS[lang]}{m.group(1)}"
 
 
+_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, httpx.AsyncClient]" = weakref.WeakKeyDictionary()
+
+
+def _http() -> httpx.AsyncClient:
+    """The Tamar fetch client — one per event loop, kept alive across fills (no handshake per skin)."""
+    loop = asyncio.get_running_loop()
+    client = _clients.get(loop)
+    if client is None or client.is_closed:
+        client = _clients[loop] = httpx.AsyncClient(
+            headers={"User-Agent": _UA}, follow_redirects=True, timeout=20,
+            limits=httpx.Limits(max_connections=_TAMAR_CONCURRENCY, max_keepalive_connections=_TAMAR_CONCURRENCY))
+    return client
+
+
+async def aclose_client() -> None:
+    """Close this loop's Tamar client (app shutdown)."""
+    client = _clients.pop(asyncio.get_running_loop(), None)
+    if client is not None:
+        await client.aclose()
+
+
 async def _fetch_tamar(client: httpx.AsyncClient, source_url: str, lang: str):
     """Native (name, description) for `lang` off the Tamar detail page, or (None, None)."""
     url = _tamar_url(source_url, lang)
@@ -120,58 +160,194 @@ async def _translate(text: str, tgt_lang: str, src_lang: str = "en") -> str | No
         return None
 
 
+def _batch_schema(n: int) -> dict:
+    return {
+        "type": "object",
+        "properties": {
+            "items": {
+                "type": "array",
+                "maxItems": n,
+                "items": {
+                    "type": "object",
+                    "properties": {
+                        "id": {"type": "string"},
+                        "text": {"type": "string", "maxLength": _MAX_DESC},
+                    },
+                    "required": ["id", "text"],
+                },
+            }
+        },
+        "required": ["items"],
+    }
+
+
+async def _translate_batch(texts: list[str], tgt_lang: str, src_lang: str) -> list[str | None]:
+    """Machine-translate several descriptions in ONE model call, answers matched back by id.
+    A slot the model skipped (or the whole call failing) comes back None."""
+    from src.llm import run_llm, turbo_or_local
+    system = (
+        f"You translate retail product descriptions from {LANG_NAMES.get(src_lang, src_lang)} "
+        f"to {LANG_NAMES.get(tgt_lang, tgt_lang)}. Translate each item faithfully and concisely. Keep "
+        f"brand and product names, units, and numbers unchanged. Return every item with its id and "
+        f"ONLY the translated text — no preamble, no quotes, no notes."
+    )
+    user = json.dumps({"items": [{"id": str(i), "text": t} for i, t in enumerate(texts)]}, ensure_ascii=False)
+    out: list[str | None] = [None] * len(texts)
+    try:
+        res = await run_llm(user, target=turbo_or_local("gpt-oss:120b"), system=system,
+                            schema=_batch_schema(len(texts)), temperature=0)
+        data = json.loads(re.sub(r"<think>.*?</think>", "", res.text or "", flags=re.S).strip())
+    except Exception as e:  # noqa: BLE001
+        log.warning("batch translate %s->%s (%d) failed: %s", src_lang, tgt_lang, len(texts), e)
+        return out
+    for row in (data.get("items") if isinstance(data, dict) else None) or []:
+        try:
+            i, text = int(row["id"]), (row.get("text") or "").strip()
+        except (KeyError, TypeError, ValueError, AttributeError):
+            continue
+        if 0 <= i < len(texts) and text:
+            out[i] = text[:_MAX_DESC]
+    return out
+
+
 async def invalidate_translations(db, product_id) -> int:
-    """Drop the cached per-language skins for a product so ``ensure_description`` refills
-    them from the CURRENT base text on the next view.
+    """Drop the cached per-language skins for a product and queue it for a refill from the
+    CURRENT base text.
 
     Call this whenever the base name/description changes. The stored translations are
-    DERIVED text — machine-translated (or fetched) from the base at first view — and go
-    stale silently otherwise: a manager rewrites a description, but the postcard keeps
-    serving the old wording because ``ensure_description`` returns the first stored hit
-    forever. Clearing the rows is cheap (they refill on demand, only for the languages
-    actually viewed) and needs no schema change. Returns the number of rows cleared."""
+    DERIVED text — machine-translated (or fetched) from the base — and go stale silently
+    otherwise: a manager rewrites a description, but the postcard keeps serving the old
+    wording because a stored skin is served as-is forever. Clearing the rows is cheap (the
+    worker refills them in the background) and needs no schema change. Returns the number of
+    rows cleared."""
     res = await db.execute(
         delete(ProductTranslationModel).where(ProductTranslationModel.product_id == product_id)
     )
     await db.commit()
+    for key in [k for k in _failed if k[0] == product_id]:
+        del _failed[key]
+    enqueue(product_id)
     return res.rowcount or 0
 
 
-async def ensure_description(db, product, lang: str) -> dict:
-    """Best description for `lang`, filling `product_translations` on demand.
+# ---- work queue + single-flight -------------------------------------------------------------
 
-    Order: stored row → Tamar native fetch → machine-translate the base → raw base/EN fallback.
-    Returns ``{lang, description, name, provenance, fallback?}``."""
-    lang = _norm(lang)
-    rows = (await db.execute(
-        select(ProductTranslationModel).where(ProductTranslationModel.product_id == product.id)
-    )).scalars().all()
-    existing = {t.lang: t for t in rows}
+_inflight: dict[tuple, asyncio.Future] = {}     # (product_id, lang) → the fill everyone awaits
+_wanted: dict = {}                             # product ids to fill first, oldest first
+_failed: dict[tuple, float] = {}               # (product_id, lang) → monotonic time it came up empty
+_cursor = None                                 # the catalogue walk's last product id
+_wake = asyncio.Event()
 
-    hit = existing.get(lang)
-    if hit and (hit.description or "").strip():
-        return {"lang": lang, "description": hit.description, "name": hit.name,
-                "provenance": hit.provenance}
 
-    base = (product.description or "").strip()
-    # HONEST source language (BL-CAT): source_lang lies 'en' all over the catalogue. A confident
-    # German smell overrides that lie; a stored value is used only if we have no counter-signal;
-    # else we assume 'en' but treat it as UNVERIFIED (never mint an authoritative skin from it).
+def enqueue(product_id) -> None:
+    """Ask the worker to fill this product's missing skins next."""
+    _wanted[product_id] = None
+    _wake.set()
+
+
+async def wait_for_work(timeout: float) -> None:
+    """The worker's nap: until something is enqueued, or `timeout` seconds."""
+    try:
+        await asyncio.wait_for(_wake.wait(), timeout)
+    except asyncio.TimeoutError:
+        pass
+    _wake.clear()
+
+
+def _claim(key) -> asyncio.Future | None:
+    """Register the fill of `key`; None when someone else's is already in flight."""
+    if key in _inflight:
+        return None
+    fut = _inflight[key] = asyncio.get_running_loop().create_future()
+    return fut
+
+
+def _settle(key, fut: asyncio.Future, result=None, exc: BaseException | None = None) -> None:
+    _inflight.pop(key, None)
+    if fut.done():
+        return
+    if exc is not None:
+        fut.set_exception(exc)
+        fut.exception()                  # retrieved: waiters (if any) re-raise it themselves
+    elif result is not None:
+        fut.set_result(result)
+    else:
+        fut.cancel()
+
+
+# ---- filling ----------------------------------------------------------------------------------
+
+def _source_lang(product) -> tuple[str, bool, str | None]:
+    """(true source language, verified?, guessed) of the base description.
+
+    HONEST source language (BL-CAT): source_lang lies 'en' all over the catalogue. A confident
+    German smell overrides that lie; a stored value is used only if we have no counter-signal;
+    else we assume 'en' but treat it as UNVERIFIED (never mint an authoritative skin from it)."""
     stored_src = _norm(product.source_lang) if (product.source_lang or "").strip() else None
-    guessed = _guess_base_lang(base)
-    true_src = guessed or stored_src or "en"
-    source_verified = bool(guessed) or (stored_src is not None)
+    guessed = _guess_base_lang((product.description or "").strip())
+    return guessed or stored_src or "en", bool(guessed) or (stored_src is not None), guessed
+
+
+def _heal_source_lang(product) -> None:
     # Self-heal the lie: base is clearly German but stored en/null → correct source_lang for next time.
-    if guessed == "de" and stored_src != "de":
+    if _source_lang(product)[2] == "de" and _norm(product.source_lang) != "de":
         product.source_lang = "de"
 
+
+def _base_fallback(product, lang: str) -> dict:
+    return {"lang": lang, "description": product.description, "name": product.name,
+            "provenance": "base", "fallback": True}
+
+
+def _out(lang: str, row) -> dict:
+    return {"lang": lang, "description": row.description, "name": row.name, "provenance": row.provenance}
+
+
+async def _skins(db, product_id) -> dict:
+    rows = (await db.execute(
+        select(ProductTranslationModel).where(ProductTranslationModel.product_id == product_id)
+    )).scalars().all()
+    return {t.lang: t for t in rows}
+
+
+def _save(db, product, lang: str, hit, name, desc, provenance, needs_review) -> dict:
+    if hit:
+        hit.description = desc
+        hit.name = name or hit.name
+        hit.provenance = provenance
+        hit.needs_review = needs_review
+    else:
+        db.add(ProductTranslationModel(
+            product_id=product.id, lang=lang, name=name, description=desc,
+            provenance=provenance, needs_review=needs_review))
+    return {"lang": lang, "description": desc, "name": name, "provenance": provenance}
+
+
+async def _insert_new(db, rows: list[dict]) -> set[tuple]:
+    """Store new skins in one INSERT that skips any (product, lang) another process stored first —
+    theirs stands, and the rest of the rows still land. Returns the keys actually inserted."""
+    if db.get_bind().dialect.name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert
+    stmt = (insert(ProductTranslationModel).values(rows)
+            .on_conflict_do_nothing(index_elements=["product_id", "lang"])
+            .returning(ProductTranslationModel.product_id, ProductTranslationModel.lang))
+    return {tuple(r) for r in (await db.execute(stmt)).all()}
+
+
+async def _fill(db, product, lang: str, hit) -> dict:
+    """Stored-miss path of ensure_description: Tamar native fetch → base / machine-translate."""
+    base = (product.description or "").strip()
+    true_src, source_verified, _ = _source_lang(product)
+    _heal_source_lang(product)
+
     name = desc = None
     provenance = "machine"
     needs_review = True
 
     if is_tamar_product(product):
-        async with httpx.AsyncClient() as client:
-            name, desc = await _fetch_tamar(client, product.source_url, lang)
+        name, desc = await _fetch_tamar(_http(), product.source_url, lang)
         if desc:
             provenance, needs_review = "source", False   # native per-language fetch is authoritative
 
@@ -186,18 +362,193 @@ async def ensure_description(db, product, lang: str) -> dict:
             provenance, needs_review = "machine", True
 
     if desc:
-        if hit:
-            hit.description = desc
-            hit.name = name or hit.name
-            hit.provenance = provenance
-            hit.needs_review = needs_review
-        else:
-            db.add(ProductTranslationModel(
-                product_id=product.id, lang=lang, name=name, description=desc,
-                provenance=provenance, needs_review=needs_review))
+        out = _save(db, product, lang, hit, name, desc, provenance, needs_review)
         await db.commit()
-        return {"lang": lang, "description": desc, "name": name, "provenance": provenance}
+        return out
 
     # Nothing to fill from — hand back the raw base so the UI still shows *something*.
-    return {"lang": lang, "description": product.description, "name": product.name,
-            "provenance": "base", "fallback": True}
+    return _base_fallback(product, lang)
+
+
+async def ensure_description(db, product, lang: str) -> dict:
+    """Best description for `lang`, filling `product_translations` now if it's missing (BLOCKING:
+    may fetch a page or call the model — views use `describe`).
+
+    Order: stored row → Tamar native fetch → machine-translate the base → raw base/EN fallback.
+    A fill of the same (product, lang) already in flight is awaited, not repeated.
+    Returns ``{lang, description, name, provenance, fallback?}``."""
+    lang = _norm(lang)
+    hit = (await _skins(db, product.id)).get(lang)
+    if hit and (hit.description or "").strip():
+        return _out(lang, hit)
+
+    key = (product.id, lang)
+    fut = _claim(key)
+    if fut is None:
+        return await asyncio.shield(_inflight[key])
+    try:
+        result = await _fill(db, product, lang, hit)
+    except BaseException as e:
+        _settle(key, fut, exc=e)
+        raise
+    _settle(key, fut, result)
+    return result
+
+
+async def describe(db, product, lang: str) -> dict:
+    """The description a VIEW shows for `lang` — never waits on a model or a page fetch.
+
+    A stored skin is served; a skin that IS the base text (the base's own language, nothing to
+    fetch) is filled on the spot; anything else is queued for the worker and the view gets the
+    English skin, else the raw base, meanwhile (``pending: True``)."""
+    lang = _norm(lang)
+    skins = await _skins(db, product.id)
+    hit = skins.get(lang)
+    if hit and (hit.description or "").strip():
+        return _out(lang, hit)
+
+    base = (product.description or "").strip()
+    if base and not is_tamar_product(product) and lang == _source_lang(product)[0]:
+        return await ensure_description(db, product, lang)
+
+    enqueue(product.id)
+    en = skins.get("en")
+    if en and (en.description or "").strip():
+        return {**_out("en", en), "lang": lang, "fallback": True, "pending": True}
+    return {**_base_fallback(product, lang), "pending": True}
+
+
+async def _candidates(db) -> list:
+    """Up to PREFILL_PRODUCTS products to work on: the queued ones, then the catalogue walk."""
+    global _cursor
+    ids = list(_wanted)[:PREFILL_PRODUCTS]
+    for pid in ids:
+        del _wanted[pid]
+    products = list((await db.execute(select(ProductModel).where(ProductModel.id.in_(ids)))).scalars().all()) \
+        if ids else []
+
+    room = PREFILL_PRODUCTS - len(products)
+    if room > 0:
+        fillable = or_(and_(ProductModel.description.isnot(None), ProductModel.description != ""),
+                       ProductModel.source_url.isnot(None))
+        langs = {_norm(lang) for lang in TARGET_LANGS}
+        have = (select(func.count()).where(
+            ProductTranslationModel.product_id == ProductModel.id, ProductTranslationModel.lang.in_(langs),
+            ProductTranslationModel.description.isnot(None), ProductTranslationModel.description != "")
+            .scalar_subquery())
+        q = (select(ProductModel).where(ProductModel.is_active.is_(True), fillable, have < len(langs))
+             .order_by(ProductModel.id).limit(room))
+        if _cursor is not None:
+            q = q.where(ProductModel.id > _cursor)
+        walked = (await db.execute(q)).scalars().all()
+        _cursor = walked[-1].id if len(walked) == room else None     # wrap around at the end
+        seen = {p.id for p in products}
+        products += [p for p in walked if p.id not in seen]
+    return products
+
+
+async def prefill(db) -> dict:
+    """One worker pass: fill the missing TARGET_LANGS skins of up to PREFILL_PRODUCTS products.
+
+    Tamar skins are fetched (bounded concurrency, shared client); base-language skins come from the
+    base; the rest are machine-translated in batches of PREFILL_BATCH per source→target pair. A
+    skin that comes up empty is not retried for RETRY_AFTER_S. New skins go in with one INSERT … ON
+    CONFLICT DO NOTHING: one another process stored meanwhile is kept (and handed to our waiters,
+    not counted as ours), the rest of the pass still commits. Returns counts for the loop, and
+    `more` while the queue or the catalogue walk has products left."""
+    now = time.monotonic()
+    products = await _candidates(db)
+    skins = {}
+    if products:
+        rows = (await db.execute(select(ProductTranslationModel).where(
+            ProductTranslationModel.product_id.in_([p.id for p in products])))).scalars().all()
+        for t in rows:
+            skins.setdefault(t.product_id, {})[t.lang] = t
+
+    claimed: dict[tuple, tuple] = {}          # key → (product, lang, hit, future)
+    for p in products:
+        have = skins.get(p.id, {})
+        for lang in TARGET_LANGS:
+            lang = _norm(lang)
+            key = (p.id, lang)
+            hit = have.get(lang)
+            if (hit and (hit.description or "").strip()) or now - _failed.get(key, -RETRY_AFTER_S) < RETRY_AFTER_S:
+                continue
+            fut = _claim(key)
+            if fut is not None:
+                claimed[key] = (p, lang, hit, fut)
+    more = bool(_wanted) or _cursor is not None
+    if not claimed:
+        return {"products": 0, "filled": 0, "failed": 0, "more": more}
+
+    filled: dict[tuple, tuple] = {}           # key → (name, desc, provenance, needs_review)
+    try:
+        sem = asyncio.Semaphore(_TAMAR_CONCURRENCY)
+
+        async def _tamar(key, p, lang):
+            async with sem:
+                name, desc = await _fetch_tamar(_http(), p.source_url, lang)
+            if desc:
+                filled[key] = (name, desc, "source", False)
+
+        await asyncio.gather(*(_tamar(k, p, lang) for k, (p, lang, _, _) in claimed.items()
+                               if is_tamar_product(p)))
+
+        groups: dict[tuple, list] = {}        # (src, tgt) → [(key, base text)]
+        for key, (p, lang, _, _) in claimed.items():
+            base = (p.description or "").strip()
+            if key in filled or not base:
+                continue
+            true_src, verified, _ = _source_lang(p)
+            if lang == true_src:
+                filled[key] = (None, base, "source", not verified)
+            else:
+                groups.setdefault((true_src, lang), []).append((key, base))
+
+        async def _machine(src, tgt, items):
+            for i in range(0, len(items), PREFILL_BATCH):
+                chunk = items[i:i + PREFILL_BATCH]
+                texts = await _translate_batch([b for _, b in chunk], tgt, src)
+                for (key, _), text in zip(chunk, texts):
+                    if text:
+                        filled[key] = (None, text, "machine", True)
+
+        await asyncio.gather(*(_machine(src, tgt, items) for (src, tgt), items in groups.items()))
+
+        results, new, lost = {}, [], set()
+        for key, (p, lang, hit, _) in claimed.items():
+            _heal_source_lang(p)
+            if key not in filled:
+                _failed[key] = now
+                results[key] = _base_fallback(p, lang)
+            elif hit:
+                results[key] = _save(db, p, lang, hit, *filled[key])
+            else:
+                name, desc, provenance, needs_review = filled[key]
+                new.append({"product_id": p.id, "lang": lang, "name": name, "description": desc,
+                            "provenance": provenance, "needs_review": needs_review})
+                results[key] = {"lang": lang, "description": desc, "name": name, "provenance": provenance}
+        if new:
+            lost = {(r["product_id"], r["lang"]) for r in new} - await _insert_new(db, new)
+            if lost:                          # stored by someone else meanwhile: serve theirs
+                theirs = (await db.execute(select(ProductTranslationModel).where(
+                    ProductTranslationModel.product_id.in_({pid for pid, _ in lost})))).scalars().all()
+                for t in theirs:
+                    if (t.product_id, t.lang) in lost:
+                        results[(t.product_id, t.lang)] = _out(t.lang, t)
+                for key in lost:
+                    del filled[key]
+        await db.commit()
+    except BaseException as e:
+        for key, (*_, fut) in claimed.items():
+            _settle(key, fut, exc=e)
+        raise
+    for key, (*_, fut) in claimed.items():
+        _settle(key, fut, results[key])
+    for key in filled:
+        _failed.pop(key, None)
+    done = len({k[0] for k in claimed})
+    empty = len(claimed) - len(filled) - len(lost)
+    log.info("translation prefill: %d skin(s) filled, %d empty, %d stored elsewhere, over %d product(s)",
+             len(filled), empty, len(lost), done)
+    return {"products": done, "filled": len(filled), "failed": empty, "more": more}
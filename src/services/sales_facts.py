@@ -0,0 +1,279 @@
+"""Sales facts — the line items as a range report wants them (db/models/sales_fact_model.py).
+
+The product / category reports used to pull every completed sale id of the range into Python and
+bind them all back as `transaction_id IN (...)`. The facts carry the day, product, name, category,
+cashier, customer and VAT snapshot on the row, so a report is one range scan on
+(business_date, product_id | category) — any range, a fixed handful of parameters.
+
+Write side (called by the routes next to the sales_rollup calls, before their commit):
+  record_sale(db, txn, rate_table, lines)   a sale just COMPLETED (legacy checkout, atomic /sales)
+  record_refund(db, txn)                    after a refund: a full refund appends the negated rows
+Neither ever raises — a sale must not fail for its report row: the rows are written (flushed) in
+a savepoint, so a failed write rolls back alone and the sale commits without them. A sale left
+without facts (a failed write, a path that doesn't record, history from before the table) is
+picked up by `backfill`, which the boot seeders and the hourly rollup tick run.
+
+Read side: `product_totals` and `sold_lines` net refunds out per line (a refunded line's sale +
+refund rows cancel), so they report exactly the COMPLETED sales' lines, giveaways excluded — the
+figures the reports have always shown. `write_export` streams the raw append-only log for offline
+work into a file, batch by batch (Parquet via pyarrow when installed, CSV always).
+"""
+import csv
+import io
+import logging
+from datetime import date
+from decimal import Decimal
+from typing import Optional
+
+from sqlalchemy import case, func, select
+
+from src.db.models import LineItemModel, ProductModel, SalesFactModel, TransactionModel, TransactionStatus
+from src.services.sales_rollup import business_day
+
+logger = logging.getLogger(__name__)
+
+CHUNK = 500     # sales per backfill batch (one commit each)
+EXPORT_BATCH = 5000   # rows per export batch (one Parquet row group / one CSV write)
+
+# Copied verbatim from a sale row onto its refund row — the columns the net-line grouping pairs on.
+_LINE_KEY = ("business_date", "sold_at", "transaction_id", "transaction_number", "line_no", "cashier_id",
+             "customer_id", "product_id", "name", "category", "vat_rate", "vat_code", "consumption",
+             "is_giveaway", "unit_cost")
+
+EXPORT_COLUMNS = ("business_date", "sold_at", "kind", "transaction_number", "line_no", "product_id", "name",
+                  "category", "cashier_id", "customer_id", "quantity", "revenue", "vat_amount", "vat_rate",
+                  "vat_code", "consumption", "is_giveaway", "unit_cost")
+
+
+def _vat_code(rate, rate_table) -> Optional[str]:
+    """The rate table's code for a line's snapshotted rate — same bucketing as split_vat: the first
+    entry with that rate, else (unmatched / NULL rate) the default entry."""
+    if not rate_table:
+        return None
+    default = next((e for e in rate_table if e.get("default")), rate_table[0])["code"]
+    if rate is None:
+        return default
+    r = Decimal(str(rate))
+    return next((e["code"] for e in rate_table if Decimal(str(e["rate"])) == r), default)
+
+
+async def _products(db, ids) -> dict:
+    ids = {i for i in ids if i}
+    if not ids:
+        return {}
+    rows = (await db.execute(select(ProductModel.id, ProductModel.name, ProductModel.category, ProductModel.cost)
+                             .where(ProductModel.id.in_(ids)))).all()
+    return {r.id: r for r in rows}
+
+
+def _rows(txn, lines, products: dict, rate_table) -> list[dict]:
+    day = business_day(txn.completed_at)
+    out = []
+    for i, ln in enumerate(lines):
+        p = products.get(ln.product_id)
+        out.append({
+            "business_date": day, "sold_at": txn.completed_at, "kind": "sale",
+            "transaction_id": txn.id, "transaction_number": txn.transaction_number, "line_no": i,
+            "cashier_id": txn.cashier_id, "customer_id": txn.customer_id,
+            "product_id": ln.product_id,
+            "name": (p.name if p else None) or ln.notes or "Item",
+            "category": (p.category if p else None) or "Uncategorized",
+            "quantity": int(ln.quantity or 0),
+            "revenue": Decimal(str(ln.line_total or 0)),
+            "vat_amount": Decimal(str(ln.vat_amount or 0)),
+            "vat_rate": ln.vat_rate, "vat_code": _vat_code(ln.vat_rate, rate_table),
+            "consumption": ln.consumption or "dine_in",
+            "is_giveaway": bool(ln.is_giveaway),
+            "unit_cost": p.cost if p else None,
+        })
+    return out
+
+
+async def _lines_of(db, txn_ids) -> dict:
+    rows = (await db.execute(select(LineItemModel).where(LineItemModel.transaction_id.in_(txn_ids))
+                             .order_by(LineItemModel.created_at, LineItemModel.id))).scalars().all()
+    by_txn: dict = {}
+    for ln in rows:
+        by_txn.setdefault(ln.transaction_id, []).append(ln)
+    return by_txn
+
+
+async def record_sale(db, txn, rate_table, lines: Optional[list] = None) -> None:
+    """Append a just-COMPLETED sale's lines, in the caller's transaction (commit is theirs).
+    `lines` = the in-memory LineItemModels when the caller hasn't flushed them (atomic /sales)."""
+    try:
+        async with db.begin_nested():
+            if lines is None:
+                lines = (await _lines_of(db, [txn.id])).get(txn.id, [])
+            products = await _products(db, [ln.product_id for ln in lines])
+            db.add_all([SalesFactModel(**r) for r in _rows(txn, lines, products, rate_table)])
+            await db.flush()
+    except Exception:
+        logger.warning(f"sales facts: could not record {txn.transaction_number}; backfill will",
+                       exc_info=True)
+
+
+async def record_refund(db, txn) -> None:
+    """A full refund reverses the sale's rows on the sale's own day. A partial refund keeps the
+    sale COMPLETED with its lines as rung — nothing to append. A sale with no facts yet has nothing
+    to reverse (and, being REFUNDED, is never backfilled)."""
+    if txn.status != TransactionStatus.REFUNDED:
+        return
+    try:
+        async with db.begin_nested():
+            sold = (await db.execute(select(SalesFactModel).where(
+                SalesFactModel.transaction_id == txn.id, SalesFactModel.kind == "sale"))).scalars().all()
+            db.add_all([SalesFactModel(
+                **{k: getattr(f, k) for k in _LINE_KEY}, kind="refund",
+                quantity=-f.quantity, revenue=-f.revenue, vat_amount=-f.vat_amount) for f in sold])
+            await db.flush()
+    except Exception:
+        logger.warning(f"sales facts: could not reverse {txn.transaction_number}", exc_info=True)
+
+
+async def backfill(db) -> dict:
+    """Facts for every COMPLETED sale that has none, CHUNK sales per commit. Resumable and a cheap
+    no-op once caught up (one anti-join on the transaction_id index)."""
+    from src.services.tenant_settings import tenant_settings
+
+    rate_table = (await tenant_settings.get(db)).rate_table
+    has_facts = select(SalesFactModel.id).where(SalesFactModel.transaction_id == TransactionModel.id).exists()
+    done, after = 0, None
+    while True:
+        q = (select(TransactionModel)
+             .where(TransactionModel.status == TransactionStatus.COMPLETED,
+                    TransactionModel.completed_at.isnot(None), ~has_facts)
+             .order_by(TransactionModel.id).limit(CHUNK))
+        if after is not None:
+            q = q.where(TransactionModel.id > after)      # a sale with no lines never gets a row
+        txns = (await db.execute(q)).scalars().all()
+        if not txns:
+            break
+        lines = await _lines_of(db, [t.id for t in txns])
+        products = await _products(db, [ln.product_id for ls in lines.values() for ln in ls])
+        for t in txns:
+            db.add_all([SalesFactModel(**r) for r in _rows(t, lines.get(t.id, []), products, rate_table)])
+        await db.commit()
+        done += len(txns)
+        after = txns[-1].id
+    if done:
+        logger.info(f"sales facts: backfilled {done} sale(s)")
+    return {"backfilled": done}
+
+
+def _net_lines(d_from: date, d_to: date, *conds):
+    """Sold lines in the day range, giveaways out, with refunded lines netted away."""
+    F = SalesFactModel
+    key = (F.transaction_id, F.line_no, F.transaction_number, F.sold_at, F.cashier_id, F.customer_id,
+           F.product_id, F.name, F.category)
+    return (select(*key, func.sum(F.quantity).label("qty"), func.sum(F.revenue).label("revenue"),
+                   func.sum(F.vat_amount).label("vat"))
+            .where(F.business_date >= d_from, F.business_date <= d_to, F.is_giveaway.is_(False), *conds)
+            .group_by(*key)
+            .having(func.sum(case((F.kind == "refund", -1), else_=1)) > 0))
+
+
+async def product_totals(db, d_from: date, d_to: date) -> list:
+    """Per product (custom lines per name): qty, revenue, VAT, sales count — revenue first. A
+    product renamed / recategorised inside the range stays one row, under one of its snapshots."""
+    n = _net_lines(d_from, d_to).subquery("n")
+    custom_name = case((n.c.product_id.is_(None), n.c.name), else_=None)
+    return (await db.execute(
+        select(n.c.product_id, func.max(n.c.name).label("name"), func.max(n.c.category).label("category"),
+               func.sum(n.c.qty).label("qty"), func.sum(n.c.revenue).label("revenue"),
+               func.coalesce(func.sum(n.c.vat), 0).label("vat"),
+               func.count(func.distinct(n.c.transaction_id)).label("txns"))
+        .group_by(n.c.product_id, custom_name)
+        .order_by(func.sum(n.c.revenue).desc()))).all()
+
+
+async def sold_lines(db, d_from: date, d_to: date, *, product_id=None, category: Optional[str] = None) -> list:
+    """The individual sold lines of one product or one category, newest first (the drill)."""
+    F = SalesFactModel
+    conds = []
+    if product_id is not None:
+        conds.append(F.product_id == product_id)
+    if category is not None:
+        conds.append(F.category == category)
+    n = _net_lines(d_from, d_to, *conds).subquery("n")
+    return (await db.execute(select(n).order_by(n.c.sold_at.desc()))).all()
+
+
+async def export_batches(db, d_from: date, d_to: date, size: int = EXPORT_BATCH):
+    """The raw log of the range, `size` rows at a time off a server-side cursor — never the whole
+    range in memory."""
+    F = SalesFactModel
+    result = await db.stream(
+        select(*(getattr(F, c) for c in EXPORT_COLUMNS))
+        .where(F.business_date >= d_from, F.business_date <= d_to)
+        .order_by(F.business_date, F.id)
+        .execution_options(yield_per=size))
+    async for rows in result.partitions(size):
+        yield rows
+
+
+def _plain(v):
+    if isinstance(v, Decimal):
+        return float(v)
+    if v is None or isinstance(v, (int, float, bool, str)):
+        return v
+    return str(v)          # UUIDs; dates / datetimes keep their type for Arrow below
+
+
+def _arrow_schema():
+    import pyarrow as pa
+
+    text = ("kind", "transaction_number", "product_id", "name", "category", "cashier_id", "customer_id",
+            "vat_code", "consumption")
+    types = {"business_date": pa.date32(), "sold_at": pa.timestamp("us", tz="UTC"),
+             "line_no": pa.int32(), "quantity": pa.int32(), "is_giveaway": pa.bool_(),
+             **{c: pa.string() for c in text}}
+    # An explicit schema: a batch whose column is all NULL must not decide that column's type.
+    return pa.schema([(c, types.get(c, pa.float64())) for c in EXPORT_COLUMNS])
+
+
+def _parquet_part(writer, rows, schema) -> None:
+    import pyarrow as pa
+
+    cols = {c: [] for c in EXPORT_COLUMNS}
+    for r in rows:
+        for c, v in zip(EXPORT_COLUMNS, r):
+            cols[c].append(v if c in ("business_date", "sold_at") else _plain(v))
+    writer.write_table(pa.Table.from_pydict(cols, schema=schema))
+
+
+def _csv_part(out, rows, header: bool = False) -> None:
+    buf = io.StringIO()
+    w = csv.writer(buf)
+    if header:
+        w.writerow(EXPORT_COLUMNS)
+    for r in rows:
+        w.writerow(["" if v is None else (v.isoformat() if hasattr(v, "isoformat") else v) for v in r])
+    out.write(buf.getvalue().encode())
+
+
+async def write_export(db, d_from: date, d_to: date, fmt: str, out) -> int:
+    """Write the range to the binary file `out` as Parquet (pyarrow; one zstd row group per batch —
+    ImportError before any query when it isn't installed) or CSV, one EXPORT_BATCH at a time.
+    Encoding and writing run in a thread. Returns the number of rows written."""
+    import asyncio
+
+    writer = None
+    if fmt == "parquet":
+        import pyarrow.parquet as pq
+        schema = _arrow_schema()
+        writer = pq.ParquetWriter(out, schema, compression="zstd")
+    n = 0
+    try:
+        async for rows in export_batches(db, d_from, d_to):
+            if writer is not None:
+                await asyncio.to_thread(_parquet_part, writer, rows, schema)
+            else:
+                await asyncio.to_thread(_csv_part, out, rows, n == 0)
+            n += len(rows)
+        if writer is None and n == 0:
+            _csv_part(out, (), header=True)
+    finally:
+        if writer is not None:
+            writer.close()                  # the footer: a Parquet file is only readable after this
+    return n
@@ -0,0 +1,353 @@
+"""Running daily-sales rollup — the Z-report kept up to date instead of recomputed.
+
+The daily summary used to load every completed sale of the day, sum the payment buckets in seven
+passes, run three line-item queries and re-split VAT per sale — and the status-bar pulse did all of
+that again on every refresh. Now each sale folds its contribution into a `daily_sales_rollups` row
+(one per shop-local day x cashier) inside the sale's OWN DB transaction, and the readers sum a few
+rows.
+
+Write side (called by the routes just before their commit):
+  record_sale(db, txn, ...)       a sale just COMPLETED (legacy checkout, atomic /sales)
+  booked(db, txn, ...)            the sale as booked, taken BEFORE a refund mutates it
+  record_refund(db, txn, before)  swap that contribution for the post-refund one
+
+Consistency rules:
+  • A day with ANY rollup row is authoritative. A day with none (history from before the rollup
+    shipped) is summarized straight from the raw lines by the SAME builder, so it never reads empty.
+  • The first write of a day seeds it from the raw lines first — a mid-day deploy or a refund on an
+    old day can't leave a half-counted rollup.
+  • Writers for one day are serialized by a transaction-scoped advisory lock (Postgres), so two
+    tills closing sales at once can't lose an update or race the seed.
+  • If folding a sale fails, the day's rows are dropped rather than left short: the day falls back
+    to raw lines until the reconcile job (`reconcile_day`) rebuilds it. The fold runs in a SAVEPOINT,
+    so a failed statement only rolls that back — the sale's own transaction stays usable for the
+    drop and its commit.
+"""
+import logging
+import os
+from collections import defaultdict
+from dataclasses import dataclass
+from datetime import date, datetime, timezone
+from decimal import Decimal, ROUND_HALF_UP
+from typing import Optional
+from uuid import UUID
+from zoneinfo import ZoneInfo
+
+from sqlalchemy import and_, delete, select, text
+
+from src.db.models import LineItemModel, ProductModel, TransactionModel, TransactionStatus
+from src.db.models.sales_rollup_model import DailySalesRollupModel
+from src.services.vat_resolver import split_vat
+
+logger = logging.getLogger(__name__)
+
+SHOP_TZ = ZoneInfo(os.environ.get("HX_SHOP_TZ", "Europe/Zurich"))
+CENTS = Decimal("0.01")
+_VAT_SCALARS = ("turnover_standard", "vat_standard", "turnover_reduced", "vat_reduced")
+
+
+@dataclass(frozen=True)
+class _Line:
+    product_id: Optional[UUID]
+    quantity: int
+    line_total: object
+    vat_rate: object
+    is_giveaway: bool
+    notes: Optional[str]
+    cost: object
+
+
+def _d(v) -> Decimal:
+    return Decimal(str(v or 0))
+
+
+def _money(v) -> str:
+    return str(_d(v).quantize(CENTS, rounding=ROUND_HALF_UP))
+
+
+def _local(ts: datetime) -> datetime:
+    # SQLite hands back naive datetimes; every stored timestamp is UTC.
+    return (ts if ts.tzinfo else ts.replace(tzinfo=timezone.utc)).astimezone(SHOP_TZ)
+
+
+def business_day(ts: Optional[datetime]) -> date:
+    """The shop-local calendar day a sale belongs to (same window the daily summary uses)."""
+    return _local(ts or datetime.now(timezone.utc)).date()
+
+
+def _day_window(day: date) -> tuple[datetime, datetime]:
+    return (datetime.combine(day, datetime.min.time(), tzinfo=SHOP_TZ),
+            datetime.combine(day, datetime.max.time(), tzinfo=SHOP_TZ))
+
+
+def _empty() -> dict:
+    return {"txn_count": 0, "total_sales": Decimal("0"), "vat_total": Decimal("0"),
+            "giveaway_count": 0, "giveaway_cost": Decimal("0"),
+            "payments": {}, "vat": {"streams": {}}, "products": {}, "hours": {}}
+
+
+def contribution(txn, lines: list[_Line], rate_table) -> dict:
+    """One completed sale as a rollup delta (pure). The figures are exactly the ones the daily
+    summary has always reported for it: total/tax as booked, per-line VAT streams via split_vat,
+    giveaway units + cost, non-giveaway units per product, and the shop-local completion hour."""
+    c = _empty()
+    c["txn_count"] = 1
+    c["total_sales"] = _d(txn.total)
+    c["vat_total"] = _d(txn.tax_amount)
+    if txn.payment_method is not None:
+        c["payments"][txn.payment_method.name] = _d(txn.total)
+    if lines:
+        sp = split_vat([(ln.vat_rate, ln.line_total) for ln in lines], txn.total, txn.subtotal,
+                       rate_table=rate_table)
+        c["vat"] = {k: sp[k] for k in _VAT_SCALARS}
+        c["vat"]["streams"] = {code: dict(st) for code, st in sp["vat_streams"].items()}
+    for ln in lines:
+        qty = int(ln.quantity or 0)
+        if ln.is_giveaway:
+            c["giveaway_count"] += qty
+            c["giveaway_cost"] += _d(ln.cost) * qty
+        else:
+            key = str(ln.product_id) if ln.product_id else "~" + (ln.notes or "Item")
+            c["products"][key] = c["products"].get(key, 0) + qty
+    if txn.completed_at:
+        c["hours"][f"{_local(txn.completed_at).hour:02d}"] = 1
+    return c
+
+
+def _fold(acc: dict, c: dict, sign: int = 1) -> dict:
+    """acc + sign*c, as a NEW dict (nothing is mutated, so a failure half-way changes nothing).
+    Keys whose count/amount returns to zero are dropped so a refunded-away bucket vanishes."""
+    out = {k: acc[k] + sign * c[k] for k in ("txn_count", "total_sales", "vat_total",
+                                             "giveaway_count", "giveaway_cost")}
+    for k in ("payments", "products", "hours"):
+        m = dict(acc[k])
+        for key, v in c[k].items():
+            m[key] = m.get(key, 0) + sign * v
+            if not m[key]:
+                del m[key]
+        out[k] = m
+    vat = {k: _d(acc["vat"].get(k)) + sign * _d(c["vat"].get(k)) for k in _VAT_SCALARS}
+    streams = {code: dict(st) for code, st in acc["vat"].get("streams", {}).items()}
+    for code, st in c["vat"].get("streams", {}).items():
+        cur = streams.setdefault(code, {"code": code, "label": st["label"], "rate": st["rate"],
+                                        "turnover": Decimal("0"), "vat": Decimal("0")})
+        cur["turnover"] = _d(cur["turnover"]) + sign * _d(st["turnover"])
+        cur["vat"] = _d(cur["vat"]) + sign * _d(st["vat"])
+    vat["streams"] = streams
+    out["vat"] = vat
+    return out
+
+
+def combine(aggs) -> dict:
+    """Sum several aggregates (e.g. every cashier's row of a day) into one."""
+    acc = _empty()
+    for a in aggs:
+        acc = _fold(acc, a)
+    return acc
+
+
+def _from_row(row: DailySalesRollupModel) -> dict:
+    vat = dict(row.vat or {})
+    return {
+        "txn_count": row.txn_count or 0, "total_sales": _d(row.total_sales), "vat_total": _d(row.vat_total),
+        "giveaway_count": row.giveaway_count or 0, "giveaway_cost": _d(row.giveaway_cost),
+        "payments": {k: _d(v) for k, v in (row.payments or {}).items()},
+        "vat": {**{k: _d(vat.get(k)) for k in _VAT_SCALARS},
+                "streams": {code: {**st, "rate": _d(st.get("rate")), "turnover": _d(st.get("turnover")),
+                                   "vat": _d(st.get("vat"))}
+                            for code, st in (vat.get("streams") or {}).items()}},
+        "products": dict(row.products or {}), "hours": dict(row.hours or {}),
+    }
+
+
+def _to_row(row: DailySalesRollupModel, agg: dict) -> None:
+    row.txn_count = agg["txn_count"]
+    row.total_sales = _d(agg["total_sales"]).quantize(CENTS, rounding=ROUND_HALF_UP)
+    row.vat_total = _d(agg["vat_total"]).quantize(CENTS, rounding=ROUND_HALF_UP)
+    row.giveaway_count = agg["giveaway_count"]
+    row.giveaway_cost = _d(agg["giveaway_cost"]).quantize(CENTS, rounding=ROUND_HALF_UP)
+    row.payments = {k: _money(v) for k, v in agg["payments"].items()}
+    row.vat = {**{k: _money(agg["vat"].get(k)) for k in _VAT_SCALARS},
+               "streams": {code: {"code": code, "label": st["label"], "rate": str(st["rate"]),
+                                  "turnover": _money(st["turnover"]), "vat": _money(st["vat"])}
+                           for code, st in agg["vat"].get("streams", {}).items()}}
+    row.products = dict(agg["products"])
+    row.hours = dict(agg["hours"])
+
+
+async def _lines_for(db, txn_ids) -> dict:
+    """{txn_id: [_Line]} from the stored line items (+ the product's cost for giveaways)."""
+    by_txn: dict = defaultdict(list)
+    if not txn_ids:
+        return by_txn
+    rows = (await db.execute(
+        select(LineItemModel.transaction_id, LineItemModel.product_id, LineItemModel.quantity,
+               LineItemModel.line_total, LineItemModel.vat_rate, LineItemModel.is_giveaway,
+               LineItemModel.notes, ProductModel.cost)
+        .outerjoin(ProductModel, ProductModel.id == LineItemModel.product_id)
+        .where(LineItemModel.transaction_id.in_(txn_ids))
+    )).all()
+    for tid, *rest in rows:
+        by_txn[tid].append(_Line(*rest))
+    return by_txn
+
+
+async def build_day(db, day: date, rate_table, exclude: Optional[UUID] = None) -> dict:
+    """Rebuild a day from the raw sales + lines: {cashier_id: aggregate}. The reference the rollup
+    must always equal — used to seed a day, to summarize a day that has no rollup, and to reconcile."""
+    start, end = _day_window(day)
+    conds = [TransactionModel.status == TransactionStatus.COMPLETED,
+             TransactionModel.completed_at >= start, TransactionModel.completed_at <= end]
+    if exclude is not None:
+        conds.append(TransactionModel.id != exclude)
+    txns = (await db.execute(select(TransactionModel).where(and_(*conds)))).scalars().all()
+    lines = await _lines_for(db, [t.id for t in txns])
+    out: dict = {}
+    for t in txns:
+        out[t.cashier_id] = _fold(out.get(t.cashier_id) or _empty(),
+                                  contribution(t, lines.get(t.id, []), rate_table))
+    return out
+
+
+async def _lock_day(db, day: date) -> None:
+    conn = await db.connection()
+    if conn.dialect.name == "postgresql":
+        await db.execute(text("SELECT pg_advisory_xact_lock(hashtext(:k))"),
+                         {"k": f"daily_sales_rollup:{day.isoformat()}"})
+
+
+async def _day_rows(db, day: date) -> dict:
+    rows = (await db.execute(
+        select(DailySalesRollupModel).where(DailySalesRollupModel.business_date == day)
+        .execution_options(populate_existing=True))).scalars().all()
+    return {r.cashier_id: r for r in rows}
+
+
+async def read_day(db, day: date) -> Optional[dict]:
+    """{cashier_id: aggregate} from the rollup, or None when the day was never rolled up."""
+    rows = await _day_rows(db, day)
+    return {cid: _from_row(r) for cid, r in rows.items()} if rows else None
+
+
+async def _fold_into_day(db, day: date, deltas: list[tuple[UUID, dict, int]], rate_table,
+                         exclude: Optional[UUID]) -> None:
+    await _lock_day(db, day)
+    rows = await _day_rows(db, day)
+    if rows:
+        aggs = {cid: _from_row(r) for cid, r in rows.items()}
+    else:
+        aggs = await build_day(db, day, rate_table, exclude=exclude)
+    for cid, c, sign in deltas:
+        aggs[cid] = _fold(aggs.get(cid) or _empty(), c, sign)
+    # Everything above may fail; nothing below can — the session is only touched once it's all known.
+    for cid, agg in aggs.items():
+        row = rows.get(cid)
+        if row is None:
+            row = DailySalesRollupModel(business_date=day, cashier_id=cid)
+            db.add(row)
+        _to_row(row, agg)
+
+
+async def _give_up_on_day(db, day: date) -> None:
+    logger.warning(f"sales rollup: could not fold into {day}; day falls back to raw lines", exc_info=True)
+    try:
+        await db.execute(delete(DailySalesRollupModel).where(DailySalesRollupModel.business_date == day))
+    except Exception:
+        logger.error(f"sales rollup: could not drop {day} either — run the reconcile", exc_info=True)
+
+
+async def record_sale(db, txn, rate_table, lines: Optional[list] = None) -> None:
+    """Fold a just-COMPLETED sale into its day, in the caller's transaction (commit is theirs).
+    `lines` = the in-memory LineItemModels when the caller hasn't flushed them (atomic /sales)."""
+    day = business_day(txn.completed_at)
+    try:
+        if lines is None:
+            ls = (await _lines_for(db, [txn.id])).get(txn.id, [])
+        else:
+            gift_ids = [ln.product_id for ln in lines if ln.is_giveaway and ln.product_id]
+            costs = dict((await db.execute(
+                select(ProductModel.id, ProductModel.cost).where(ProductModel.id.in_(gift_ids)))).all()
+            ) if gift_ids else {}
+            ls = [_Line(ln.product_id, ln.quantity, ln.line_total, ln.vat_rate, bool(ln.is_giveaway),
+                        ln.notes, costs.get(ln.product_id)) for ln in lines]
+        async with db.begin_nested():
+            await _fold_into_day(db, day, [(txn.cashier_id, contribution(txn, ls, rate_table), 1)],
+                                 rate_table, exclude=txn.id)
+    except Exception:
+        await _give_up_on_day(db, day)
+
+
+async def booked(db, txn, rate_table) -> Optional[dict]:
+    """The sale's contribution as currently booked — take it BEFORE a refund changes the sale."""
+    try:
+        ls = (await _lines_for(db, [txn.id])).get(txn.id, [])
+        return {"lines": ls, "contribution": contribution(txn, ls, rate_table)}
+    except Exception:
+        logger.warning("sales rollup: could not snapshot the booked sale", exc_info=True)
+        return None
+
+
+async def record_refund(db, txn, before: Optional[dict], rate_table) -> None:
+    """Swap a refunded sale's booked contribution for what it is worth now (nothing, if the refund
+    reversed it). The day's seed (if any) is built WITHOUT the sale, then the swap is applied."""
+    day = business_day(txn.completed_at)
+    try:
+        if before is None:
+            raise RuntimeError("no booked snapshot")
+        deltas = [(txn.cashier_id, before["contribution"], -1)]
+        if txn.status == TransactionStatus.COMPLETED:
+            deltas.append((txn.cashier_id, contribution(txn, before["lines"], rate_table), 1))
+        # Seeding without the sale then subtracting its booked value would count it negative — so
+        # the seed leaves it out AND the first delta is dropped; only the post-refund value lands.
+        async with db.begin_nested():
+            await _lock_day(db, day)
+            if not await _day_rows(db, day):
+                deltas = deltas[1:]
+            await _fold_into_day(db, day, deltas, rate_table, exclude=txn.id)
+    except Exception:
+        await _give_up_on_day(db, day)
+
+
+def _comparable(agg: Optional[dict]) -> dict:
+    """An aggregate in a canonical, zero-free, JSON-able form, so stored vs rebuilt compare exactly."""
+    row = DailySalesRollupModel()
+    _to_row(row, agg or _empty())
+    vat = {k: v for k, v in row.vat.items() if k != "streams" and _d(v)}
+    vat["streams"] = {c: st for c, st in row.vat["streams"].items() if _d(st["turnover"]) or _d(st["vat"])}
+    out = {"txn_count": row.txn_count, "total_sales": str(row.total_sales), "vat_total": str(row.vat_total),
+           "giveaway_count": row.giveaway_count, "giveaway_cost": str(row.giveaway_cost),
+           "payments": {k: v for k, v in row.payments.items() if _d(v)},
+           "vat": vat, "products": row.products, "hours": row.hours}
+    return out
+
+
+async def reconcile_day(db, day: date, rate_table, apply: bool = False) -> dict:
+    """Rebuild `day` from raw lines and diff it against the rollup, per cashier. With apply=True the
+    rebuilt figures replace the stored ones (the caller commits). A day that was never rolled up
+    reports its cashiers as missing and, applied, gets its rollup — backfilling history."""
+    if apply:
+        await _lock_day(db, day)
+    rows = await _day_rows(db, day)
+    rebuilt = await build_day(db, day, rate_table)
+    mismatches = {}
+    for cid in set(rows) | set(rebuilt):
+        stored = _comparable(_from_row(rows[cid])) if cid in rows else None
+        fresh = _comparable(rebuilt.get(cid))
+        if stored != fresh:
+            mismatches[str(cid)] = {
+                "stored": stored,
+                "rebuilt": fresh,
+                "fields": sorted(k for k in fresh if stored is None or stored.get(k) != fresh[k]),
+            }
+    if apply and mismatches:
+        for cid, agg in rebuilt.items():
+            row = rows.get(cid)
+            if row is None:
+                row = DailySalesRollupModel(business_date=day, cashier_id=cid)
+                db.add(row)
+            _to_row(row, agg)
+        for cid, row in rows.items():
+            if cid not in rebuilt:
+                _to_row(row, _empty())
+    return {"date": day.isoformat(), "rolled_up": bool(rows), "cashiers": len(set(rows) | set(rebuilt)),
+            "mismatches": mismatches, "applied": bool(apply and mismatches)}
@@ -0,0 +1,50 @@
+"""Boot-time upkeep for the till search documents (`product_search_docs`).
+
+The per-row work is done by the database: `trg_products_search_doc` / `trg_product_images_search_doc`
+(database._DDL_MIGRATIONS) re-derive a product's document on every searchable write, whichever code
+path made it — ORM, raw SQL, catalog import. Two things a row trigger cannot see are handled here:
+
+  • the synonym list (catalog_search_synonyms.SYNONYM_CONCEPTS) lives in Python. When it changes on
+    deploy, `search_synonym_terms` is re-synced and every document's category/name terms re-derived;
+  • products that predate the triggers (first boot after the upgrade) get their document backfilled.
+
+Both are no-ops on a normal boot. Like the additive DDL, a failure here is logged and never blocks
+startup — search just ranks from whatever documents exist.
+"""
+import logging
+
+from sqlalchemy import text
+
+from src.services.catalog_search_synonyms import SYNONYM_CONCEPTS
+
+logger = logging.getLogger(__name__)
+
+
+def synonym_terms() -> list[str]:
+    """Every distinct term of every concept — the vocabulary a document's *_terms are drawn from."""
+    return sorted({t for group in SYNONYM_CONCEPTS for t in group})
+
+
+async def ensure_search_documents() -> None:
+    from src.db.database import async_engine
+
+    terms = synonym_terms()
+    try:
+        async with async_engine.begin() as conn:
+            stored = set((await conn.execute(text("SELECT term FROM search_synonym_terms"))).scalars())
+            if stored != set(terms):
+                await conn.execute(text("DELETE FROM search_synonym_terms"))
+                await conn.execute(text("INSERT INTO search_synonym_terms (term) VALUES (:t)"),
+                                   [{"t": t} for t in terms])
+                n = (await conn.execute(text(
+                    "SELECT count(product_search_doc_refresh(id)) FROM products"))).scalar()
+                logger.info(f"search documents: synonym list changed, re-derived {n} document(s)")
+                return
+            n = (await conn.execute(text("""
+                SELECT count(product_search_doc_refresh(p.id)) FROM products p
+                WHERE NOT EXISTS (SELECT 1 FROM product_search_docs d WHERE d.product_id = p.id)
+            """))).scalar()
+            if n:
+                logger.info(f"search documents: backfilled {n} product(s)")
+    except Exception as e:  # pragma: no cover - defensive, never block startup
+        logger.warning(f"search document upkeep skipped: {e}")
@@ -9,15 +9,28 @@ Adding a supplier's live search = set its website + platform, done. If the platf
 set (or isn't a web platform, e.g. a `csv` importer), we SNIFF the homepage to detect it —
 so "just point at the website" works even without a hand-set type. A brand-new platform =
 write that one adapter once, and every supplier on it is covered forever.
+
+Warm path (a re-search is a cache read, not a volley at every shop):
+* the registry (active suppliers -> platform) is cached in-process for REGISTRY_TTL_S, and a
+  sniffed platform is stored back on the supplier row (re-sniffed after SNIFF_TTL_DAYS);
+* ONE long-lived client (keep-alive + cookie jar) serves every search, behind a per-host
+  concurrency + spacing limiter (base.HostLimiter);
+* each supplier's results per normalized query are cached stale-while-revalidate (cache.py).
 """
 from __future__ import annotations
 
 import asyncio
 import logging
+import os
+import time
+from dataclasses import asdict, dataclass
+from datetime import datetime, timedelta
 
-from sqlalchemy import select
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from .base import BaseAdapter, SupplierResult, make_client
+from . import cache as live_cache
+from .base import BaseAdapter, HostLimiter, SupplierResult, make_client, request_timeout
 from .magento import MagentoAdapter
 from .query_i18n import query_variants
 from .shopware import ShopwareAdapter
@@ -47,52 +60,169 @@ def detect_platform(homepage_html: str | None) -> str | None:
     return None
 
 
-async def _adapters_for_suppliers(db, client, suppliers: list[str] | None) -> list[BaseAdapter]:
-    """Build the platform adapters for the shop's active suppliers that have a website.
-    ``suppliers`` optionally restricts by supplier code/prefix/name (case-insensitive)."""
+REGISTRY_TTL_S = float(os.getenv("SUPPLIER_SEARCH_REGISTRY_TTL_S", "60"))
+SNIFF_TTL_DAYS = float(os.getenv("SUPPLIER_SEARCH_SNIFF_TTL_DAYS", "7"))
+
+
+@dataclass(frozen=True)
+class _SupplierSpec:
+    """What live search needs from one supplier row (the registry, cached in-process)."""
+    url: str
+    name: str
+    platform: str
+    role: str
+    keys: frozenset          # code / prefix / name, lowercased -- the `suppliers=` filter
+
+
+_registry: tuple[float, list[_SupplierSpec]] | None = None
+
+
+def invalidate_registry() -> None:
+    """Drop the cached registry -- call after a supplier is created or edited."""
+    global _registry
+    _registry = None
+
+
+async def _sniff(client, url: str, name: str) -> str | None:
+    """Homepage platform sniff: the platform, '' if none is supported, None if it failed."""
+    try:
+        hp = await client.get(url)
+        return detect_platform(hp.text) or ""
+    except Exception as e:
+        log.warning("platform sniff failed for %s (%s): %s", name, url, e)
+        return None
+
+
+async def _store_sniffs(db, sniffed: dict, now: datetime) -> None:
+    """Write sniffed platforms back in a short session of their own: the caller's session (a
+    request's) keeps its pending work and its transaction -- nothing is committed for it."""
     from src.db.models.supplier_model import SupplierModel
 
-    rows = (await db.execute(
+    try:
+        async with AsyncSession(db.bind, expire_on_commit=False) as own:
+            for supplier_id, platform in sniffed.items():
+                await own.execute(update(SupplierModel).where(SupplierModel.id == supplier_id)
+                                  .values(detected_platform=platform, platform_checked_at=now))
+            await own.commit()
+    except Exception as e:  # noqa: BLE001 -- the sniff still serves this search
+        log.warning("storing sniffed platforms failed: %s", e)
+
+
+async def _load_registry(db, client) -> list[_SupplierSpec]:
+    """Active suppliers with a website -> platform. Sniffs only rows whose platform isn't a
+    web platform AND whose stored sniff is missing/stale, then writes the sniff back."""
+    from src.db.models.supplier_model import SupplierModel
+
+    rows = [s for s in (await db.execute(
         select(SupplierModel).where(SupplierModel.is_active.is_(True))
-    )).scalars().all()
+    )).scalars().all() if (s.source_url or "").strip()]
 
-    want = {s.strip().lower() for s in (suppliers or []) if s.strip()}
-    adapters: list[BaseAdapter] = []
+    stale_before = datetime.utcnow() - timedelta(days=SNIFF_TTL_DAYS)   # naive UTC, like the table
+    to_sniff = [s for s in rows
+                if (s.adapter_type or "").strip().lower() not in PLATFORM_ADAPTERS
+                and (s.detected_platform is None or s.platform_checked_at is None
+                     or s.platform_checked_at < stale_before)]
+    sniffed = {}
+    if to_sniff:
+        found = await asyncio.gather(*[_sniff(client, s.source_url.strip(), s.name) for s in to_sniff])
+        sniffed = {s.id: platform for s, platform in zip(to_sniff, found)
+                   if platform is not None}     # a failed sniff is retried next load
+        if sniffed:
+            await _store_sniffs(db, sniffed, datetime.utcnow())
+
+    specs = []
     for s in rows:
-        url = (s.source_url or "").strip()
-        if not url:
-            continue
-        if want and not ({(s.code or "").lower(), (s.prefix or "").lower(), (s.name or "").lower()} & want):
-            continue
         platform = (s.adapter_type or "").strip().lower()
         if platform not in PLATFORM_ADAPTERS:
-            # Not a web platform (e.g. 'csv'/'manual'/unset) — sniff the homepage.
-            try:
-                hp = await client.get(url)
-                platform = detect_platform(hp.text) or ""
-            except Exception as e:
-                log.warning("platform sniff failed for %s (%s): %s", s.name, url, e)
-                platform = ""
-        cls = PLATFORM_ADAPTERS.get(platform)
-        if cls:
-            adapters.append(cls(url, s.name, getattr(s, "supplier_role", None) or "wholesale"))
-        else:
+            platform = sniffed.get(s.id, s.detected_platform) or ""
+        if platform not in PLATFORM_ADAPTERS:
             log.info("supplier %s has a website but no supported platform — skipped", s.name)
-    return adapters
+            continue
+        specs.append(_SupplierSpec(
+            url=s.source_url.strip(), name=s.name, platform=platform,
+            role=getattr(s, "supplier_role", None) or "wholesale",
+            keys=frozenset({(s.code or "").lower(), (s.prefix or "").lower(), (s.name or "").lower()})))
+    return specs
 
 
-async def _shop_fx(db):
-    """The shop's base currency + plan FX rates (store_settings). Falls back to CHF + defaults."""
-    from sqlalchemy import text as _text
-    from src.services.currency import load_fx
+async def _adapters_for_suppliers(db, client, suppliers: list[str] | None) -> list[BaseAdapter]:
+    """Build the platform adapters for the shop's active suppliers that have a website.
+    ``suppliers`` optionally restricts by supplier code/prefix/name (case-insensitive)."""
+    global _registry
+    if _registry is None or time.monotonic() - _registry[0] >= REGISTRY_TTL_S:
+        _registry = (time.monotonic(), await _load_registry(db, client))
+    want = {s.strip().lower() for s in (suppliers or []) if s.strip()}
+    return [PLATFORM_ADAPTERS[sp.platform](sp.url, sp.name, sp.role)
+            for sp in _registry[1] if not want or (sp.keys & want)]
+
+
+# One long-lived scraping client per event loop: keep-alive + the cookie jar survive across
+# searches, and every request goes through the per-host limiter. Timeouts are per search
+# (base.request_timeout), not baked into the client.
+_client: tuple[asyncio.AbstractEventLoop, object] | None = None
+_limiter = HostLimiter()
+_revalidations: set[asyncio.Task] = set()
+
+
+def _shared_client():
+    global _client
+    loop = asyncio.get_running_loop()
+    if _client is None or _client[0] is not loop or _client[1].is_closed:
+        _client = (loop, make_client(limiter=_limiter))
+    return _client[1]
+
+
+async def aclose_client() -> None:
+    global _client
+    if _client is not None:
+        await _client[1].aclose()
+        _client = None
+
+
+async def _search_one(client, adapter: BaseAdapter, q: str, variants: list[str], limit: int,
+                      timeout: float) -> tuple[list[SupplierResult], str | None]:
+    """One supplier, every query variant it needs. Returns (deduped results, first error)."""
+    # When a site is searched under several variants, split the fetch budget across them so
+    # the extra language pass doesn't double the wait — the union still covers the ground.
+    qs = [q] if adapter.multilingual else variants
+    lim = limit if len(qs) <= 1 else max(2, limit // len(qs))
+    settled = await asyncio.gather(
+        *[asyncio.wait_for(adapter.search(client, qv, lim), timeout=timeout) for qv in qs],
+        return_exceptions=True)
+    by_url: dict[str, SupplierResult] = {}
+    error = None
+    for qv, res in zip(qs, settled):
+        if isinstance(res, Exception):
+            log.warning("supplier-search %s failed for %r: %s", adapter.supplier, qv, res)
+            error = error or (str(res) or res.__class__.__name__)
+            continue
+        for r in res:
+            if r.product_url not in by_url or r.score > by_url[r.product_url].score:
+                by_url[r.product_url] = r
+    return list(by_url.values()), error
+
+
+def _cache_key(adapter: BaseAdapter, q: str, limit: int) -> tuple:
+    return (adapter.base_url, adapter.supplier, live_cache.normalize_query(q), limit)
+
+
+async def _revalidate(client, adapter: BaseAdapter, q: str, variants: list[str], limit: int,
+                      timeout: float, key: tuple) -> None:
     try:
-        row = (await db.execute(_text(
-            "SELECT currency, fx_rates FROM store_settings ORDER BY id LIMIT 1"))).first()
-    except Exception as e:  # noqa: BLE001
-        log.warning("shop fx load failed: %s", e)
-        return "CHF", load_fx(None)
-    base = (row.currency if row and row.currency else "CHF").upper()
-    return base, load_fx(row.fx_rates if row else None)
+        results, error = await _search_one(client, adapter, q, variants, limit, timeout)
+        if error is None:
+            live_cache.RESULTS.put(key, [asdict(r) for r in results])
+    except Exception as e:  # noqa: BLE001 -- the stale answer stays until the next try
+        log.warning("supplier-search revalidate %s failed: %s", adapter.supplier, e)
+    finally:
+        live_cache.RESULTS.release_refresh(key)
+
+
+async def _shop_fx(db):
+    """The shop's base currency + plan FX rates (the tenant settings snapshot; CHF + defaults)."""
+    from src.services.tenant_settings import tenant_settings
+    tenant = await tenant_settings.get(db)
+    return tenant.currency, tenant.fx
 
 
 async def search_suppliers(q: str, db, suppliers: list[str] | None = None,
@@ -103,36 +233,47 @@ async def search_suppliers(q: str, db, suppliers: list[str] | None = None,
     if not q or db is None:
         return {"query": q, "results": [], "errors": {}, "suppliers": []}
 
-    async with make_client(timeout) as client:
-        adapters = await _adapters_for_suppliers(db, client, suppliers)
-        if not adapters:
-            return {"query": q, "results": [], "errors": {}, "suppliers": []}
+    request_timeout.set(timeout)        # this search's requests (and its revalidations) only
+    client = _shared_client()
+    adapters = await _adapters_for_suppliers(db, client, suppliers)
+    if not adapters:
+        return {"query": q, "results": [], "errors": {}, "suppliers": []}
 
-        # BL-38: also search a German variant so an English/French term hits the German sites.
-        # Only the single-language (German) sites need it; Tamar multiplexes languages itself.
-        variants = await query_variants(client, q, langs=("de",))
+    # BL-38: also search a German variant so an English/French term hits the German sites.
+    # Only the single-language (German) sites need it; Tamar multiplexes languages itself.
+    # (Translations are cached per term in query_i18n; the brain call goes through src.llm's pool.)
+    variants = await query_variants(None, q, langs=("de",))
 
-        async def _run(adapter, qv, lim):
-            return await asyncio.wait_for(adapter.search(client, qv, lim), timeout=timeout)
+    # Serve what the cache has (stale ones refresh in the background); fetch the rest live.
+    per_adapter: dict[int, list[SupplierResult]] = {}
+    cached: list[str] = []
+    live: list[BaseAdapter] = []
+    for i, a in enumerate(adapters):
+        key = _cache_key(a, q, limit)
+        hit, state = live_cache.RESULTS.get(key)
+        if hit is None:
+            live.append(a)
+            continue
+        per_adapter[i] = [SupplierResult(**d) for d in hit]
+        cached.append(a.supplier)
+        if state == live_cache.STALE and live_cache.RESULTS.claim_refresh(key):
+            task = asyncio.create_task(_revalidate(client, a, q, variants, limit, timeout, key))
+            _revalidations.add(task)
+            task.add_done_callback(_revalidations.discard)
 
-        # When a site is searched under several variants, split the fetch budget across them so
-        # the extra language pass doesn't double the wait — the union still covers the ground.
-        jobs = []
-        for a in adapters:
-            qs = [q] if a.multilingual else variants
-            lim = limit if len(qs) <= 1 else max(2, limit // len(qs))
-            jobs += [(a, qv, lim) for qv in qs]
-        settled = await asyncio.gather(*[_run(a, qv, lim) for (a, qv, lim) in jobs], return_exceptions=True)
+    errors: dict[str, str] = {}
+    settled = await asyncio.gather(*[_search_one(client, a, q, variants, limit, timeout) for a in live])
+    for a, (results, error) in zip(live, settled):
+        per_adapter[adapters.index(a)] = results
+        if error is None:
+            live_cache.RESULTS.put(_cache_key(a, q, limit), [asdict(r) for r in results])
+        else:
+            errors[a.supplier] = error
 
-    # Merge across (adapter × variant); dedupe the same product, keep its best score.
+    # Merge across suppliers; dedupe the same product, keep its best score.
     by_key: dict[tuple, SupplierResult] = {}
-    errors: dict[str, str] = {}
-    for (adapter, qv, _lim), res in zip(jobs, settled):
-        if isinstance(res, Exception):
-            log.warning("supplier-search %s failed for %r: %s", adapter.supplier, qv, res)
-            errors.setdefault(adapter.supplier, str(res) or res.__class__.__name__)
-            continue
-        for r in res:
+    for i, adapter in enumerate(adapters):
+        for r in per_adapter.get(i, []):
             r.role = adapter.role       # stamp what this site's price means (cost vs market)
             key = (r.supplier, r.product_url)
             if key not in by_key or r.score > by_key[key].score:
@@ -158,4 +299,5 @@ async def search_suppliers(q: str, db, suppliers: list[str] | None = None,
         "results": [r.to_dict() for r in results],
         "errors": errors,
         "suppliers": [a.supplier for a in adapters],
+        "cached": cached,               # suppliers answered from the result cache
     }
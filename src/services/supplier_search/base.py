@@ -10,9 +10,14 @@ we parse with tight regexes rather than pulling in a soup library the app image
 """
 from __future__ import annotations
 
+import asyncio
+import contextvars
 import difflib
 import html as _html
+import os
 import re
+import time
+from contextlib import asynccontextmanager
 from dataclasses import asdict, dataclass, field
 from decimal import ROUND_HALF_UP, Decimal
 from typing import Optional
@@ -72,8 +77,62 @@ def score_title(query: str, title: str) -> float:
     return round(ratio, 3)
 
 
-def make_client(timeout: float = 15.0) -> httpx.AsyncClient:
-    """A browser-shaped async client with a cookie jar (some Magento search needs a session)."""
+# Politeness per supplier HOST -- a burst of cashier searches (x variants x pages per adapter)
+# must not look like a scraper to the shop's WAF: at most N requests in flight per host, and
+# request starts spaced by a minimum gap.
+HOST_CONCURRENCY = int(os.getenv("SUPPLIER_SEARCH_HOST_CONCURRENCY", "2"))
+HOST_MIN_GAP_S = float(os.getenv("SUPPLIER_SEARCH_HOST_MIN_GAP_S", "0.25"))
+
+
+class HostLimiter:
+    """Per-host concurrency cap + minimum spacing between request starts."""
+
+    def __init__(self, concurrency: int = HOST_CONCURRENCY, min_gap: float = HOST_MIN_GAP_S):
+        self.concurrency = max(1, concurrency)
+        self.min_gap = min_gap
+        self._sems: dict[str, asyncio.Semaphore] = {}
+        self._next_start: dict[str, float] = {}
+
+    @asynccontextmanager
+    async def slot(self, host: str):
+        sem = self._sems.setdefault(host, asyncio.Semaphore(self.concurrency))
+        async with sem:
+            now = time.monotonic()
+            start = max(now, self._next_start.get(host, 0.0))   # reserve the next start slot
+            self._next_start[host] = start + self.min_gap
+            if start > now:
+                await asyncio.sleep(start - now)
+            yield
+
+
+# The caller's per-request timeout. The scraping client is shared across searches, so its own
+# timeout is only the default; a search sets this and every request it makes carries it.
+request_timeout: contextvars.ContextVar[float | None] = contextvars.ContextVar(
+    "supplier_search_request_timeout", default=None)
+
+
+class _PoliteTransport(httpx.AsyncBaseTransport):
+    """Every request (search, detail page, homepage sniff, redirect hop) takes a host slot, under
+    the calling search's `request_timeout` when it set one."""
+
+    def __init__(self, limiter: HostLimiter):
+        self._limiter = limiter
+        self._inner = httpx.AsyncHTTPTransport()
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        timeout = request_timeout.get()
+        if timeout is not None:
+            request.extensions["timeout"] = httpx.Timeout(timeout).as_dict()
+        async with self._limiter.slot(request.url.host):
+            return await self._inner.handle_async_request(request)
+
+    async def aclose(self) -> None:
+        await self._inner.aclose()
+
+
+def make_client(timeout: float = 15.0, limiter: HostLimiter | None = None) -> httpx.AsyncClient:
+    """A browser-shaped async client with a cookie jar (some Magento search needs a session).
+    With a ``limiter``, every request to a host goes through its politeness slot."""
     return httpx.AsyncClient(
         headers={
             "User-Agent": BROWSER_UA,
@@ -82,6 +141,7 @@ def make_client(timeout: float = 15.0) -> httpx.AsyncClient:
         },
         timeout=timeout,
         follow_redirects=True,
+        transport=_PoliteTransport(limiter) if limiter is not None else None,
     )
 
 
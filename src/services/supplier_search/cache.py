@@ -0,0 +1,74 @@
+"""Live supplier search — the per-(supplier, query) result cache.
+
+A cashier re-searching the same product (or the next cashier searching it) should not send a
+fresh volley at every supplier website: that is seconds of wall-clock and it is exactly what
+gets us WAF-throttled. So each supplier's answer for a NORMALIZED query is kept:
+
+* fresh (< ``SUPPLIER_SEARCH_FRESH_S``) — served as-is, the site is not touched;
+* stale (< ``SUPPLIER_SEARCH_STALE_S``) — served at once AND refreshed in the background
+  (stale-while-revalidate; one refresh per key at a time);
+* older / missing — fetched live as before.
+
+Only clean answers are stored (a supplier that errored is retried next search). In-process
+and LRU-bounded (``SUPPLIER_SEARCH_CACHE_MAX`` entries); prices are at most STALE_S old.
+"""
+from __future__ import annotations
+
+import os
+import time
+from collections import OrderedDict
+
+FRESH_S = float(os.getenv("SUPPLIER_SEARCH_FRESH_S", "900"))          # 15 min
+STALE_S = float(os.getenv("SUPPLIER_SEARCH_STALE_S", "86400"))        # 24 h
+CACHE_MAX = int(os.getenv("SUPPLIER_SEARCH_CACHE_MAX", "2000"))
+
+FRESH, STALE = "fresh", "stale"
+
+
+def normalize_query(q: str) -> str:
+    """The cache's notion of 'the same search': case- and whitespace-insensitive."""
+    return " ".join((q or "").casefold().split())
+
+
+class LiveResultCache:
+    def __init__(self, fresh_s: float = FRESH_S, stale_s: float = STALE_S, max_entries: int = CACHE_MAX):
+        self.fresh_s = fresh_s
+        self.stale_s = stale_s
+        self.max_entries = max_entries
+        self._entries: OrderedDict[tuple, tuple[float, list[dict]]] = OrderedDict()
+        self._refreshing: set[tuple] = set()
+
+    def get(self, key: tuple) -> tuple[list[dict] | None, str | None]:
+        """(results, FRESH | STALE) or (None, None) when it must be fetched live."""
+        hit = self._entries.get(key)
+        if hit is None:
+            return None, None
+        age = time.monotonic() - hit[0]
+        if age >= self.stale_s:
+            del self._entries[key]
+            return None, None
+        self._entries.move_to_end(key)
+        return hit[1], (FRESH if age < self.fresh_s else STALE)
+
+    def put(self, key: tuple, results: list[dict]) -> None:
+        self._entries[key] = (time.monotonic(), results)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def claim_refresh(self, key: tuple) -> bool:
+        """True if the caller should revalidate `key` (nobody else is already doing it)."""
+        if key in self._refreshing:
+            return False
+        self._refreshing.add(key)
+        return True
+
+    def release_refresh(self, key: tuple) -> None:
+        self._refreshing.discard(key)
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self._refreshing.clear()
+
+
+RESULTS = LiveResultCache()
@@ -0,0 +1,183 @@
+"""Tenant settings snapshot — the store_settings facts the till reads on every cart and checkout.
+
+The hot POS paths each went back to `store_settings` on their own: `_store_currency`,
+`_tenant_currency`, `_tenant_vat_rates`, `_tenant_rate_table`, `_max_discount_pct`, the tender FX
+read, the payment-provider probe and supplier search's `_shop_fx` — several identical queries per
+request, and one more per line added to a cart. They change a few times a year.
+
+So the facts they need are loaded ONCE into an immutable `TenantSettings` (currency, the resolved
+VAT regime + N-rate table, FX plan rates, the per-role discount caps and the payment provider) and
+shared by every request in the process through `tenant_settings.get(db)`. Freshness follows
+barcode_index:
+  • an ORM write to a store_settings row (update_store_settings, seeding) bumps the version on
+    COMMIT (the session hooks at the bottom), as does a bulk UPDATE/DELETE or a (re)created table;
+  • a TTL bounds how long ANOTHER worker process can serve the old values.
+A failed load degrades to the CH defaults for that call and is not cached — the same fallback every
+helper had, so a DB blip never turns VAT math or a discount check into a 500.
+"""
+from __future__ import annotations
+
+import copy
+import logging
+import time
+from dataclasses import dataclass
+from decimal import Decimal
+from typing import Optional
+
+from sqlalchemy import event, select
+from sqlalchemy.orm import Session
+
+from src.db.models.store_settings_model import StoreSettingsModel
+from src.services.currency import load_fx
+from src.services.fiscal_regime import resolve_regime
+
+logger = logging.getLogger(__name__)
+
+# Cross-process staleness ceiling. Writes in THIS process invalidate on commit.
+SETTINGS_TTL_SECONDS = 30.0
+
+# Role discount ceilings when the store leaves them unset (admins are always unlimited).
+DEFAULT_CASHIER_MAX_DISCOUNT = Decimal("10")
+DEFAULT_MANAGER_MAX_DISCOUNT = Decimal("25")
+
+
+@dataclass(frozen=True)
+class TenantSettings:
+    """What the till needs to know about the shop. Mutable parts are handed out as copies."""
+    store_number: Optional[int]
+    currency: str
+    payment_provider: str
+    vat_standard: Decimal
+    vat_reduced: Decimal
+    cashier_max_discount: Optional[Decimal]
+    manager_max_discount: Optional[Decimal]
+    _regime: dict
+    _fx_rates_json: Optional[str]
+
+    @classmethod
+    def from_store(cls, store) -> "TenantSettings":
+        """Snapshot a store_settings row (None → pure CH from config, like resolve_regime)."""
+        regime = resolve_regime(store)
+        return cls(
+            store_number=getattr(store, "store_number", None),
+            currency=((getattr(store, "currency", None) or "").strip().upper()
+                      or regime.get("currency") or "CHF"),
+            payment_provider=(getattr(store, "payment_provider", None) or "manual").strip().lower(),
+            vat_standard=Decimal(str(regime["vat_rate"])),
+            vat_reduced=Decimal(str(regime["vat_rate_reduced"])),
+            cashier_max_discount=getattr(store, "cashier_max_discount", None),
+            manager_max_discount=getattr(store, "manager_max_discount", None),
+            _regime=copy.deepcopy(regime),
+            _fx_rates_json=getattr(store, "fx_rates", None),
+        )
+
+    @property
+    def regime(self) -> dict:
+        """The resolve_regime dict (a copy — callers may annotate it)."""
+        return copy.deepcopy(self._regime)
+
+    @property
+    def rate_table(self) -> list[dict]:
+        """The N-rate VAT table for split_vat (a copy)."""
+        return copy.deepcopy(self._regime["vat_rates"])
+
+    @property
+    def fx(self) -> dict:
+        """The plan FX rates (load_fx: the store's own, else currency.DEFAULT_FX). A copy."""
+        return copy.deepcopy(load_fx(self._fx_rates_json))
+
+    def max_discount_pct(self, roles) -> Decimal:
+        """Manual-discount ceiling for a user with `roles`: admin/developer 100, else the store's
+        manager/cashier cap, else 25 / 10."""
+        roles = roles or []
+        if any(("admin" in r or "developer" in r) for r in roles):
+            return Decimal("100")
+        if any("manager" in r for r in roles):
+            return self.manager_max_discount if self.manager_max_discount is not None else DEFAULT_MANAGER_MAX_DISCOUNT
+        return self.cashier_max_discount if self.cashier_max_discount is not None else DEFAULT_CASHIER_MAX_DISCOUNT
+
+
+async def _load_store(db):
+    """The tenant's row: active Store #1 (get_active_store_settings), else the first store row."""
+    rows = (await db.execute(
+        select(StoreSettingsModel).order_by(StoreSettingsModel.store_number))).scalars().all()
+    return next((r for r in rows if r.store_number == 1 and r.is_active), rows[0] if rows else None)
+
+
+class TenantSettingsCache:
+    """A versioned, TTL-bounded TenantSettings shared by every request in the process."""
+
+    def __init__(self, ttl: float = SETTINGS_TTL_SECONDS):
+        self._ttl = ttl
+        self._value: Optional[TenantSettings] = None
+        self._version = 0
+        self._built_version = -1
+        self._built_at = 0.0
+
+    @property
+    def version(self) -> int:
+        return self._version
+
+    def invalidate(self) -> None:
+        """Mark the snapshot stale; a load already in flight won't install."""
+        self._version += 1
+
+    def _fresh(self) -> bool:
+        return (self._value is not None and self._built_version == self._version
+                and (time.monotonic() - self._built_at) < self._ttl)
+
+    async def get(self, db) -> TenantSettings:
+        if self._fresh():
+            return self._value
+        version = self._version
+        try:
+            value = TenantSettings.from_store(await _load_store(db))
+        except Exception:
+            logger.warning("tenant settings: store read failed; CH fallback", exc_info=True)
+            return TenantSettings.from_store(None)
+        if version == self._version:
+            self._value, self._built_version, self._built_at = value, version, time.monotonic()
+        return value
+
+
+tenant_settings = TenantSettingsCache()
+
+
+# ----------------------------------------------------------------------------------------------------
+# Invalidation (see barcode_index for why the flag is set at flush and acted on at commit).
+# ----------------------------------------------------------------------------------------------------
+_DIRTY_KEY = "tenant_settings_dirty"
+
+
+@event.listens_for(Session, "after_flush")
+def _note_settings_writes(session, flush_context) -> None:
+    if not session.info.get(_DIRTY_KEY) and any(
+            isinstance(obj, StoreSettingsModel) for obj in (*session.new, *session.dirty, *session.deleted)):
+        session.info[_DIRTY_KEY] = True
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _note_bulk_settings_writes(orm_execute_state) -> None:
+    # delete(StoreSettingsModel) / update(...) through the session never reach after_flush.
+    if (orm_execute_state.is_update or orm_execute_state.is_delete) and \
+            orm_execute_state.bind_mapper is not None and \
+            orm_execute_state.bind_mapper.class_ is StoreSettingsModel:
+        orm_execute_state.session.info[_DIRTY_KEY] = True
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_on_commit(session) -> None:
+    if session.info.pop(_DIRTY_KEY, False):
+        tenant_settings.invalidate()
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def _forget_on_rollback(session, previous_transaction) -> None:
+    if previous_transaction.nested:          # a savepoint: writes flushed before it still commit
+        return
+    session.info.pop(_DIRTY_KEY, None)
+
+
+@event.listens_for(StoreSettingsModel.__table__, "after_create")
+def _invalidate_on_create(target, connection, **kw) -> None:
+    tenant_settings.invalidate()
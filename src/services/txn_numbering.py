@@ -0,0 +1,208 @@
+"""Transaction numbering — gap-free TXN-YYYYMMDD-NNNN from one counter row per store and day.
+
+Both sale paths used to COUNT today's transactions (`transaction_number LIKE 'TXN-…-%'`) and add one:
+a scan per sale, and two tills ringing at once read the same count and one of them lost on the unique
+index. Now a number is drawn from `transaction_counters` (store_number, day) with ONE
+`UPDATE … SET last_number = last_number + n RETURNING last_number`:
+
+  • O(1) — a primary-key row, no scan (the day's first sale seeds the row once from what exists);
+  • contention-safe — the row lock queues a second till behind the first instead of letting them
+    collide, so there is nothing to retry;
+  • gap-free — the bump runs inside the SALE's own DB transaction, so a rejected or rolled-back sale
+    hands its number back. Callers draw the number as LATE as they can — after the drawer gate and
+    the terminal capture, right before their commit: the row stays locked until then. Until the
+    draw a sale carries a `provisional` placeholder so it can be flushed.
+
+Offline tills: `reserve_block` carves a contiguous run off the same counter for one cashier; the till
+rings those numbers itself and the server claims them (`claim_reserved`) when the sale arrives — one
+INSERT … ON CONFLICT DO NOTHING into `transaction_number_claims`, so two uploads of one number
+cannot both win.
+
+Fiscal export: `audit` lists, for a store-day, every number up to the counter that has no transaction
+— split into reserved-but-never-rung (an offline block that was not used up) and true gaps.
+"""
+import logging
+import re
+from datetime import date, datetime, timezone
+
+from sqlalchemy import select, update
+
+from src.db.models import TransactionModel
+from src.db.models.transaction_counter_model import (
+    TransactionCounterModel, TransactionNumberBlockModel, TransactionNumberClaimModel,
+)
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_STORE = 1
+BLOCK_MAX = 500
+
+_NUMBER_RE = re.compile(r"^TXN-(\d{8})-(?:S(\d+)-)?(\d+)$")
+
+
+class NumberNotReserved(Exception):
+    """A client-supplied transaction number is not in one of the cashier's blocks, or is used."""
+
+
+def _prefix(day: date, store_number: int) -> str:
+    # Store 1 keeps the historic format byte-for-byte; other stores carry their number.
+    return f"TXN-{day:%Y%m%d}-" if store_number == DEFAULT_STORE else f"TXN-{day:%Y%m%d}-S{store_number}-"
+
+
+def format_number(day: date, seq: int, store_number: int = DEFAULT_STORE) -> str:
+    return f"{_prefix(day, store_number)}{seq:04d}"
+
+
+def provisional(txn_id) -> str:
+    """Placeholder for a sale that has not drawn its number yet (unique, never a TXN number)."""
+    return f"PENDING-{txn_id}"
+
+
+def parse_number(number: str) -> tuple[int, date, int] | None:
+    """(store_number, day, seq) of a TXN number, None if it isn't one."""
+    m = _NUMBER_RE.match(number or "")
+    if not m:
+        return None
+    try:
+        day = datetime.strptime(m.group(1), "%Y%m%d").date()
+    except ValueError:
+        return None
+    return int(m.group(2) or DEFAULT_STORE), day, int(m.group(3))
+
+
+async def _used_seqs(db, day: date, store_number: int) -> set[int]:
+    prefix = _prefix(day, store_number)
+    rows = (await db.execute(select(TransactionModel.transaction_number)
+                             .where(TransactionModel.transaction_number.like(f"{prefix}%")))).scalars().all()
+    seqs = set()
+    for n in rows:
+        parsed = parse_number(n)
+        if parsed and parsed[0] == store_number:
+            seqs.add(parsed[2])
+    return seqs
+
+
+async def _seed(db, day: date, store_number: int) -> int:
+    """Where a fresh counter starts: the highest number already rung that day (sales from before the
+    counter existed, or a counter row lost with a restore). Runs once per store-day."""
+    return max(await _used_seqs(db, day, store_number), default=0)
+
+
+def _insert(db):
+    if db.get_bind().dialect.name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert
+    return insert
+
+
+async def allocate(db, n: int = 1, *, store_number: int = DEFAULT_STORE, day: date | None = None) -> int:
+    """Advance the store-day counter by n and return the LAST sequence drawn (the first is last-n+1).
+
+    Not committed here — the caller's commit makes the number permanent, its rollback returns it."""
+    day = day or date.today()
+    now = datetime.now(timezone.utc)
+    t = TransactionCounterModel
+    last = (await db.execute(
+        update(t).where(t.store_number == store_number, t.day == day)
+        .values(last_number=t.last_number + n, updated_at=now).returning(t.last_number)
+    )).scalar_one_or_none()
+    if last is not None:
+        return int(last)
+
+    # First draw of the day: create the row. ON CONFLICT covers two tills racing the first sale —
+    # the loser waits on the winner's row and bumps it like any later sale.
+    insert = _insert(db)
+    seed = await _seed(db, day, store_number)
+    stmt = insert(t).values(store_number=store_number, day=day, last_number=seed + n, updated_at=now)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[t.store_number, t.day],
+        set_={"last_number": t.last_number + n, "updated_at": now},
+    ).returning(t.last_number)
+    return int((await db.execute(stmt)).scalar_one())
+
+
+async def next_number(db, *, store_number: int = DEFAULT_STORE) -> str:
+    """Draw ONE number for a sale being rung now (see allocate for the commit contract)."""
+    day = date.today()
+    return format_number(day, await allocate(db, store_number=store_number, day=day), store_number)
+
+
+async def peek(db, *, store_number: int = DEFAULT_STORE) -> str:
+    """The number the next sale will most likely get — a read, nothing is drawn or locked."""
+    day = date.today()
+    last = (await db.execute(select(TransactionCounterModel.last_number).where(
+        TransactionCounterModel.store_number == store_number,
+        TransactionCounterModel.day == day))).scalar_one_or_none()
+    if last is None:
+        last = await _seed(db, day, store_number)
+    return format_number(day, int(last) + 1, store_number)
+
+
+async def reserve_block(db, size: int, issued_to: str, *,
+                        store_number: int = DEFAULT_STORE) -> TransactionNumberBlockModel:
+    """Carve `size` consecutive numbers for an offline till and record who may ring them. Commits."""
+    if not 1 <= size <= BLOCK_MAX:
+        raise ValueError(f"block size must be 1..{BLOCK_MAX}")
+    day = date.today()
+    last = await allocate(db, size, store_number=store_number, day=day)
+    block = TransactionNumberBlockModel(store_number=store_number, day=day, first_number=last - size + 1,
+                                        last_number=last, issued_to=str(issued_to))
+    db.add(block)
+    await db.commit()
+    logger.info(f"Number block reserved: {format_number(day, block.first_number, store_number)}.."
+                f"{format_number(day, last, store_number)} for {issued_to}")
+    return block
+
+
+async def claim_reserved(db, number: str, issued_to: str) -> None:
+    """Claim an offline-rung number for the sale being saved: it must come from one of `issued_to`'s
+    blocks and not be rung yet. Raises NumberNotReserved otherwise. The claim is an INSERT … ON
+    CONFLICT DO NOTHING in the caller's transaction — a concurrent upload of the same number waits
+    on it and then inserts nothing; a rolled-back sale releases it. The counter is not touched."""
+    parsed = parse_number(number)
+    if parsed is None:
+        raise NumberNotReserved(f"Not a transaction number: {number}")
+    store_number, day, seq = parsed
+    b = TransactionNumberBlockModel
+    block = (await db.execute(select(b.id).where(
+        b.store_number == store_number, b.day == day, b.issued_to == str(issued_to),
+        b.first_number <= seq, b.last_number >= seq).limit(1))).scalar_one_or_none()
+    if block is None:
+        raise NumberNotReserved(f"{number} is not reserved for this cashier")
+    # Numbers rung before claims were recorded have a transaction but no claim row.
+    taken = (await db.execute(select(TransactionModel.id).where(
+        TransactionModel.transaction_number == number))).scalar_one_or_none()
+    if taken is not None:
+        raise NumberNotReserved(f"{number} has already been rung")
+    claimed = await db.execute(_insert(db)(TransactionNumberClaimModel).values(
+        transaction_number=number, issued_to=str(issued_to),
+        claimed_at=datetime.now(timezone.utc)).on_conflict_do_nothing())
+    if claimed.rowcount == 0:
+        raise NumberNotReserved(f"{number} has already been rung")
+
+
+async def audit(db, day: date, *, store_number: int = DEFAULT_STORE) -> dict:
+    """Gap report for one store-day: every number 1..counter must be a transaction, or sit unused in
+    a reserved offline block. `gap_free` is what the fiscal export checks."""
+    last = (await db.execute(select(TransactionCounterModel.last_number).where(
+        TransactionCounterModel.store_number == store_number,
+        TransactionCounterModel.day == day))).scalar_one_or_none()
+    used = await _used_seqs(db, day, store_number)
+    last = max(int(last or 0), max(used, default=0))
+    blocks = (await db.execute(select(TransactionNumberBlockModel.first_number, TransactionNumberBlockModel.last_number)
+                               .where(TransactionNumberBlockModel.store_number == store_number,
+                                      TransactionNumberBlockModel.day == day))).all()
+    reserved = {s for first, end in blocks for s in range(first, end + 1)}
+    missing = [s for s in range(1, last + 1) if s not in used]
+    return {
+        "store_number": store_number,
+        "day": day.isoformat(),
+        "first": format_number(day, 1, store_number) if last else None,
+        "last": format_number(day, last, store_number) if last else None,
+        "issued": last,
+        "rung": len(used),
+        "reserved_unused": [format_number(day, s, store_number) for s in missing if s in reserved],
+        "gaps": [format_number(day, s, store_number) for s in missing if s not in reserved],
+        "gap_free": all(s in reserved for s in missing),
+    }
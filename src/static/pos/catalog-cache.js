@@ -9,17 +9,21 @@
  *
  * Public API (all async, all safe to call even where IndexedDB is unavailable):
  *   CatalogCache.available()         -> bool
- *   CatalogCache.sync()              -> {count, at} | null   (pull /products when online)
+ *   CatalogCache.sync()              -> {count, at, cursor} | null  (pull what changed, when online)
  *   CatalogCache.put(product)        -> void                 (warm the cache with a seen item)
- *   CatalogCache.findByBarcode(code) -> product | null       (primary barcode; aliases = P1.2)
+ *   CatalogCache.findByBarcode(code) -> product | null       (primary barcode, then alias barcodes)
  *   CatalogCache.search(q)           -> [product]            (name / sku / category contains)
- *   CatalogCache.meta()              -> {count, at} | null   (last sync stamp)
+ *   CatalogCache.meta()              -> {count, at, cursor} | null   (last sync stamp)
  *
- * Bump nothing here on catalog changes — sync() always clears + reloads from the server.
+ * sync() is a DELTA pull: the server numbers every catalog change, and the till keeps the cursor
+ * of the last change it applied. /pos/catalog/changes?since=<cursor> returns only the upserts
+ * (columnar: one `cols` header + positional rows, alias barcodes included) and the deletions
+ * since then — a bodiless 304 when nothing moved. A first sync (cursor 0) or a server `reset`
+ * is a full load into an emptied mirror, paged so catalogs of any size fit.
  */
 (function () {
   'use strict';
-  var DB = 'banco-pos', STORE = 'products', META = 'meta', VER = 1;
+  var DB = 'banco-pos', STORE = 'products', META = 'meta', VER = 2;
 
   function available() {
     try { return typeof indexedDB !== 'undefined' && indexedDB !== null; }
@@ -31,10 +35,11 @@
       var r = indexedDB.open(DB, VER);
       r.onupgradeneeded = function () {
         var db = r.result;
-        if (!db.objectStoreNames.contains(STORE)) {
-          var s = db.createObjectStore(STORE, { keyPath: 'id' });
-          s.createIndex('barcode', 'barcode', { unique: false });
-        }
+        var s = db.objectStoreNames.contains(STORE)
+          ? r.transaction.objectStore(STORE)
+          : db.createObjectStore(STORE, { keyPath: 'id' });
+        if (!s.indexNames.contains('barcode')) s.createIndex('barcode', 'barcode', { unique: false });
+        if (!s.indexNames.contains('aliases')) s.createIndex('aliases', 'aliases', { unique: false, multiEntry: true });
         if (!db.objectStoreNames.contains(META)) {
           db.createObjectStore(META, { keyPath: 'k' });
         }
@@ -52,44 +57,86 @@
   var CatalogCache = {
     available: available,
 
-    // Pull the whole sellable catalog (it's small — tens to low hundreds) and replace the
-    // local mirror atomically. No-op (returns null) offline / unauth / no IndexedDB.
+    // Pull every catalog change after our cursor (page by page) and apply each page in ONE
+    // transaction, advancing the stored cursor with it. No-op (returns null) offline / unauth /
+    // no IndexedDB. A 503 (a catalog write is committing) just leaves the cursor for next time.
     sync: function () {
       if (!available()) return Promise.resolve(null);
       var tok = token();
       if (!tok) return Promise.resolve(null);
-      return fetch('/api/v1/pos/products?limit=1000&active_only=true', {
-        headers: { 'Authorization': 'Bearer ' + tok }
-      }).then(function (res) {
-        if (!res.ok) throw new Error('catalog sync HTTP ' + res.status);
-        return res.json();
-      }).then(function (list) {
-        if (!Array.isArray(list)) list = [];
-        return open().then(function (db) {
-          return new Promise(function (resolve, reject) {
-            var t = db.transaction(STORE, 'readwrite');
-            var s = t.objectStore(STORE);
-            s.clear();
-            list.forEach(function (p) { if (p && p.id) s.put(p); });
-            t.oncomplete = function () { resolve(); };
-            t.onerror = function () { reject(t.error); };
-          }).then(function () {
-            var at = Date.now();
-            return CatalogCache._setMeta({ k: 'sync', count: list.length, at: at })
-              .then(function () { return { count: list.length, at: at }; });
+      return CatalogCache.meta().then(function (m) {
+        var cursor = (m && m.cursor) || 0, etag = (m && m.etag) || null;
+        function page() {
+          var headers = { 'Authorization': 'Bearer ' + tok };
+          if (etag) headers['If-None-Match'] = etag;
+          return fetch('/api/v1/pos/catalog/changes?since=' + cursor, { headers: headers })
+            .then(function (res) {
+              if (res.status === 304) return null;
+              if (!res.ok) throw new Error('catalog sync HTTP ' + res.status);
+              var tag = res.headers.get('ETag');
+              return res.json().then(function (p) { p.etag = tag; return p; });
+            }).then(function (p) {
+              if (!p) return null;
+              return CatalogCache._apply(p).then(function () {
+                cursor = p.cursor;
+                etag = p.more ? null : p.etag;     // only the LAST page's tag means "up to date"
+                return p.more ? page() : null;
+              });
+            });
+        }
+        return page().then(function () { return CatalogCache._count(); }).then(function (count) {
+          var at = Date.now();
+          return CatalogCache._setMeta({ k: 'sync', count: count, at: at, cursor: cursor, etag: etag })
+            .then(function () { return { count: count, at: at, cursor: cursor }; });
+        });
+      });
+    },
+
+    _apply: function (p) {
+      var cols = p.cols || [];
+      return open().then(function (db) {
+        return new Promise(function (resolve, reject) {
+          var t = db.transaction([STORE, META], 'readwrite');
+          var s = t.objectStore(STORE);
+          if (p.full) s.clear();
+          (p.deleted || []).forEach(function (id) { s.delete(id); });
+          (p.rows || []).forEach(function (row) {
+            var o = {};
+            for (var i = 0; i < cols.length; i++) o[cols[i]] = row[i];
+            o.is_active = true;
+            s.put(o);
           });
+          // The cursor moves in the SAME transaction as the rows it covers.
+          t.objectStore(META).put({ k: 'sync', cursor: p.cursor, at: Date.now() });
+          t.oncomplete = function () { resolve(); };
+          t.onerror = function () { reject(t.error); };
         });
       });
     },
 
+    _count: function () {
+      return open().then(function (db) {
+        return new Promise(function (resolve) {
+          var r = db.transaction(STORE, 'readonly').objectStore(STORE).count();
+          r.onsuccess = function () { resolve(r.result || 0); };
+          r.onerror = function () { resolve(0); };
+        });
+      }).catch(function () { return 0; });
+    },
+
     // Keep the mirror warm: every product the till actually touches online gets cached, so
     // a freshly-scanned item is available offline even before the next full sync.
     put: function (p) {
       if (!available() || !p || !p.id) return Promise.resolve();
       return open().then(function (db) {
         return new Promise(function (resolve) {
-          var t = db.transaction(STORE, 'readwrite');
-          t.objectStore(STORE).put(p);
+          var t = db.transaction(STORE, 'readwrite'), s = t.objectStore(STORE);
+          var r = s.get(p.id);
+          r.onsuccess = function () {       // keep the feed's alias list + version on the row
+            var o = Object.assign({}, r.result || {}, p);
+            if (!o.aliases) o.aliases = [];
+            s.put(o);
+          };
           t.oncomplete = function () { resolve(); };
           t.onerror = function () { resolve(); };
         });
@@ -100,9 +147,14 @@
       if (!available() || !code) return Promise.resolve(null);
       return open().then(function (db) {
         return new Promise(function (resolve) {
-          var idx = db.transaction(STORE, 'readonly').objectStore(STORE).index('barcode');
-          var r = idx.get(String(code));
-          r.onsuccess = function () { resolve(r.result || null); };
+          var s = db.transaction(STORE, 'readonly').objectStore(STORE);
+          var r = s.index('barcode').get(String(code));
+          r.onsuccess = function () {
+            if (r.result) { resolve(r.result); return; }
+            var a = s.index('aliases').get(String(code));   // BL-90: a second code on the pack
+            a.onsuccess = function () { resolve(a.result || null); };
+            a.onerror = function () { resolve(null); };
+          };
           r.onerror = function () { resolve(null); };
         });
       }).catch(function () { return null; });
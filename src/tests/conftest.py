@@ -6,7 +6,7 @@ Maps PostgreSQL-specific types (JSONB, enums) to SQLite equivalents.
 """
 import pytest
 import pytest_asyncio
-from sqlalchemy import event, JSON
+from sqlalchemy import event, text, JSON
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
 from sqlalchemy.orm import sessionmaker
 from sqlalchemy.dialects.postgresql import JSONB
@@ -58,3 +58,66 @@ async def db_session(test_db_engine):
         # SQLite can't resolve circular FK deps on DROP -- safe to ignore
         # since in-memory DB is per-session and tables get recreated per test
         pass
+
+
+# The barcode-integrity change queue is filled by Postgres triggers (database._BARCODE_INTEGRITY_DDL).
+# SQLite can't run plpgsql, so the same triggers are restated here: same tables, same firing
+# columns, same rows queued. test_barcode_integrity checks the firing columns still match.
+SQLITE_BARCODE_INTEGRITY_TRIGGERS = [
+    """
+    CREATE TRIGGER IF NOT EXISTS trg_products_barcode_integrity_ins AFTER INSERT ON products
+    BEGIN
+        INSERT INTO barcode_integrity_dirty (barcode, name, full_sweep, created_at)
+        VALUES (NULLIF(NEW.barcode, ''), lower(NEW.name), 0, CURRENT_TIMESTAMP);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS trg_products_barcode_integrity_upd
+    AFTER UPDATE OF barcode, name, is_active ON products
+    BEGIN
+        INSERT INTO barcode_integrity_dirty (barcode, name, full_sweep, created_at)
+        VALUES (NULLIF(OLD.barcode, ''), lower(OLD.name), 0, CURRENT_TIMESTAMP);
+        INSERT INTO barcode_integrity_dirty (barcode, name, full_sweep, created_at)
+        SELECT NULLIF(NEW.barcode, ''), lower(NEW.name), 0, CURRENT_TIMESTAMP
+        WHERE NEW.barcode IS NOT OLD.barcode OR NEW.name IS NOT OLD.name;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS trg_products_barcode_integrity_del AFTER DELETE ON products
+    BEGIN
+        INSERT INTO barcode_integrity_dirty (barcode, name, full_sweep, created_at)
+        VALUES (NULLIF(OLD.barcode, ''), lower(OLD.name), 0, CURRENT_TIMESTAMP);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS trg_product_barcodes_integrity_ins AFTER INSERT ON product_barcodes
+    BEGIN
+        INSERT INTO barcode_integrity_dirty (barcode, full_sweep, created_at)
+        VALUES (NEW.barcode, 0, CURRENT_TIMESTAMP);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS trg_product_barcodes_integrity_upd
+    AFTER UPDATE OF barcode, product_id ON product_barcodes
+    BEGIN
+        INSERT INTO barcode_integrity_dirty (barcode, full_sweep, created_at)
+        VALUES (OLD.barcode, 0, CURRENT_TIMESTAMP), (NEW.barcode, 0, CURRENT_TIMESTAMP);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS trg_product_barcodes_integrity_del AFTER DELETE ON product_barcodes
+    BEGIN
+        INSERT INTO barcode_integrity_dirty (barcode, full_sweep, created_at)
+        VALUES (OLD.barcode, 0, CURRENT_TIMESTAMP);
+    END
+    """,
+]
+
+
+@pytest_asyncio.fixture
+async def barcode_integrity_triggers(db_session):
+    """The barcode-integrity triggers on the SQLite test DB (dropped with the tables)."""
+    for ddl in SQLITE_BARCODE_INTEGRITY_TRIGGERS:
+        await db_session.execute(text(ddl))
+    await db_session.commit()
+    return SQLITE_BARCODE_INTEGRITY_TRIGGERS
@@ -0,0 +1,140 @@
+"""Artemis shop crawl — conditional GETs, Retry-After and a resumable checkpoint.
+
+scripts/import/artemis_import.py crawls the live shop; here it runs against a stub shop on
+127.0.0.1. A page fetched before is revalidated with its ETag and served from the disk cache
+on a 304; a 429 with Retry-After holds the host off for the time asked; and a crawl that died
+on one category resumes from its checkpoint, fetching only that category again.
+"""
+import importlib.util
+import json
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import parse_qs, urlsplit
+
+import pytest
+
+_SCRIPT = Path(__file__).resolve().parents[2] / "scripts" / "import" / "artemis_import.py"
+
+
+@pytest.fixture(scope="module")
+def ai():
+    spec = importlib.util.spec_from_file_location("artemis_import", _SCRIPT)
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[spec.name] = module                   # dataclasses resolve annotations through it
+    spec.loader.exec_module(module)
+    yield module
+    sys.modules.pop(spec.name, None)
+
+
+class _Shop:
+    """What the stub serves, and every request it saw: [(path, query, If-None-Match)]."""
+
+    def __init__(self):
+        self.seen = []
+        self.busy = 0                                 # 429s still to send on /busy
+        self.broken = set()                           # category guids whose products API fails
+
+    def category_html(self, guid):
+        return (f'<input id="productsApiUrl" value="/api/shop/products?navigationId=26169'
+                f'&amp;hierarchicalCategoryId={guid}" />')
+
+
+@pytest.fixture
+def shop(ai, monkeypatch):
+    state = _Shop()
+
+    class Handler(BaseHTTPRequestHandler):
+        def log_message(self, *args):
+            pass
+
+        def _send(self, status, body=b"", headers=None):
+            self.send_response(status)
+            for k, v in (headers or {}).items():
+                self.send_header(k, v)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            url = urlsplit(self.path)
+            state.seen.append((url.path, url.query, self.headers.get("If-None-Match")))
+            if url.path == "/page":
+                if self.headers.get("If-None-Match") == '"v1"':
+                    return self._send(304, headers={"ETag": '"v1"'})
+                return self._send(200, b"<h1>Papers</h1>", {"ETag": '"v1"'})
+            if url.path == "/busy":
+                if state.busy:
+                    state.busy -= 1
+                    return self._send(429, headers={"Retry-After": "1"})
+                return self._send(200, b"ok")
+            if url.path.startswith("/de/"):
+                return self._send(200, state.category_html(url.path.rsplit("/", 1)[-1].zfill(36)).encode())
+            if url.path == "/api/shop/products":
+                q = parse_qs(url.query)
+                guid, page = q["hierarchicalCategoryId"][0], int(q["page"][0])
+                if guid in state.broken:
+                    return self._send(500)
+                products = [{"identifier": f"{guid[-4:]}-{page}-{n}", "name": f"Item {n}"} for n in range(2)]
+                return self._send(200, json.dumps({"products": products, "hasMore": page < 2}).encode())
+            self._send(404)
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    state.base = f"http://127.0.0.1:{server.server_address[1]}"
+    monkeypatch.setattr(ai, "BASE", state.base)
+    yield state
+    server.shutdown()
+    server.server_close()
+
+
+def _http(ai, tmp_path, **kw):
+    return ai.AsyncHttp(rate=100, burst=10, retries=2, backoff=0.01, timeout=5,
+                        cache_dir=tmp_path / "cache", **kw)
+
+
+@pytest.mark.asyncio
+async def test_a_cached_page_is_revalidated_with_its_etag(ai, shop, tmp_path):
+    http = _http(ai, tmp_path, max_age=0)                 # always revalidate
+    first = await http.get(f"{shop.base}/page")
+    again = await http.get(f"{shop.base}/page")
+    assert first == again == b"<h1>Papers</h1>"
+    assert [inm for _, _, inm in shop.seen] == [None, '"v1"']
+    assert (http.n_requests, http.n_not_modified) == (2, 1)
+
+    fresh = _http(ai, tmp_path)                           # within max-age: no request at all
+    assert await fresh.get(f"{shop.base}/page") == first and len(shop.seen) == 2
+
+
+@pytest.mark.asyncio
+async def test_retry_after_holds_the_host_off(ai, shop, tmp_path):
+    shop.busy = 1
+    http = _http(ai, tmp_path)
+    started = time.monotonic()
+    assert await http.get(f"{shop.base}/busy", cacheable=False) == b"ok"
+    assert time.monotonic() - started >= 0.9              # waited out Retry-After: 1
+    assert [p for p, _, _ in shop.seen] == ["/busy", "/busy"]
+
+
+@pytest.mark.asyncio
+async def test_a_killed_crawl_resumes_from_its_checkpoint(ai, shop, tmp_path):
+    cats = [ai.Category(url=f"{shop.base}/de/papers/{n}", segments=["papers", str(n)]) for n in (1, 2)]
+    guid_2 = "2".zfill(36)
+    shop.broken.add(guid_2)
+    checkpoint = ai.CrawlCheckpoint(tmp_path / "crawl.jsonl", "en")
+
+    crawled, resumed = await ai.crawl_categories(_http(ai, tmp_path), cats, "en", checkpoint=checkpoint)
+    assert resumed == 0 and len(crawled[0][1]) == 4 and crawled[1][2]          # 2 pages x 2; one error
+    assert len(checkpoint) == 1
+
+    shop.broken.clear()
+    shop.seen.clear()
+    again = ai.CrawlCheckpoint(tmp_path / "crawl.jsonl", "en")                 # a new process
+    crawled, resumed = await ai.crawl_categories(_http(ai, tmp_path), cats, "en", checkpoint=again)
+    assert resumed == 1 and [err for _, _, err in crawled] == [None, None]
+    assert crawled[0][1] == [{"identifier": f"{'1'.zfill(36)[-4:]}-{p}-{n}", "name": f"Item {n}"}
+                             for p in (1, 2) for n in range(2)]
+    assert {q.split("hierarchicalCategoryId=")[1][:36] for p, q, _ in shop.seen if p == "/api/shop/products"} \
+        == {guid_2}                                                            # only the failed one
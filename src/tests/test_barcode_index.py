@@ -0,0 +1,136 @@
+"""In-process barcode index — the till scan path without the per-scan DB walk.
+
+Both the primary code and any alias resolve from the one map. A price or alias edit drops it on
+commit; the stock decrement every sale makes does not, or the index would never survive a busy
+hour. A build that raced a write is thrown away rather than installed, and a stale hit that
+slipped through heals itself through the DB fallback.
+"""
+import uuid
+from decimal import Decimal
+
+import pytest
+
+from src.db.models.product_model import ProductModel, ProductBarcodeModel
+from src.routes import pos_router
+from src.services import barcode_index as bi
+
+
+async def _make_product(db, *, barcode, price="9.90", active=True):
+    p = ProductModel(sku=f"BIX-{uuid.uuid4().hex[:8]}", name="Rolling papers", price=Decimal(price),
+                     barcode=barcode, is_active=active, product_class="standard")
+    db.add(p)
+    await db.commit()
+    await db.refresh(p)
+    return p
+
+
+@pytest.fixture
+def index(monkeypatch):
+    """A fresh index swapped in for the module singleton, so no test sees another's build."""
+    fresh = bi.BarcodeIndex()
+    monkeypatch.setattr(bi, "barcode_index", fresh)
+    monkeypatch.setattr(pos_router, "barcode_index", fresh)
+    return fresh
+
+
+@pytest.mark.asyncio
+async def test_resolves_primary_and_alias_codes(db_session, index):
+    p = await _make_product(db_session, barcode="7610000000017")
+    db_session.add(ProductBarcodeModel(product_id=p.id, barcode="7610000000024"))
+    await db_session.commit()
+
+    primary = await index.lookup(db_session, "7610000000017")
+    alias = await index.lookup(db_session, "7610000000024")
+    assert primary is not None and alias is not None
+    assert primary.product_id == alias.product_id == p.id
+    assert primary.price == Decimal("9.90")
+    assert primary.is_active is True
+    assert await index.lookup(db_session, "0000000000000") is None
+
+
+@pytest.mark.asyncio
+async def test_price_edit_invalidates_on_commit(db_session, index):
+    p = await _make_product(db_session, barcode="7610000000031")
+    await index.lookup(db_session, "7610000000031")
+    built = index.version
+
+    p.price = Decimal("12.50")
+    await db_session.commit()
+
+    assert index.version == built + 1
+    assert (await index.lookup(db_session, "7610000000031")).price == Decimal("12.50")
+
+
+@pytest.mark.asyncio
+async def test_stock_decrement_keeps_the_index(db_session, index):
+    """A sale moves stock on every checkout — that must not force a rebuild per sale."""
+    p = await _make_product(db_session, barcode="7610000000048")
+    await index.lookup(db_session, "7610000000048")
+    built = index.version
+
+    p.stock_quantity = (p.stock_quantity or 0) - 1
+    await db_session.commit()
+
+    assert index.version == built
+
+
+@pytest.mark.asyncio
+async def test_rolled_back_write_does_not_invalidate(db_session, index):
+    p = await _make_product(db_session, barcode="7610000000055")
+    await index.lookup(db_session, "7610000000055")
+    built = index.version
+
+    p.price = Decimal("1.00")
+    await db_session.flush()
+    await db_session.rollback()
+
+    assert index.version == built
+
+
+@pytest.mark.asyncio
+async def test_rolled_back_savepoint_keeps_the_earlier_write(db_session, index):
+    p = await _make_product(db_session, barcode="7610000000093")
+    await index.lookup(db_session, "7610000000093")
+    built = index.version
+
+    p.price = Decimal("3.20")
+    await db_session.flush()
+    with pytest.raises(RuntimeError):
+        async with db_session.begin_nested():          # e.g. a report row that failed mid-sale
+            raise RuntimeError("the nested step fails")
+    await db_session.commit()
+
+    assert index.version == built + 1
+
+
+@pytest.mark.asyncio
+async def test_build_racing_a_write_is_not_installed(db_session, index, monkeypatch):
+    await _make_product(db_session, barcode="7610000000062")
+    real_execute = db_session.execute
+    calls = {"n": 0}
+
+    async def _execute_then_write(*a, **kw):
+        res = await real_execute(*a, **kw)
+        calls["n"] += 1
+        if calls["n"] == 1:
+            index.invalidate()          # a write commits between the two build queries
+        return res
+
+    monkeypatch.setattr(db_session, "execute", _execute_then_write)
+    await index.lookup(db_session, "7610000000062")
+    assert not index._fresh()           # stale read never installed as current
+
+
+@pytest.mark.asyncio
+async def test_scan_lookup_heals_a_stale_hit(db_session, index):
+    """Another worker deleted the row: the index still names it, the PK load comes back empty,
+    and the lookup invalidates + falls back to the DB instead of serving a ghost."""
+    p = await _make_product(db_session, barcode="7610000000079")
+    await index.lookup(db_session, "7610000000079")
+    index._codes["7610000000086"] = bi.BarcodeEntry(
+        uuid.uuid4(), Decimal("1.00"), None, None, "standard", True, False)
+    built = index.version
+
+    assert await pos_router._scan_lookup(db_session, "7610000000086") is None
+    assert index.version == built + 1
+    assert (await pos_router._scan_lookup(db_session, " 7610000000079\r")).id == p.id
@@ -0,0 +1,186 @@
+# Tests for src.services.barcode_integrity -- the seal sweep's findings kept as standing rows.
+# Editing one product's barcode queues that code, and the refresh recomputes only what was queued,
+# so fixing a clash clears its finding while an unrelated edit leaves the others standing. The
+# manual reverify rebuilds everything and streams its progress through to "done".
+# The queue is filled by database triggers: on SQLite by the conftest restatement, whose firing
+# columns are checked against the Postgres DDL; the Postgres DDL itself runs against
+# POSTGRES_TEST_DB when that database is reachable.
+
+import re
+import uuid
+
+import pytest
+from sqlalchemy import create_engine, delete, exc, func, insert, make_url, select, update
+
+from src.db.models import (BarcodeIntegrityDirtyModel, BarcodeIntegrityFindingModel, LineItemModel,
+                           ProductBarcodeModel, ProductModel)
+from src.services import barcode_integrity
+
+pytestmark = pytest.mark.usefixtures("barcode_integrity_triggers")
+
+
+def _p(name, barcode=None, active=True):
+    return ProductModel(sku=f"BI-{uuid.uuid4().hex[:8]}", name=name, price=1.0, is_active=active,
+                        barcode=barcode)
+
+
+async def _fresh(db):
+    await db.execute(delete(LineItemModel))
+    await db.execute(delete(ProductBarcodeModel))
+    await db.execute(delete(ProductModel))
+    await db.commit()
+    await barcode_integrity.refresh(db)        # drain what the deletes queued
+
+
+def _check(res, key):
+    return next(c for c in res["checks"] if c["key"] == key)
+
+
+@pytest.mark.asyncio
+async def test_writes_queue_and_refresh_maintains_findings(db_session):
+    await _fresh(db_session)
+    pink = _p("Integrity Pink", barcode="77001")
+    black = _p("Integrity Black", barcode="77002")
+    db_session.add_all([pink, black])
+    await db_session.commit()
+    db_session.add(ProductBarcodeModel(product_id=black.id, barcode="77001"))
+    await db_session.commit()
+
+    queued = (await db_session.execute(select(BarcodeIntegrityDirtyModel.barcode))).scalars().all()
+    assert "77001" in queued and not any(k.full_sweep for k in (await db_session.execute(
+        select(BarcodeIntegrityDirtyModel))).scalars())
+
+    await barcode_integrity.refresh(db_session)
+    res = await barcode_integrity.report(db_session)
+    assert res["pending_changes"] == 0
+    assert [f["barcode"] for f in _check(res, "collision")["findings"]] == ["77001"]
+
+    # the fix: drop the alias → its finding goes, nothing else recomputed
+    alias = (await db_session.execute(select(ProductBarcodeModel).where(
+        ProductBarcodeModel.barcode == "77001"))).scalar_one()
+    await db_session.delete(alias)
+    await db_session.commit()
+    stats = await barcode_integrity.refresh(db_session)
+    assert stats["full"] is False and stats["recomputed"] == 1
+    assert (await barcode_integrity.report(db_session))["clean"] is True
+
+
+@pytest.mark.asyncio
+async def test_discontinuing_a_twin_strands_its_code(db_session):
+    await _fresh(db_session)
+    live = _p("Integrity Gas 250ml", barcode="77010")
+    dead = _p("Integrity Gas 250ml", barcode="77011")
+    db_session.add_all([live, dead])
+    await db_session.commit()
+    await barcode_integrity.refresh(db_session)
+    assert (await barcode_integrity.report(db_session))["clean"] is True
+
+    dead.is_active = False
+    await db_session.commit()
+    await barcode_integrity.refresh(db_session)
+    st = _check(await barcode_integrity.report(db_session), "stranded_inactive")
+    assert [(f["barcode"], f["sku"]) for f in st["findings"]] == [("77011", dead.sku)]
+
+    # renaming the live row away removes the same-name twin → the finding is recomputed away
+    live.name = "Integrity Butane 250ml"
+    await db_session.commit()
+    await barcode_integrity.refresh(db_session)
+    assert _check(await barcode_integrity.report(db_session), "stranded_inactive")["count"] == 0
+
+
+@pytest.mark.asyncio
+async def test_reverify_streams_progress_and_rebuilds(db_session, monkeypatch):
+    await _fresh(db_session)
+    monkeypatch.setattr(barcode_integrity, "CHUNK", 2)
+    a = _p("Integrity Dup A", barcode="77020")
+    b = _p("Integrity Dup B", barcode="77021")
+    db_session.add_all([a, b, _p("Integrity Solo", barcode="77022")])
+    await db_session.commit()
+    db_session.add(ProductBarcodeModel(product_id=b.id, barcode="77020"))
+    await db_session.commit()
+    await db_session.execute(delete(BarcodeIntegrityFindingModel))      # lost / never built
+    await db_session.commit()
+
+    steps = [p async for p in barcode_integrity.reverify(db_session)]
+    assert steps[0] == {"phase": "start", "total": 3}
+    assert [p["done"] for p in steps if p["phase"] == "verify"] == [2, 3]
+    assert steps[-1]["phase"] == "done" and steps[-1]["findings"] == 1
+    res = await barcode_integrity.report(db_session)
+    assert res["pending_changes"] == 0
+    assert [f["barcode"] for f in _check(res, "collision")["findings"]] == ["77020"]
+
+
+@pytest.mark.asyncio
+async def test_request_path_leaves_a_full_sweep_queued(db_session, monkeypatch):
+    await _fresh(db_session)
+    db_session.add(_p("Integrity Request", barcode="77030"))
+    db_session.add(BarcodeIntegrityDirtyModel(barcode=None, name=None, full_sweep=True))
+    await db_session.commit()
+
+    async def _no_full_pass(db):
+        raise AssertionError("the sweep request ran a full re-verification")
+        yield
+    monkeypatch.setattr(barcode_integrity, "reverify", _no_full_pass)
+
+    stats = await barcode_integrity.refresh(db_session, full=False, wait=False, batches=1)
+    assert stats["full"] is False and stats["drained"] >= 1
+    res = await barcode_integrity.report(db_session)
+    assert res["full_sweep_pending"] is True and res["pending_changes"] == 0
+
+
+def _firing(ddl: str) -> dict:
+    """{table: (events, update columns)} of the CREATE TRIGGER statements in `ddl`."""
+    out = {}
+    for clause, table in re.findall(r"AFTER\s+(.+?)\s+ON\s+(\w+)", ddl):
+        events, cols = out.setdefault(table, (set(), set()))
+        events.update(re.findall(r"INSERT|UPDATE|DELETE", clause))
+        of = re.search(r"UPDATE OF ([\w, ]+?)(?: OR |$)", clause)
+        if of:
+            cols.update(c.strip() for c in of.group(1).split(","))
+    return out
+
+
+def test_sqlite_triggers_fire_on_the_postgres_columns(barcode_integrity_triggers):
+    from src.db import database
+
+    pg = _firing("\n".join(database._BARCODE_INTEGRITY_DDL))
+    assert pg == _firing("\n".join(barcode_integrity_triggers))
+    assert pg == {"products": ({"INSERT", "UPDATE", "DELETE"}, {"barcode", "name", "is_active"}),
+                  "product_barcodes": ({"INSERT", "UPDATE", "DELETE"}, {"barcode", "product_id"})}
+
+
+def test_postgres_triggers_queue_what_a_finding_depends_on():
+    from src.core.config import settings
+    from src.db import database
+    from src.db.models.base import Base
+
+    url = make_url(settings.POSTGRES_SYNC_URI).set(database=settings.POSTGRES_TEST_DB)
+    engine = create_engine(url, connect_args={"connect_timeout": 3})
+    try:
+        conn = engine.connect()
+    except exc.OperationalError:
+        pytest.skip("POSTGRES_TEST_DB is not reachable")
+    P, A, D = ProductModel.__table__, ProductBarcodeModel.__table__, BarcodeIntegrityDirtyModel.__table__
+    tx = conn.begin()                                 # DDL included: everything is rolled back
+    try:
+        Base.metadata.create_all(conn)
+        for ddl in database._BARCODE_INTEGRITY_DDL[:-1]:    # the triggers, not the first-deploy sweep
+            conn.exec_driver_sql(ddl)
+        start = conn.execute(select(func.coalesce(func.max(D.c.id), 0))).scalar()
+        pid = conn.execute(insert(P).values(sku=f"BI-{uuid.uuid4().hex[:8]}", name="Integrity PG", price=1,
+                                            barcode="77090").returning(P.c.id)).scalar()
+        conn.execute(update(P).where(P.c.id == pid).values(stock_quantity=4))   # not an integrity event
+        conn.execute(insert(A).values(product_id=pid, barcode="77091"))
+        conn.execute(update(P).where(P.c.id == pid).values(name="Integrity PG 2"))
+        conn.execute(delete(P).where(P.c.id == pid))                             # the alias goes by cascade
+        queued = conn.execute(select(D.c.barcode, D.c.name).where(D.c.id > start)).all()
+    finally:
+        tx.rollback()
+        conn.close()
+        engine.dispose()
+    assert sorted(map(tuple, queued), key=repr) == sorted([
+        ("77090", "integrity pg"),                                  # insert
+        ("77091", None),                                            # alias added
+        ("77090", "integrity pg"), ("77090", "integrity pg 2"),     # rename: old and new
+        ("77090", "integrity pg 2"), ("77091", None),               # delete, and the cascaded alias
+    ], key=repr)
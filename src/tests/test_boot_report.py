@@ -0,0 +1,49 @@
+# Tests for the boot path's bookkeeping: the per-phase timing report, and the schema ledger keys
+# that let a restart skip boot DDL it already applied.
+# A slow boot should say which phase was slow, and a phase that blows up is marked in the report
+# before the error goes on up. The ledger keys must survive re-indenting a statement but not a
+# change to it, and the metadata fingerprint only moves when a table's shape does.
+
+import pytest
+from sqlalchemy import Column, Integer, Table
+
+from src.core.boot_report import BootReport
+from src.db import database
+from src.db.models.base import Base
+
+
+@pytest.mark.asyncio
+async def test_phases_are_timed_and_failures_marked():
+    report = BootReport()
+    async with report.phase("db.init"):
+        pass
+    with pytest.raises(RuntimeError):
+        async with report.phase("seed.hr"):
+            raise RuntimeError("no employees table")
+    report.skip("seed.customers", "HX_SEED_DEMO=false")
+    report.mark_ready()
+
+    out = report.as_dict()
+    assert out["ready_after_s"] is not None
+    assert [(p["name"], p["status"]) for p in out["phases"]] == [
+        ("db.init", "ok"), ("seed.hr", "failed"), ("seed.customers", "skipped")]
+    assert out["phases"][1]["detail"] == "no employees table"
+
+
+def test_statement_key_ignores_layout_only():
+    stmt = "ALTER TABLE products ADD COLUMN IF NOT EXISTS catalog_version BIGINT"
+    assert database._stmt_hash(stmt) == database._stmt_hash(f"\n    {stmt.replace(' ', '  ')}\n")
+    assert database._stmt_hash(stmt) != database._stmt_hash(stmt.replace("BIGINT", "INTEGER"))
+    keys = [database._stmt_hash(s) for s in database._ADDITIVE_COLUMNS + database._DDL_MIGRATIONS]
+    assert len(keys) == len(set(keys)), "two boot statements share a ledger key"
+
+
+def test_metadata_fingerprint_tracks_table_shapes():
+    before = database._metadata_fingerprint()
+    assert before == database._metadata_fingerprint()
+    t = Table("zz_boot_fingerprint_probe", Base.metadata, Column("id", Integer, primary_key=True))
+    try:
+        assert database._metadata_fingerprint() != before
+    finally:
+        Base.metadata.remove(t)
+    assert database._metadata_fingerprint() == before
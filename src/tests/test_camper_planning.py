@@ -0,0 +1,131 @@
+# Tests for src.services.camper_planning -- the set-based reads behind the bay timeline, calendar,
+# dashboard and reminders. SQLite session.
+# Each screen used to load a bay and then its jobs one by one; now a shop of 12 bays x 60 jobs
+# costs the same number of statements as 2 x 2 (counted at the engine by the fixture below).
+# The snapshot still has to put each job on its own bay, and a committed booking drops the shared
+# snapshot so the planner sees it on the next refresh.
+
+import uuid
+from contextlib import contextmanager
+from datetime import date, timedelta
+
+import pytest
+from sqlalchemy import event
+
+from src.db.models.camper_bay_model import BayType, CamperBayModel
+from src.db.models.camper_customer_model import CamperCustomerModel
+from src.db.models.camper_service_job_model import CamperServiceJobModel, JobStatus
+from src.db.models.camper_vehicle_model import CamperVehicleModel, VehicleType
+from src.services import camper_planning
+
+MONDAY = date(2026, 6, 1)
+SUNDAY = MONDAY + timedelta(days=6)
+
+
+@pytest.fixture
+def count_queries(test_db_engine):
+    """Benchmark fixture: `with count_queries() as n:` -> n[0] statements run inside the block."""
+    @contextmanager
+    def counting():
+        n = [0]
+
+        def _count(*_a, **_k):
+            n[0] += 1
+        event.listen(test_db_engine.sync_engine, "before_cursor_execute", _count)
+        try:
+            yield n
+        finally:
+            event.remove(test_db_engine.sync_engine, "before_cursor_execute", _count)
+    return counting
+
+
+async def _shop(db, bays: int, jobs_per_bay: int) -> list[CamperBayModel]:
+    tag = uuid.uuid4().hex[:6]
+    made = [CamperBayModel(name=f"Bay {tag}-{i}", bay_type=BayType.GENERAL, display_order=i) for i in range(bays)]
+    db.add_all(made)
+    await db.flush()
+    for b, bay in enumerate(made):
+        for k in range(jobs_per_bay):
+            cust = CamperCustomerModel(name=f"Cust {tag}-{b}-{k}", phone="+41 79 000 00 00")
+            veh = CamperVehicleModel(registration_plate=f"TI {tag}{b}{k}", vehicle_type=VehicleType.CAMPERVAN)
+            db.add_all([cust, veh])
+            await db.flush()
+            multi = k % 2 == 0
+            db.add(CamperServiceJobModel(
+                job_number=f"JOB-{tag}-{b}-{k}", title="Service", vehicle_id=veh.id, customer_id=cust.id,
+                bay_id=bay.id, status=JobStatus.IN_PROGRESS,
+                start_date=MONDAY + timedelta(days=k % 5) if multi else None,
+                end_date=MONDAY + timedelta(days=k % 5 + 1) if multi else None,
+                scheduled_date=None if multi else MONDAY + timedelta(days=k % 7),
+                follow_up_required=True, next_service_date=MONDAY + timedelta(days=30 + k),
+            ))
+    await db.commit()
+    return made
+
+
+async def _reads(db):
+    await camper_planning.load_snapshot(db, MONDAY, SUNDAY)
+    await camper_planning.load_snapshot(db, None, None)       # the calendar's open-ended range
+    await camper_planning.load_summary(db, MONDAY)
+    await camper_planning.load_reminders(db)
+
+
+@pytest.mark.asyncio
+async def test_query_count_is_constant_as_the_shop_grows(db_session, count_queries):
+    await _shop(db_session, bays=2, jobs_per_bay=2)
+    with count_queries() as small:
+        await _reads(db_session)
+
+    await _shop(db_session, bays=12, jobs_per_bay=5)
+    with count_queries() as big:
+        await _reads(db_session)
+
+    assert small[0] == big[0] == 6      # snapshot 2+2, summary 1, reminders 1
+
+
+@pytest.mark.asyncio
+async def test_snapshot_puts_jobs_on_their_bays(db_session):
+    bays = await _shop(db_session, bays=2, jobs_per_bay=3)
+    snap = await camper_planning.load_snapshot(db_session, MONDAY, SUNDAY)
+    rows = snap.by_bay()
+
+    ours = rows[bays[0].id]
+    assert [j.multi_day for j in ours] == [True, True, False]        # multi-day first, then scheduled
+    assert all(j.vehicle_plate and j.customer_name for j in ours)
+    assert {b.id for b in bays} <= {b.id for b in snap.bays}
+
+    summary = await camper_planning.load_summary(db_session, MONDAY)
+    assert summary.jobs_in_progress >= 6 and summary.bay_utilization > 0
+
+
+@pytest.mark.asyncio
+async def test_commit_invalidates_the_shared_snapshot(db_session):
+    cache = camper_planning.planning_cache
+    bays = await _shop(db_session, bays=1, jobs_per_bay=1)
+    first = await cache.snapshot(db_session, MONDAY, SUNDAY)
+    assert await cache.snapshot(db_session, MONDAY, SUNDAY) is first    # served from the cache
+
+    bays[0].name = "Renamed bay"
+    await db_session.commit()
+    fresh = await cache.snapshot(db_session, MONDAY, SUNDAY)
+    assert fresh is not first
+    assert "Renamed bay" in {b.name for b in fresh.bays}
+
+
+@pytest.mark.asyncio
+async def test_a_rolled_back_savepoint_keeps_the_earlier_write(db_session):
+    cache = camper_planning.planning_cache
+    bays = await _shop(db_session, bays=1, jobs_per_bay=1)
+    first = await cache.snapshot(db_session, MONDAY, SUNDAY)
+
+    bays[0].name = "Renamed before the savepoint"
+    await db_session.flush()
+    try:
+        async with db_session.begin_nested():
+            raise RuntimeError("the nested step fails")
+    except RuntimeError:
+        pass
+    await db_session.commit()
+    fresh = await cache.snapshot(db_session, MONDAY, SUNDAY)
+    assert fresh is not first
+    assert "Renamed before the savepoint" in {b.name for b in fresh.bays}
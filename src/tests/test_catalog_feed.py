@@ -0,0 +1,75 @@
+# Tests for src.services.catalog_feed -- the offline till's delta sync. SQLite session: the
+# Postgres trigger stamps catalog_version, so here the versions are set by hand.
+# A till that last synced at version N asks for what changed since; the page it gets back holds
+# only versions in (since, head], columnar, alias barcodes included. A deactivated product or a
+# tombstone reaches the till as a delete, the next page picks up at the cursor with nothing
+# skipped, and a till whose cursor is ahead of the DB (restored backup) is told to reload in full.
+
+import random
+import uuid
+
+import pytest
+
+from src.db.models import CatalogTombstoneModel, ProductBarcodeModel, ProductModel
+from src.services import catalog_feed
+
+
+def _product(v, active=True, **kw):
+    tag = uuid.uuid4().hex[:8]
+    return ProductModel(sku=f"FEED-{tag}", name=f"Paper {tag}", price=2.5, barcode=f"76{tag}",
+                        is_active=active, catalog_version=v, **kw)
+
+
+@pytest.fixture
+def base():
+    return random.randint(10**9, 10**12)          # the test DB is not wiped: own version range
+
+
+@pytest.mark.asyncio
+async def test_delta_page_has_upserts_aliases_and_deletes(db_session, base):
+    old, new, gone = _product(base - 5), _product(base + 1), _product(base + 2, active=False)
+    db_session.add_all([old, new, gone])
+    await db_session.flush()
+    db_session.add(ProductBarcodeModel(product_id=new.id, barcode=f"case-{uuid.uuid4().hex[:8]}"))
+    dead = uuid.uuid4()
+    db_session.add(CatalogTombstoneModel(product_id=dead, catalog_version=base + 3))
+    await db_session.commit()
+
+    head = await catalog_feed.catalog_head(db_session)
+    page = await catalog_feed.catalog_changes(db_session, base, head)
+    cols = page["cols"]
+    rows = [dict(zip(cols, r)) for r in page["rows"]]
+    mine = [r for r in rows if r["id"] == str(new.id)]
+    assert len(mine) == 1 and mine[0]["aliases"][0].startswith("case-")
+    assert mine[0]["price"] == 2.5 and mine[0]["v"] == base + 1
+    assert str(old.id) not in {r["id"] for r in rows}                # before the cursor
+    assert {str(gone.id), str(dead)} <= set(page["deleted"])
+    assert page["cursor"] == head and page["more"] is False and page["reset"] is False
+
+
+@pytest.mark.asyncio
+async def test_paging_resumes_at_the_cursor(db_session, base):
+    ps = [_product(base + i) for i in range(1, 6)]
+    db_session.add_all(ps)
+    await db_session.commit()
+
+    seen, since = [], base
+    head = base + 5                                 # pin the head to this test's own range
+    while True:
+        page = await catalog_feed.catalog_changes(db_session, since, head, limit=2)
+        seen += [r[0] for r in page["rows"]]
+        since = page["cursor"]
+        if not page["more"]:
+            break
+    assert seen == [str(p.id) for p in ps] and since == head
+
+
+@pytest.mark.asyncio
+async def test_cursor_ahead_of_db_is_a_reset(db_session, base):
+    db_session.add(_product(base + 1))
+    await db_session.commit()
+    head = await catalog_feed.catalog_head(db_session)
+    page = await catalog_feed.catalog_changes(db_session, head + 100, head)
+    assert page["reset"] is True and page["full"] is True and page["deleted"] == []
+    assert catalog_feed.etag_for(7, head, 50) == catalog_feed.etag_for(7, head, 50) != \
+        catalog_feed.etag_for(7, head + 1, 50)
@@ -319,14 +319,16 @@ async def test_suggest_next_threads_language_and_dedups():
     # must generate in the active language (lang clause reaches the brain) and still dedup.
     seen = {}
 
-    async def fake_brain(system, user, json_mode=False, schema=None, model=None):
+    async def fake_brain(system, user, json_mode=False, schema=None, model=None, cache_ttl=None):
         seen["system"] = system
+        seen["cache_ttl"] = cache_ttl
         return '{"suggestions": ["Parlami di te", "parlami di te", "Chiama un Maestro"]}'
 
     with patch.object(cg, "_brain_chat", fake_brain):
         out = await cg.suggest_next([{"role": "member", "content": "ciao"}], cg.blank_record(), language="it")
     assert "ITALIAN" in seen["system"]                      # chips written in the active language
     assert out == ["Parlami di te", "Chiama un Maestro"]    # case-insensitive dedup, order kept
+    assert seen["cache_ttl"] == cg.SUGGEST_CACHE_TTL        # deterministic + cached chips
 
 
 @pytest.mark.asyncio
@@ -627,3 +629,25 @@ def test_merge_without_fiction_terms_is_unchanged():
     old = cg.merge_record(cg.blank_record(), {"affinities": ["innovation lab", "baking"]})
     m = cg.merge_record(old, {"affinities": ["teaching"]})   # no fiction_terms -> no scrub
     assert "innovation lab" in [a.lower() for a in m["affinities"]]
+
+
+def test_think_filter_hides_reasoning_split_across_chunks():
+    f = cg._ThinkFilter()
+    chunks = ["  <thi", "nk>weighing", " it</th", "ink>\n\nCiao", " Ana <", "b>!</b>"]
+    assert "".join(f.feed(c) for c in chunks) == "Ciao Ana <b>!</b>"
+
+
+@pytest.mark.asyncio
+async def test_concierge_reply_stream_ends_with_stripped_result():
+    from src.llm import LLMResult
+
+    async def fake_stream(system, user, model=None, model_local=None):
+        for d in ("<think>hmm</think>", "Hello", " there"):
+            yield d
+        yield LLMResult(text="<think>hmm</think>Hello there", tokens=9, model="m")
+
+    with patch.object(cg, "_brain_stream", fake_stream):
+        parts = [p async for p in cg.concierge_reply_stream([{"role": "member", "content": "hi"}],
+                                                            cg.blank_record())]
+    assert parts[:-1] == ["Hello", " there"]
+    assert (parts[-1].text, parts[-1].tokens) == ("Hello there", 9)
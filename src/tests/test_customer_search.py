@@ -0,0 +1,53 @@
+# Tests for src.services.customer_search -- the till's member lookup. SQLite session: the
+# Postgres trigram path shares the ranking, so the order contract is checked here.
+# Typing "max" at the till should put the member whose handle IS max first, then handles starting
+# with it, then names or instagram handles, then anything containing it. Inactive members stay
+# hidden, a scanned HLX- card in any case goes straight to its member, and 079... finds +4179....
+
+import uuid
+
+import pytest
+
+from src.db.models import CustomerModel
+from src.services import customer_search
+
+
+def _member(handle, **kw):
+    return CustomerModel(handle=handle, **kw)
+
+
+@pytest.mark.asyncio
+async def test_ranked_exact_then_prefix_then_name_then_contains(db_session):
+    tag = uuid.uuid4().hex[:6]
+    db_session.add_all([
+        _member(f"a{tag}zed"),                                    # contains
+        _member(f"{tag}zed"),                                     # prefix
+        _member(f"larry{tag}x", real_name=f"{tag} Larry"),       # real-name prefix
+        _member(tag),                                             # exact
+        _member(f"{tag}gone", is_active=False),
+    ])
+    await db_session.commit()
+
+    hits = [c.handle for c in await customer_search.search(db_session, tag.upper(), limit=10)]
+    assert hits == [tag, f"{tag}zed", f"larry{tag}x", f"a{tag}zed"]
+
+
+@pytest.mark.asyncio
+async def test_card_code_is_a_direct_hit(db_session):
+    m = _member(f"card{uuid.uuid4().hex[:6]}")
+    code = m.generate_qr_code()
+    db_session.add(m)
+    await db_session.commit()
+
+    assert [c.id for c in await customer_search.search(db_session, code.lower())] == [m.id]
+    assert (await customer_search.find_by_qr(db_session, f"  {code.lower()} ")).id == m.id
+    assert await customer_search.find_by_qr(db_session, "HLX-00000000") is None
+
+
+def test_phone_and_code_normalization():
+    assert customer_search.normalize_phone("079 123 45 67") == customer_search.normalize_phone("+41 79 123 45 67")
+    assert customer_search.normalize_phone("0041 79 123 45 67") == "41791234567"
+    assert customer_search._phone_term("45 67") == "4567"
+    assert customer_search._phone_term("poppie") is None
+    assert customer_search.normalize_qr(" hlx-0a1b2c3d ") == "HLX-0A1B2C3D"
+    assert customer_search.normalize_qr("HLX-XYZ") is None
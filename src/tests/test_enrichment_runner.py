@@ -0,0 +1,109 @@
+"""Catalog enrichment batch runner — the LLM pass over thousands of items, concurrent + resumable.
+
+Thousands of items go to the model in batches packed up to the prompt-token budget, several at
+once. A SKU the model skipped is asked again and a batch that keeps failing is split in two. Every
+answer is checkpointed, so a second run over the same file only asks what the first left open,
+a SKU listed twice in the input is asked (and counted) once, and a brain that stops answering ends
+the run.
+"""
+import asyncio
+
+import pytest
+
+from src.llm import LLMResult
+from src.services import catalog_enrichment as ce
+
+
+def _items(n, name="Rolling papers king size slim unbleached"):
+    return [{"sku": f"TAM-{i}", "name": f"{name} {i}", "group": "Papers & Co",
+             "artemis_path": "papers-co/papers", "attributes": {}, "allowed": ["Papers"]} for i in range(n)]
+
+
+def _row(sku):
+    return {"category": "Papers", "description": f"about {sku}", "category_confidence": 0.9}
+
+
+def test_batches_fill_the_token_budget():
+    items = _items(30)
+    one = ce._item_prompt_chars(items[0]) / ce._CHARS_PER_TOKEN
+    batches = ce.plan_batches(items, budget_tokens=int(one * 6), max_items=25)
+    assert [it["sku"] for b in batches for it in b] == [it["sku"] for it in items]   # order kept
+    assert all(1 <= len(b) <= 6 for b in batches) and len(batches) >= 5
+    assert max(len(b) for b in ce.plan_batches(items, budget_tokens=10 ** 6, max_items=7)) == 7
+    assert [len(b) for b in ce.plan_batches(items[:3], budget_tokens=1)] == [1, 1, 1]
+
+
+@pytest.mark.asyncio
+async def test_concurrent_run_retries_and_resumes(tmp_path, monkeypatch):
+    live = peak = 0
+    asked: list[str] = []
+    skipped_once: set = set()
+
+    async def _call(batch, target, client=None):
+        nonlocal live, peak
+        live += 1
+        peak = max(peak, live)
+        await asyncio.sleep(0.01)
+        live -= 1
+        skus = [it["sku"] for it in batch]
+        asked.extend(skus)
+        if "TAM-7" in skus and len(batch) > 1:
+            raise ValueError("unparseable")                       # split until TAM-7 stands alone
+        out = {}
+        for s in skus:
+            if s == "TAM-3" and s not in skipped_once:
+                skipped_once.add(s)                               # the model drops it once
+                continue
+            if s != "TAM-7":
+                out[s] = _row(s)
+        return out, LLMResult(text="", tokens=100 * len(batch), model="test-model")
+    monkeypatch.setattr(ce, "_llm_batch_call", _call)
+
+    items = _items(40)
+    cp = tmp_path / "run.jsonl"
+    results, stats = await ce.run_enrichment(items, None, checkpoint=ce.Checkpoint(cp),
+                                             concurrency=4, max_items=5)
+    assert peak > 1
+    assert set(results) == {it["sku"] for it in items} - {"TAM-7"}
+    assert stats.enriched == 39 and stats.failed == 1              # TAM-7 gave up after its tries
+    assert asked.count("TAM-3") == 2 and stats.retried_calls >= 1
+    report = stats.report()
+    assert report["tokens_per_item"] and report["retry_rate"] > 0 and report["model"] == "test-model"
+
+    asked.clear()
+    results2, stats2 = await ce.run_enrichment(items, None, checkpoint=ce.Checkpoint(cp), concurrency=4)
+    assert asked.count("TAM-7") >= 1 and set(asked) == {"TAM-7"}   # only the unfinished SKU
+    assert stats2.resumed == 39 and results2["TAM-0"] == _row("TAM-0")
+
+
+@pytest.mark.asyncio
+async def test_a_dead_brain_stops_the_run(monkeypatch):
+    calls = 0
+
+    async def _down(batch, target, client=None):
+        nonlocal calls
+        calls += 1
+        raise ConnectionError("refused")
+    monkeypatch.setattr(ce, "_llm_batch_call", _down)
+
+    results, stats = await ce.run_enrichment(_items(200), None, concurrency=2, max_items=5)
+    assert results == {} and stats.aborted and stats.failed == 200
+    assert calls < 20
+
+
+@pytest.mark.asyncio
+async def test_a_repeated_sku_is_asked_once(monkeypatch):
+    asked: list[str] = []
+
+    async def _call(batch, target, client=None):
+        asked.extend(it["sku"] for it in batch)
+        return {it["sku"]: _row(it["sku"]) for it in batch}, LLMResult(text="", tokens=10, model="m")
+    monkeypatch.setattr(ce, "_llm_batch_call", _call)
+
+    items = _items(6) + _items(2)                                     # an export listing TAM-0/1 twice
+    seen = []
+    results, stats = await asyncio.wait_for(ce.run_enrichment(
+        items, None, concurrency=2, max_items=3, progress=lambda done, total: seen.append((done, total))), 5)
+    assert sorted(asked) == sorted(f"TAM-{i}" for i in range(6)) and len(results) == 6
+    assert stats.items == 6 and stats.enriched == 6
+    assert sorted(seen) == [(3, 6), (6, 6)]                           # counted over the distinct SKUs
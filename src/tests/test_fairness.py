@@ -0,0 +1,94 @@
+# Tests for src.compute.fairness -- the FairBrain gate. Pure asyncio: no Redis, no brain.
+# One user alone may fill the brain; with two busy users each is capped at half (total // active).
+# A freed slot wakes the one waiter allowed to take it rather than every waiter at once, and a
+# waiter cancelled in the queue leaves no slot behind.
+
+import asyncio
+
+import pytest
+
+from src.compute.fairness import FairBrain
+
+
+async def _hold(brain, owner, started: list, release: asyncio.Event):
+    async with brain.slot(owner):
+        started.append(owner)
+        await release.wait()
+
+
+async def _settle():
+    for _ in range(5):
+        await asyncio.sleep(0)
+
+
+@pytest.mark.asyncio
+async def test_alone_uses_the_whole_brain():
+    brain = FairBrain(4)
+    started, release = [], asyncio.Event()
+    tasks = [asyncio.create_task(_hold(brain, "ana", started, release)) for _ in range(6)]
+    await _settle()
+    assert len(started) == 4
+    assert brain.snapshot()["running"] == 4 and brain.waiting == {"ana": 2}
+    release.set()
+    await asyncio.gather(*tasks)
+    assert brain.snapshot()["running"] == 0 and brain.waiting == {}
+
+
+@pytest.mark.asyncio
+async def test_freed_slots_go_to_the_user_under_cap():
+    brain = FairBrain(4)
+    ana_go, bo_go = asyncio.Event(), asyncio.Event()
+    started: list = []
+    ana = [asyncio.create_task(_hold(brain, "ana", started, ana_go)) for _ in range(4)]
+    await _settle()
+    bo = [asyncio.create_task(_hold(brain, "bo", started, bo_go)) for _ in range(3)]
+    await _settle()
+    assert started.count("bo") == 0              # no preemption: ana keeps all 4
+
+    ana_go.set()
+    await asyncio.gather(*ana)
+    await _settle()
+    # ana is done -> bo alone again, cap back to 4: all three of those jobs run.
+    assert started.count("bo") == 3
+    assert brain.snapshot()["by_user"] == {"bo": 3}
+    bo_go.set()
+    await asyncio.gather(*bo)
+
+
+@pytest.mark.asyncio
+async def test_two_busy_users_split_the_brain():
+    brain = FairBrain(4)
+    started: list = []
+    gates = {o: [asyncio.Event() for _ in range(4)] for o in ("ana", "bo")}
+    tasks = [asyncio.create_task(_hold(brain, "ana", started, g)) for g in gates["ana"][:2]]
+    tasks += [asyncio.create_task(_hold(brain, "bo", started, g)) for g in gates["bo"]]
+    tasks += [asyncio.create_task(_hold(brain, "ana", started, g)) for g in gates["ana"][2:]]
+    await _settle()
+    snap = brain.snapshot()
+    assert snap["active_users"] == 2 and snap["cap_per_user"] == 2
+    assert snap["by_user"] == {"ana": 2, "bo": 2}
+
+    gates["ana"][0].set()                        # one slot frees up ...
+    await _settle()
+    assert brain.snapshot()["by_user"] == {"ana": 2, "bo": 2}   # ... and exactly one waiter took it
+    assert brain.waiting == {"ana": 1, "bo": 2}
+    for g in gates["ana"] + gates["bo"]:
+        g.set()
+    await asyncio.gather(*tasks)
+
+
+@pytest.mark.asyncio
+async def test_cancelled_waiter_leaks_no_slot():
+    brain = FairBrain(1)
+    started, release = [], asyncio.Event()
+    holder = asyncio.create_task(_hold(brain, "ana", started, release))
+    await _settle()
+    waiter = asyncio.create_task(_hold(brain, "bo", started, release))
+    await _settle()
+    waiter.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await waiter
+    assert brain.waiting == {}
+    release.set()
+    await holder
+    assert brain.snapshot()["running"] == 0 and brain.snapshot()["active_users"] == 1
@@ -212,3 +212,106 @@ async def test_run_llm_raises_after_exhausting_retries(monkeypatch):
 
 async def _no_sleep(*a, **k):
     return None
+
+
+# --- shared pooled client + deterministic response cache ------------------------------
+
+class _CountingClient(_FakeClient):
+    """A _FakeClient that counts instances, calls, and peak in-flight requests."""
+    made = 0
+    calls = 0
+    inflight = 0
+    peak = 0
+
+    def __init__(self, *a, **k):
+        _CountingClient.made += 1
+        self.is_closed = False
+
+    async def post(self, url, json=None, headers=None, timeout=None):
+        _CountingClient.calls += 1
+        _CountingClient.inflight += 1
+        _CountingClient.peak = max(_CountingClient.peak, _CountingClient.inflight)
+        import asyncio
+        await asyncio.sleep(0.01)
+        _CountingClient.inflight -= 1
+        return await super().post(url, json=json, headers=headers, timeout=timeout)
+
+
+@pytest.fixture
+def counting(monkeypatch):
+    from src.llm import client as llm
+    for k in ("made", "calls", "inflight", "peak"):
+        setattr(_CountingClient, k, 0)
+    monkeypatch.setattr(llm.httpx, "AsyncClient", _CountingClient)
+    llm.clear_cache()
+    yield llm
+    llm.clear_cache()
+
+
+@pytest.mark.asyncio
+async def test_calls_share_one_pooled_client_per_backend(counting):
+    t = ModelTarget("m", "http://pool-a")
+    for _ in range(3):
+        await run_llm("p", target=t)
+    await run_llm("p", target=ModelTarget("m2", "http://pool-a/"))   # same backend, other model
+    assert _CountingClient.made == 1 and _CountingClient.calls == 4
+    await run_llm("p", target=ModelTarget("m", "http://pool-b"))
+    assert _CountingClient.made == 2
+
+
+@pytest.mark.asyncio
+async def test_deterministic_calls_are_cached_others_are_not(counting):
+    t = ModelTarget("m", "http://cache")
+    first = await run_llm("classify", target=t, schema={"type": "object"}, temperature=0, cache_ttl=60)
+    again = await run_llm("classify", target=t, schema={"type": "object"}, temperature=0, cache_ttl=60)
+    assert _CountingClient.calls == 1
+    assert _FakeClient.captured["body"]["options"] == {"temperature": 0}
+    assert (first.cached, first.tokens) == (False, 42)
+    assert (again.cached, again.tokens, again.text) == (True, 0, "hello world")   # nothing billed
+
+    await run_llm("classify", target=t, schema={"type": "string"}, temperature=0, cache_ttl=60)
+    await run_llm("classify", target=t, schema={"type": "object"}, temperature=0.7, cache_ttl=60)
+    assert _CountingClient.calls == 3      # other schema = other key; sampling calls never cache
+
+
+@pytest.mark.asyncio
+async def test_in_flight_calls_capped_per_target(counting, monkeypatch):
+    import asyncio
+    monkeypatch.setattr(counting, "LLM_MAX_CONCURRENCY", 2)
+    t = ModelTarget("m", "http://capped")
+    await asyncio.gather(*(run_llm(f"p{i}", target=t) for i in range(6)))
+    assert _CountingClient.calls == 6 and _CountingClient.peak == 2
+
+
+# --- streaming: deltas as they arrive, then the billable LLMResult --------------------
+
+def _ndjson(*objs):
+    import json
+    return "".join(json.dumps(o) + "\n" for o in objs).encode()
+
+
+@pytest.mark.asyncio
+async def test_stream_llm_yields_deltas_then_tokens(monkeypatch):
+    import httpx
+    from src.llm import LLMResult, stream_llm
+    from src.llm import client as llm
+    monkeypatch.setattr(llm.asyncio, "sleep", _no_sleep)
+    calls = {"n": 0, "body": None}
+
+    def handler(request):
+        import json
+        calls["n"] += 1
+        if calls["n"] == 1:
+            return httpx.Response(503, text="warming up")          # retried: nothing sent yet
+        calls["body"] = json.loads(request.content)
+        return httpx.Response(200, content=_ndjson(
+            {"message": {"content": "Ciao"}, "done": False},
+            {"message": {"content": ", Ana"}, "done": False},
+            {"message": {"content": ""}, "done": True, "prompt_eval_count": 20, "eval_count": 5}))
+
+    async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as c:
+        parts = [p async for p in stream_llm("hi", target=ModelTarget("m", "http://x"), client=c)]
+    assert parts[:-1] == ["Ciao", ", Ana"]
+    assert isinstance(parts[-1], LLMResult)
+    assert (parts[-1].text, parts[-1].tokens) == ("Ciao, Ana", 25)    # billing unchanged
+    assert calls["n"] == 2 and calls["body"]["stream"] is True
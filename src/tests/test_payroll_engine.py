@@ -0,0 +1,152 @@
+"""Set-based payroll — a month's payslips from one grouped load and one bulk write.
+
+Running payroll for 13 people issues the same three writes-and-reads as running it for one: a
+grouped time-entry query, a payslip insert and an entry update. Pam's slip is checked by hand
+against the Swiss rules (remote hours at her multiplier, overtime at 125%, unpaid hours left out,
+BVG only when insured, Quellensteuer by tariff letter). Her approved entries end up paid and
+linked to the slip, and the what-if scenarios reuse the loaded month without writing anything.
+"""
+import uuid
+from datetime import date
+from decimal import Decimal
+
+import pytest
+from sqlalchemy import event, func, select
+
+from src.db.models import EmployeeModel, PaySlipModel, PayrollRunModel, TimeEntryModel
+from src.services.payroll_service import PayrollCalculator
+
+
+async def _employee(db, rate, **kw):
+    n = uuid.uuid4().hex[:8]
+    e = EmployeeModel(first_name="Pam", last_name=f"Test-{n}", date_of_birth=date(1990, 1, 1),
+                      ahv_number=f"756.{n[:4]}.{n[4:]}", email=f"{n}@test.ch", street="Seestrasse 1",
+                      postal_code="6000", city="Luzern", iban="CH9300762011623852957",
+                      employee_number=f"E-{n}", start_date=date(2030, 1, 1), status="active",
+                      hourly_rate=Decimal(rate), **kw)
+    db.add(e)
+    await db.flush()
+    return e
+
+
+def _entries(db, employee, year, month, *spec):
+    for i, (entry_type, hours, status) in enumerate(spec, 1):
+        db.add(TimeEntryModel(employee_id=employee.id, entry_date=date(year, month, i),
+                              entry_type=entry_type, hours=Decimal(hours), status=status))
+
+
+async def _month(db, year, month, staff=3):
+    """Pam (the checked figures) + `staff` colleagues, each with approved hours."""
+    pam = await _employee(db, "30.00", remote_rate_multiplier=Decimal("0.80"))
+    _entries(db, pam, year, month, ("regular", "100", "approved"), ("remote", "10", "approved"),
+             ("overtime", "4", "approved"), ("unpaid", "8", "approved"), ("regular", "9", "draft"))
+    _entries(db, pam, year, month % 12 + 1, ("regular", "7", "approved"))   # next month: not this run
+    for _ in range(staff):
+        other = await _employee(db, "25.00", bvg_insured=False, is_quellensteuer=True,
+                                quellensteuer_code="B1")
+        _entries(db, other, year, month, ("regular", "40", "approved"), ("sick", "8", "approved"))
+    run = PayrollRunModel(year=year, month=month, period_name=f"Test {year}-{month}", status="draft")
+    db.add(run)
+    await db.commit()
+    return pam, run
+
+
+def _count_statements(db):
+    seen = []
+
+    def _log(conn, cursor, statement, params, context, executemany):
+        seen.append(" ".join(statement.split()).lower())
+    event.listen(db.bind.sync_engine, "before_cursor_execute", _log)
+    return seen, lambda: event.remove(db.bind.sync_engine, "before_cursor_execute", _log)
+
+
+@pytest.mark.asyncio
+async def test_month_is_one_grouped_load_and_one_bulk_write(db_session):
+    pam, run = await _month(db_session, 2031, 3, staff=12)
+
+    seen, stop = _count_statements(db_session)
+    try:
+        result = await PayrollCalculator(db_session).calculate_all_payslips(run.id)
+    finally:
+        stop()
+    assert result["employees_processed"] == 13 and result["errors"] is None
+    assert sum("from time_entries" in s and s.startswith("select") for s in seen) == 1
+    assert sum(s.startswith("insert into payslips") for s in seen) == 1
+    assert sum(s.startswith("update time_entries") for s in seen) == 1
+
+    slip = (await db_session.execute(select(PaySlipModel).where(
+        PaySlipModel.employee_id == pam.id))).scalar_one()
+    assert slip.total_hours == Decimal("114") and slip.unpaid_hours == Decimal("8")
+    assert slip.gross_salary == Decimal("3390.00")                  # 3000 + 10h×24 + 4h×37.50
+    assert slip.ahv_iv_eo == Decimal("179.65") and slip.bvg == Decimal("118.65")
+    assert slip.quellensteuer == 0 and slip.net_salary == Decimal("3054.40")
+
+    other = (await db_session.execute(select(PaySlipModel).where(
+        PaySlipModel.payroll_run_id == run.id, PaySlipModel.employee_id != pam.id))).scalars().first()
+    assert other.gross_salary == Decimal("1200.00") and other.bvg == 0
+    assert other.quellensteuer == Decimal("180.00")                 # B tariff: 15%
+
+    entries = (await db_session.execute(select(TimeEntryModel).where(
+        TimeEntryModel.employee_id == pam.id))).scalars().all()
+    assert {(e.status, e.payslip_id) for e in entries if e.entry_date.month == 3} == {
+        ("paid", slip.id), ("draft", None)}
+    assert [e.status for e in entries if e.entry_date.month == 4] == ["approved"]
+
+    await db_session.refresh(run)
+    assert run.status == "pending_review" and run.total_employees == 13
+    assert Decimal(run.total_gross) == Decimal("3390.00") + 12 * Decimal("1200.00")
+
+
+@pytest.mark.asyncio
+async def test_what_if_reuses_the_loaded_month_and_writes_nothing(db_session):
+    pam, run = await _month(db_session, 2031, 5)
+    calculator = PayrollCalculator(db_session)
+    await calculator.calculate_all_payslips(run.id)
+    await db_session.refresh(run)
+    slips = (await db_session.execute(select(func.count()).select_from(PaySlipModel))).scalar()
+
+    batch = await calculator.load_month(run.year, run.month, payroll_run_id=run.id)
+    seen, stop = _count_statements(db_session)
+    try:
+        result = await calculator.what_if(run.id, {
+            "raise": {"hourly_rate_factor": "1.10"},
+            "pam": {"hourly_rates": {str(pam.id): "33.00"}},
+            "ahv": {"ahv_employee": "0.060"},
+        }, batch=batch)
+    finally:
+        stop()
+    assert not any("from time_entries" in s for s in seen)            # the loaded month is reused
+    assert result["dry_run"] and result["baseline"]["gross_salary"] == float(run.total_gross)
+
+    raise_ = result["scenarios"]["raise"]
+    assert raise_["totals"]["gross_salary"] == pytest.approx(float(run.total_gross) * 1.1, abs=0.2)
+    pam_only = result["scenarios"]["pam"]
+    assert pam_only["delta"]["gross_salary"] == pytest.approx(339.0)  # 10% on Pam alone
+    assert sum(e["net_delta"] != 0 for e in pam_only["employees"]) == 1
+    ahv = result["scenarios"]["ahv"]
+    assert ahv["delta"]["net_salary"] < 0 and ahv["delta"]["total_employer_cost"] == 0
+
+    with pytest.raises(ValueError):
+        await calculator.what_if(run.id, {"typo": {"ahv_employe": "0.06"}}, batch=batch)
+    assert (await db_session.execute(select(func.count()).select_from(PaySlipModel))).scalar() == slips
+
+
+@pytest.mark.asyncio
+async def test_recalculation_replaces_the_runs_payslips(db_session):
+    pam, run = await _month(db_session, 2031, 7, staff=1)
+    calculator = PayrollCalculator(db_session)
+    await calculator.calculate_all_payslips(run.id)
+
+    _entries(db_session, pam, 2031, 7, *[("regular", "1", "draft")] * 19, ("regular", "10", "approved"))
+    await db_session.commit()                                          # approved after the first pass
+    result = await calculator.calculate_all_payslips(run.id)
+    assert result["employees_processed"] == 2
+
+    [slip] = (await db_session.execute(select(PaySlipModel).where(
+        PaySlipModel.payroll_run_id == run.id, PaySlipModel.employee_id == pam.id))).scalars().all()
+    assert slip.total_hours == Decimal("124") and slip.gross_salary == Decimal("3690.00")
+    linked = (await db_session.execute(select(TimeEntryModel.payslip_id).where(
+        TimeEntryModel.employee_id == pam.id, TimeEntryModel.status == "paid"))).scalars().all()
+    assert len(linked) == 5 and set(linked) == {slip.id}
+    await db_session.refresh(run)
+    assert run.status == "pending_review" and run.total_employees == 2
@@ -0,0 +1,106 @@
+# Tests for src.services.product_images -- gallery photos stored once per size, served from disk.
+# The size and format served follow the browser's Accept header and never point at an object
+# that was not stored. The disk cache stays under its budget, evicting the least recently used,
+# and a burst of misses for one photo shares a single download. Each worker keeps to its own
+# cache directory, a file evicted just before it is read is fetched again, and an upload whose
+# bytes are already stored is not derived again.
+
+import asyncio
+import os
+import uuid
+
+import pytest
+
+from src.db.models import ProductImageModel, ProductModel
+from src.services import product_images
+from src.services.product_images import DiskCache, pick
+
+
+def test_pick_negotiates_format_and_size():
+    full = {f"{s}.{f}": 1 for s in ("thumb", "list", "full") for f in ("jpg", "webp")}
+    assert pick(full, "thumb", "image/avif,image/webp,*/*") == "thumb.webp"
+    assert pick(full, "list", "image/*") == "list.jpg"
+    assert pick(full, "huge", "") == "full.jpg"                       # unknown size → full
+    assert pick({"full.jpg": 1}, "thumb", "image/webp") == "full.jpg"  # stored as-is: one object
+
+
+@pytest.mark.asyncio
+async def test_disk_cache_is_a_bounded_lru_with_single_flight(tmp_path):
+    calls = []
+
+    def fetch(key, dest):
+        calls.append(key)
+        dest.write_bytes(b"x" * 40)
+        return key != "missing"
+
+    cache = DiskCache(tmp_path, max_bytes=100)
+    paths = await asyncio.gather(*(cache.path("a", fetch) for _ in range(5)))
+    assert calls == ["a"] and len({str(p) for p in paths}) == 1       # one download, five answers
+    assert paths[0].read_bytes() == b"x" * 40
+
+    await cache.path("b", fetch)
+    assert await cache.path("a", fetch) == paths[0]                   # hit: "a" is now most recent
+    await cache.path("c", fetch)                                      # 120 > 100 → evict LRU ("b")
+    assert calls == ["a", "b", "c"]
+    await cache.path("a", fetch)
+    await cache.path("b", fetch)
+    assert calls == ["a", "b", "c", "b"]
+
+    assert await cache.path("missing", fetch) is None
+
+
+@pytest.mark.asyncio
+async def test_known_upload_is_not_derived_again(db_session, monkeypatch):
+    product = ProductModel(sku=f"IMG-{uuid.uuid4().hex[:8]}", name="Image twin", price=1.0)
+    db_session.add(product)
+    await db_session.flush()
+    raw = uuid.uuid4().bytes * 10
+    variants = {"thumb.jpg": 10, "list.jpg": 20, "full.jpg": 30}
+    db_session.add(ProductImageModel(product_id=product.id, content_hash=product_images.content_digest(raw),
+                                     variants=variants))
+    await db_session.commit()
+
+    async def _no_derive(_raw):
+        raise AssertionError("re-derived a stored upload")
+    monkeypatch.setattr(product_images, "derive", _no_derive)
+    assert await product_images.store(db_session, raw) == (product_images.content_digest(raw), variants)
+
+
+@pytest.mark.asyncio
+async def test_disk_cache_keeps_to_its_own_worker_directory(tmp_path):
+    gone = tmp_path / "w99999999"                                     # a worker that has exited
+    gone.mkdir()
+    (gone / "old").write_bytes(b"x" * 40)
+    (tmp_path / "w1").mkdir()                                         # a live process: left alone
+
+    def fetch(key, dest):
+        dest.write_bytes(b"y" * 10)
+        return True
+
+    cache = DiskCache(tmp_path, max_bytes=100)
+    path = await cache.path("a", fetch)
+    assert path.parent == tmp_path / f"w{os.getpid()}"
+    assert not gone.exists() and (tmp_path / "w1").exists()
+
+
+@pytest.mark.asyncio
+async def test_a_rendition_evicted_before_the_read_is_fetched_again(tmp_path):
+    fetched = []
+
+    def fetch(key, dest):
+        fetched.append(key)
+        dest.write_bytes(key.encode() * 10)
+        return True
+
+    cache = DiskCache(tmp_path, max_bytes=100)
+    real_path = cache.path
+
+    async def _evicted_meanwhile(key, fetch):                         # another request's fill evicts it
+        path = await real_path(key, fetch)
+        if len(fetched) == 1:
+            path.unlink()
+        return path
+    cache.path = _evicted_meanwhile
+    assert await cache.read("a", fetch) == b"a" * 10
+    assert fetched == ["a", "a"]
+    assert await cache.read("missing", lambda key, dest: False) is None
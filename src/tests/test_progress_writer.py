@@ -0,0 +1,91 @@
+# Tests for src.compute.progress -- the coalescing progress writer. Mocked session: no DB.
+# Jobs report a step many times a second; all of that, across every job, goes out as one batched
+# UPDATE per flush. A kill pushed from the board reaches the running job without a query, and a
+# flush that fails keeps its updates for the next one without overwriting newer steps.
+
+import uuid
+
+import pytest
+
+from src.compute import progress as pw
+
+
+class _FakeSession:
+    def __init__(self, log, fail=False):
+        self.log, self.fail = log, fail
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    async def execute(self, stmt, params=None):
+        if self.fail:
+            raise RuntimeError("db down")
+        self.log.append(params)
+
+    async def commit(self):
+        pass
+
+
+@pytest.fixture
+def writes(monkeypatch):
+    log: list = []
+    monkeypatch.setattr(pw, "AsyncSessionLocal", lambda: _FakeSession(log))
+    return log
+
+
+@pytest.mark.asyncio
+async def test_steps_coalesce_into_one_batched_update(writes):
+    w = pw.ProgressWriter()
+    jobs = [uuid.uuid4() for _ in range(3)]
+    for j in jobs:
+        w.track(j)
+        for step in range(1, 7):
+            w.update(j, tokens=step * 100, progress=step * 16, credits_burned=step)
+    await w.flush()
+    assert len(writes) == 1                              # one statement for 18 step updates
+    rows = {r["_id"]: r for r in writes[0]}
+    assert set(rows) == set(jobs)
+    assert all(r["_tokens"] == 600 and r["_credits_burned"] == 6 for r in rows.values())
+    await w.flush()
+    assert len(writes) == 1                              # nothing moved -> no write
+
+
+@pytest.mark.asyncio
+async def test_discarded_progress_is_not_written(writes):
+    w = pw.ProgressWriter()
+    j = uuid.uuid4()
+    w.track(j)
+    w.update(j, tokens=50, progress=16, credits_burned=1)
+    w.discard(j)                                         # the runner writes the final state itself
+    await w.flush()
+    assert writes == []
+
+
+@pytest.mark.asyncio
+async def test_pushed_kill_sets_only_that_job():
+    w = pw.ProgressWriter()
+    a, b = uuid.uuid4(), uuid.uuid4()
+    ka, kb = w.track(a), w.track(b)
+    w._on_kill(None, 0, pw.KILL_CHANNEL, str(a))
+    w._on_kill(None, 0, pw.KILL_CHANNEL, "not-a-uuid")
+    assert ka.is_set() and not kb.is_set()
+
+
+@pytest.mark.asyncio
+async def test_failed_flush_requeues_without_clobbering_newer(monkeypatch):
+    w = pw.ProgressWriter()
+    j = uuid.uuid4()
+    w.track(j)
+    w.update(j, tokens=100, progress=16, credits_burned=1)
+    monkeypatch.setattr(pw, "AsyncSessionLocal", lambda: _FakeSession([], fail=True))
+    with pytest.raises(RuntimeError):
+        await w.flush()
+    assert w._pending[j]["tokens"] == 100
+    w.update(j, tokens=200, progress=33, credits_burned=2)
+    log: list = []
+    monkeypatch.setattr(pw, "AsyncSessionLocal", lambda: _FakeSession(log))
+    await w.flush()
+    assert log[0][0]["_tokens"] == 200
@@ -0,0 +1,118 @@
+"""Sales facts — the denormalized sold-line table the product / category reports scan by day.
+
+A sale lands in the per-product totals under the name and category it had when it was sold, and
+a full refund takes it out of the reports again while the log keeps both rows. Giveaways never
+count. The backfill gives an older sale its rows exactly once, the export streams the range out
+in batches, and the VAT code is bucketed the way split_vat does it (unknown or NULL rate → default).
+"""
+import io
+import uuid
+from datetime import datetime, timezone
+from decimal import Decimal
+
+import pytest
+from sqlalchemy import func, select
+
+from src.db.models import SalesFactModel
+from src.db.models.line_item_model import LineItemModel
+from src.db.models.product_model import ProductModel
+from src.db.models.transaction_model import PaymentMethod, TransactionModel, TransactionStatus
+from src.db.models.user_model import UserModel
+from src.services import sales_facts
+from src.services.sales_rollup import business_day
+
+_RATES = [{"code": "S", "label": "standard", "rate": "8.1", "default": True},
+          {"code": "R", "label": "reduced", "rate": "2.6", "default": False}]
+
+
+def _noon(day):
+    """10:30 UTC = 12:30 in Lucerne; each test rings on its own May day (the test DB is not wiped)."""
+    return datetime(2026, 5, day, 10, 30, tzinfo=timezone.utc)
+
+
+async def _sale(db, at, *, lines=(("10.00", 2, False),), record=True, category="Smoking"):
+    p = ProductModel(sku=f"SF-{uuid.uuid4().hex[:8]}", name=f"Lighter {uuid.uuid4().hex[:4]}",
+                     category=category, price=Decimal("5.00"), cost=Decimal("0.40"))
+    cashier = UserModel(keycloak_id=uuid.uuid4(), username=f"pam-{uuid.uuid4().hex[:8]}",
+                        email=f"pam-{uuid.uuid4().hex[:8]}@test.ch")
+    db.add_all([p, cashier])
+    await db.flush()
+    subtotal = sum((Decimal(lt) for lt, _, _ in lines), Decimal("0"))
+    txn = TransactionModel(transaction_number=f"TXN-SF-{uuid.uuid4().hex[:6]}", cashier_id=cashier.id,
+                           subtotal=subtotal, total=subtotal, tax_amount=Decimal("0.15"),
+                           status=TransactionStatus.COMPLETED, payment_method=PaymentMethod.CASH, completed_at=at)
+    db.add(txn)
+    await db.flush()
+    for lt, qty, gift in lines:
+        db.add(LineItemModel(transaction_id=txn.id, product_id=p.id, quantity=qty,
+                             unit_price=Decimal(lt) / qty, line_total=Decimal(lt), is_giveaway=gift,
+                             vat_rate=Decimal("8.1"), vat_amount=Decimal("0.75")))
+    await db.flush()
+    if record:
+        await sales_facts.record_sale(db, txn, _RATES)
+    await db.commit()
+    return txn, p
+
+
+def test_vat_code_follows_the_rate_table():
+    assert sales_facts._vat_code(Decimal("2.60"), _RATES) == "R"
+    assert sales_facts._vat_code(Decimal("8.1"), _RATES) == "S"
+    assert sales_facts._vat_code(Decimal("7.7"), _RATES) == "S"      # unmatched → default
+    assert sales_facts._vat_code(None, _RATES) == "S"
+    assert sales_facts._vat_code(Decimal("8.1"), None) is None
+
+
+@pytest.mark.asyncio
+async def test_recorded_sale_reports_and_full_refund_nets_out(db_session):
+    day = business_day(_noon(4))
+    kept, p_kept = await _sale(db_session, _noon(4), lines=(("10.00", 2, False), ("0.00", 1, True)))
+    gone, _ = await _sale(db_session, _noon(4), lines=(("7.50", 1, False),))
+
+    totals = {r.product_id: r for r in await sales_facts.product_totals(db_session, day, day)}
+    assert set(totals) >= {p_kept.id} and len(totals) == 2
+    assert totals[p_kept.id].qty == 2 and Decimal(str(totals[p_kept.id].revenue)) == Decimal("10.00")
+    assert totals[p_kept.id].name == p_kept.name and totals[p_kept.id].category == "Smoking"
+
+    gone.status = TransactionStatus.REFUNDED
+    await sales_facts.record_refund(db_session, gone)
+    await db_session.commit()
+
+    totals = await sales_facts.product_totals(db_session, day, day)
+    assert [r.product_id for r in totals] == [p_kept.id]
+    drill = await sales_facts.sold_lines(db_session, day, day, category="Smoking")
+    assert [r.transaction_id for r in drill] == [kept.id]              # one line, giveaway out
+    out = io.BytesIO()
+    assert await sales_facts.write_export(db_session, day, day, "csv", out) == 4   # 2 + 1 sold, 1 reversal
+    header, *lines = out.getvalue().decode().splitlines()
+    assert header.split(",") == list(sales_facts.EXPORT_COLUMNS)
+    assert sorted(line.split(",")[2] for line in lines) == ["refund", "sale", "sale", "sale"]
+
+
+@pytest.mark.asyncio
+async def test_backfill_records_a_sale_without_facts_once(db_session):
+    day = business_day(_noon(5))
+    txn, product = await _sale(db_session, _noon(5), record=False)
+    assert await sales_facts.product_totals(db_session, day, day) == []
+
+    assert (await sales_facts.backfill(db_session))["backfilled"] >= 1
+    assert (await sales_facts.backfill(db_session))["backfilled"] == 0   # caught up: no-op
+
+    rows = (await db_session.execute(select(func.count()).where(SalesFactModel.transaction_id == txn.id))).scalar()
+    assert rows == 1
+    [r] = await sales_facts.product_totals(db_session, day, day)
+    assert r.product_id == product.id and r.qty == 2
+
+
+@pytest.mark.asyncio
+async def test_a_failed_fact_write_leaves_the_sale_committed(db_session, monkeypatch):
+    day = business_day(_noon(6))
+    real_rows = sales_facts._rows
+    monkeypatch.setattr(sales_facts, "_rows",                         # NOT NULL breaks the INSERT
+                        lambda *a: [{**r, "business_date": None} for r in real_rows(*a)])
+    txn, _ = await _sale(db_session, _noon(6))
+
+    await db_session.refresh(txn)                                      # re-read from the DB: committed
+    assert txn.status == TransactionStatus.COMPLETED
+    assert await sales_facts.product_totals(db_session, day, day) == []
+    monkeypatch.undo()
+    assert (await sales_facts.backfill(db_session))["backfilled"] >= 1   # picked up later
@@ -0,0 +1,154 @@
+"""Running daily-sales rollup — the Z-report folded in per sale instead of recomputed per read.
+
+The daily summary now reads one row per day, so that row has to match a rebuild from the raw
+lines to the cent: payments, VAT streams, giveaways, products and hours. A refund swaps what was
+booked for what was kept, the day's first write seeds the row from sales rung before the rollup
+existed, and the nightly reconcile finds a row that drifted and puts it right.
+"""
+import uuid
+from datetime import datetime, timezone
+from decimal import Decimal
+
+import pytest
+
+from src.db.models.line_item_model import LineItemModel
+from src.db.models.product_model import ProductModel
+from src.db.models.sales_rollup_model import DailySalesRollupModel
+from src.db.models.transaction_model import PaymentMethod, TransactionModel, TransactionStatus
+from src.db.models.user_model import UserModel
+from src.routes import pos_router
+from src.services import sales_rollup
+
+
+
+def _noon(day):
+    """10:30 UTC = 12:30 in Lucerne; each test rings on its own day (the test DB is not wiped)."""
+    return datetime(2026, 7, day, 10, 30, tzinfo=timezone.utc)
+
+
+async def _cashier(db):
+    u = UserModel(keycloak_id=uuid.uuid4(), username=f"pam-{uuid.uuid4().hex[:8]}",
+                  email=f"pam-{uuid.uuid4().hex[:8]}@test.ch")
+    db.add(u)
+    await db.commit()
+    return u.id
+
+
+async def _sale(db, cashier_id, at, *, method=PaymentMethod.CASH, lines=(("10.00", 2, False),), record=True):
+    """A completed sale with (line_total, qty, is_giveaway) lines, folded in like checkout does."""
+    p = ProductModel(sku=f"RU-{uuid.uuid4().hex[:8]}", name="Lighter", price=Decimal("5.00"),
+                     cost=Decimal("0.40"))
+    db.add(p)
+    await db.flush()
+    subtotal = sum((Decimal(lt) for lt, _, _ in lines), Decimal("0"))
+    txn = TransactionModel(transaction_number=f"TXN-RU-{uuid.uuid4().hex[:6]}", cashier_id=cashier_id,
+                           subtotal=subtotal, total=subtotal, tax_amount=Decimal("0.15"),
+                           status=TransactionStatus.COMPLETED, payment_method=method, completed_at=at)
+    db.add(txn)
+    await db.flush()
+    for lt, qty, gift in lines:
+        db.add(LineItemModel(transaction_id=txn.id, product_id=p.id, quantity=qty,
+                             unit_price=Decimal(lt) / qty, line_total=Decimal(lt), is_giveaway=gift,
+                             vat_rate=Decimal("8.1")))
+    await db.flush()
+    if record:
+        await sales_rollup.record_sale(db, txn, None)
+    await db.commit()
+    return txn
+
+
+async def _rows(db, day):
+    return (await sales_rollup.read_day(db, day)) or {}
+
+
+@pytest.mark.asyncio
+async def test_rollup_equals_a_raw_rebuild(db_session):
+    at = _noon(10)
+    day = sales_rollup.business_day(at)
+    a, b = await _cashier(db_session), await _cashier(db_session)
+    await _sale(db_session, a, at)
+    await _sale(db_session, a, at, method=PaymentMethod.TWINT, lines=(("7.50", 1, False), ("0.00", 3, True)))
+    await _sale(db_session, b, at, method=PaymentMethod.VISA)
+
+    rolled = await _rows(db_session, day)
+    assert set(rolled) == {a, b}
+    assert rolled[a]["txn_count"] == 2
+    assert rolled[a]["payments"] == {"CASH": Decimal("10.00"), "TWINT": Decimal("7.50")}
+    assert rolled[a]["giveaway_count"] == 3 and rolled[a]["giveaway_cost"] == Decimal("1.20")
+    assert rolled[a]["hours"] == {"12": 2}
+
+    result = await sales_rollup.reconcile_day(db_session, day, None)
+    assert result["rolled_up"] and result["mismatches"] == {}
+
+
+@pytest.mark.asyncio
+async def test_first_write_of_the_day_seeds_earlier_sales(db_session):
+    """Sales rung before the rollup existed must not vanish from the day the first folded one opens."""
+    at = _noon(11)
+    day = sales_rollup.business_day(at)
+    a = await _cashier(db_session)
+    await _sale(db_session, a, at, record=False)
+    assert await sales_rollup.read_day(db_session, day) is None
+    await _sale(db_session, a, at)
+    assert (await _rows(db_session, day))[a]["txn_count"] == 2
+
+
+@pytest.mark.asyncio
+async def test_refunds_swap_the_booked_value(db_session):
+    at = _noon(12)
+    day = sales_rollup.business_day(at)
+    a = await _cashier(db_session)
+    keep = await _sale(db_session, a, at, lines=(("50.00", 1, False),))
+    gone = await _sale(db_session, a, at, method=PaymentMethod.VISA)
+
+    before = await sales_rollup.booked(db_session, keep, None)
+    keep.total = Decimal("45.00")
+    await sales_rollup.record_refund(db_session, keep, before, None)
+    before = await sales_rollup.booked(db_session, gone, None)
+    gone.status = TransactionStatus.REFUNDED
+    await sales_rollup.record_refund(db_session, gone, before, None)
+    await db_session.commit()
+
+    agg = (await _rows(db_session, day))[a]
+    assert agg["txn_count"] == 1
+    assert agg["payments"] == {"CASH": Decimal("45.00")}
+    assert (await sales_rollup.reconcile_day(db_session, day, None))["mismatches"] == {}
+
+
+@pytest.mark.asyncio
+async def test_reconcile_reports_and_repairs_drift(db_session):
+    at = _noon(13)
+    day = sales_rollup.business_day(at)
+    a = await _cashier(db_session)
+    await _sale(db_session, a, at)
+    row = (await db_session.execute(
+        DailySalesRollupModel.__table__.select().where(DailySalesRollupModel.business_date == day))).first()
+    await db_session.execute(DailySalesRollupModel.__table__.update()
+                             .where(DailySalesRollupModel.id == row.id).values(total_sales=Decimal("99.00")))
+    await db_session.commit()
+
+    found = await sales_rollup.reconcile_day(db_session, day, None)
+    assert found["mismatches"][str(a)]["fields"] == ["total_sales"]
+    fixed = await sales_rollup.reconcile_day(db_session, day, None, apply=True)
+    await db_session.commit()
+    assert fixed["applied"]
+    assert (await sales_rollup.reconcile_day(db_session, day, None))["mismatches"] == {}
+
+
+@pytest.mark.asyncio
+async def test_daily_summary_reads_the_rollup(db_session):
+    at = _noon(14)
+    day = sales_rollup.business_day(at)
+    a = await _cashier(db_session)
+    await _sale(db_session, a, at, lines=(("10.00", 2, False), ("0.00", 1, True)))
+    await _sale(db_session, a, at, method=PaymentMethod.TWINT, lines=(("5.00", 1, False),))
+
+    s = await pos_router.get_daily_summary(report_date=day.isoformat(), db=db_session,
+                                           current_user={"username": "felix"})
+    assert s.total_transactions == 2
+    assert s.total_sales == Decimal("15.00")
+    assert s.cash_total == Decimal("10.00") and s.twint_total == Decimal("5.00")
+    assert s.items_sold == 3
+    assert s.top_seller == "Lighter" and s.top_seller_quantity == 3      # grouped by name, as before
+    assert s.giveaway_count == 1
+    assert s.busiest_hour == "12:00–13:00"
@@ -0,0 +1,42 @@
+"""Till search documents + keyset paging on /pos/search.
+
+The ranking itself runs in Postgres (pg_trgm) over the trigger-maintained product_search_docs, so
+it is not reproducible on the SQLite test DB. This locks the Python half: the page cursor carries
+every sort-key type back to the SAME typed value (a lossy round trip would skip or repeat rows at a
+page boundary), a foreign/junk cursor is a clean 400, and the doc vocabulary covers every synonym.
+"""
+from datetime import datetime, timezone
+from decimal import Decimal
+from uuid import uuid4
+
+import pytest
+from fastapi import HTTPException
+
+from src.routes.pos_router import _decode_search_cursor, _encode_search_cursor
+from src.services.catalog_search_synonyms import SYNONYM_CONCEPTS
+from src.services.search_documents import synonym_terms
+
+
+def test_cursor_round_trips_every_key_type():
+    kinds = ["int", "float", "num", "ts", "text", "uuid"]
+    values = [0, 0.30000001192092896, Decimal("12.50"),
+              datetime(2026, 7, 1, 9, 30, 15, 123456, tzinfo=timezone.utc), "Feuerzeug BIC mini", uuid4()]
+    assert _decode_search_cursor(_encode_search_cursor(values, kinds), kinds) == values
+
+
+def test_cursor_is_url_safe():
+    c = _encode_search_cursor(["Blättchen ??? &/+", uuid4()], ["text", "uuid"])
+    assert all(ch.isalnum() or ch in "-_" for ch in c)
+
+
+@pytest.mark.parametrize("cursor", ["not-a-cursor", "", _encode_search_cursor([1], ["int"])])
+def test_bad_or_foreign_cursor_is_400(cursor):
+    with pytest.raises(HTTPException) as exc:
+        _decode_search_cursor(cursor, ["int", "text", "uuid"])
+    assert exc.value.status_code == 400
+
+
+def test_synonym_vocabulary_covers_every_concept_term():
+    terms = synonym_terms()
+    assert terms == sorted(set(terms))
+    assert {t for group in SYNONYM_CONCEPTS for t in group} == set(terms)
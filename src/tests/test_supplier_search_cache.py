@@ -0,0 +1,155 @@
+# Tests for the live supplier search warm path (src.services.supplier_search). SQLite session,
+# a fake platform adapter and a mock transport -- no supplier site is touched.
+# Searching "Grinder" then "  grinder " hits the result cache the second time; a stale entry is still
+# served, with one refresh started behind it. The platform sniffed from a supplier's site is
+# kept on its row instead of sniffed again, written by a session of its own so the caller's
+# pending work is left alone. The per-host limiter caps and spaces the requests, and each
+# search's own timeout rides on its requests through the shared client.
+
+import asyncio
+import time
+import uuid
+
+import httpx
+import pytest
+
+from src.db.models.supplier_model import SupplierModel
+from src.services import supplier_search as ss
+from src.services.supplier_search import cache as live_cache
+from src.services.supplier_search.base import (
+    BaseAdapter, HostLimiter, SupplierResult, _PoliteTransport, request_timeout,
+)
+
+
+class _FakeAdapter(BaseAdapter):
+    platform = "fake"
+    multilingual = True
+    calls: list = []
+
+    async def search(self, client, q, limit=5):
+        _FakeAdapter.calls.append(q)
+        return [SupplierResult(supplier=self.supplier, title=f"{q} grinder",
+                               product_url=f"{self.base_url}/p/1", price=9.9, score=0.8)]
+
+
+@pytest.fixture
+def live(monkeypatch):
+    homepage_hits = []
+
+    def _site(request):
+        homepage_hits.append(str(request.url))
+        return httpx.Response(200, text="<script src='/static/version123/mage/x.js'></script>")
+
+    client = httpx.AsyncClient(transport=httpx.MockTransport(_site))
+
+    async def _no_translate(_client, q, langs=("de",)):
+        return [q]
+    monkeypatch.setitem(ss.PLATFORM_ADAPTERS, "fake", _FakeAdapter)
+    monkeypatch.setattr(ss, "_shared_client", lambda: client)
+    monkeypatch.setattr(ss, "query_variants", _no_translate)
+    monkeypatch.setattr(live_cache, "RESULTS", live_cache.LiveResultCache(fresh_s=60, stale_s=600))
+    ss.invalidate_registry()
+    _FakeAdapter.calls = []
+    yield homepage_hits, client
+    ss.invalidate_registry()
+
+
+def _supplier(name, adapter_type=None, url=None):
+    code = uuid.uuid4().hex[:8]
+    return SupplierModel(code=code, name=name, source_url=url or f"https://{code}.example",
+                         adapter_type=adapter_type)
+
+
+@pytest.mark.asyncio
+async def test_repeat_search_is_a_cache_hit_and_stale_revalidates_once(db_session, live):
+    name = f"Fake {uuid.uuid4().hex[:6]}"           # the test DB is not wiped
+    db_session.add(_supplier(name, adapter_type="fake"))
+    await db_session.commit()
+
+    first = await ss.search_suppliers("Grinder", db_session, suppliers=[name])
+    assert [r["supplier"] for r in first["results"]] == [name] and first["cached"] == []
+    again = await ss.search_suppliers("  grinder ", db_session, suppliers=[name])
+    assert again["cached"] == [name] and _FakeAdapter.calls == ["Grinder"]
+
+    for key, (_at, res) in list(live_cache.RESULTS._entries.items()):   # age it past fresh
+        live_cache.RESULTS._entries[key] = (time.monotonic() - 120, res)
+    stale = await asyncio.gather(*[ss.search_suppliers("GRINDER", db_session, suppliers=[name])
+                                   for _ in range(3)])
+    assert all(s["cached"] == [name] for s in stale)              # served at once
+    await asyncio.gather(*ss._revalidations)
+    assert _FakeAdapter.calls == ["Grinder", "GRINDER"]           # one refresh, not three
+
+
+@pytest.mark.asyncio
+async def test_sniffed_platform_is_stored_not_resniffed(db_session, live):
+    name = f"Csv {uuid.uuid4().hex[:6]}"
+    row = _supplier(name, adapter_type="csv")
+    db_session.add(row)
+    await db_session.commit()
+
+    hits, client = live
+    adapters = await ss._adapters_for_suppliers(db_session, client, [name])
+    assert [a.platform for a in adapters] == ["magento"]
+    await db_session.refresh(row)
+    assert row.detected_platform == "magento" and row.platform_checked_at is not None
+
+    seen = len(hits)
+    ss.invalidate_registry()
+    await ss._adapters_for_suppliers(db_session, client, [name])
+    assert not any(row.source_url in u for u in hits[seen:])     # stored sniff reused
+
+
+@pytest.mark.asyncio
+async def test_storing_a_sniff_leaves_the_callers_session_alone(db_session, live):
+    name = f"Csv {uuid.uuid4().hex[:6]}"
+    db_session.add(_supplier(name, adapter_type="csv"))
+    await db_session.commit()
+
+    pending = _supplier(f"Draft {uuid.uuid4().hex[:6]}")
+    db_session.add(pending)
+    with db_session.no_autoflush:
+        adapters = await ss._adapters_for_suppliers(db_session, live[1], [name])
+    assert [a.platform for a in adapters] == ["magento"]
+    assert pending in db_session.new                              # not flushed, committed or dropped
+    db_session.expunge(pending)
+
+
+@pytest.mark.asyncio
+async def test_host_limiter_caps_and_spaces_requests():
+    limiter = HostLimiter(concurrency=2, min_gap=0.05)
+    inflight, peak, starts = 0, 0, []
+
+    async def hit():
+        nonlocal inflight, peak
+        async with limiter.slot("shop.example"):
+            starts.append(time.monotonic())
+            inflight += 1
+            peak = max(peak, inflight)
+            await asyncio.sleep(0.02)
+            inflight -= 1
+
+    await asyncio.gather(*[hit() for _ in range(5)])
+    assert peak <= 2
+    gaps = [b - a for a, b in zip(starts, starts[1:])]
+    assert min(gaps) >= 0.045
+
+
+@pytest.mark.asyncio
+async def test_each_search_sets_its_own_request_timeout():
+    seen = []
+
+    def _site(request):
+        seen.append(request.extensions["timeout"]["read"])
+        return httpx.Response(200, text="ok")
+
+    transport = _PoliteTransport(HostLimiter(concurrency=4, min_gap=0))
+    transport._inner = httpx.MockTransport(_site)
+    client = httpx.AsyncClient(transport=transport, timeout=15.0)
+
+    async def _search(timeout):
+        request_timeout.set(timeout)
+        await client.get("https://shop.example/search")
+    await asyncio.gather(_search(2.0), _search(30.0))
+    await client.get("https://shop.example/search")                 # no search context: the default
+    assert sorted(seen[:2]) == [2.0, 30.0] and seen[2] == 15.0
+    await client.aclose()
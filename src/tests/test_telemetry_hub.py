@@ -0,0 +1,90 @@
+# Tests for src.compute.telemetry -- the shared /compute/stream hub. No DB: job changes are
+# fed as the trigger's NOTIFY payloads. Locks: running counters follow status transitions
+# (no table re-aggregation), every tab gets the SAME serialized delta, a new tab gets a
+# snapshot, and an unchanged tick sends nothing.
+
+import json
+import uuid
+
+import pytest
+
+from src.compute.telemetry import TelemetryHub
+
+
+def _note(hub, jid, new, old=None, owner="ana", dtok=0, at=1000.0):
+    hub._on_change(None, 0, "lpcx_jobs", json.dumps(
+        {"id": jid, "owner": owner, "created_at": at, "old": old, "new": new, "dtok": dtok}))
+
+
+def _job(jid, status, at):
+    return {"id": jid, "status": status, "created_at": f"2026-10-17T10:00:{int(at) % 60:02d}+00:00",
+            "queue_position": 0, "output": None}
+
+
+@pytest.fixture
+def hub(monkeypatch):
+    h = TelemetryHub()
+
+    async def _idle():
+        return None
+    monkeypatch.setattr(h, "_run", _idle)       # drive the hub by hand
+    return h
+
+
+def test_counters_follow_status_transitions(hub):
+    a, b = str(uuid.uuid4()), str(uuid.uuid4())
+    _note(hub, a, "queued", at=1.0)
+    _note(hub, b, "queued", owner="bo", at=2.0)
+    _note(hub, a, "running", old="queued", dtok=0)
+    _note(hub, a, "running", old="running", dtok=120)      # a progress flush
+    brain = hub._view()["brain"]
+    assert brain["active"] == 1 and brain["waiting"] == 1
+    assert brain["by_user"] == {"ana": 1} and brain["tokens_total"] == 120
+    assert hub._view()["queue_total"] == 1
+
+    _note(hub, a, "done", old="running", dtok=30)
+    brain = hub._view()["brain"]
+    assert brain["active"] == 0 and brain["jobs_served"] == 1 and brain["by_user"] == {}
+    assert brain["tokens_total"] == 150
+    assert hub._dirty == {a, b}                             # window refetches only these
+
+
+@pytest.mark.asyncio
+async def test_snapshot_then_identical_deltas(hub):
+    a, b = str(uuid.uuid4()), str(uuid.uuid4())
+    hub._jobs, hub._jobs_at = {a: _job(a, "running", 1)}, {a: 1.0}
+    hub._counts = {"running": 1}
+    async with hub.subscribe() as t1, hub.subscribe() as t2:
+        hub._publish()
+        snap = json.loads((await t1.get())[len("data: "):])
+        assert snap["type"] == "snapshot" and [j["id"] for j in snap["jobs"]] == [a]
+        await t2.get()
+
+        hub._publish()                                      # nothing moved
+        assert t1.empty() and t2.empty()
+
+        hub._jobs[b], hub._jobs_at[b] = _job(b, "queued", 2), 2.0
+        hub._queued[b] = 2.0
+        hub._publish()
+        m1, m2 = await t1.get(), await t2.get()
+        assert m1 is m2                                     # serialized once, fanned out
+        delta = json.loads(m1[len("data: "):])
+        assert delta["type"] == "delta" and delta["remove"] == []
+        assert [(j["id"], j["queue_position"]) for j in delta["upsert"]] == [(b, 1)]
+
+        async with hub.subscribe() as late:                 # joins mid-stream
+            assert json.loads((await late.get())[len("data: "):])["type"] == "snapshot"
+
+
+@pytest.mark.asyncio
+async def test_slow_tab_is_resynced_with_a_snapshot(hub):
+    hub._publish()
+    async with hub.subscribe() as slow:
+        for i in range(40):                                 # overflow its backlog
+            hub._counts = {"done": i + 1}
+            hub._publish()
+        hub._publish()
+        msgs = []
+        while not slow.empty():
+            msgs.append(json.loads((await slow.get())[len("data: "):])["type"])
+        assert msgs[0] == "snapshot" and set(msgs[1:]) == {"delta"}   # backlog dropped, resynced
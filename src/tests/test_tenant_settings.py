@@ -0,0 +1,72 @@
+# Tests for src.services.tenant_settings -- the store_settings snapshot the till reads per cart line.
+# The till asks for the VAT mode and discount caps on every cart line, so one load has to serve
+# them all. A settings write (ORM or bulk UPDATE) shows on the next read once committed; a shop
+# with no store row gets the CH defaults, and the discount a cashier may give follows their role.
+
+from decimal import Decimal
+
+import pytest
+from sqlalchemy import delete, event, update
+
+from src.db.models.store_settings_model import StoreSettingsModel
+from src.services.tenant_settings import TenantSettings, tenant_settings
+
+
+async def _only_store(db, **over):
+    await db.execute(delete(StoreSettingsModel))
+    db.add(StoreSettingsModel(
+        store_number=1, store_name="Artemis", legal_name="Artemis AG", address_line1="Teststrasse 1",
+        city="Luzern", postal_code="6003", vat_number="CHE-123.456.789 MWST", **over))
+    await db.commit()
+
+
+@pytest.mark.asyncio
+async def test_one_load_serves_every_read(db_session, test_db_engine):
+    await _only_store(db_session, currency="eur", payment_provider="Worldline_Sim")
+    first = await tenant_settings.get(db_session)
+    assert (first.currency, first.payment_provider) == ("EUR", "worldline_sim")
+
+    n = [0]
+
+    def _count(*_a, **_k):
+        n[0] += 1
+    event.listen(test_db_engine.sync_engine, "before_cursor_execute", _count)
+    try:
+        for _ in range(20):
+            assert await tenant_settings.get(db_session) is first
+    finally:
+        event.remove(test_db_engine.sync_engine, "before_cursor_execute", _count)
+    assert n[0] == 0
+
+
+@pytest.mark.asyncio
+async def test_committed_writes_are_seen(db_session):
+    await _only_store(db_session, cashier_max_discount=Decimal("12"))
+    assert (await tenant_settings.get(db_session)).max_discount_pct(["pos-cashier"]) == Decimal("12")
+
+    store = (await db_session.execute(StoreSettingsModel.__table__.select())).first()
+    row = await db_session.get(StoreSettingsModel, store.id)
+    row.cashier_max_discount = Decimal("15")
+    await db_session.commit()
+    assert (await tenant_settings.get(db_session)).max_discount_pct(["pos-cashier"]) == Decimal("15")
+
+    await db_session.execute(update(StoreSettingsModel).values(cashier_max_discount=Decimal("7")))
+    await db_session.commit()
+    assert (await tenant_settings.get(db_session)).max_discount_pct(["pos-cashier"]) == Decimal("7")
+
+    row.cashier_max_discount = Decimal("9")               # flushed, then a savepoint fails: still commits
+    await db_session.flush()
+    with pytest.raises(RuntimeError):
+        async with db_session.begin_nested():
+            raise RuntimeError("the nested step fails")
+    await db_session.commit()
+    assert (await tenant_settings.get(db_session)).max_discount_pct(["pos-cashier"]) == Decimal("9")
+
+
+def test_no_store_is_ch_and_caps_follow_roles():
+    ch = TenantSettings.from_store(None)
+    assert (ch.currency, ch.payment_provider) == ("CHF", "manual")
+    assert ch.rate_table and ch.rate_table is not ch.rate_table          # handed out as copies
+    assert ch.max_discount_pct(["pos-admin"]) == Decimal("100")
+    assert ch.max_discount_pct(["pos-manager"]) == Decimal("25")
+    assert ch.max_discount_pct([]) == Decimal("10")
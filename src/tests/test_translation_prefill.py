@@ -0,0 +1,133 @@
+"""Background pre-translation — product descriptions filled ahead of the viewer.
+
+A shopper opening a product page must not wait on the model: `describe` serves the base text
+and queues the missing language. The worker (`prefill`) then fills the queue with one batched call
+per language pair, and a skin another worker stored in the meantime is skipped without losing the
+rest of the pass. Two fills of the same (product, lang) share one call, and editing the source
+text (`invalidate_translations`) puts the product back in the queue.
+"""
+import asyncio
+import uuid
+
+import pytest
+from sqlalchemy import select
+
+from src.db.models.product_model import ProductModel, ProductTranslationModel
+from src.services import product_translations as pt
+
+
+async def _mk(db, description):
+    p = ProductModel(sku=f"PRE-{uuid.uuid4().hex[:8]}", name="Storm lighter", price=1.0,
+                     description=description, source_lang="en")
+    db.add(p)
+    await db.commit()
+    await db.refresh(p)
+    return p
+
+
+@pytest.fixture(autouse=True)
+def _quiet_queue(monkeypatch):
+    monkeypatch.setattr(pt, "_wanted", {})
+    monkeypatch.setattr(pt, "_failed", {})
+    monkeypatch.setattr(pt, "TARGET_LANGS", ("en", "de", "fr", "it"))
+
+
+@pytest.mark.asyncio
+async def test_view_never_waits_on_the_model(db_session, monkeypatch):
+    async def _no_model(*a, **kw):
+        raise AssertionError("a view called the model")
+    monkeypatch.setattr(pt, "_translate", _no_model)
+
+    p = await _mk(db_session, "A windproof metal lighter with a refillable tank.")
+    out = await pt.describe(db_session, p, "fr")
+    assert out["pending"] and out["provenance"] == "base" and out["description"] == p.description
+    assert p.id in pt._wanted
+
+    own = await pt.describe(db_session, p, "en")      # the base's own language: filled on the spot
+    assert own["provenance"] == "source" and "pending" not in own
+
+
+@pytest.mark.asyncio
+async def test_prefill_batches_one_call_per_language_pair(db_session, monkeypatch):
+    calls = []
+
+    async def _batch(texts, tgt, src):
+        calls.append((src, tgt, len(texts)))
+        return [f"[{tgt}] {t}" for t in texts]
+    monkeypatch.setattr(pt, "_translate_batch", _batch)
+    monkeypatch.setattr(pt, "PREFILL_PRODUCTS", 2)
+
+    a = await _mk(db_session, "A windproof metal lighter.")
+    b = await _mk(db_session, "Unbleached rolling papers, king size.")
+    pt.enqueue(a.id)
+    pt.enqueue(b.id)
+
+    result = await pt.prefill(db_session)
+    assert result["products"] == 2 and result["filled"] == 8 and result["failed"] == 0
+    assert sorted(calls) == [("en", "de", 2), ("en", "fr", 2), ("en", "it", 2)]
+
+    rows = (await db_session.execute(select(ProductTranslationModel).where(
+        ProductTranslationModel.product_id == a.id))).scalars().all()
+    assert {r.lang: r.provenance for r in rows} == {"en": "source", "de": "machine", "fr": "machine",
+                                                    "it": "machine"}
+    assert (await pt.describe(db_session, a, "it"))["description"] == "[it] A windproof metal lighter."
+
+
+@pytest.mark.asyncio
+async def test_a_skin_stored_meanwhile_keeps_the_rest_of_the_pass(db_session, monkeypatch):
+    p = await _mk(db_session, "A windproof metal lighter.")
+
+    waiting = {}
+
+    async def _batch(texts, tgt, src):
+        if tgt == "de":                                # another worker gets there first
+            waiting["de"] = pt._inflight[(p.id, "de")]
+            db_session.add(ProductTranslationModel(product_id=p.id, lang="de", description="Theirs",
+                                                   provenance="source", needs_review=False))
+            await db_session.flush()
+        return [f"[{tgt}] {t}" for t in texts]
+    monkeypatch.setattr(pt, "_translate_batch", _batch)
+    monkeypatch.setattr(pt, "PREFILL_PRODUCTS", 1)   # the queued product only, not the catalogue walk
+    pt.enqueue(p.id)
+
+    result = await pt.prefill(db_session)
+    assert (result["filled"], result["failed"]) == (3, 0) and not pt._failed   # en, fr, it are ours
+    assert waiting["de"].result()["description"] == "Theirs"                   # a waiter gets what is stored
+    rows = (await db_session.execute(select(ProductTranslationModel).where(
+        ProductTranslationModel.product_id == p.id))).scalars().all()
+    assert {r.lang: r.description for r in rows} == {
+        "en": p.description, "de": "Theirs", "fr": "[fr] A windproof metal lighter.",
+        "it": "[it] A windproof metal lighter."}
+
+
+@pytest.mark.asyncio
+async def test_concurrent_fills_share_one_model_call(db_session, monkeypatch):
+    calls = []
+    gate = asyncio.Event()
+
+    async def _slow(text, tgt, src="en"):
+        calls.append(tgt)
+        await gate.wait()
+        return f"[{tgt}] lighter"
+    monkeypatch.setattr(pt, "_translate", _slow)
+
+    p = await _mk(db_session, "A windproof metal lighter.")
+    first = asyncio.create_task(pt.ensure_description(db_session, p, "de"))
+    while not calls:                                   # the first fill is at the model now
+        await asyncio.sleep(0.01)
+    others = [asyncio.create_task(pt.ensure_description(db_session, p, "de")) for _ in range(3)]
+    await asyncio.sleep(0)
+    gate.set()
+    results = await asyncio.gather(first, *others)
+    assert calls == ["de"]
+    assert {r["description"] for r in results} == {"[de] lighter"}
+
+
+@pytest.mark.asyncio
+async def test_text_edit_queues_a_refill(db_session):
+    p = await _mk(db_session, "Old text")
+    db_session.add(ProductTranslationModel(product_id=p.id, lang="de", description="Alter Text",
+                                           provenance="machine", needs_review=True))
+    await db_session.commit()
+    assert await pt.invalidate_translations(db_session, p.id) == 1
+    assert p.id in pt._wanted
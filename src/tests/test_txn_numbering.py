@@ -0,0 +1,107 @@
+# Tests for src.services.txn_numbering -- the store-day counter behind TXN-YYYYMMDD-NNNN.
+# Numbers follow on from those rung before the counter existed, and a sale that rolls back hands
+# its number back so no gap opens. An offline block comes off the same counter for one cashier:
+# only they may ring it, each number once, and when two uploads claim the same number the first
+# one wins. The audit tells reserved-but-unused numbers apart from real gaps.
+# Each test uses its own store number -- the test DB is not wiped.
+
+import random
+import uuid
+from datetime import date
+from decimal import Decimal
+
+import pytest
+
+from src.db.models.transaction_model import TransactionModel, TransactionStatus
+from src.db.models.user_model import UserModel
+from src.services import txn_numbering
+
+DAY = date(2026, 3, 14)
+
+
+@pytest.fixture
+def store():
+    return random.randint(1000, 10**6)
+
+
+async def _ring(db, number):
+    u = UserModel(keycloak_id=uuid.uuid4(), username=f"pam-{uuid.uuid4().hex[:8]}",
+                  email=f"pam-{uuid.uuid4().hex[:8]}@test.ch")
+    db.add(u)
+    await db.flush()
+    db.add(TransactionModel(transaction_number=number, cashier_id=u.id, status=TransactionStatus.COMPLETED,
+                            subtotal=Decimal("1.00"), discount_amount=Decimal("0.00"),
+                            tax_amount=Decimal("0.07"), total=Decimal("1.00")))
+    await db.commit()
+
+
+@pytest.mark.asyncio
+async def test_draws_are_sequential_and_seed_from_existing_numbers(db_session, store):
+    await _ring(db_session, txn_numbering.format_number(DAY, 7, store))
+    first = await txn_numbering.allocate(db_session, store_number=store, day=DAY)
+    second = await txn_numbering.allocate(db_session, store_number=store, day=DAY)
+    await db_session.commit()
+    assert (first, second) == (8, 9)
+    assert txn_numbering.parse_number(txn_numbering.format_number(DAY, 9, store)) == (store, DAY, 9)
+    assert txn_numbering.parse_number("TXN-20260314-0042") == (1, DAY, 42)
+
+
+@pytest.mark.asyncio
+async def test_rolled_back_draw_is_handed_back(db_session, store):
+    assert await txn_numbering.allocate(db_session, store_number=store, day=DAY) == 1
+    await db_session.commit()
+    assert await txn_numbering.allocate(db_session, store_number=store, day=DAY) == 2
+    await db_session.rollback()                          # the sale was rejected
+    assert await txn_numbering.allocate(db_session, store_number=store, day=DAY) == 2
+
+
+@pytest.mark.asyncio
+async def test_offline_block_is_reserved_for_its_cashier_once(db_session, store):
+    today = date.today()
+    await txn_numbering.allocate(db_session, store_number=store, day=today)
+    block = await txn_numbering.reserve_block(db_session, 3, "cashier-a", store_number=store)
+    assert (block.first_number, block.last_number) == (2, 4)
+    assert await txn_numbering.allocate(db_session, store_number=store, day=today) == 5   # online goes on after it
+    await db_session.commit()
+
+    mine = txn_numbering.format_number(today, 3, store)
+    await txn_numbering.claim_reserved(db_session, mine, "cashier-a")
+    with pytest.raises(txn_numbering.NumberNotReserved):
+        await txn_numbering.claim_reserved(db_session, mine, "cashier-b")
+    with pytest.raises(txn_numbering.NumberNotReserved):
+        await txn_numbering.claim_reserved(db_session, txn_numbering.format_number(today, 5, store), "cashier-a")
+    await _ring(db_session, mine)
+    with pytest.raises(txn_numbering.NumberNotReserved):
+        await txn_numbering.claim_reserved(db_session, mine, "cashier-a")
+
+
+@pytest.mark.asyncio
+async def test_a_reserved_number_is_claimed_first_wins(db_session, store):
+    block = await txn_numbering.reserve_block(db_session, 2, "cashier-a", store_number=store)
+    number = txn_numbering.format_number(date.today(), block.first_number, store)
+
+    await txn_numbering.claim_reserved(db_session, number, "cashier-a")
+    with pytest.raises(txn_numbering.NumberNotReserved):            # the same upload, twice
+        await txn_numbering.claim_reserved(db_session, number, "cashier-a")
+    await db_session.rollback()                                      # the first sale was rejected
+    await txn_numbering.claim_reserved(db_session, number, "cashier-a")
+    await db_session.commit()
+
+@pytest.mark.asyncio
+async def test_audit_tells_reserved_unused_from_gaps(db_session, store):
+    today = date.today()
+    for _ in range(2):                                   # 1, 2
+        await _ring(db_session, await txn_numbering.next_number(db_session, store_number=store))
+    await txn_numbering.reserve_block(db_session, 2, "cashier-a", store_number=store)     # 3, 4
+    await _ring(db_session, txn_numbering.format_number(today, 3, store))
+    await _ring(db_session, await txn_numbering.next_number(db_session, store_number=store))   # 5
+
+    report = await txn_numbering.audit(db_session, today, store_number=store)
+    assert report["gap_free"] is True and report["issued"] == 5 and report["rung"] == 4
+    assert report["reserved_unused"] == [txn_numbering.format_number(today, 4, store)]
+
+    await txn_numbering.allocate(db_session, store_number=store, day=today)              # 6, never rung
+    await db_session.commit()
+    report = await txn_numbering.audit(db_session, today, store_number=store)
+    assert report["gap_free"] is False and report["gaps"] == [txn_numbering.format_number(today, 6, store)]
+    assert await txn_numbering.peek(db_session, store_number=store) == txn_numbering.format_number(today, 7, store)
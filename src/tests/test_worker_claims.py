@@ -0,0 +1,90 @@
+# Tests for src.compute.claims -- what GET /compute/worker/next hands out. SQLite session
+# (SKIP LOCKED is a Postgres clause; the compiled statement is checked separately).
+# A worker asking for a batch gets the oldest queued jobs, flipped to RUNNING in one commit, and no
+# two workers get the same job. A job whose template is not on the allowlist is failed rather
+# than handed out. An idle worker's long-poll parks until a job for its own node arrives, and each
+# node's claims are counted.
+
+import asyncio
+import json
+import uuid
+
+import pytest
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import sessionmaker
+
+from src.compute import claims
+from src.db.models.compute_model import ComputeJobModel, ComputeJobStatus
+
+
+def _job(n, node="do-staging-0", template="cv-to-bio", inputs=None):
+    return ComputeJobModel(job_number=n, template=template, node=node, owner="ana",
+                           status=ComputeJobStatus.QUEUED, inputs=json.dumps(inputs or {"file": "cv"}))
+
+
+@pytest.fixture
+def broker(monkeypatch):
+    b = claims.ClaimBroker(max_batch=5, recheck=5)
+
+    async def _no_listen():
+        return None
+    monkeypatch.setattr(b, "_ensure_listen", _no_listen)     # wakeups driven by hand
+    return b
+
+
+@pytest.mark.asyncio
+async def test_batch_claim_is_oldest_first_and_never_repeats(db_session, broker):
+    db_session.add_all([_job(3), _job(1), _job(2), _job(4, node="laptop-0"),
+                        _job(5, template="not-a-recipe")])
+    await db_session.commit()
+
+    first = await broker.claim(db_session, "do-staging-0", limit=2)
+    assert [j["job_number"] for j in first] == [1, 2]
+    assert first[0]["system"] and first[0]["json_mode"] is True
+    rest = await broker.claim(db_session, "do-staging-0", limit=5)
+    assert [j["job_number"] for j in rest] == [3]                 # 5 is off the allowlist
+    assert await broker.claim(db_session, "do-staging-0") == []
+
+    by_n = {j.job_number: j for j in (await db_session.execute(
+        ComputeJobModel.__table__.select())).all()}
+    assert by_n[1].status == ComputeJobStatus.RUNNING and by_n[1].progress == 10
+    assert by_n[4].status == ComputeJobStatus.QUEUED              # other node untouched
+    assert by_n[5].status == ComputeJobStatus.FAILED and "allowlist" in by_n[5].reject_reason
+
+    s = broker.stats()["do-staging-0"]
+    assert (s["polls"], s["empty"], s["jobs"]) == (3, 1, 3)
+    assert s["queue_wait_p50_s"] is not None
+
+
+def test_claim_query_skips_locked_rows(broker):
+    captured = []
+
+    class _Capture:
+        async def execute(self, stmt):
+            captured.append(str(stmt.compile(dialect=postgresql.dialect())))
+            raise RuntimeError("stop")
+
+    with pytest.raises(RuntimeError):
+        asyncio.run(broker.claim(_Capture(), "do-staging-0", limit=50))
+    assert "FOR UPDATE SKIP LOCKED" in captured[0] and "LIMIT" in captured[0]
+
+
+@pytest.mark.asyncio
+async def test_long_poll_wakes_only_for_its_node(db_session, test_db_engine, broker):
+    other = sessionmaker(test_db_engine, expire_on_commit=False, class_=AsyncSession)
+    node = f"laptop-{uuid.uuid4().hex[:6]}"                       # the test DB is not wiped
+    poll = asyncio.create_task(broker.next_jobs(db_session, node, wait=5))
+    await asyncio.sleep(0.05)
+    broker._on_change(None, 0, claims.CHANGE_CHANNEL, json.dumps(
+        {"id": str(uuid.uuid4()), "node": "do-staging-0", "old": None, "new": "queued"}))
+    await asyncio.sleep(0.05)
+    assert not poll.done()                                        # someone else's node
+
+    async with other() as db:
+        db.add(_job(7, node=node))
+        await db.commit()
+    broker._on_change(None, 0, claims.CHANGE_CHANNEL, json.dumps(
+        {"id": str(uuid.uuid4()), "node": node, "old": None, "new": "queued"}))
+    jobs = await asyncio.wait_for(poll, timeout=1)
+    assert [j["job_number"] for j in jobs] == [7]
@@ -10,6 +10,7 @@ LOCKS the promises we make about a phone photo before it's stored or read:
   - transparency is flattened onto white (JPEG has no alpha)
   - output carries no EXIF, and is smaller than a big original
   - junk bytes raise ImageIntakeError, not a 500
+  - derive makes every served size (square thumb, list, full) in every format asked for
 """
 import sys
 from io import BytesIO
@@ -19,7 +20,7 @@ from PIL import Image
 
 sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
 from src.services.image_intake import (  # noqa: E402
-    PRODUCT, SLIP, IntakePreset, ImageIntakeError, process,
+    PRODUCT, SLIP, IntakePreset, ImageIntakeError, derive, process,
 )
 
 
@@ -97,3 +98,12 @@ def test_bad_bytes_raise_intake_error():
             assert False, f"expected ImageIntakeError for {junk!r}"
         except ImageIntakeError:
             pass
+
+
+def test_derive_makes_every_size_once():
+    out = derive(_png_bytes(4000, 3000), formats=("jpg", "webp"))
+    assert set(out) == {f"{s}.{f}" for s in ("thumb", "list", "full") for f in ("jpg", "webp")}
+    assert _decode(out["thumb.jpg"]).size == (256, 256)              # grid tile: centered square
+    assert _decode(out["list.webp"]).size == (480, 360)              # aspect kept
+    assert _decode(out["full.jpg"]).size == (PRODUCT.max_edge, 768)
+    assert len(out["thumb.jpg"]) < len(out["list.jpg"]) < len(out["full.jpg"])
@@ -0,0 +1,36 @@
+"""Audit cockpit feed (`GET /pos/audit/feed`) — keyset paging + counter-backed facets.
+
+Black-box HTTP against the running server (same harness as the rest of tests/pos); needs the
+audit_log from scripts/db/audit_log_setup.sql on the target DB. Proves:
+  1. `before=<next_before>` pages walk the log newest-first with no repeats or skips,
+  2. the facet counters agree with themselves (total == sum of the action counts),
+  3. a filtered first page reports `matched`, and every row honours the filter.
+
+Run (sandbox):  ENV=sandbox POS_REALM=kc-sandbox python -m pytest tests/pos/test_pos_audit_feed.py -v
+"""
+from conftest import POS
+
+
+def test_keyset_pages_are_contiguous(session):
+    first = session.get(f"{POS}/audit/feed", params={"limit": 5})
+    assert first.status_code == 200, first.text
+    page = first.json()
+    if page["next_before"] is None:
+        return                                   # fewer than one page of history on this DB
+    second = session.get(f"{POS}/audit/feed", params={"limit": 5, "before": page["next_before"]}).json()
+    ids = [i["id"] for i in page["items"]] + [i["id"] for i in second["items"]]
+    assert ids == sorted(ids, reverse=True) and len(ids) == len(set(ids))
+    assert max(i["id"] for i in second["items"]) < page["next_before"]
+
+
+def test_facets_add_up(session):
+    d = session.get(f"{POS}/audit/feed", params={"limit": 1}).json()
+    assert d["total"] == sum(d["actions"].values())
+    assert d["total"] == sum(t["count"] for t in d["entity_types"])
+
+
+def test_filtered_page_reports_matches(session):
+    d = session.get(f"{POS}/audit/feed", params={"limit": 20, "action": "UPDATE"}).json()
+    assert all(i["action"] == "UPDATE" for i in d["items"])
+    assert d["matched"] >= d["shown"]
+    assert d["matched"] <= d["actions"].get("UPDATE", 0) or d["matched_capped"]
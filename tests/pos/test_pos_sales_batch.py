@@ -0,0 +1,69 @@
+"""P2.2 — offline outbox drain (`POST /pos/sales/batch`).
+
+Black-box HTTP against the running server (same harness as the rest of tests/pos).
+Proves what a till coming back online relies on:
+  1. N queued sales ring in ONE request, IN ORDER (transaction numbers ascend with the queue),
+  2. each sale stands alone — a rejected one is reported and the rest still ring,
+  3. client_uuid idempotency holds per sale — replaying the whole batch (or a duplicate inside
+     it) adopts the original sales, never double-rings,
+  4. the money is identical to `POST /pos/sales` for the same cart.
+
+Custom lines (product_id=None + unit_price) keep it independent of the seeded catalog. Card
+(TWINT) payments so no open cash drawer is needed.
+
+Run (sandbox):  ENV=sandbox POS_REALM=kc-sandbox python -m pytest tests/pos/test_pos_sales_batch.py -v
+"""
+import uuid
+from decimal import Decimal
+
+from conftest import POS
+
+
+def _sale(price, qty=1, cu=None):
+    return {
+        "client_uuid": cu or str(uuid.uuid4()),
+        "lines": [{"product_id": None, "quantity": qty, "unit_price": str(price), "name": "Outbox item"}],
+        "payment_method": "twint",
+        "discount_percent": "0",
+    }
+
+
+def test_batch_rings_in_order_and_replays_once(session):
+    queue = [_sale("3.00"), _sale("4.50", qty=2), _sale("1.20")]
+    r = session.post(f"{POS}/sales/batch", json={"sales": queue})
+    assert r.status_code == 200, r.text
+    out = r.json()
+    assert out["created"] == 3 and out["failed"] == 0
+    assert [o["client_uuid"] for o in out["results"]] == [s["client_uuid"] for s in queue]
+    numbers = [o["transaction"]["transaction_number"] for o in out["results"]]
+    assert numbers == sorted(numbers), "replay order not preserved"
+    assert Decimal(out["results"][1]["transaction"]["total"]) == Decimal("9.00")
+
+    again = session.post(f"{POS}/sales/batch", json={"sales": queue}).json()
+    assert again["created"] == 0 and again["replayed"] == 3
+    assert [o["transaction"]["id"] for o in again["results"]] == [o["transaction"]["id"] for o in out["results"]]
+
+
+def test_one_bad_sale_does_not_sink_the_queue(session):
+    bad = _sale("2.00")
+    bad["lines"][0]["product_id"] = str(uuid.uuid4())          # no such product -> 404
+    queue = [_sale("5.00"), bad, _sale("6.00")]
+    out = session.post(f"{POS}/sales/batch", json={"sales": queue}).json()
+    assert [o["outcome"] for o in out["results"]] == ["created", "error", "created"]
+    assert out["results"][1]["status_code"] == 404
+
+
+def test_duplicate_inside_a_batch_rings_once(session):
+    cu = str(uuid.uuid4())
+    out = session.post(f"{POS}/sales/batch", json={"sales": [_sale("7.00", cu=cu), _sale("7.00", cu=cu)]}).json()
+    assert [o["outcome"] for o in out["results"]] == ["created", "replayed"]
+    assert out["results"][0]["transaction"]["id"] == out["results"][1]["transaction"]["id"]
+
+
+def test_batch_money_matches_single_sale(session):
+    single = session.post(f"{POS}/sales", json=_sale("8.35", qty=3))
+    assert single.status_code == 201, single.text
+    batched = session.post(f"{POS}/sales/batch", json={"sales": [_sale("8.35", qty=3)]}).json()
+    txn = batched["results"][0]["transaction"]
+    for field in ("subtotal", "total", "tax_amount"):
+        assert Decimal(txn[field]) == Decimal(single.json()[field]), f"{field} drift"
@@ -0,0 +1,49 @@
+"""Transaction numbering — the store-day counter behind TXN-YYYYMMDD-NNNN.
+
+Black-box HTTP against the running server (same harness as the rest of tests/pos):
+  1. `GET /transactions/next-number` previews exactly what the next sale is given,
+  2. a till going offline reserves a block; a sale rung with one of its numbers keeps it, and the
+     same number can't be rung twice (409),
+  3. the numbering audit stays gap-free — a rejected sale hands its number back.
+
+Run (sandbox):  ENV=sandbox POS_REALM=kc-sandbox python -m pytest tests/pos/test_pos_txn_numbering.py -v
+"""
+import uuid
+
+from conftest import POS
+
+
+def _sale(**extra):
+    return {
+        "client_uuid": str(uuid.uuid4()),
+        "lines": [{"product_id": None, "quantity": 1, "unit_price": "2.00", "name": "Numbering item"}],
+        "payment_method": "twint",
+        **extra,
+    }
+
+
+def test_next_number_preview_matches_the_sale(session):
+    preview = session.get(f"{POS}/transactions/next-number").json()["transaction_number"]
+    r = session.post(f"{POS}/sales", json=_sale())
+    assert r.status_code == 201, r.text
+    assert r.json()["transaction_number"] == preview
+
+
+def test_offline_block_number_is_kept_once(session):
+    r = session.post(f"{POS}/transactions/number-blocks", json={"size": 2})
+    assert r.status_code == 201, r.text
+    block = r.json()
+    rung = session.post(f"{POS}/sales", json=_sale(transaction_number=block["first"]))
+    assert rung.status_code == 201, rung.text
+    assert rung.json()["transaction_number"] == block["first"]
+    again = session.post(f"{POS}/sales", json=_sale(transaction_number=block["first"]))
+    assert again.status_code == 409
+
+
+def test_rejected_sale_leaves_no_gap(session):
+    bad = _sale()
+    bad["lines"][0]["product_id"] = str(uuid.uuid4())          # no such product -> 404
+    assert session.post(f"{POS}/sales", json=bad).status_code == 404
+    assert session.post(f"{POS}/sales", json=_sale()).status_code == 201
+    audit = session.get(f"{POS}/transactions/numbering-audit").json()
+    assert audit["gap_free"] is True, audit["gaps"]